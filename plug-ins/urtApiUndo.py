@@ -0,0 +1,50 @@
+"""
+Undoable command for the OpenMaya modifiers that the URT Toolkit commits in
+one batch. The toolkit runs the modifier, queues its undo/redo pair in
+urt.tools.apiUndo and calls urtApiUndo, which puts the pair on Maya's undo
+queue.
+"""
+import maya.api.OpenMaya as om2
+
+from urt.tools import apiUndo
+
+
+def maya_useNewAPI():
+    pass
+
+
+class ApiUndoCommand(om2.MPxCommand):
+    commandName = apiUndo.PLUGIN_NAME
+
+    def __init__(self):
+        om2.MPxCommand.__init__(self)
+        self.undo = None
+        self.redo = None
+
+    def doIt(self, args):
+        # the modifier is already executed by the caller
+        if apiUndo.pending:
+            self.undo, self.redo = apiUndo.pending.pop(0)
+
+    def undoIt(self):
+        if self.undo:
+            self.undo()
+
+    def redoIt(self):
+        if self.redo:
+            self.redo()
+
+    def isUndoable(self):
+        return self.undo is not None
+
+    @staticmethod
+    def creator():
+        return ApiUndoCommand()
+
+
+def initializePlugin(plugin):
+    om2.MFnPlugin(plugin, "Atul Shakya", "2.0").registerCommand(ApiUndoCommand.commandName, ApiUndoCommand.creator)
+
+
+def uninitializePlugin(plugin):
+    om2.MFnPlugin(plugin).deregisterCommand(ApiUndoCommand.commandName)
@@ -0,0 +1,128 @@
+"""
+Command line entry point of the URT toolkit. Runs one tool of urt.api in a
+headless Maya::
+
+    mayapy -m urt <tool> [--scene SCENE] [--save SCENE] [--options JSON] [--<field> VALUE ...]
+
+    mayapy -m urt biped-rig --scene hero.ma --save hero_rig.ma --pelvis pelvis --spine1 spine_01 ...
+    mayapy -m urt controller --shape Gear --controllerName head --color 255 0 0
+    mayapy -m urt export --scene hero_rig.ma --mode Models_and_Rig --exportPath hero.fbx
+
+Every field of the tool's parameter object is a --<field> flag. Booleans
+take true or false, lists take several values and dicts take JSON. The
+fields of --options are applied first and the flags override them. The
+scripts folder holding the urt package has to be on PYTHONPATH, and
+``mayapy -m urt <tool> --help`` lists the fields of a tool.
+
+Whatever the tool returns is printed as JSON on the last line. The exit
+code is 1 when the tool raised an error.
+"""
+import argparse
+import json
+import sys
+import traceback
+
+
+BOOLEAN_VALUES = {"true": True, "1": True, "yes": True, "on": True, "false": False, "0": False, "no": False, "off": False}
+
+
+def boolean(value):
+    if value.lower() not in BOOLEAN_VALUES:
+        raise argparse.ArgumentTypeError("{0!r} is not true or false".format(value))
+
+    return BOOLEAN_VALUES[value.lower()]
+
+
+def create_parser(api):
+    """
+    :param module api: urt.api
+    :return: Parser with one sub command per tool of api.TOOLS
+    :rtype: argparse.ArgumentParser
+    """
+    parser = argparse.ArgumentParser(prog="mayapy -m urt", description="Run a URT tool in a headless Maya.")
+    tools = parser.add_subparsers(dest="tool", metavar="tool")
+
+    for name, (function, options_class) in api.TOOLS.items():
+        summary = (function.__doc__ or "").strip().split("\n")[0]
+        tool = tools.add_parser(name, help=summary, description=summary + "\n\n" + (options_class.__doc__ or ""), formatter_class=argparse.RawDescriptionHelpFormatter)
+        tool.add_argument("--scene", help="scene to open first")
+        tool.add_argument("--save", help="save the scene here afterwards, .mb saves a Maya binary")
+        tool.add_argument("--options", help="JSON file with the fields of the tool")
+
+        fields = tool.add_argument_group("fields")
+        for field, kind, default in options_class.FIELDS:
+            keywords = {"dest": "field_" + field, "default": argparse.SUPPRESS, "help": "default: {0!r}".format(default)}
+
+            if kind is bool:
+                keywords.update(type=boolean, metavar="BOOL")
+            elif kind is list:
+                keywords.update(type=options_class.ITEM_TYPES.get(field, str), nargs="*")
+            elif kind is dict:
+                keywords.update(type=json.loads, metavar="JSON")
+            else:
+                keywords.update(type=kind)
+
+            if field in options_class.CHOICES:
+                keywords["choices"] = options_class.CHOICES[field]
+
+            fields.add_argument("--" + field, **keywords)
+
+    return parser
+
+
+def save_scene(path):
+    from maya import cmds
+
+    cmds.file(rename=path)
+    cmds.file(save=True, force=True, type="mayaBinary" if path.lower().endswith(".mb") else "mayaAscii")
+
+
+def main(argv=None):
+    """
+    Start Maya, run the tool of the command line and stop Maya again.
+
+    :param list argv: Arguments without the program name, sys.argv by default
+    :return: Exit code
+    :rtype: int
+    """
+    import maya.standalone
+
+    maya.standalone.initialize(name="python")
+
+    try:
+        from maya import cmds
+        from urt import api
+
+        arguments = create_parser(api).parse_args(sys.argv[1:] if argv is None else argv)
+        fields = {}
+
+        if arguments.options:
+            with open(arguments.options) as options_file:
+                fields.update(json.load(options_file))
+
+        fields.update((key[len("field_"):], value) for key, value in vars(arguments).items() if key.startswith("field_"))
+
+        if arguments.scene:
+            cmds.file(arguments.scene, open=True, force=True)
+
+        result = api.run(arguments.tool, fields)
+
+        if arguments.save:
+            save_scene(arguments.save)
+
+        print(json.dumps(result, default=str))
+        return 0
+
+    except SystemExit as error:
+        return error.code
+
+    except Exception:
+        sys.stderr.write(traceback.format_exc())
+        return 1
+
+    finally:
+        maya.standalone.uninitialize()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,649 @@
+"""
+Scripting API of the URT toolkit.
+
+Every tool of the URT dialog is one function here that takes one parameter
+object, so scripts and farm jobs can run the tools without the dialog::
+
+    from urt import api
+
+    api.create_controller(api.ControllerOptions(controllerName="head", shape="Gear", controllerSize=2.0))
+    api.create_biped_rig(api.BipedRigOptions(pelvis="pelvis", spine1="spine_01", ...))
+
+Field names are the argument names of the tool functions, the same keys the
+batch rig and batch ROM manifests use. A parameter object can also be given
+as a dict, and None runs the tool with the defaults.
+
+Fields called ``nodes`` name the objects a tool works on. None keeps the
+current selection, as the dialog does, and a list selects exactly those
+objects first.
+
+The same tools run from the command line through ``mayapy -m urt``, see
+urt.__main__.
+"""
+import copy
+import logging
+from collections import OrderedDict
+
+from maya import cmds
+from PySide2 import QtGui
+
+from .tools import URT_atulshakya as tools
+
+
+log = logging.getLogger(__name__)
+STRING_TYPES = (str, type(u""))
+
+
+class Options(object):
+    """
+    Base of the parameter objects. FIELDS holds the (name, type, default) of
+    every field. The constructor takes the fields as keywords and checks
+    their types, so a typo or a wrong value fails before the scene changes.
+    An int is accepted for a float field and a tuple for a list field, None
+    is accepted for every field.
+
+    CHOICES maps a field to its allowed values, REQUIRED lists the fields
+    that can not be left None or empty and ITEM_TYPES gives the type of the
+    items of a list field for the command line, str by default.
+    """
+    FIELDS = []
+    CHOICES = {}
+    REQUIRED = []
+    ITEM_TYPES = {}
+
+    def __init__(self, **fields):
+        names = [field[0] for field in self.FIELDS]
+        unknown = sorted(set(fields) - set(names))
+
+        if unknown:
+            raise TypeError("{0} has no field {1}".format(type(self).__name__, ", ".join(unknown)))
+
+        for name, kind, default in self.FIELDS:
+            value = fields[name] if name in fields else copy.deepcopy(default)
+            setattr(self, name, self.checked(name, kind, value))
+
+    def __repr__(self):
+        return "{0}({1})".format(type(self).__name__, ", ".join(["{0}={1!r}".format(name, getattr(self, name)) for name, kind, default in self.FIELDS]))
+
+    def checked(self, name, kind, value):
+        if value is None:
+            return value
+
+        if kind is float and isinstance(value, int) and not isinstance(value, bool):
+            value = float(value)
+        elif kind is list and isinstance(value, tuple):
+            value = list(value)
+
+        if kind is str:
+            valid = isinstance(value, STRING_TYPES)
+        else:
+            valid = isinstance(value, kind) and not (kind is int and isinstance(value, bool))
+
+        if not valid:
+            raise TypeError("{0}.{1} has to be {2}, not {3!r}".format(type(self).__name__, name, kind.__name__, value))
+
+        choices = self.CHOICES.get(name)
+        if choices and value not in choices:
+            raise ValueError("{0}.{1} has to be one of {2}, not {3!r}".format(type(self).__name__, name, ", ".join([str(choice) for choice in choices]), value))
+
+        return value
+
+    def validate(self):
+        """
+        Raise a ValueError for the first required field that is not set.
+        """
+        for name in self.REQUIRED:
+            if getattr(self, name) in (None, "", []):
+                raise ValueError("{0}.{1} is required".format(type(self).__name__, name))
+
+    def as_dict(self):
+        return OrderedDict([(name, getattr(self, name)) for name, kind, default in self.FIELDS])
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**dict((str(key), value) for key, value in data.items()))
+
+
+def resolve(options, options_class):
+    """
+    Parameter object of options_class from an instance, a dict or None.
+
+    :param Options/dict/None options:
+    :param type options_class:
+    :return: Checked parameter object
+    :rtype: Options
+    """
+    if options is None:
+        options = options_class()
+    elif isinstance(options, dict):
+        options = options_class.from_dict(options)
+    elif not isinstance(options, options_class):
+        raise TypeError("expected {0}, not {1}".format(options_class.__name__, type(options).__name__))
+
+    options.validate()
+
+    return options
+
+
+def select_nodes(nodes):
+    if nodes is not None:
+        if nodes:
+            cmds.select(nodes, replace=True)
+        else:
+            cmds.select(clear=True)
+
+
+# --------------------------------------------------------------------------------------------------
+# Search and replace names
+# --------------------------------------------------------------------------------------------------
+RENAME_OPERATIONS = ["searchReplace", "prefix", "suffix", "padding"]
+RENAME_SCOPES = ["Hierarchy", "Selected", "All"]
+
+
+class RenameOptions(Options):
+    """
+    operation: searchReplace replaces text with replaceText in the names,
+    prefix and suffix add text, padding names the objects text followed by a
+    number counting from startNumber by step, padded to padding digits.
+    scope: Hierarchy renames the selected objects and everything below them,
+    All renames every transform of the scene.
+    """
+    FIELDS = [("operation", str, "searchReplace"),
+              ("text", str, ""),
+              ("replaceText", str, ""),
+              ("startNumber", int, 1),
+              ("padding", int, 2),
+              ("step", int, 1),
+              ("scope", str, "Selected"),
+              ("nodes", list, None)]
+    CHOICES = {"operation": RENAME_OPERATIONS, "scope": RENAME_SCOPES}
+    REQUIRED = ["text"]
+
+
+def rename(options=None):
+    """
+    Rename objects like the Search/Replace Names page.
+
+    :param RenameOptions options:
+    """
+    options = resolve(options, RenameOptions)
+    select_nodes(options.nodes)
+    scope = [options.scope == scope for scope in RENAME_SCOPES]
+
+    if options.operation == "searchReplace":
+        return tools.searchReplaceNames(options.text, options.replaceText, *scope)
+    if options.operation == "prefix":
+        return tools.prefixName(options.text, *scope)
+    if options.operation == "suffix":
+        return tools.suffixName(options.text, *scope)
+
+    return tools.paddingRename(options.text, options.startNumber, options.padding, options.step, *scope)
+
+
+# --------------------------------------------------------------------------------------------------
+# Controllers
+# --------------------------------------------------------------------------------------------------
+class ControllerOptions(Options):
+    """
+    shape: name of a built-in or saved shape, see controller_shapes().
+    groupNumber: number of groups (0 to 4) above the controller, named with
+    the first groupNumber groupSuffixes. color: red, green and blue from 0 to
+    255. With selected nodes a controller is made for every node, named
+    after the node unless forceLabel is set, and snapped to it when
+    snapSelected is set.
+    """
+    FIELDS = [("controllerName", str, ""),
+              ("controllerSuffix", str, "_ctrl"),
+              ("controllerSize", float, 1.0),
+              ("forceLabel", bool, False),
+              ("snapSelected", bool, True),
+              ("shape", str, "Circle"),
+              ("groupNumber", int, 1),
+              ("groupSuffixes", list, ["_offset", "_con", "_grp", "_grp"]),
+              ("color", list, [255, 255, 0]),
+              ("nodes", list, None)]
+    CHOICES = {"groupNumber": [0, 1, 2, 3, 4]}
+    REQUIRED = ["shape", "color"]
+    ITEM_TYPES = {"color": int}
+
+
+def controller_shapes(search=""):
+    """
+    Names of the built-in and saved controller shapes.
+
+    :param str search: Whole tag or part of a name to filter by
+    :rtype: list
+    """
+    return tools.controllerShapeNames(search)
+
+
+def create_controller(options=None):
+    """
+    Create controllers with their groups like the Create Controllers page.
+
+    :param ControllerOptions options:
+    """
+    options = resolve(options, ControllerOptions)
+
+    if options.shape not in tools.controllerShapeNames():
+        raise ValueError("ControllerOptions.shape {0!r} is not a controller shape".format(options.shape))
+
+    suffixes = ((options.groupSuffixes or []) + [""] * 4)[:4]
+
+    select_nodes(options.nodes)
+
+    return tools.createController(options.controllerName, options.controllerSuffix, options.controllerSize, options.forceLabel, options.snapSelected,
+                                  options.shape, options.groupNumber, suffixes[0], suffixes[1], suffixes[2], suffixes[3], QtGui.QColor(*options.color))
+
+
+class ShapeOptions(Options):
+    """
+    Save the curves of node (the first selected object when None) to the
+    controller shape library under name, found by its tags.
+    """
+    FIELDS = [("name", str, ""),
+              ("tags", list, []),
+              ("node", str, None)]
+    REQUIRED = ["name"]
+
+
+def save_controller_shape(options=None):
+    """
+    Add the curves of an object to the controller shapes.
+
+    :param ShapeOptions options:
+    :return: Name of the saved shape, None when it was not saved
+    """
+    options = resolve(options, ShapeOptions)
+
+    return tools.saveControllerShape(options.name, options.tags, options.node)
+
+
+class TextControllerOptions(Options):
+    """
+    One controller per text in texts, drawn with font. kerning is added
+    between the letters.
+    """
+    FIELDS = [("texts", list, []),
+              ("font", str, "Arial"),
+              ("kerning", float, 0.0)]
+    REQUIRED = ["texts"]
+
+
+def create_text_controllers(options=None):
+    """
+    Create controllers from text like the Create Controller from Text page.
+
+    :param TextControllerOptions options:
+    :return: Names of the controllers
+    """
+    options = resolve(options, TextControllerOptions)
+
+    return tools.createTextControllers(options.texts, options.font, options.kerning)
+
+
+# --------------------------------------------------------------------------------------------------
+# Export to FBX
+# --------------------------------------------------------------------------------------------------
+EXPORT_MODES = ["Selected", "Models", "Models_and_Rig", "Animations_with_Model", "Animations_without_Model", "All"]
+
+
+class ExportOptions(Options):
+    """
+    mode: what goes in the file, see EXPORT_MODES. bakeRange: Automatic bakes
+    the joints of the animation modes over the playback range, Manual bakes
+    from bakeStart to bakeEnd every bakeStep frames. units and upAxis are
+    only used with autoUnits off.
+    """
+    FIELDS = [("exportPath", str, ""),
+              ("mode", str, "Selected"),
+              ("nodes", list, None),
+              ("smoothingGroups", bool, True),
+              ("smoothMesh", bool, True),
+              ("referencedAssets", bool, True),
+              ("triangulate", bool, False),
+              ("animation", bool, False),
+              ("bakeAnimation", bool, False),
+              ("bakeRange", str, "Automatic"),
+              ("bakeStart", float, None),
+              ("bakeEnd", float, None),
+              ("bakeStep", int, 1),
+              ("resample", bool, False),
+              ("autoUnits", bool, True),
+              ("units", str, "centimeters"),
+              ("upAxis", str, "Y")]
+    CHOICES = {"mode": EXPORT_MODES, "bakeRange": ["Automatic", "Manual"], "upAxis": ["Y", "Z"]}
+    REQUIRED = ["exportPath"]
+
+
+def export_fbx(options=None):
+    """
+    Export the scene to FBX like the Export To FBX page.
+
+    :param ExportOptions options:
+    """
+    options = resolve(options, ExportOptions)
+
+    if not cmds.pluginInfo("fbxmaya", query=True, loaded=True):
+        cmds.loadPlugin("fbxmaya", quiet=True)
+
+    bakeStart = cmds.playbackOptions(query=True, minTime=True) if options.bakeStart is None else options.bakeStart
+    bakeEnd = cmds.playbackOptions(query=True, maxTime=True) if options.bakeEnd is None else options.bakeEnd
+    values = [options.smoothingGroups, options.smoothMesh, options.referencedAssets, options.triangulate, options.animation, options.bakeAnimation,
+              bakeStart, bakeEnd, options.bakeStep, options.resample, options.autoUnits, options.units, options.upAxis]
+
+    # Same rule as the dialog: the automatic range only bakes the animation modes
+    bake = options.mode in EXPORT_MODES[3:5] if options.bakeRange == "Automatic" else True
+
+    select_nodes(options.nodes)
+
+    return tools.exportSaveButtonPush(options.mode, options.exportPath, values, bake, options.bakeRange)
+
+
+# --------------------------------------------------------------------------------------------------
+# IK chains
+# --------------------------------------------------------------------------------------------------
+class IKChainOptions(Options):
+    """
+    nodes: three joints of one chain, or the root joints of chains that are
+    split every segmentJoints joints. driverMode and stretchMode are the
+    options of the Create IK Chain group of the Miscellaneous page.
+    """
+    FIELDS = [("controllerSize", float, 1.0),
+              ("driverMode", str, "Driven Keys"),
+              ("segmentJoints", int, 3),
+              ("stretchMode", str, "Rigid"),
+              ("nodes", list, None)]
+    CHOICES = {"driverMode": ["Driven Keys", "Math Nodes"], "stretchMode": tools.IK_STRETCH_MODES}
+
+
+def create_ik_chain(options=None):
+    """
+    Create IK chains with their controllers.
+
+    :param IKChainOptions options:
+    """
+    options = resolve(options, IKChainOptions)
+    select_nodes(options.nodes)
+
+    return tools.createIKChain(options.controllerSize, options.driverMode, options.segmentJoints, options.stretchMode)
+
+
+# --------------------------------------------------------------------------------------------------
+# Biped control rig
+# --------------------------------------------------------------------------------------------------
+BIPED_RIG_JOINTS = ["pelvis", "spine1", "chest", "neck", "head", "l_clavicle", "l_shoulder", "l_elbow", "l_wrist",
+                    "l_thigh", "l_knee", "l_ankle", "l_ball"]
+
+
+class BipedRigOptions(Options):
+    """
+    The fields of the Control Rig page. The joint fields name the left side
+    joints, the right side ones are found by swapping leftIndicator for
+    rightIndicator. footRoll maps heel, ankleRollIn, ankleRollOut and toeTip
+    to the world [x, z] of their pivot, the pivot locators are only made
+    when the scene has none yet.
+    """
+    FIELDS = ([(name, type(tools.BATCH_RIG_DEFAULTS[name]), tools.BATCH_RIG_DEFAULTS[name]) for name in tools.BATCH_RIG_ARGUMENTS if name in tools.BATCH_RIG_DEFAULTS] +
+              [(name, str, "") for name in BIPED_RIG_JOINTS] +
+              [("footRoll", dict, None)])
+    CHOICES = {"blendMode": ["Constraint", "Matrix"], "driverMode": ["Driven Keys", "Math Nodes"], "stretchMode": tools.IK_STRETCH_MODES}
+    REQUIRED = BIPED_RIG_JOINTS
+
+
+def create_biped_rig(options=None):
+    """
+    Build the biped control rig like the Control Rig page.
+
+    :param BipedRigOptions options:
+    :return: True when the rig was built
+    """
+    options = resolve(options, BipedRigOptions)
+
+    if options.footRollControl and not cmds.objExists("L_footRollInfo_doNotDelete"):
+        tools.createFootRollLocators(options.controllerSize, options.footRoll)
+
+    tools.createBipedControlRig(*[getattr(options, name) for name in tools.BATCH_RIG_ARGUMENTS])
+
+    return cmds.objExists("MAIN_CTRL")
+
+
+class BatchOptions(Options):
+    """
+    A batch rig or batch ROM manifest, run in workers parallel mayapy
+    sessions. Outputs and reports go to outputDir, next to the manifest
+    when None.
+    """
+    FIELDS = [("manifestPath", str, ""),
+              ("workers", int, None),
+              ("outputDir", str, None)]
+    REQUIRED = ["manifestPath"]
+
+
+def batch_rig(options=None):
+    """
+    Rig every character of a manifest.
+
+    :param BatchOptions options:
+    """
+    options = resolve(options, BatchOptions)
+
+    return tools.batchRigFromManifest(options.manifestPath, options.workers, options.outputDir)
+
+
+# --------------------------------------------------------------------------------------------------
+# Range of motion
+# --------------------------------------------------------------------------------------------------
+class ROMOptions(Options):
+    """
+    The fields of the Range of Motion page. rotXP to rotZN turn the poses of
+    every axis and direction on or off, limitsPath is a JSON table of joint
+    angle limits. With exportPath the keyed joints are exported to that FBX
+    file after the ROM is keyed.
+    """
+    FIELDS = [("rotXP", bool, True),
+              ("rotYP", bool, True),
+              ("rotZP", bool, True),
+              ("rotXN", bool, True),
+              ("rotYN", bool, True),
+              ("rotZN", bool, True),
+              ("rotAngle", float, 60.0),
+              ("keyFramePadding", int, 20),
+              ("keyFrameStart", int, 0),
+              ("scheduleMode", str, "Serial"),
+              ("limitsPath", str, None),
+              ("exportPath", str, None),
+              ("nodes", list, None)]
+    CHOICES = {"scheduleMode": tools.ROM_SCHEDULE_MODES}
+
+
+def create_rom(options=None):
+    """
+    Key the range of motion of the joints or controllers.
+
+    :param ROMOptions options:
+    :return: Keyed objects
+    """
+    options = resolve(options, ROMOptions)
+    select_nodes(options.nodes)
+
+    keyed = tools.createROM(options.rotXP, options.rotYP, options.rotZP, options.rotXN, options.rotYN, options.rotZN,
+                            options.rotAngle, options.keyFramePadding, options.keyFrameStart, options.scheduleMode, options.limitsPath)
+
+    if keyed and options.exportPath:
+        tools.exportROMClip(options.exportPath, keyed)
+
+    return keyed
+
+
+def batch_rom(options=None):
+    """
+    Key and export the ROM of every character of a manifest.
+
+    :param BatchOptions options:
+    """
+    options = resolve(options, BatchOptions)
+
+    return tools.batchROMFromManifest(options.manifestPath, options.workers, options.outputDir)
+
+
+class DeformationQAOptions(Options):
+    """
+    Skinned meshes to check at every ROM key, all of them when None. The
+    printed report lists the worst report frames and joints.
+    """
+    FIELDS = [("meshes", list, None),
+              ("report", int, 10)]
+
+
+def deformation_qa(options=None):
+    """
+    Check the skinned meshes for volume loss, stretch and flips over the ROM.
+
+    :param DeformationQAOptions options:
+    :return: Results per frame and worst score per joint
+    """
+    options = resolve(options, DeformationQAOptions)
+
+    return tools.deformationQA(options.meshes, None, options.report)
+
+
+# --------------------------------------------------------------------------------------------------
+# Miscellaneous
+# --------------------------------------------------------------------------------------------------
+class OptimizeSceneOptions(Options):
+    """
+    categories: what to remove, see OPTIMIZE_CATEGORIES, all of them when
+    None. measureFileSize saves a temporary copy before and after to report
+    the size saved.
+    """
+    FIELDS = [("categories", list, None),
+              ("measureFileSize", bool, True)]
+
+
+def optimize_scene(options=None):
+    """
+    Remove unknown nodes, unused utilities and other cruft from the scene.
+
+    :param OptimizeSceneOptions options:
+    :return: Removed node names per category
+    """
+    options = resolve(options, OptimizeSceneOptions)
+    unknown = sorted(set(options.categories or []) - set(tools.OPTIMIZE_CATEGORIES))
+
+    if unknown:
+        raise ValueError("OptimizeSceneOptions.categories has no {0}".format(", ".join(unknown)))
+
+    return tools.optimizeScene(options.categories, options.measureFileSize)
+
+
+class NodesOptions(Options):
+    """
+    Objects a tool works on, the selection when None.
+    """
+    FIELDS = [("nodes", list, None)]
+
+
+def select_skinned_joints(options=None):
+    """
+    Select the joints skinned to the meshes.
+
+    :param NodesOptions options:
+    """
+    options = resolve(options, NodesOptions)
+    select_nodes(options.nodes)
+
+    return tools.selectSkinnedJoints()
+
+
+class CombineShapeOptions(Options):
+    """
+    The shapes of nodes go to the first one, or with eachGroup every group
+    in nodes takes the shapes of its children.
+    """
+    FIELDS = [("eachGroup", bool, False),
+              ("nodes", list, None)]
+
+
+def combine_shape(options=None):
+    """
+    Combine curve shapes under one transform.
+
+    :param CombineShapeOptions options:
+    """
+    options = resolve(options, CombineShapeOptions)
+    select_nodes(options.nodes)
+
+    return tools.combineShape(options.eachGroup)
+
+
+class RigAnalysisOptions(Options):
+    """
+    Root controller of the rig to analyze, and for the evaluation profile
+    the frames to play from startFrame (the playback start when None) and
+    the folder of the reports (the temp folder when None).
+    """
+    FIELDS = [("rootNode", str, "MAIN_CTRL"),
+              ("frameCount", int, 100),
+              ("startFrame", float, None),
+              ("outputDir", str, None)]
+
+
+def analyze_rig(options=None):
+    """
+    Report the node counts, estimated cost, cycles, spline IKs and
+    expressions of the rig below rootNode.
+
+    :param RigAnalysisOptions options:
+    """
+    options = resolve(options, RigAnalysisOptions)
+
+    return tools.analyzeRigEvaluation(options.rootNode)
+
+
+def profile_rig(options=None):
+    """
+    Profile the evaluation of the scene over frameCount frames.
+
+    :param RigAnalysisOptions options:
+    :return: Paths of the profile and the per node timing report
+    """
+    options = resolve(options, RigAnalysisOptions)
+
+    return tools.profileRigEvaluation(options.frameCount, options.startFrame, options.outputDir)
+
+
+# Command line name : (function, parameter object) of every tool, in the order of the dialog
+TOOLS = OrderedDict([("rename", (rename, RenameOptions)),
+                     ("controller", (create_controller, ControllerOptions)),
+                     ("save-shape", (save_controller_shape, ShapeOptions)),
+                     ("text-controller", (create_text_controllers, TextControllerOptions)),
+                     ("export", (export_fbx, ExportOptions)),
+                     ("rom", (create_rom, ROMOptions)),
+                     ("batch-rom", (batch_rom, BatchOptions)),
+                     ("deformation-qa", (deformation_qa, DeformationQAOptions)),
+                     ("ik-chain", (create_ik_chain, IKChainOptions)),
+                     ("optimize-scene", (optimize_scene, OptimizeSceneOptions)),
+                     ("select-skinned-joints", (select_skinned_joints, NodesOptions)),
+                     ("combine-shape", (combine_shape, CombineShapeOptions)),
+                     ("analyze-rig", (analyze_rig, RigAnalysisOptions)),
+                     ("profile-rig", (profile_rig, RigAnalysisOptions)),
+                     ("biped-rig", (create_biped_rig, BipedRigOptions)),
+                     ("batch-rig", (batch_rig, BatchOptions))])
+
+
+def run(tool, options=None):
+    """
+    Run a tool by its command line name.
+
+    :param str tool: Key of TOOLS
+    :param Options/dict/None options:
+    :return: What the tool returns
+    """
+    if tool not in TOOLS:
+        raise ValueError("{0!r} is not a URT tool, pick one of {1}".format(tool, ", ".join(TOOLS)))
+
+    function, options_class = TOOLS[tool]
+    log.info("Running {0} with {1!r}".format(tool, options))
+
+    return function(resolve(options, options_class))
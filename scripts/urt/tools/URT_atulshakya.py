@@ -17,17 +17,43 @@ from PySide2 import QtWidgets
 from PySide2 import QtGui 
 from shiboken2 import wrapInstance
 from functools import partial
+from collections import OrderedDict
+
+import fnmatch
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
 
 import maya.OpenMayaUI as omui  
 import maya.OpenMaya as om 
+import maya.api.OpenMaya as om2
+import maya.api.OpenMayaAnim as oma2
 
 import maya.cmds as cmds
 import maya.mel as mel
 
 import pymel.core as pymel
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from . import apiUndo
+
 def maya_main_window():
     main_window_pntr = omui.MQtUtil.mainWindow()
+    
+    #No main window when the module is imported in mayapy
+    if main_window_pntr is None:
+        return None
+    
     return wrapInstance(long(main_window_pntr), QtWidgets.QWidget)
 
 
@@ -38,13 +64,191 @@ class UndoContext(object):
         cmds.undoInfo(closeChunk=True)
         
 
+#Thumbnails kept decoded by the thumbnail cache, the least recently used ones are dropped past this many
+THUMBNAIL_CACHE_SIZE = 64
+
+class ThumbnailCache (QtCore.QObject):
+    #Pixmaps of images scaled to a size, by (path, width, height), and controller previews by ("preview", shape, width, height).
+    #preload decodes the images on the thread pool and the pixmaps are made when each image comes back, QImage can be
+    #used off the UI thread but QPixmap can not
+    imageDecoded = QtCore.Signal(object, QtGui.QImage)
+    
+    cache_instance = None
+    
+    @classmethod
+    def shared (cls):
+        if not cls.cache_instance:
+            cls.cache_instance = ThumbnailCache()
+        
+        return cls.cache_instance
+    
+    
+    @staticmethod
+    def decode (key):
+        path, width, height = key
+        image = QtGui.QImage (path)
+        
+        return image.scaled (width, height, QtCore.Qt.IgnoreAspectRatio, QtCore.Qt.SmoothTransformation)
+    
+    
+    def __init__ (self, maxSize = THUMBNAIL_CACHE_SIZE, parent = None):
+        super (ThumbnailCache, self).__init__(parent)
+        
+        self.maxSize = maxSize
+        self.pixmaps = OrderedDict()
+        self.pending = set()
+        
+        self.imageDecoded.connect(self.store)
+    
+    
+    def preload (self, paths, width, height):
+        for path in paths:
+            key = (path, width, height)
+            
+            if key not in self.pixmaps and key not in self.pending:
+                self.pending.add(key)
+                QtCore.QThreadPool.globalInstance().start(ThumbnailTask(self, key))
+    
+    
+    def store (self, key, image):
+        self.pending.discard(key)
+        self.pixmaps.pop(key, None)
+        self.pixmaps[key] = QtGui.QPixmap.fromImage(image)
+        pixmap = self.pixmaps[key]
+        
+        while len(self.pixmaps) > self.maxSize:
+            self.pixmaps.popitem(last = False)
+        
+        return pixmap
+    
+    
+    def lookup (self, key, render):
+        #A cached pixmap moves to the newest end, a missing one is rendered here
+        if key in self.pixmaps:
+            pixmap = self.pixmaps.pop(key)
+            self.pixmaps[key] = pixmap
+            
+            return pixmap
+        
+        return self.store(key, render(key))
+    
+    
+    def pixmap (self, path, width, height):
+        #An image still on the thread pool is decoded here instead of waited for
+        return self.lookup((path, width, height), self.decode)
+    
+    
+    def preview (self, shapeName, width, height):
+        #Drawn from the shape curves in the text color of the palette, there is no file to read
+        color = QtWidgets.QApplication.palette().color(QtGui.QPalette.Text)
+        
+        return self.lookup(("preview", shapeName, width, height), lambda key: renderControllerPreview(controllerShapeCurves(shapeName), width, height, color))
+    
+    
+    def discardPreview (self, shapeName):
+        for key in [key for key in self.pixmaps if key[:2] == ("preview", shapeName)]:
+            del self.pixmaps[key]
+
+
+class ThumbnailTask (QtCore.QRunnable):
+    def __init__ (self, cache, key):
+        super (ThumbnailTask, self).__init__()
+        
+        self.cache = cache
+        self.key = key
+    
+    
+    def run (self):
+        self.cache.imageDecoded.emit(self.key, ThumbnailCache.decode(self.key))
+
+
+#Settings are written this many milliseconds after the last change, typing in a field saves once
+SETTINGS_SAVE_DELAY = 500
+
+def settingsPath():
+    return os.path.join(cmds.internalVar(userAppDir = True), "URT_settings.json")
+
+def currentScenePath():
+    #Empty for a scene that was never saved
+    return cmds.file(query = True, sceneName = True)
+
+def readJsonFile(path, label, objectPairsHook = None):
+    #Contents of the JSON file, or None with a warning when the file can not be read or is not valid JSON
+    try:
+        with open(path) as jsonFile:
+            return json.load(jsonFile, object_pairs_hook = objectPairsHook)
+    except (IOError, ValueError):
+        om.MGlobal.displayWarning("{0} COULD NOT BE READ FROM {1}".format(label, path))
+        return None
+
+class SettingsStore (QtCore.QObject):
+    #Field values of the dialog as {"global" : {key : value}, "scenes" : {scene path : {key : value}}}, a saved scene keeps
+    #its own values on top of the global ones. The file is read when the first value is asked for and written by a single
+    #shot timer restarted on every change
+    def __init__ (self, path, parent = None):
+        super (SettingsStore, self).__init__(parent)
+        
+        self.path = path
+        self.data = None
+        
+        self.saveTimer = QtCore.QTimer(self)
+        self.saveTimer.setSingleShot(True)
+        self.saveTimer.setInterval(SETTINGS_SAVE_DELAY)
+        self.saveTimer.timeout.connect(self.save)
+    
+    
+    def load (self):
+        if self.data is None:
+            self.data = {"global" : {}, "scenes" : {}}
+            
+            if os.path.isfile(self.path):
+                self.data.update(readJsonFile(self.path, "URT SETTINGS") or {})
+        
+        return self.data
+    
+    
+    def values (self, scene):
+        data = self.load()
+        values = dict(data["global"])
+        values.update(data["scenes"].get(scene, {}))
+        
+        return values
+    
+    
+    def setValue (self, key, value, scene):
+        #Also the global value, so a new scene starts from the last values used
+        data = self.load()
+        data["global"][key] = value
+        
+        if scene:
+            data["scenes"].setdefault(scene, {})[key] = value
+        
+        self.saveTimer.start()
+    
+    
+    def save (self):
+        self.saveTimer.stop()
+        
+        if self.data is None:
+            return
+        
+        try:
+            with open(self.path, "w") as settingsFile:
+                json.dump(self.data, settingsFile, indent = 4)
+        except (IOError, OSError):
+            om.MGlobal.displayWarning("URT SETTINGS COULD NOT BE SAVED TO {0}".format(self.path))
+
+
 class CustomImageWidget (QtWidgets.QWidget):
     
-    def __init__ (self, width, height, image_path, parent = None):
+    def __init__ (self, width, height, image_path = None, parent = None):
         super (CustomImageWidget, self).__init__(parent)
         
+        self.pixmap = QtGui.QPixmap()
+        
         self.setSize (width, height)
-        self.setImage (image_path)
+        if image_path:
+            self.setImage (image_path)
         self.setBackgroundColor(QtCore.Qt.transparent)
     
     
@@ -53,11 +257,11 @@ class CustomImageWidget (QtWidgets.QWidget):
     
     
     def setImage (self, image_path):
-        image = QtGui.QImage (image_path)
-        image = image.scaled (self.width(),self.height(), QtCore.Qt.IgnoreAspectRatio, QtCore.Qt.SmoothTransformation)
-        
-        self.pixmap = QtGui.QPixmap()
-        self.pixmap.convertFromImage(image)
+        #Decoded once at this widget's size by the shared thumbnail cache
+        self.setPixmap (ThumbnailCache.shared().pixmap(image_path, self.width(), self.height()))
+    
+    def setPixmap (self, pixmap):
+        self.pixmap = pixmap
         
         self.update() 
     
@@ -142,6 +346,42 @@ class CustomColorButton(QtWidgets.QWidget):
     def onColorChanged (self, *args):
         self.colorChanged.emit (self.getColor())
 
+class LazyPageStack (QtWidgets.QStackedWidget):
+    #Stacked widget whose pages are built by their builder the first time they are shown and kept afterwards.
+    #Pages not on display ignore their size so the dialog can shrink back to a smaller page
+    pageBuilt = QtCore.Signal(str, QtWidgets.QWidget)
+    
+    def __init__ (self, parent = None):
+        super (LazyPageStack, self).__init__(parent)
+        
+        self.builders = {}
+        self.pages = {}
+    
+    
+    def addPage (self, name, builder):
+        self.builders[name] = builder
+    
+    
+    def page (self, name):
+        if name not in self.pages:
+            self.pages[name] = self.builders[name]()
+            self.addWidget(self.pages[name])
+            self.pageBuilt.emit(name, self.pages[name])
+        
+        return self.pages[name]
+    
+    
+    def showPage (self, name):
+        current = self.page(name)
+        
+        for widget in self.pages.values():
+            policy = QtWidgets.QSizePolicy.Preferred if widget is current else QtWidgets.QSizePolicy.Ignored
+            widget.setSizePolicy(policy, policy)
+        
+        self.setCurrentWidget(current)
+        
+        return current
+
 '''
 ####################################################################################################
 UI BUILDING PHASE
@@ -158,6 +398,28 @@ class MainDialog (QtWidgets.QDialog):
     
     dlg_instance = None
     
+    #Pages of the Helper Scripts list and of the main combo box: (name, builder method, dialog width and height, bottom button).
+    #Every page is built the first time it is shown and stays in its stack afterwards
+    HELPER_PAGES = [("Search/Replace Names", "build_searchReplace_page", (550, 515), None),
+                    ("Create Controllers", "build_createController_page", (560, 515), None),
+                    ("Create Controller from Text", "build_controllerText_page", (460, 300), None),
+                    ("Export To FBX", "build_export_page", (893, 700), "exportApply_btn"),
+                    ("Range of Motion (ROM)", "build_rom_page", (490, 350), "rom_apply_btn"),
+                    ("Miscellaneous", "build_misc_page", (460, 570), None)]
+    
+    WINDOW_PAGES = [("Helper Scripts", "build_helperScripts_page", None, None),
+                    ("Built-In", "build_builtIn_page", (500, 700), None),
+                    ("Control Rig", "build_controlRig_page", (500, 750), "accept_btn")]
+    
+    PAGE_BUTTONS = ["accept_btn", "exportApply_btn", "rom_apply_btn"]
+    
+    #Fields of these types keep their value between sessions, by their attribute name. The ones in SETTINGS_SKIP do not
+    SETTINGS_TYPES = (QtWidgets.QLineEdit, QtWidgets.QAbstractSpinBox, QtWidgets.QCheckBox, QtWidgets.QRadioButton, QtWidgets.QComboBox, CustomColorButton)
+    SETTINGS_SKIP = ["controllerFilter_le", "shapeName_le", "shapeTags_le"]
+    
+    #Size of the Create Controllers previews
+    CONTROLLER_IMAGE_SIZE = (205, 50)
+    
     @classmethod
     def showDialog (cls):
         if not cls.dlg_instance:
@@ -179,36 +441,135 @@ class MainDialog (QtWidgets.QDialog):
        
        self.setWindowFlags(self.windowFlags() ^ QtCore.Qt.WindowContextHelpButtonHint)
        
+       self.settings = SettingsStore(settingsPath(), self)
+       self.settings_fields = OrderedDict()
+       self.settings_scene = currentScenePath()
+       self.settings_restoring = False
+       
        self.create_widgets()
        self.create_layouts()
        self.create_connection()
     
   
     def create_widgets (self):    
-        self.create_controller_image()
         '''
         Creating the main combo box
         '''
         self.main_comboBox = QtWidgets.QComboBox()
-        self.main_comboBox.addItems(["Helper Scripts", 
-                                    "Built-In", 
-                                    "Control Rig"])
+        self.main_comboBox.addItems([page[0] for page in self.WINDOW_PAGES])
         self.default_main_comboBox = self.main_comboBox.itemText(0)
         
         '''
         Creating the list for the custom-panel
         '''
         self.custom_list = QtWidgets.QListWidget()
-        self.custom_list.addItems(["Search/Replace Names",
-                                   "Create Controllers", 
-                                   "Create Controller from Text",
-                                   "Export To FBX",
-                                   "Range of Motion (ROM)",
-                                   "Miscellaneous"])
+        self.custom_list.addItems([page[0] for page in self.HELPER_PAGES])
         self.custom_list.setMaximumWidth(150)
         self.custom_list.setMinimumWidth(150)
         self.custom_list.setCurrentRow(0)
         
+        '''       
+        Creating Cancel/Accept/Help Buttons
+        '''
+        self.helpDocs_btn = QtWidgets.QPushButton ("Help")
+        self.exportApply_btn = QtWidgets.QPushButton("Export")
+        self.exportApply_btn.hide()
+        self.accept_btn = QtWidgets.QPushButton("Accept")
+        self.accept_btn.hide()
+        self.cancel_btn = QtWidgets.QPushButton("Cancel")
+        self.rom_apply_btn = QtWidgets.QPushButton("Create")
+        self.rom_apply_btn.hide()
+    
+
+    def create_controller_image (self):
+        width, height = self.CONTROLLER_IMAGE_SIZE
+                
+        self.controllerImage_ciw = CustomImageWidget(width, height)
+        self.controllerImage_ciw.setPixmap(ThumbnailCache.shared().preview(list(CONTROLLER_SHAPES)[0], width, height))
+    
+   
+    def create_layouts (self): 
+        '''
+        Cancel Button Layout
+        '''
+        button_layout = QtWidgets.QHBoxLayout()
+        button_layout.addWidget(self.helpDocs_btn)
+        button_layout.addStretch() 
+        button_layout.addWidget(self.accept_btn)
+        button_layout.addWidget(self.exportApply_btn)
+        button_layout.addWidget(self.rom_apply_btn)
+        button_layout.addWidget(self.cancel_btn)
+        self.button_grp = QtWidgets.QFrame()
+        self.button_grp.setLayout(button_layout)
+        
+        '''
+        Main Dropdown Layout
+        '''
+        mainCombo_layout = QtWidgets.QHBoxLayout()
+        mainCombo_layout.addStretch()
+        mainCombo_layout.addWidget(self.main_comboBox)
+        
+        '''
+        Tool Pages
+        '''
+        self.window_stack = LazyPageStack()
+        for name, builder, size, button in self.WINDOW_PAGES:
+            self.window_stack.addPage(name, getattr(self, builder))
+        self.window_stack.pageBuilt.connect(self.bind_page_settings)
+        
+        self.window_stack.showPage(self.main_comboBox.currentText())
+        
+        '''
+        Main Layout
+        '''
+        main_layout = QtWidgets.QVBoxLayout(self)
+ 
+        main_layout.addLayout(mainCombo_layout)
+        main_layout.addWidget(self.window_stack)
+        main_layout.addWidget(self.button_grp)
+    
+
+    def create_connection (self):
+        self.cancel_btn.clicked.connect(self.close)
+        
+        self.helpDocs_btn.clicked.connect(showHelp)
+        
+        self.custom_list.currentItemChanged.connect(self.custom_list_change)
+        
+        self.main_comboBox.activated[str].connect(self.on_activated_text)
+        
+        self.exportApply_btn.clicked.connect (self.exportButtonPressed)
+        
+        self.rom_apply_btn.clicked.connect(lambda: createROM(self.rotXP_cb.checkState(),self.rotYP_cb.checkState(),self.rotZP_cb.checkState(),self.rotXN_cb.checkState(),self.rotYN_cb.checkState(),self.rotZN_cb.checkState(),self.angleBox_sb.value(),self.framePad_sb.value(),self.frameStart_sb.value(),self.romSchedule_comboBox.currentText(),self.romLimits_le.text()))
+        
+        self.accept_btn.clicked.connect (lambda: createBipedControlRig(self.left_joints_le.text(), self.right_joints_le.text(), self.pelvis_le.text(), self.spine1_le.text(), self.chest_le.text(), self.neck_le.text(), self.head_le.text(), self.clavicle_le.text(), self.shoulder_le.text(), self.elbow_le.text(), self.wrist_le.text(), self.thigh_le.text(), self.knee_le.text(), self.ankle_le.text(), self.ball_le.text(), self.armFK_cb.checkState(), self.armIK_cb.checkState(), self.legFK_cb.checkState(), self.legIK_cb.checkState(), self.controllerSize_controlRig_sb.value(),self.footRollControls_cb.checkState(), self.ikfkBlend_comboBox.currentText(), self.drivers_comboBox.currentText(), self.mirrorBuild_cb.checkState(), self.ikStretch_comboBox.currentText(), self.spineControls_sb.value(), self.handSetup_cb.checkState()))
+    
+    '''
+    Helper Scripts Page
+    '''
+    def build_helperScripts_page (self):
+        self.custom_stack = LazyPageStack()
+        for name, builder, size, button in self.HELPER_PAGES:
+            self.custom_stack.addPage(name, getattr(self, builder))
+        self.custom_stack.pageBuilt.connect(self.bind_page_settings)
+        
+        '''       
+        Custom Window Layout
+        '''
+        custom_window_layout = QtWidgets.QHBoxLayout()
+        custom_window_layout.addWidget(self.custom_list)  
+        custom_window_layout.addWidget(self.custom_stack) 
+        self.custom_window_layout_frame = QtWidgets.QFrame()
+        self.custom_window_layout_frame.setLayout(custom_window_layout)
+        
+        self.custom_stack.showPage(self.custom_list.currentItem().text())
+        
+        return self.custom_window_layout_frame
+    
+    '''
+    Search and Replace Names Page
+    '''
+    def build_searchReplace_page (self):
         '''
         Search and Replace Name Widgets
         '''
@@ -234,30 +595,106 @@ class MainDialog (QtWidgets.QDialog):
         self.stepsNumber_sb.setMinimum (1)
         self.numRename_btn = QtWidgets.QPushButton("Rename")
         
+        '''
+        Search and Replace Name Layout
+        '''
+        searchReplace_gridLayout = QtWidgets.QGridLayout()
+        searchReplace_gridLayout.setHorizontalSpacing(5)
+        searchReplace_gridLayout.setColumnStretch(0,0)
+        searchReplace_gridLayout.setColumnStretch(1,1)
+        searchReplace_gridLayout.setColumnStretch(2,1)
+        searchReplace_gridLayout.setColumnStretch(3,1)
+        
+        searchReplace_gridLayout.addWidget (self.hierachy_name_rb, 0, 1)
+        searchReplace_gridLayout.addWidget (self.selected_name_rb, 0, 2)
+        searchReplace_gridLayout.addWidget (self.all_name_rb, 0, 3)
+        
+        self.search_lbl = QtWidgets.QLabel("Search")
+        searchReplace_gridLayout.addWidget(self.search_lbl, 1, 0, QtCore.Qt.AlignRight)
+        searchReplace_gridLayout.addWidget(self.search_name_le, 1, 1, 1, 3)
+        
+        self.replace_lbl = QtWidgets.QLabel("Replace")
+        searchReplace_gridLayout.addWidget(self.replace_lbl, 2, 0, QtCore.Qt.AlignRight)
+        searchReplace_gridLayout.addWidget(self.replace_name_le, 2, 1, 1, 3)
+        
+        searchReplace_gridLayout.addWidget(self.search_apply_btn, 3, 1)
+        
+        self.prefix_lbl = QtWidgets.QLabel("Prefix")
+        searchReplace_gridLayout.addWidget(self.prefix_lbl, 4, 0, QtCore.Qt.AlignRight)
+        searchReplace_gridLayout.addWidget(self.addPrefix_le, 4, 1, 1, 3)
+        
+        searchReplace_gridLayout.addWidget(self.addPrefix_btn, 5, 1)
+        
+        self.suffix_lbl = QtWidgets.QLabel("Suffix")
+        searchReplace_gridLayout.addWidget(self.suffix_lbl, 6, 0, QtCore.Qt.AlignRight)
+        searchReplace_gridLayout.addWidget(self.addSuffix_le, 6, 1, 1, 3)
+        
+        searchReplace_gridLayout.addWidget(self.addSuffix_btn, 7, 1)
+        
+        self.rename_lbl = QtWidgets.QLabel("Rename")
+        searchReplace_gridLayout.addWidget(self.rename_lbl, 8, 0, QtCore.Qt.AlignRight)
+        searchReplace_gridLayout.addWidget(self.numRename_le, 8, 1, 1, 3)
+                
+        self.start_lbl = QtWidgets.QLabel("Start #")
+        searchReplace_gridLayout.addWidget(self.start_lbl, 9, 0, QtCore.Qt.AlignRight)
+        searchReplace_gridLayout.addWidget(self.startNumber_sb, 9, 1)
+        
+        self.steps_lbl = QtWidgets.QLabel("Steps")
+        searchReplace_gridLayout.addWidget(self.steps_lbl, 10, 0, QtCore.Qt.AlignRight)
+        searchReplace_gridLayout.addWidget(self.stepsNumber_sb, 10, 1)
+        
+        self.length_lbl = QtWidgets.QLabel("Padding")
+        searchReplace_gridLayout.addWidget(self.length_lbl, 11, 0, QtCore.Qt.AlignRight)
+        searchReplace_gridLayout.addWidget(self.paddingNumber_sb, 11, 1)
+        
+        searchReplace_gridLayout.addWidget(self.numRename_btn, 12, 1)
+        
+        search_bottomSpacer = QtWidgets.QSpacerItem(5, 5, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
+        searchReplace_gridLayout.addItem (search_bottomSpacer, 13, 0, 1, 4)
+        
+        self.search_replace_frame = QtWidgets.QGroupBox("Search and Replace Names")
+        self.search_replace_frame.setAlignment(QtCore.Qt.AlignCenter)
+        self.search_replace_frame.setLayout(searchReplace_gridLayout)
+        
+        '''
+        Search and Replace Name Connections
+        '''
+        #Search and Replace Names
+        self.search_apply_btn.clicked.connect (lambda: searchReplaceNames(self.search_name_le.text(), self.replace_name_le.text(), self.hierachy_name_rb.isChecked(), self.selected_name_rb.isChecked(), self.all_name_rb.isChecked()))
+        #Prefix Name
+        self.addPrefix_btn.clicked.connect(lambda: prefixName(self.addPrefix_le.text(), self.hierachy_name_rb.isChecked(), self.selected_name_rb.isChecked(), self.all_name_rb.isChecked()))
+        #Suffix Name
+        self.addSuffix_btn.clicked.connect(lambda: suffixName(self.addSuffix_le.text(), self.hierachy_name_rb.isChecked(), self.selected_name_rb.isChecked(), self.all_name_rb.isChecked()))
+        #Padding Rename
+        self.numRename_btn.clicked.connect (lambda: paddingRename (self.numRename_le.text(), self.startNumber_sb.value(), self.paddingNumber_sb.value(), self.stepsNumber_sb.value(), self.hierachy_name_rb.isChecked(), self.selected_name_rb.isChecked(), self.all_name_rb.isChecked()))
+        
+        return self.search_replace_frame
+    
+    '''
+    Create Controllers Page
+    '''
+    def build_createController_page (self):
+        self.create_controller_image()
+        
         '''
         Create Widgets for the Create Controller Tab
         '''
+        self.controllerFilter_le = QtWidgets.QLineEdit()
+        self.controllerFilter_le.setPlaceholderText("Name or tag")
+        self.controllerFilter_le.setMaximumWidth(120)
         self.controller_list = QtWidgets.QListWidget()
-        self.controller_list.addItems(["Circle",
-                                   "Square", 
-                                   "Cube",
-                                   "Hexagon",
-                                   "Sphere",
-                                   "Cross",
-                                   "Arrow",
-                                   "Arc Arrow",
-                                   "Double Arrow",
-                                   "Curved Arrow",
-                                   "Tube",
-                                   "Gear",
-                                   "Plus",
-                                   "Triangle",
-                                   "Pyramid",
-                                   "3D Diamond",
-                                   "2D Diamond",
-                                   "Diamond Sphere"])
+        self.controller_list.addItems(controllerShapeNames())
         self.controller_list.setMaximumWidth(120)
         self.controller_list.setCurrentRow(0)
+        self.shapeName_le = QtWidgets.QLineEdit()
+        self.shapeName_le.setPlaceholderText("Shape name")
+        self.shapeName_le.setMaximumWidth(120)
+        self.shapeTags_le = QtWidgets.QLineEdit()
+        self.shapeTags_le.setPlaceholderText("Tags, comma separated")
+        self.shapeTags_le.setMaximumWidth(120)
+        self.shapeSave_btn = QtWidgets.QPushButton ("Save Selected")
+        self.shapeSave_btn.setMaximumWidth(120)
+        self.shapeSave_btn.setToolTip ("Saves the curves of the selected transform as a shape of this list")
         
         self.controllerName_le = QtWidgets.QLineEdit()
         self.controllerSuffix_le = QtWidgets.QLineEdit()
@@ -291,15 +728,94 @@ class MainDialog (QtWidgets.QDialog):
         self.fourthGroupSuffix_le.setEnabled(False)
         
         '''
-        Create Controller from Text Widgets
-        '''
-        self.controller_text_name_le = QtWidgets.QLineEdit()
-        self.controller_text_font_combo = QtWidgets.QFontComboBox()
-        self.controller_text_font_combo.FontFilter (QtWidgets.QFontComboBox.MonospacedFonts)
-        self.controller_text_btn = QtWidgets.QPushButton("Create")
-        
-        '''
-        Create Widgets for Import/Export Tab
+        Create Controllers Layout
+        '''
+        createControllerSide_formLayout = QtWidgets.QFormLayout()
+        createControllerSide_formLayout.addRow ("", self.controllerForceLabel_cb)
+        createControllerSide_formLayout.addRow ("", self.controllerSnapSelected_cb)
+        createControllerSide_formLayout.addRow ("Label", self.controllerName_le)
+        createControllerSide_formLayout.addRow ("Suffix", self.controllerSuffix_le)
+        createControllerSide_formLayout.addRow ("Size", self.controllerSize_sb)
+        createControllerSide_formLayout.addRow ("Color", self.controllerColor_ccb)
+        createControllerSide_formLayout.addRow ("Groups", self.controllerGroup_sb)
+        createControllerSide_formLayout.addRow ("Suffix 1", self.firstGroupSuffix_le)
+        createControllerSide_formLayout.addRow ("Suffix 2", self.secondGroupSuffix_le)
+        createControllerSide_formLayout.addRow ("Suffix 3", self.thirdGroupSuffix_le)
+        createControllerSide_formLayout.addRow ("Suffix 4", self.fourthGroupSuffix_le)
+        createControllerSide_formLayout.addRow ("", self.controller_apply_btn)
+        
+        createControllerImage_layout = QtWidgets.QVBoxLayout()
+        createControllerImage_layout.addWidget(self.controllerImage_ciw)
+        createControllerImage_layout.addLayout(createControllerSide_formLayout)
+        
+        controllerList_layout = QtWidgets.QVBoxLayout()
+        controllerList_layout.addWidget(self.controllerFilter_le)
+        controllerList_layout.addWidget(self.controller_list)
+        controllerList_layout.addWidget(self.shapeName_le)
+        controllerList_layout.addWidget(self.shapeTags_le)
+        controllerList_layout.addWidget(self.shapeSave_btn)
+        
+        createController_layout = QtWidgets.QHBoxLayout()
+        createController_layout.addLayout(controllerList_layout)
+        createController_layout.addLayout(createControllerImage_layout) 
+        
+        self.createController_layout_frame = QtWidgets.QGroupBox("Create Controller")
+        self.createController_layout_frame.setAlignment(QtCore.Qt.AlignCenter)
+        self.createController_layout_frame.setLayout(createController_layout)
+        
+        '''
+        Create Controller Connections
+        '''
+        self.controllerGroup_sb.valueChanged.connect(self.groupNumber_createController)
+        self.controller_list.currentItemChanged.connect(self.controller_list_change)
+        self.controllerFilter_le.textChanged.connect(self.refresh_controller_list)
+        self.shapeSave_btn.clicked.connect(self.save_controller_shape)
+        self.controller_apply_btn.clicked.connect(lambda: createController(self.controllerName_le.text(), self.controllerSuffix_le.text(), self.controllerSize_sb.value(), self.controllerForceLabel_cb.checkState(), self.controllerSnapSelected_cb.checkState(), self.controller_list.item(self.controller_list.currentRow()).text(), self.controllerGroup_sb.value(), self.firstGroupSuffix_le.text(), self.secondGroupSuffix_le.text(), self.thirdGroupSuffix_le.text(), self.fourthGroupSuffix_le.text(), self.controllerColor_ccb.getColor()))
+        
+        return self.createController_layout_frame
+    
+    '''
+    Create Controller from Text Page
+    '''
+    def build_controllerText_page (self):
+        '''
+        Create Controller from Text Widgets
+        '''
+        self.controller_text_name_le = QtWidgets.QLineEdit()
+        self.controller_text_font_combo = QtWidgets.QFontComboBox()
+        self.controller_text_font_combo.FontFilter (QtWidgets.QFontComboBox.MonospacedFonts)
+        self.controller_text_kerning_sb = QtWidgets.QDoubleSpinBox()
+        self.controller_text_kerning_sb.setRange (-10.0, 10.0)
+        self.controller_text_kerning_sb.setSingleStep (0.1)
+        self.controller_text_kerning_sb.setToolTip ("Extra space added between the letters")
+        self.controller_text_btn = QtWidgets.QPushButton("Create")
+        
+        '''
+        Controller from Text layout
+        '''
+        controllerText_formLayout = QtWidgets.QFormLayout()
+        controllerText_formLayout.addRow ("Text", self.controller_text_name_le)
+        controllerText_formLayout.addRow("Font", self.controller_text_font_combo)
+        controllerText_formLayout.addRow("Spacing", self.controller_text_kerning_sb)
+        controllerText_formLayout.addRow ("", self.controller_text_btn)
+        
+        self.controllerText_frame = QtWidgets.QGroupBox("Create Controller from Input Text")
+        self.controllerText_frame.setAlignment(QtCore.Qt.AlignCenter)
+        self.controllerText_frame.setLayout(controllerText_formLayout)
+        
+        '''
+        Create Controller from Text Connections
+        '''
+        self.controller_text_btn.clicked.connect(lambda: createControllerText(self.controller_text_name_le.text(), self.controller_text_font_combo.currentText(), self.controller_text_kerning_sb.value()))
+        
+        return self.controllerText_frame
+    
+    '''
+    Export To FBX Page
+    '''
+    def build_export_page (self):
+        '''
+        Create Widgets for Import/Export Tab
         '''
         self.exportSelected_rb = QtWidgets.QRadioButton("Selected")
         self.exportSelected_rb.setChecked(True)
@@ -386,20 +902,87 @@ class MainDialog (QtWidgets.QDialog):
         self.exportUpAxis_comboBox.setEnabled(False)
         
         '''
-        Create Widgets for Miscellaneous Tab
+        Export Tab Layout
         '''
-        self.optimize_rig_btn = QtWidgets.QPushButton ("Remove Unknown Nodes")
-        self.combine_shapeNode_btn = QtWidgets.QPushButton("Combine Shape")
-        self.select_skinnedJnts_btn = QtWidgets.QPushButton("Select Skinned Joints")
+        exportOptions_layout = QtWidgets.QGridLayout()
+        exportOptions_layout.setHorizontalSpacing(30)
+        exportOptions_layout.addWidget(self.exportSelected_rb,0,0)
+        exportOptions_layout.addWidget(self.exportModel_rb,0,1)
+        exportOptions_layout.addWidget(self.exportModelRig_rb,0,2)
+        exportOptions_layout.addWidget(self.exportAnimation_rb,1,0)
+        exportOptions_layout.addWidget(self.exportAnimationModel_rb,1,1)
+        exportOptions_layout.addWidget(self.exportAll_rb,1,2)
+        exportOptions_layout_grp = QtWidgets.QGroupBox("")
+        exportOptions_layout_grp.setLayout(exportOptions_layout)
         
-        self.createIKControllerSize_sb = QtWidgets.QDoubleSpinBox()
-        self.createIKControllerSize_sb.setValue(1.0)
-        self.createIKControllerSize_sb.setFixedWidth (80)
-        self.createIKControllerSize_sb.setRange (0.01 , 150.0)
-        self.createIKControllerSize_sb.setSingleStep (0.1)
+        exportEngine_layout = QtWidgets.QGridLayout()
+        exportEngine_layout.setHorizontalSpacing(112)
+        exportEngine_layout.addWidget(self.unityEngineSelected_rb,0,1)
+        exportEngine_layout.addWidget(self.unrealEngineSelected_rb,0,2)
+        exportEngine_layout.addWidget(self.noneEngineSelected_rb,0,3)
+        exportEngine_layout_grp = QtWidgets.QGroupBox("")
+        exportEngine_layout_grp.setLayout(exportEngine_layout)
         
-        self.create_IK_btn = QtWidgets.QPushButton("Setup IK")
+        exportFilePath_layout = QtWidgets.QHBoxLayout()
+        exportFilePath_layout.addWidget(self.exportProjectPath_le)
+        exportFilePath_layout.addWidget(self.exportProjecPath_btn)
+        
+        exportGeometry_layout = QtWidgets.QGridLayout()
+        exportGeometry_layout.setHorizontalSpacing(70)
+        exportGeometry_layout.addWidget(self.exportSmoothingGrp_cb,0,1)
+        exportGeometry_layout.addWidget(self.exportSmoothMesh_cb,0,2)
+        exportGeometry_layout.addWidget(self.exportRac_cb,0,3)
+        exportGeometry_layout.addWidget(self.exportTraingulate_cb,1,1)
+        
+        exportTab_layout = QtWidgets.QFormLayout()
+        exportTab_layout.setVerticalSpacing(15)
+        exportTab_layout.addRow("Export: ", exportOptions_layout_grp)
+        exportTab_layout.addRow("Unity or Unreal: ", exportEngine_layout_grp)
+        exportTab_layout.addRow("Unity/Unreal Project Path: ", exportFilePath_layout)
+        exportTab_layout.addRow("Export Options: ", self.exportOptions_comboBox)
+        exportTab_layout.addRow("Geometry: ", exportGeometry_layout)
+        exportTab_layout.addRow("Animation: ", self.exportAnimations_cb)
+        exportTab_layout.addRow("", self.exportBakeAnimation_cb)
+        exportTab_layout.addRow("Start: ", self.exportBakeStart_sb)
+        exportTab_layout.addRow("End: ", self.exportBakeEnd_sb)
+        exportTab_layout.addRow("Steps: ", self.exportBakeSteps_sb)
+        exportTab_layout.addRow("", self.exportReSample_cb)
+        exportTab_layout.addRow("Units Coversion: ", self.exportUnitsAuto_cb)
+        exportTab_layout.addRow("Units Converted To: ", self.exportUnit_comboBox)
+        exportTab_layout.addRow("Up Axis: ", self.exportUpAxis_comboBox)
+        
+        self.exportTab_layout_frame = QtWidgets.QGroupBox("Export To FBX")
+        self.exportTab_layout_frame.setAlignment(QtCore.Qt.AlignCenter)
+        self.exportTab_layout_frame.setLayout(exportTab_layout)
+        
+        '''
+        Export To FBX Connections
+        '''
+        self.exportSelected_rb.toggled.connect(self.deSelectAnimationBox)
+        self.exportModel_rb.toggled.connect(self.deSelectAnimationBox)
+        self.exportModelRig_rb.toggled.connect(self.deSelectAnimationBox)
+        self.exportAll_rb.toggled.connect(self.deSelectAnimationBox)
+        self.exportAnimation_rb.toggled.connect(self.selectAnimationBox)
+        self.exportAnimationModel_rb.toggled.connect(self.selectAnimationBox)
+        
+        self.exportProjecPath_btn.clicked.connect(self.select_unityUnreal_export_location)
+        
+        self.unityEngineSelected_rb.toggled.connect(self.exportPathDefUnity)
+        self.unrealEngineSelected_rb.toggled.connect(self.exportPathDefUnreal)
+        self.noneEngineSelected_rb.toggled.connect(self.exportPathDefNone)
+        
+        self.exportOptions_comboBox.activated[str].connect(self.exportOptionComboActivated)
+        
+        self.exportAnimations_cb.toggled.connect(self.exportAnimationToggle)
+        self.exportBakeAnimation_cb.toggled.connect(self.exportBakeAnimationToggle)
+        self.exportUnitsAuto_cb.toggled.connect(self.exportUnitAutoToggle)
         
+        return self.exportTab_layout_frame
+    
+    '''
+    Range of Motion (ROM) Page
+    '''
+    def build_rom_page (self):
         '''
         Range of Motion (ROM) Widgets
         '''
@@ -430,79 +1013,252 @@ class MainDialog (QtWidgets.QDialog):
         self.frameStart_sb = QtWidgets.QSpinBox()
         self.frameStart_sb.setValue(0)
 
+        self.romSchedule_comboBox = QtWidgets.QComboBox()
+        self.romSchedule_comboBox.addItems(ROM_SCHEDULE_MODES)
+        self.romSchedule_comboBox.setToolTip ("Serial keys the objects one after the other, Hierarchy Level keys every object of the same depth at once and Mirrored keys left and right counterparts at once")
+        self.romLimits_le = QtWidgets.QLineEdit()
+        self.romLimits_le.setToolTip ("JSON table of per object, per axis angle limits in degrees: {\"name or pattern\" : {\"X\" : [min, max]}}")
+        self.romLimits_btn = QtWidgets.QPushButton("...")
+        
         self.rom_delete_key_btn = QtWidgets.QPushButton("Delete Keys")
-        self.rom_apply_btn = QtWidgets.QPushButton("Create")
-        self.rom_apply_btn.hide()
+        self.romExport_btn = QtWidgets.QPushButton("Export ROM FBX...")
+        self.romExport_btn.setToolTip ("Export the keyed joints and their ROM curves to FBX without baking")
+        self.romBatch_btn = QtWidgets.QPushButton("Batch ROM...")
+        self.romBatch_btn.setToolTip ("Key and export the ROM of every character listed in a JSON manifest in parallel mayapy sessions")
+        self.romQA_btn = QtWidgets.QPushButton("Deformation QA")
+        self.romQA_btn.setToolTip ("Evaluate the skinned meshes at every ROM key and report the frames and joints with the most volume loss, stretch and flipped normals (needs NumPy)")
         
         '''
-        Create Control Rig Widgets
-        '''
-        self.left_joints_le = QtWidgets.QLineEdit()
-        self.right_joints_le = QtWidgets.QLineEdit()
-        self.controllerSize_controlRig_sb = QtWidgets.QDoubleSpinBox()
-        self.controllerSize_controlRig_sb.setValue(10.0)
-        self.controllerSize_controlRig_sb.setFixedWidth (65)
-        self.controllerSize_controlRig_sb.setRange (0.01 , 150.0)
-        self.controllerSize_controlRig_sb.setSingleStep (0.1)
+        Range of Motion (ROM) Layout
+        '''   
+                   
+        rom_main_gridLayout = QtWidgets.QGridLayout()
+        rom_main_gridLayout.setHorizontalSpacing(5)
+        rom_main_gridLayout.setColumnStretch(0,0)
+        rom_main_gridLayout.setColumnStretch(1,1)
+        rom_main_gridLayout.setColumnStretch(2,1)
+        rom_main_gridLayout.setColumnStretch(3,1)
         
-        self.pelvis_le = QtWidgets.QLineEdit()
-        self.pelvis_btn = QtWidgets.QPushButton("<<")
-        self.spine1_le = QtWidgets.QLineEdit()
-        self.spine1_btn = QtWidgets.QPushButton("<<")
-        self.chest_le = QtWidgets.QLineEdit()
-        self.chest_btn = QtWidgets.QPushButton("<<")
-        self.neck_le = QtWidgets.QLineEdit()
-        self.neck_btn = QtWidgets.QPushButton("<<")
-        self.head_le = QtWidgets.QLineEdit()
-        self.head_btn = QtWidgets.QPushButton("<<")
+        rom_main_gridLayout.setColumnMinimumWidth (1,50)
+        rom_main_gridLayout.setColumnMinimumWidth (2,50)
+        rom_main_gridLayout.setColumnMinimumWidth (3,50)
         
-        self.armIK_cb = QtWidgets.QCheckBox("IK")
-        self.armIK_cb.setChecked(True)
-        self.armFK_cb = QtWidgets.QCheckBox("FK")
-        self.armFK_cb.setChecked(True)
-        self.clavicle_le = QtWidgets.QLineEdit()
-        self.clavicle_btn = QtWidgets.QPushButton("<<")
-        self.shoulder_le = QtWidgets.QLineEdit()
-        self.shoulder_btn = QtWidgets.QPushButton("<<")
-        self.elbow_le = QtWidgets.QLineEdit()
-        self.elbow_btn = QtWidgets.QPushButton("<<")
-        self.wrist_le = QtWidgets.QLineEdit()
-        self.wrist_btn = QtWidgets.QPushButton("<<")
         
-        self.legIK_cb = QtWidgets.QCheckBox("IK")
-        self.legIK_cb.setChecked(True)
-        self.legFK_cb = QtWidgets.QCheckBox("FK")
-        self.legFK_cb.setChecked(True)
-        self.thigh_le = QtWidgets.QLineEdit()
-        self.thigh_btn = QtWidgets.QPushButton("<<")
-        self.knee_le = QtWidgets.QLineEdit()
-        self.knee_btn = QtWidgets.QPushButton("<<")
-        self.ankle_le = QtWidgets.QLineEdit()
-        self.ankle_btn = QtWidgets.QPushButton("<<")
-        self.ball_le = QtWidgets.QLineEdit()
-        self.ball_btn = QtWidgets.QPushButton("<<")
+        rom_main_gridLayout.addWidget (QtWidgets.QLabel(""), 0, 0)
+        rom_main_gridLayout.addWidget (self.XLabel_label, 0, 1)
+        rom_main_gridLayout.addWidget (self.YLabel_label, 0, 2)
+        rom_main_gridLayout.addWidget (self.ZLabel_label, 0, 3)
         
-        self.footRollControls_cb = QtWidgets.QCheckBox("Foot Roll Controls")
+        rom_main_gridLayout.addWidget (QtWidgets.QLabel("+ve"), 1, 0)
+        rom_main_gridLayout.addWidget (self.rotXP_cb, 1, 1)
+        rom_main_gridLayout.addWidget (self.rotYP_cb, 1, 2)
+        rom_main_gridLayout.addWidget (self.rotZP_cb, 1, 3)
+        
+        rom_main_gridLayout.addWidget (QtWidgets.QLabel("-ve"), 2, 0)
+        rom_main_gridLayout.addWidget (self.rotXN_cb, 2, 1)
+        rom_main_gridLayout.addWidget (self.rotYN_cb, 2, 2)
+        rom_main_gridLayout.addWidget (self.rotZN_cb, 2, 3)
+        
+        rom_main_gridLayout.addWidget (QtWidgets.QLabel(""), 3, 0, 1, 4)
+        
+        rom_main_gridLayout.addWidget (QtWidgets.QLabel("Rotate Angle"), 4, 0)
+        rom_main_gridLayout.addWidget (self.angleBox_sb, 4, 1)
+        
+        rom_main_gridLayout.addWidget (QtWidgets.QLabel("Frame Padding"), 5, 0)
+        rom_main_gridLayout.addWidget (self.framePad_sb, 5, 1)
+        
+        rom_main_gridLayout.addWidget (QtWidgets.QLabel("Rotate Angle"), 6, 0)
+        rom_main_gridLayout.addWidget (self.frameStart_sb, 6, 1)
+        
+        rom_main_gridLayout.addWidget (QtWidgets.QLabel("Schedule"), 7, 0)
+        rom_main_gridLayout.addWidget (self.romSchedule_comboBox, 7, 1, 1, 3)
+        
+        rom_main_gridLayout.addWidget (QtWidgets.QLabel("Limits"), 8, 0)
+        rom_main_gridLayout.addWidget (self.romLimits_le, 8, 1, 1, 2)
+        rom_main_gridLayout.addWidget (self.romLimits_btn, 8, 3)
+        
+        rom_main_gridLayout.addWidget (QtWidgets.QLabel(""), 9, 0, 1, 4)
+        
+        rom_main_gridLayout.addWidget (self.rom_delete_key_btn, 10, 0, 1, 4)
+        rom_main_gridLayout.addWidget (self.romExport_btn, 11, 0, 1, 2)
+        rom_main_gridLayout.addWidget (self.romBatch_btn, 11, 2, 1, 2)
+        rom_main_gridLayout.addWidget (self.romQA_btn, 12, 0, 1, 4)
+        
+        rom_bottomSpacing = QtWidgets.QSpacerItem(5, 5, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
+        rom_main_gridLayout.addItem (rom_bottomSpacing, 13, 0)
+        
+        self.rom_layout_frame = QtWidgets.QGroupBox("Range of Motion (ROM)")
+        self.rom_layout_frame.setAlignment(QtCore.Qt.AlignCenter)
+        self.rom_layout_frame.setLayout(rom_main_gridLayout)
         
         '''
-        Create Built-In Buttons
+        Range of Motion (ROM) Connections
         '''
-        self.builtIn_label = QtWidgets.QLabel ("** Right-Click the Buttons to Access the Option Window")
-        self.builtIn_label.setAlignment(QtCore.Qt.AlignRight)
-        builtIn_label_font = QtGui.QFont()
-        builtIn_label_font.setBold(True)
-        builtIn_label_font.setWeight(81)
-        builtIn_label_font.setPointSize(8)
-        self.builtIn_label.setFont(builtIn_label_font)
+        self.rom_delete_key_btn.clicked.connect (cmds.DeleteKeys)
         
-        #General Options
-        self.deleteKeys_built_btn = QtWidgets.QPushButton ("DK")
-        self.deleteKeys_built_btn.setIcon(QtGui.QIcon(":menuIconEdit.png"))
-        self.deleteKeys_built_btn.setToolTip ("Delete Keys on Selected")
-        self.deleteHistory_built_btn = QtWidgets.QPushButton ("Hist")
-        self.deleteHistory_built_btn.setIcon(QtGui.QIcon(":menuIconEdit.png"))
-        self.deleteHistory_built_btn.setToolTip ("Delete History")
-        self.duplicate_built_btn = QtWidgets.QPushButton ("Dupl")
+        self.romLimits_btn.clicked.connect(self.romLimitsButtonPushed)
+        self.romExport_btn.clicked.connect(self.romExportButtonPushed)
+        self.romBatch_btn.clicked.connect(self.romBatchButtonPushed)
+        self.romQA_btn.clicked.connect(lambda: deformationQA())
+        
+        return self.rom_layout_frame
+    
+    '''
+    Miscellaneous Page
+    '''
+    def build_misc_page (self):
+        '''
+        Create Widgets for Miscellaneous Tab
+        '''
+        self.optimize_rig_btn = QtWidgets.QPushButton ("Optimize Scene")
+        self.optimize_rig_btn.setToolTip ("Remove unknown nodes and plugins, unused utility nodes, orphan anim curves, empty groups and duplicate shading networks in one batch, then report the node count and file size saved")
+        self.combine_shapeNode_btn = QtWidgets.QPushButton("Combine Shape")
+        self.combine_shapeNode_btn.setToolTip ("Move the curve shapes of the selected objects to the first selected one, keeping their world position and color")
+        self.combine_groups_btn = QtWidgets.QPushButton("Combine Each Group")
+        self.combine_groups_btn.setToolTip ("Every selected group takes the curve shapes of its children in one batch, the emptied children are deleted")
+        self.select_skinnedJnts_btn = QtWidgets.QPushButton("Select Skinned Joints")
+        
+        self.createIKControllerSize_sb = QtWidgets.QDoubleSpinBox()
+        self.createIKControllerSize_sb.setValue(1.0)
+        self.createIKControllerSize_sb.setFixedWidth (80)
+        self.createIKControllerSize_sb.setRange (0.01 , 150.0)
+        self.createIKControllerSize_sb.setSingleStep (0.1)
+        
+        self.createIKDrivers_comboBox = QtWidgets.QComboBox()
+        self.createIKDrivers_comboBox.addItems(["Driven Keys", 
+                                    "Math Nodes"])
+        self.createIKDrivers_comboBox.setFixedWidth (100)
+        
+        self.createIKSegment_sb = QtWidgets.QSpinBox()
+        self.createIKSegment_sb.setRange (3, 99)
+        self.createIKSegment_sb.setValue(3)
+        self.createIKSegment_sb.setFixedWidth (80)
+        self.createIKSegment_sb.setToolTip ("Joints per IK segment when long chains are split. Segments do not share joints")
+        
+        self.createIKStretch_comboBox = QtWidgets.QComboBox()
+        self.createIKStretch_comboBox.addItems(IK_STRETCH_MODES)
+        self.createIKStretch_comboBox.setFixedWidth (100)
+        
+        self.create_IK_btn = QtWidgets.QPushButton("Setup IK")
+        
+        self.profileFrames_sb = QtWidgets.QSpinBox()
+        self.profileFrames_sb.setRange (1, 100000)
+        self.profileFrames_sb.setValue(100)
+        self.profileFrames_sb.setFixedWidth (80)
+        self.analyze_rig_btn = QtWidgets.QPushButton("Analyze Rig")
+        self.analyze_rig_btn.setToolTip ("Count the nodes under MAIN_CTRL, find cycles and estimate the evaluation cost")
+        self.profile_rig_btn = QtWidgets.QPushButton("Profile Playback")
+        self.profile_rig_btn.setToolTip ("Profile the saved scene in mayapy and export a per node timing report")
+        
+        '''
+        Miscellaneous Tab Layout
+        '''
+        misc_tab_layout = QtWidgets.QVBoxLayout()
+        
+        optimizeButton = QtWidgets.QVBoxLayout()
+        optimizeButton.addWidget(self.optimize_rig_btn)
+        optimizeButton_grp = QtWidgets.QGroupBox("Optimize Rig")
+        optimizeButton_grp.setAlignment(QtCore.Qt.AlignCenter)
+        optimizeButton_grp.setLayout(optimizeButton)
+        misc_tab_layout.addWidget(optimizeButton_grp)
+        
+        combineShape = QtWidgets.QVBoxLayout()
+        combineShape.addWidget(self.combine_shapeNode_btn)
+        combineShape.addWidget(self.combine_groups_btn)
+        combineShape_grp = QtWidgets.QGroupBox("Select the Objects to Combine its Shape")
+        combineShape_grp.setAlignment(QtCore.Qt.AlignCenter)
+        combineShape_grp.setLayout(combineShape)
+        misc_tab_layout.addWidget(combineShape_grp)
+        
+        selectSkinnedJnts = QtWidgets.QVBoxLayout()
+        selectSkinnedJnts.addWidget(self.select_skinnedJnts_btn)
+        selectSkinnedJnts_grp = QtWidgets.QGroupBox("Select Mesh and Click the Button")
+        selectSkinnedJnts_grp.setAlignment(QtCore.Qt.AlignCenter)
+        selectSkinnedJnts_grp.setLayout(selectSkinnedJnts)
+        misc_tab_layout.addWidget(selectSkinnedJnts_grp)
+                
+        createIKControllerSize_layout = QtWidgets.QFormLayout()
+        createIKControllerSize_layout.addRow ("Controller Size", self.createIKControllerSize_sb)
+        createIKControllerSize_layout.addRow ("Follow Driver", self.createIKDrivers_comboBox)
+        createIKControllerSize_layout.addRow ("Segment Joints", self.createIKSegment_sb)
+        createIKControllerSize_layout.addRow ("Stretch", self.createIKStretch_comboBox)
+        createIKControllerSize_layout.setAlignment(QtCore.Qt.AlignCenter)
+        
+        createIK = QtWidgets.QVBoxLayout()
+        createIK.addLayout(createIKControllerSize_layout)
+        createIK.addWidget(self.create_IK_btn)
+        createIK_grp = QtWidgets.QGroupBox("Select 3 Joints in a Chain, or the First Joint of Each Chain to Create IK")
+        createIK_grp.setAlignment(QtCore.Qt.AlignCenter)
+        createIK_grp.setLayout(createIK)
+        misc_tab_layout.addWidget(createIK_grp)
+        
+        profileFrames_layout = QtWidgets.QFormLayout()
+        profileFrames_layout.addRow ("Frames", self.profileFrames_sb)
+        profileFrames_layout.setAlignment(QtCore.Qt.AlignCenter)
+        
+        rigPerformanceButtons = QtWidgets.QHBoxLayout()
+        rigPerformanceButtons.addWidget(self.analyze_rig_btn)
+        rigPerformanceButtons.addWidget(self.profile_rig_btn)
+        
+        rigPerformance = QtWidgets.QVBoxLayout()
+        rigPerformance.addLayout(profileFrames_layout)
+        rigPerformance.addLayout(rigPerformanceButtons)
+        rigPerformance_grp = QtWidgets.QGroupBox("Rig Performance (Reports in the Script Editor)")
+        rigPerformance_grp.setAlignment(QtCore.Qt.AlignCenter)
+        rigPerformance_grp.setLayout(rigPerformance)
+        misc_tab_layout.addWidget(rigPerformance_grp)
+        
+        misc_tab_layout.addStretch(0)       
+        
+        self.misc_layout_frame = QtWidgets.QGroupBox("Miscellaneous")
+        self.misc_layout_frame.setAlignment(QtCore.Qt.AlignCenter)
+        self.misc_layout_frame.setLayout(misc_tab_layout)
+        
+        '''
+        Miscellaneous Tab Buttons Connections
+        '''
+        #Button to create the IK Chain
+        self.create_IK_btn.clicked.connect(lambda: createIKChain(self.createIKControllerSize_sb.value(), self.createIKDrivers_comboBox.currentText(), self.createIKSegment_sb.value(), self.createIKStretch_comboBox.currentText()))
+        
+        #Button to delete Unknown Nodes
+        self.optimize_rig_btn.clicked.connect(lambda: optimizeScene())
+        
+        #Button to selected skinned joints in a mesh
+        self.select_skinnedJnts_btn.clicked.connect(selectSkinnedJoints)
+        
+        #Button for Combine Shape Nodes
+        self.combine_shapeNode_btn.clicked.connect(lambda: combineShape())
+        self.combine_groups_btn.clicked.connect(lambda: combineShape(True))
+        
+        #Buttons for the Rig Performance reports
+        self.analyze_rig_btn.clicked.connect(lambda: analyzeRigEvaluation())
+        self.profile_rig_btn.clicked.connect(lambda: profileRigHeadless(self.profileFrames_sb.value()))
+        
+        return self.misc_layout_frame
+    
+    '''
+    Built-In Page
+    '''
+    def build_builtIn_page (self):
+        '''
+        Create Built-In Buttons
+        '''
+        self.builtIn_label = QtWidgets.QLabel ("** Right-Click the Buttons to Access the Option Window")
+        self.builtIn_label.setAlignment(QtCore.Qt.AlignRight)
+        builtIn_label_font = QtGui.QFont()
+        builtIn_label_font.setBold(True)
+        builtIn_label_font.setWeight(81)
+        builtIn_label_font.setPointSize(8)
+        self.builtIn_label.setFont(builtIn_label_font)
+        
+        #General Options
+        self.deleteKeys_built_btn = QtWidgets.QPushButton ("DK")
+        self.deleteKeys_built_btn.setIcon(QtGui.QIcon(":menuIconEdit.png"))
+        self.deleteKeys_built_btn.setToolTip ("Delete Keys on Selected")
+        self.deleteHistory_built_btn = QtWidgets.QPushButton ("Hist")
+        self.deleteHistory_built_btn.setIcon(QtGui.QIcon(":menuIconEdit.png"))
+        self.deleteHistory_built_btn.setToolTip ("Delete History")
+        self.duplicate_built_btn = QtWidgets.QPushButton ("Dupl")
         self.duplicate_built_btn.setIcon(QtGui.QIcon(":menuIconEdit.png"))
         self.duplicate_built_btn.setToolTip ("Duplicate")
         self.parent_built_btn = QtWidgets.QPushButton ("Pare")
@@ -652,474 +1408,376 @@ class MainDialog (QtWidgets.QDialog):
         self.poseWindow_built_btn.setIcon(QtGui.QIcon(":poseEditor.png"))
         self.poseWindow_built_btn.setToolTip ("Pose Editor")
         
-        
-        '''       
-        Creating Cancel/Accept/Help Buttons
-        '''
-        self.helpDocs_btn = QtWidgets.QPushButton ("Help")
-        self.exportApply_btn = QtWidgets.QPushButton("Export")
-        self.exportApply_btn.hide()
-        self.accept_btn = QtWidgets.QPushButton("Accept")
-        self.accept_btn.hide()
-        self.cancel_btn = QtWidgets.QPushButton("Cancel")
-    
-
-    def create_controller_image (self):
-        self.image_path =  "D:/_RMIT/Semester 4/Studio 4/urt_atulshakya/icons/"
-                
-        self.controllerImage_ciw = CustomImageWidget(205, 50, "{0}circle.png".format(self.image_path))
-    
-   
-    def create_layouts (self): 
         '''
-        Cancel Button Layout
+        General Buttons
         '''
-        button_layout = QtWidgets.QHBoxLayout()
-        button_layout.addWidget(self.helpDocs_btn)
-        button_layout.addStretch() 
-        button_layout.addWidget(self.accept_btn)
-        button_layout.addWidget(self.exportApply_btn)
-        button_layout.addWidget(self.rom_apply_btn)
-        button_layout.addWidget(self.cancel_btn)
-        self.button_grp = QtWidgets.QFrame()
-        self.button_grp.setLayout(button_layout)
+        builtIn_general_layout1 = QtWidgets.QHBoxLayout()
+        builtIn_general_layout1.addWidget(self.locator_built_btn)
+        builtIn_general_layout1.addWidget(self.deleteKeys_built_btn)
+        builtIn_general_layout1.addWidget(self.deleteHistory_built_btn)
+        builtIn_general_layout1.addWidget(self.duplicate_built_btn)
+        builtIn_general_layout1.addWidget(self.parent_built_btn)
+        builtIn_general_layout1.addWidget(self.unParent_built_btn)
+        builtIn_general_layout2 = QtWidgets.QHBoxLayout()
+        builtIn_general_layout2.addWidget(self.hierachy_built_btn)
+        builtIn_general_layout2.addWidget(self.freezeTrans_built_btn)
+        builtIn_general_layout2.addWidget(self.resetTrans_built_btn)
+        builtIn_general_layout2.addWidget(self.centerPivot_built_btn)
+        builtIn_general_layout2.addWidget(self.disHideLRA_built_btn)
         
-        '''
-        Main Dropdown Layout
-        '''
-        mainCombo_layout = QtWidgets.QHBoxLayout()
-        mainCombo_layout.addStretch()
-        mainCombo_layout.addWidget(self.main_comboBox)
+        builtIn_general_layout = QtWidgets.QVBoxLayout()
+        builtIn_general_layout.addLayout(builtIn_general_layout1)
+        builtIn_general_layout.addLayout(builtIn_general_layout2)
+        builtIn_general_layout_grp = QtWidgets.QGroupBox ("General")
+        builtIn_general_layout_grp.setAlignment(QtCore.Qt.AlignCenter)
+        builtIn_general_layout_grp.setLayout(builtIn_general_layout)
         
         '''
-        CUSTOM WINDOW LAYOUT
-        START
+        Joint Buttons
         '''
+        builtIn_joint_layout = QtWidgets.QHBoxLayout()
+        builtIn_joint_layout.addWidget(self.createJoint_built_btn)
+        builtIn_joint_layout.addWidget(self.mirrorJoint_built_btn)
+        builtIn_joint_layout.addWidget(self.orientJoint_built_btn)
+        builtIn_joint_layout.addWidget(self.createIKJoint_built_btn)
+        builtIn_joint_layout.addWidget(self.splineIKJoint_built_btn)
+        builtIn_joint_layout.addWidget(self.jointSizeJoint_built_btn)
+        builtIn_joint_layout_grp = QtWidgets.QGroupBox ("Joint")
+        builtIn_joint_layout_grp.setAlignment(QtCore.Qt.AlignCenter)
+        builtIn_joint_layout_grp.setLayout(builtIn_joint_layout)
+        
         '''
-        Search and Replace Name Layout
+        Skinning Buttons
         '''
-        searchReplace_gridLayout = QtWidgets.QGridLayout()
-        searchReplace_gridLayout.setHorizontalSpacing(5)
-        searchReplace_gridLayout.setColumnStretch(0,0)
-        searchReplace_gridLayout.setColumnStretch(1,1)
-        searchReplace_gridLayout.setColumnStretch(2,1)
-        searchReplace_gridLayout.setColumnStretch(3,1)
+        builtIn_skinning_layout1 = QtWidgets.QHBoxLayout()
+        builtIn_skinning_layout1.addWidget(self.bindSkin_built_btn)
+        builtIn_skinning_layout1.addWidget(self.unBindSkin_built_btn)
+        builtIn_skinning_layout1.addWidget(self.bindPoseSkin_built_btn)
+        builtIn_skinning_layout1.addWidget(self.paintSkin_built_btn)
+        builtIn_skinning_layout1.addWidget(self.mirrorSkin_built_btn)
+        builtIn_skinning_layout1.addWidget(self.copyWeightsSkin_built_btn)
+        builtIn_skinning_layout2 = QtWidgets.QHBoxLayout()     
+        builtIn_skinning_layout2.addWidget(self.smoothSkin_built_btn)   
+        builtIn_skinning_layout2.addWidget(self.copyVertexSkin_built_btn)
+        builtIn_skinning_layout2.addWidget(self.pasteVertexSkin_built_btn)
+        builtIn_skinning_layout2.addWidget(self.setInfluenceSkin_built_btn)
+        builtIn_skinning_layout2.addWidget(self.addInfluenceSkin_built_btn)
+        builtIn_skinning_layout2.addWidget(self.removeInfluenceSkin_built_btn)
+        builtIn_skinning_layout3 = QtWidgets.QHBoxLayout()     
+        builtIn_skinning_layout3.addWidget(self.pruneSkin_built_btn)
+        builtIn_skinning_layout3.addWidget(self.bakeDeformSkin_built_btn)
         
-        searchReplace_gridLayout.addWidget (self.hierachy_name_rb, 0, 1)
-        searchReplace_gridLayout.addWidget (self.selected_name_rb, 0, 2)
-        searchReplace_gridLayout.addWidget (self.all_name_rb, 0, 3)
+        builtIn_skinning_layout = QtWidgets.QVBoxLayout()
+        builtIn_skinning_layout.addLayout(builtIn_skinning_layout1)
+        builtIn_skinning_layout.addLayout(builtIn_skinning_layout2)
+        builtIn_skinning_layout.addLayout(builtIn_skinning_layout3)
+        builtIn_skinning_layout_grp = QtWidgets.QGroupBox ("Skinning")
+        builtIn_skinning_layout_grp.setAlignment(QtCore.Qt.AlignCenter)
+        builtIn_skinning_layout_grp.setLayout(builtIn_skinning_layout)
         
-        self.search_lbl = QtWidgets.QLabel("Search")
-        searchReplace_gridLayout.addWidget(self.search_lbl, 1, 0, QtCore.Qt.AlignRight)
-        searchReplace_gridLayout.addWidget(self.search_name_le, 1, 1, 1, 3)
+        '''
+        Deform Buttons
+        '''
+        builtIn_deform_layout = QtWidgets.QHBoxLayout()
+        builtIn_deform_layout.addWidget(self.blendShapeDeform_built_btn)
+        builtIn_deform_layout.addWidget(self.poseSpaceDeform_built_btn)
+        builtIn_deform_layout.addWidget(self.clusterDeform_built_btn)
+        builtIn_deform_layout_grp = QtWidgets.QGroupBox ("Deform")
+        builtIn_deform_layout_grp.setAlignment(QtCore.Qt.AlignCenter)
+        builtIn_deform_layout_grp.setLayout(builtIn_deform_layout)
         
-        self.replace_lbl = QtWidgets.QLabel("Replace")
-        searchReplace_gridLayout.addWidget(self.replace_lbl, 2, 0, QtCore.Qt.AlignRight)
-        searchReplace_gridLayout.addWidget(self.replace_name_le, 2, 1, 1, 3)
+        '''
+        Constraint Buttons
+        '''
+        builtIn_constraint_layout = QtWidgets.QHBoxLayout()
+        builtIn_constraint_layout.addWidget(self.parentConstraint_built_btn)
+        builtIn_constraint_layout.addWidget(self.pointConstraint_built_btn)
+        builtIn_constraint_layout.addWidget(self.orientConstraint_built_btn)
+        builtIn_constraint_layout.addWidget(self.scaleConstraint_built_btn)
+        builtIn_constraint_layout.addWidget(self.poleVectorConstraint_built_btn)
+        builtIn_constraint_layout.addWidget(self.aimConstraint_built_btn)
+        builtIn_constraint_layout_grp = QtWidgets.QGroupBox ("Constraint")
+        builtIn_constraint_layout_grp.setAlignment(QtCore.Qt.AlignCenter)
+        builtIn_constraint_layout_grp.setLayout(builtIn_constraint_layout)
         
-        searchReplace_gridLayout.addWidget(self.search_apply_btn, 3, 1)
+        '''
+        Windows Buttons
+        '''
+        builtIn_editor_layout1 = QtWidgets.QHBoxLayout()
+        builtIn_editor_layout1.addWidget(self.connectionWindow_built_btn)
+        builtIn_editor_layout1.addWidget(self.componentWindow_built_btn)
+        builtIn_editor_layout1.addWidget(self.nodeWindow_built_btn)
+        builtIn_editor_layout1.addWidget(self.channelWindow_built_btn)
+        builtIn_editor_layout2 = QtWidgets.QHBoxLayout()
+        builtIn_editor_layout2.addWidget(self.setDrivenKeyWindow_built_btn)
+        builtIn_editor_layout2.addWidget(self.shapeWindow_built_btn)
+        builtIn_editor_layout2.addWidget(self.poseWindow_built_btn)
+        builtIn_editor_layout2.addWidget(self.graphWindow_built_btn)
         
-        self.prefix_lbl = QtWidgets.QLabel("Prefix")
-        searchReplace_gridLayout.addWidget(self.prefix_lbl, 4, 0, QtCore.Qt.AlignRight)
-        searchReplace_gridLayout.addWidget(self.addPrefix_le, 4, 1, 1, 3)
+        builtIn_editor_layout = QtWidgets.QVBoxLayout()
+        builtIn_editor_layout.addLayout(builtIn_editor_layout1)
+        builtIn_editor_layout.addLayout(builtIn_editor_layout2)
+        builtIn_editor_layout_grp = QtWidgets.QGroupBox ("Windows")
+        builtIn_editor_layout_grp.setAlignment(QtCore.Qt.AlignCenter)
+        builtIn_editor_layout_grp.setLayout(builtIn_editor_layout)
         
-        searchReplace_gridLayout.addWidget(self.addPrefix_btn, 5, 1)
         
-        self.suffix_lbl = QtWidgets.QLabel("Suffix")
-        searchReplace_gridLayout.addWidget(self.suffix_lbl, 6, 0, QtCore.Qt.AlignRight)
-        searchReplace_gridLayout.addWidget(self.addSuffix_le, 6, 1, 1, 3)
+        '''
+        Built-In Window Items
+        '''
+        builtIn_window_layout = QtWidgets.QVBoxLayout()
+        builtIn_window_layout.addWidget (builtIn_general_layout_grp)
+        builtIn_window_layout.addWidget (builtIn_joint_layout_grp)
+        builtIn_window_layout.addWidget (builtIn_skinning_layout_grp)
+        builtIn_window_layout.addWidget (builtIn_deform_layout_grp)
+        builtIn_window_layout.addWidget (builtIn_constraint_layout_grp)
+        builtIn_window_layout.addWidget (builtIn_editor_layout_grp)
+        builtIn_window_layout.addWidget (self.builtIn_label)
+        self.builtIn_window_layout_frame = QtWidgets.QFrame()
+        self.builtIn_window_layout_frame.setLayout(builtIn_window_layout)
         
-        searchReplace_gridLayout.addWidget(self.addSuffix_btn, 7, 1)
+        '''
+        Built-In Button Connections
+        '''
+        #General Options
+        self.locator_built_btn.clicked.connect (cmds.CreateLocator)
         
-        self.rename_lbl = QtWidgets.QLabel("Rename")
-        searchReplace_gridLayout.addWidget(self.rename_lbl, 8, 0, QtCore.Qt.AlignRight)
-        searchReplace_gridLayout.addWidget(self.numRename_le, 8, 1, 1, 3)
-                
-        self.start_lbl = QtWidgets.QLabel("Start #")
-        searchReplace_gridLayout.addWidget(self.start_lbl, 9, 0, QtCore.Qt.AlignRight)
-        searchReplace_gridLayout.addWidget(self.startNumber_sb, 9, 1)
+        self.deleteKeys_built_btn.clicked.connect (cmds.DeleteKeys)
+        self.deleteKeys_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.deleteKeys_built_btn.customContextMenuRequested.connect(cmds.DeleteKeysOptions)
         
-        self.steps_lbl = QtWidgets.QLabel("Steps")
-        searchReplace_gridLayout.addWidget(self.steps_lbl, 10, 0, QtCore.Qt.AlignRight)
-        searchReplace_gridLayout.addWidget(self.stepsNumber_sb, 10, 1)
+        self.deleteHistory_built_btn.clicked.connect (cmds.DeleteHistory())
         
-        self.length_lbl = QtWidgets.QLabel("Padding")
-        searchReplace_gridLayout.addWidget(self.length_lbl, 11, 0, QtCore.Qt.AlignRight)
-        searchReplace_gridLayout.addWidget(self.paddingNumber_sb, 11, 1)
+        self.duplicate_built_btn.clicked.connect (cmds.Duplicate)
         
-        searchReplace_gridLayout.addWidget(self.numRename_btn, 12, 1)
+        self.parent_built_btn.clicked.connect (cmds.Parent)
+        self.parent_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.parent_built_btn.customContextMenuRequested.connect(cmds.ParentOptions)
         
-        search_bottomSpacer = QtWidgets.QSpacerItem(5, 5, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
-        searchReplace_gridLayout.addItem (search_bottomSpacer, 13, 0, 1, 4)
+        self.unParent_built_btn.clicked.connect (cmds.Unparent)
+        self.unParent_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.unParent_built_btn.customContextMenuRequested.connect(cmds.UnparentOptions)
         
-        self.search_replace_frame = QtWidgets.QGroupBox("Search and Replace Names")
-        self.search_replace_frame.setAlignment(QtCore.Qt.AlignCenter)
-        self.search_replace_frame.setLayout(searchReplace_gridLayout)
+        self.hierachy_built_btn.clicked.connect (cmds.SelectHierarchy)
         
-        '''
-        Create Controllers Layout
-        '''
-        createControllerSide_formLayout = QtWidgets.QFormLayout()
-        createControllerSide_formLayout.addRow ("", self.controllerForceLabel_cb)
-        createControllerSide_formLayout.addRow ("", self.controllerSnapSelected_cb)
-        createControllerSide_formLayout.addRow ("Label", self.controllerName_le)
-        createControllerSide_formLayout.addRow ("Suffix", self.controllerSuffix_le)
-        createControllerSide_formLayout.addRow ("Size", self.controllerSize_sb)
-        createControllerSide_formLayout.addRow ("Color", self.controllerColor_ccb)
-        createControllerSide_formLayout.addRow ("Groups", self.controllerGroup_sb)
-        createControllerSide_formLayout.addRow ("Suffix 1", self.firstGroupSuffix_le)
-        createControllerSide_formLayout.addRow ("Suffix 2", self.secondGroupSuffix_le)
-        createControllerSide_formLayout.addRow ("Suffix 3", self.thirdGroupSuffix_le)
-        createControllerSide_formLayout.addRow ("Suffix 4", self.fourthGroupSuffix_le)
-        createControllerSide_formLayout.addRow ("", self.controller_apply_btn)
+        self.freezeTrans_built_btn.clicked.connect (cmds.FreezeTransformations)
+        self.freezeTrans_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.freezeTrans_built_btn.customContextMenuRequested.connect(cmds.FreezeTransformationsOptions)
         
-        createControllerImage_layout = QtWidgets.QVBoxLayout()
-        createControllerImage_layout.addWidget(self.controllerImage_ciw)
-        createControllerImage_layout.addLayout(createControllerSide_formLayout)
+        self.resetTrans_built_btn.clicked.connect (cmds.ResetTransformations)
+        self.resetTrans_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.resetTrans_built_btn.customContextMenuRequested.connect(cmds.ResetTransformationsOptions)
         
-        createController_layout = QtWidgets.QHBoxLayout()
-        createController_layout.addWidget(self.controller_list)
-        createController_layout.addLayout(createControllerImage_layout) 
+        self.centerPivot_built_btn.clicked.connect (cmds.CenterPivot)
         
-        self.createController_layout_frame = QtWidgets.QGroupBox("Create Controller")
-        self.createController_layout_frame.setAlignment(QtCore.Qt.AlignCenter)
-        self.createController_layout_frame.setLayout(createController_layout)
-        self.createController_layout_frame.hide()
+        self.disHideLRA_built_btn.clicked.connect (cmds.ToggleLocalRotationAxes)
         
-        '''
-        Controller from Text layout
-        '''
-        controllerText_formLayout = QtWidgets.QFormLayout()
-        controllerText_formLayout.addRow ("Text", self.controller_text_name_le)
-        controllerText_formLayout.addRow("Font", self.controller_text_font_combo)
-        controllerText_formLayout.addRow ("", self.controller_text_btn)
+        #Joints
+        self.createJoint_built_btn.clicked.connect (cmds.JointTool)
+        self.createJoint_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.createJoint_built_btn.customContextMenuRequested.connect(cmds.JointToolOptions)
         
-        self.controllerText_frame = QtWidgets.QGroupBox("Create Controller from Input Text")
-        self.controllerText_frame.setAlignment(QtCore.Qt.AlignCenter)
-        self.controllerText_frame.setLayout(controllerText_formLayout)
-        self.controllerText_frame.hide()
+        self.mirrorJoint_built_btn.clicked.connect (cmds.MirrorJoint)
+        self.mirrorJoint_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.mirrorJoint_built_btn.customContextMenuRequested.connect(cmds.MirrorJointOptions)
         
-        '''
-        Export Tab Layout
-        '''
-        exportOptions_layout = QtWidgets.QGridLayout()
-        exportOptions_layout.setHorizontalSpacing(30)
-        exportOptions_layout.addWidget(self.exportSelected_rb,0,0)
-        exportOptions_layout.addWidget(self.exportModel_rb,0,1)
-        exportOptions_layout.addWidget(self.exportModelRig_rb,0,2)
-        exportOptions_layout.addWidget(self.exportAnimation_rb,1,0)
-        exportOptions_layout.addWidget(self.exportAnimationModel_rb,1,1)
-        exportOptions_layout.addWidget(self.exportAll_rb,1,2)
-        exportOptions_layout_grp = QtWidgets.QGroupBox("")
-        exportOptions_layout_grp.setLayout(exportOptions_layout)
+        self.orientJoint_built_btn.clicked.connect (cmds.OrientJoint)
+        self.orientJoint_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.orientJoint_built_btn.customContextMenuRequested.connect(cmds.OrientJointOptions)
         
-        exportEngine_layout = QtWidgets.QGridLayout()
-        exportEngine_layout.setHorizontalSpacing(112)
-        exportEngine_layout.addWidget(self.unityEngineSelected_rb,0,1)
-        exportEngine_layout.addWidget(self.unrealEngineSelected_rb,0,2)
-        exportEngine_layout.addWidget(self.noneEngineSelected_rb,0,3)
-        exportEngine_layout_grp = QtWidgets.QGroupBox("")
-        exportEngine_layout_grp.setLayout(exportEngine_layout)
+        self.createIKJoint_built_btn.clicked.connect (cmds.IKHandleTool)
+        self.createIKJoint_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.createIKJoint_built_btn.customContextMenuRequested.connect(cmds.IKHandleToolOptions)
         
-        exportFilePath_layout = QtWidgets.QHBoxLayout()
-        exportFilePath_layout.addWidget(self.exportProjectPath_le)
-        exportFilePath_layout.addWidget(self.exportProjecPath_btn)
+        self.splineIKJoint_built_btn.clicked.connect (cmds.IKSplineHandleTool)
+        self.splineIKJoint_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.splineIKJoint_built_btn.customContextMenuRequested.connect(cmds.IKSplineHandleToolOptions)
         
-        exportGeometry_layout = QtWidgets.QGridLayout()
-        exportGeometry_layout.setHorizontalSpacing(70)
-        exportGeometry_layout.addWidget(self.exportSmoothingGrp_cb,0,1)
-        exportGeometry_layout.addWidget(self.exportSmoothMesh_cb,0,2)
-        exportGeometry_layout.addWidget(self.exportRac_cb,0,3)
-        exportGeometry_layout.addWidget(self.exportTraingulate_cb,1,1)
+        self.jointSizeJoint_built_btn.clicked.connect (cmds.JdsWin)
         
-        exportTab_layout = QtWidgets.QFormLayout()
-        exportTab_layout.setVerticalSpacing(15)
-        exportTab_layout.addRow("Export: ", exportOptions_layout_grp)
-        exportTab_layout.addRow("Unity or Unreal: ", exportEngine_layout_grp)
-        exportTab_layout.addRow("Unity/Unreal Project Path: ", exportFilePath_layout)
-        exportTab_layout.addRow("Export Options: ", self.exportOptions_comboBox)
-        exportTab_layout.addRow("Geometry: ", exportGeometry_layout)
-        exportTab_layout.addRow("Animation: ", self.exportAnimations_cb)
-        exportTab_layout.addRow("", self.exportBakeAnimation_cb)
-        exportTab_layout.addRow("Start: ", self.exportBakeStart_sb)
-        exportTab_layout.addRow("End: ", self.exportBakeEnd_sb)
-        exportTab_layout.addRow("Steps: ", self.exportBakeSteps_sb)
-        exportTab_layout.addRow("", self.exportReSample_cb)
-        exportTab_layout.addRow("Units Coversion: ", self.exportUnitsAuto_cb)
-        exportTab_layout.addRow("Units Converted To: ", self.exportUnit_comboBox)
-        exportTab_layout.addRow("Up Axis: ", self.exportUpAxis_comboBox)
+        #Skinning
+        self.bindSkin_built_btn.clicked.connect (cmds.SmoothBindSkin)
+        self.bindSkin_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.bindSkin_built_btn.customContextMenuRequested.connect(cmds.SmoothBindSkinOptions)
         
-        self.exportTab_layout_frame = QtWidgets.QGroupBox("Export To FBX")
-        self.exportTab_layout_frame.setAlignment(QtCore.Qt.AlignCenter)
-        self.exportTab_layout_frame.setLayout(exportTab_layout)
-        self.exportTab_layout_frame.hide()
+        self.unBindSkin_built_btn.clicked.connect (cmds.DetachSkin)
+        self.unBindSkin_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.unBindSkin_built_btn.customContextMenuRequested.connect(cmds.DetachSkinOptions)
         
-        '''
-        Miscellaneous Tab Layout
-        '''
-        misc_tab_layout = QtWidgets.QVBoxLayout()
+        self.bindPoseSkin_built_btn.clicked.connect (cmds.GoToBindPose)
         
-        optimizeButton = QtWidgets.QVBoxLayout()
-        optimizeButton.addWidget(self.optimize_rig_btn)
-        optimizeButton_grp = QtWidgets.QGroupBox("Optimize Rig")
-        optimizeButton_grp.setAlignment(QtCore.Qt.AlignCenter)
-        optimizeButton_grp.setLayout(optimizeButton)
-        misc_tab_layout.addWidget(optimizeButton_grp)
+        self.paintSkin_built_btn.clicked.connect (cmds.ArtPaintSkinWeightsTool)
+        self.paintSkin_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.paintSkin_built_btn.customContextMenuRequested.connect(cmds.ArtPaintSkinWeightsToolOptions)
         
-        combineShape = QtWidgets.QVBoxLayout()
-        combineShape.addWidget(self.combine_shapeNode_btn)
-        combineShape_grp = QtWidgets.QGroupBox("Select the Objects to Combine its Shape")
-        combineShape_grp.setAlignment(QtCore.Qt.AlignCenter)
-        combineShape_grp.setLayout(combineShape)
-        misc_tab_layout.addWidget(combineShape_grp)
+        self.mirrorSkin_built_btn.clicked.connect (cmds.MirrorSkinWeights)
+        self.mirrorSkin_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.mirrorSkin_built_btn.customContextMenuRequested.connect(cmds.MirrorSkinWeightsOptions)
         
-        selectSkinnedJnts = QtWidgets.QVBoxLayout()
-        selectSkinnedJnts.addWidget(self.select_skinnedJnts_btn)
-        selectSkinnedJnts_grp = QtWidgets.QGroupBox("Select Mesh and Click the Button")
-        selectSkinnedJnts_grp.setAlignment(QtCore.Qt.AlignCenter)
-        selectSkinnedJnts_grp.setLayout(selectSkinnedJnts)
-        misc_tab_layout.addWidget(selectSkinnedJnts_grp)
-                
-        createIKControllerSize_layout = QtWidgets.QFormLayout()
-        createIKControllerSize_layout.addRow ("Controller Size", self.createIKControllerSize_sb)
-        createIKControllerSize_layout.setAlignment(QtCore.Qt.AlignCenter)
+        self.copyWeightsSkin_built_btn.clicked.connect (cmds.CopySkinWeights)
+        self.copyWeightsSkin_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.copyWeightsSkin_built_btn.customContextMenuRequested.connect(cmds.CopySkinWeightsOptions)
         
-        createIK = QtWidgets.QVBoxLayout()
-        createIK.addLayout(createIKControllerSize_layout)
-        createIK.addWidget(self.create_IK_btn)
-        createIK_grp = QtWidgets.QGroupBox("Select 3 Joints in a Chain to Create IK")
-        createIK_grp.setAlignment(QtCore.Qt.AlignCenter)
-        createIK_grp.setLayout(createIK)
-        misc_tab_layout.addWidget(createIK_grp)
+        self.smoothSkin_built_btn.clicked.connect (cmds.SmoothSkinWeights)
+        self.smoothSkin_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.smoothSkin_built_btn.customContextMenuRequested.connect(cmds.SmoothSkinWeightsOptions)
         
-        misc_tab_layout.addStretch(0)       
+        self.copyVertexSkin_built_btn.clicked.connect (cmds.CopyVertexWeights)
         
-        self.misc_layout_frame = QtWidgets.QGroupBox("Miscellaneous")
-        self.misc_layout_frame.setAlignment(QtCore.Qt.AlignCenter)
-        self.misc_layout_frame.setLayout(misc_tab_layout)
-        self.misc_layout_frame.hide()
-                 
-        '''
-        Range of Motion (ROM) Layout
-        '''   
-                   
-        rom_main_gridLayout = QtWidgets.QGridLayout()
-        rom_main_gridLayout.setHorizontalSpacing(5)
-        rom_main_gridLayout.setColumnStretch(0,0)
-        rom_main_gridLayout.setColumnStretch(1,1)
-        rom_main_gridLayout.setColumnStretch(2,1)
-        rom_main_gridLayout.setColumnStretch(3,1)
+        self.pasteVertexSkin_built_btn.clicked.connect (cmds.PasteVertexWeights)
         
-        rom_main_gridLayout.setColumnMinimumWidth (1,50)
-        rom_main_gridLayout.setColumnMinimumWidth (2,50)
-        rom_main_gridLayout.setColumnMinimumWidth (3,50)
+        self.setInfluenceSkin_built_btn.clicked.connect (cmds.SetMaxInfluences)
         
+        self.addInfluenceSkin_built_btn.clicked.connect (cmds.AddInfluence)
+        self.addInfluenceSkin_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.addInfluenceSkin_built_btn.customContextMenuRequested.connect(cmds.AddInfluenceOptions)
         
-        rom_main_gridLayout.addWidget (QtWidgets.QLabel(""), 0, 0)
-        rom_main_gridLayout.addWidget (self.XLabel_label, 0, 1)
-        rom_main_gridLayout.addWidget (self.YLabel_label, 0, 2)
-        rom_main_gridLayout.addWidget (self.ZLabel_label, 0, 3)
+        self.removeInfluenceSkin_built_btn.clicked.connect (cmds.RemoveInfluence)
         
-        rom_main_gridLayout.addWidget (QtWidgets.QLabel("+ve"), 1, 0)
-        rom_main_gridLayout.addWidget (self.rotXP_cb, 1, 1)
-        rom_main_gridLayout.addWidget (self.rotYP_cb, 1, 2)
-        rom_main_gridLayout.addWidget (self.rotZP_cb, 1, 3)
+        self.pruneSkin_built_btn.clicked.connect (cmds.PruneSmallWeights)
+        self.pruneSkin_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.pruneSkin_built_btn.customContextMenuRequested.connect(cmds.PruneSmallWeightsOptions)
         
-        rom_main_gridLayout.addWidget (QtWidgets.QLabel("-ve"), 2, 0)
-        rom_main_gridLayout.addWidget (self.rotXN_cb, 2, 1)
-        rom_main_gridLayout.addWidget (self.rotYN_cb, 2, 2)
-        rom_main_gridLayout.addWidget (self.rotZN_cb, 2, 3)
+        self.bakeDeformSkin_built_btn.clicked.connect (cmds.BakeDeformerTool)
         
-        rom_main_gridLayout.addWidget (QtWidgets.QLabel(""), 3, 0, 1, 4)
+        #Deform
+        self.blendShapeDeform_built_btn.clicked.connect (cmds.CreateBlendShape)
+        self.blendShapeDeform_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.blendShapeDeform_built_btn.customContextMenuRequested.connect(cmds.CreateBlendShapeOptions)
         
-        rom_main_gridLayout.addWidget (QtWidgets.QLabel("Rotate Angle"), 4, 0)
-        rom_main_gridLayout.addWidget (self.angleBox_sb, 4, 1)
-        
-        rom_main_gridLayout.addWidget (QtWidgets.QLabel("Frame Padding"), 5, 0)
-        rom_main_gridLayout.addWidget (self.framePad_sb, 5, 1)
-        
-        rom_main_gridLayout.addWidget (QtWidgets.QLabel("Rotate Angle"), 6, 0)
-        rom_main_gridLayout.addWidget (self.frameStart_sb, 6, 1)
-        
-        rom_main_gridLayout.addWidget (QtWidgets.QLabel(""), 7, 0, 1, 4)
-        
-        rom_main_gridLayout.addWidget (self.rom_delete_key_btn, 8, 0, 1, 4)
-        
-        rom_bottomSpacing = QtWidgets.QSpacerItem(5, 5, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
-        rom_main_gridLayout.addItem (rom_bottomSpacing, 9, 0)
-        
-        self.rom_layout_frame = QtWidgets.QGroupBox("Range of Motion (ROM)")
-        self.rom_layout_frame.setAlignment(QtCore.Qt.AlignCenter)
-        self.rom_layout_frame.setLayout(rom_main_gridLayout)
-        self.rom_layout_frame.hide()
-                 
-        
-        '''
-        Custom Window Items Layout
-        '''
-        custom_window_items_layout = QtWidgets.QVBoxLayout()
-        custom_window_items_layout.addWidget(self.search_replace_frame)
-        custom_window_items_layout.addWidget(self.createController_layout_frame)
-        custom_window_items_layout.addWidget(self.controllerText_frame)
-        custom_window_items_layout.addWidget(self.exportTab_layout_frame)
-        custom_window_items_layout.addWidget(self.rom_layout_frame)
-        custom_window_items_layout.addWidget(self.misc_layout_frame)
+        self.poseSpaceDeform_built_btn.clicked.connect (cmds.CreatePoseInterpolator)
+        self.poseSpaceDeform_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.poseSpaceDeform_built_btn.customContextMenuRequested.connect(cmds.CreatePoseInterpolatorOptions)
         
-        '''       
-        Custom Window Layout
-        '''
-        custom_window_layout = QtWidgets.QHBoxLayout()
-        custom_window_layout.addWidget(self.custom_list)  
-        custom_window_layout.addLayout(custom_window_items_layout) 
-        self.custom_window_layout_frame = QtWidgets.QFrame()
-        self.custom_window_layout_frame.setLayout(custom_window_layout)
+        self.clusterDeform_built_btn.clicked.connect (cmds.CreateCluster)
+        self.clusterDeform_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.clusterDeform_built_btn.customContextMenuRequested.connect(cmds.CreateClusterOptions)
         
-        '''
-        CUSTOM WINDOW LAYOUT
-        END
-        '''
+        #Constraint
+        self.parentConstraint_built_btn.clicked.connect (cmds.ParentConstraint)
+        self.parentConstraint_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.parentConstraint_built_btn.customContextMenuRequested.connect(cmds.ParentConstraintOptions)
         
-        '''
-        BUILT-IN WINDOW LAYOUT
-        START
-        '''
-        '''
-        General Buttons
-        '''
-        builtIn_general_layout1 = QtWidgets.QHBoxLayout()
-        builtIn_general_layout1.addWidget(self.locator_built_btn)
-        builtIn_general_layout1.addWidget(self.deleteKeys_built_btn)
-        builtIn_general_layout1.addWidget(self.deleteHistory_built_btn)
-        builtIn_general_layout1.addWidget(self.duplicate_built_btn)
-        builtIn_general_layout1.addWidget(self.parent_built_btn)
-        builtIn_general_layout1.addWidget(self.unParent_built_btn)
-        builtIn_general_layout2 = QtWidgets.QHBoxLayout()
-        builtIn_general_layout2.addWidget(self.hierachy_built_btn)
-        builtIn_general_layout2.addWidget(self.freezeTrans_built_btn)
-        builtIn_general_layout2.addWidget(self.resetTrans_built_btn)
-        builtIn_general_layout2.addWidget(self.centerPivot_built_btn)
-        builtIn_general_layout2.addWidget(self.disHideLRA_built_btn)
+        self.pointConstraint_built_btn.clicked.connect (cmds.PointConstraint)
+        self.pointConstraint_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.pointConstraint_built_btn.customContextMenuRequested.connect(cmds.PointConstraintOptions)
         
-        builtIn_general_layout = QtWidgets.QVBoxLayout()
-        builtIn_general_layout.addLayout(builtIn_general_layout1)
-        builtIn_general_layout.addLayout(builtIn_general_layout2)
-        builtIn_general_layout_grp = QtWidgets.QGroupBox ("General")
-        builtIn_general_layout_grp.setAlignment(QtCore.Qt.AlignCenter)
-        builtIn_general_layout_grp.setLayout(builtIn_general_layout)
+        self.orientConstraint_built_btn.clicked.connect (cmds.OrientConstraint)
+        self.orientConstraint_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.orientConstraint_built_btn.customContextMenuRequested.connect(cmds.OrientConstraintOptions)
         
-        '''
-        Joint Buttons
-        '''
-        builtIn_joint_layout = QtWidgets.QHBoxLayout()
-        builtIn_joint_layout.addWidget(self.createJoint_built_btn)
-        builtIn_joint_layout.addWidget(self.mirrorJoint_built_btn)
-        builtIn_joint_layout.addWidget(self.orientJoint_built_btn)
-        builtIn_joint_layout.addWidget(self.createIKJoint_built_btn)
-        builtIn_joint_layout.addWidget(self.splineIKJoint_built_btn)
-        builtIn_joint_layout.addWidget(self.jointSizeJoint_built_btn)
-        builtIn_joint_layout_grp = QtWidgets.QGroupBox ("Joint")
-        builtIn_joint_layout_grp.setAlignment(QtCore.Qt.AlignCenter)
-        builtIn_joint_layout_grp.setLayout(builtIn_joint_layout)
+        self.scaleConstraint_built_btn.clicked.connect (cmds.ScaleConstraint)
+        self.scaleConstraint_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.scaleConstraint_built_btn.customContextMenuRequested.connect(cmds.ScaleConstraintOptions)
         
-        '''
-        Skinning Buttons
-        '''
-        builtIn_skinning_layout1 = QtWidgets.QHBoxLayout()
-        builtIn_skinning_layout1.addWidget(self.bindSkin_built_btn)
-        builtIn_skinning_layout1.addWidget(self.unBindSkin_built_btn)
-        builtIn_skinning_layout1.addWidget(self.bindPoseSkin_built_btn)
-        builtIn_skinning_layout1.addWidget(self.paintSkin_built_btn)
-        builtIn_skinning_layout1.addWidget(self.mirrorSkin_built_btn)
-        builtIn_skinning_layout1.addWidget(self.copyWeightsSkin_built_btn)
-        builtIn_skinning_layout2 = QtWidgets.QHBoxLayout()     
-        builtIn_skinning_layout2.addWidget(self.smoothSkin_built_btn)   
-        builtIn_skinning_layout2.addWidget(self.copyVertexSkin_built_btn)
-        builtIn_skinning_layout2.addWidget(self.pasteVertexSkin_built_btn)
-        builtIn_skinning_layout2.addWidget(self.setInfluenceSkin_built_btn)
-        builtIn_skinning_layout2.addWidget(self.addInfluenceSkin_built_btn)
-        builtIn_skinning_layout2.addWidget(self.removeInfluenceSkin_built_btn)
-        builtIn_skinning_layout3 = QtWidgets.QHBoxLayout()     
-        builtIn_skinning_layout3.addWidget(self.pruneSkin_built_btn)
-        builtIn_skinning_layout3.addWidget(self.bakeDeformSkin_built_btn)
+        self.poleVectorConstraint_built_btn.clicked.connect (cmds.PoleVectorConstraint)
+        self.poleVectorConstraint_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.poleVectorConstraint_built_btn.customContextMenuRequested.connect(cmds.PoleVectorConstraintOptions)
         
-        builtIn_skinning_layout = QtWidgets.QVBoxLayout()
-        builtIn_skinning_layout.addLayout(builtIn_skinning_layout1)
-        builtIn_skinning_layout.addLayout(builtIn_skinning_layout2)
-        builtIn_skinning_layout.addLayout(builtIn_skinning_layout3)
-        builtIn_skinning_layout_grp = QtWidgets.QGroupBox ("Skinning")
-        builtIn_skinning_layout_grp.setAlignment(QtCore.Qt.AlignCenter)
-        builtIn_skinning_layout_grp.setLayout(builtIn_skinning_layout)
+        self.aimConstraint_built_btn.clicked.connect (cmds.AimConstraint)
+        self.aimConstraint_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.aimConstraint_built_btn.customContextMenuRequested.connect(cmds.AimConstraintOptions)
         
-        '''
-        Deform Buttons
-        '''
-        builtIn_deform_layout = QtWidgets.QHBoxLayout()
-        builtIn_deform_layout.addWidget(self.blendShapeDeform_built_btn)
-        builtIn_deform_layout.addWidget(self.poseSpaceDeform_built_btn)
-        builtIn_deform_layout.addWidget(self.clusterDeform_built_btn)
-        builtIn_deform_layout_grp = QtWidgets.QGroupBox ("Deform")
-        builtIn_deform_layout_grp.setAlignment(QtCore.Qt.AlignCenter)
-        builtIn_deform_layout_grp.setLayout(builtIn_deform_layout)
+        #Windows 
+        self.connectionWindow_built_btn.clicked.connect(cmds.ConnectionEditor)
+        self.componentWindow_built_btn.clicked.connect(cmds.ComponentEditor)
+        self.nodeWindow_built_btn.clicked.connect(cmds.NodeEditorWindow)
+        self.channelWindow_built_btn.clicked.connect(cmds.ChannelControlEditor)
+        self.setDrivenKeyWindow_built_btn.clicked.connect(cmds.SetDrivenKey)
+        self.shapeWindow_built_btn.clicked.connect(cmds.ShapeEditor)
+        self.poseWindow_built_btn.clicked.connect(cmds.PoseEditor)
+        self.graphWindow_built_btn.clicked.connect(cmds.GraphEditor)
         
+        return self.builtIn_window_layout_frame
+    
+    '''
+    Control Rig Page
+    '''
+    def build_controlRig_page (self):
         '''
-        Constraint Buttons
+        Create Control Rig Widgets
         '''
-        builtIn_constraint_layout = QtWidgets.QHBoxLayout()
-        builtIn_constraint_layout.addWidget(self.parentConstraint_built_btn)
-        builtIn_constraint_layout.addWidget(self.pointConstraint_built_btn)
-        builtIn_constraint_layout.addWidget(self.orientConstraint_built_btn)
-        builtIn_constraint_layout.addWidget(self.scaleConstraint_built_btn)
-        builtIn_constraint_layout.addWidget(self.poleVectorConstraint_built_btn)
-        builtIn_constraint_layout.addWidget(self.aimConstraint_built_btn)
-        builtIn_constraint_layout_grp = QtWidgets.QGroupBox ("Constraint")
-        builtIn_constraint_layout_grp.setAlignment(QtCore.Qt.AlignCenter)
-        builtIn_constraint_layout_grp.setLayout(builtIn_constraint_layout)
+        self.left_joints_le = QtWidgets.QLineEdit()
+        self.right_joints_le = QtWidgets.QLineEdit()
+        self.controllerSize_controlRig_sb = QtWidgets.QDoubleSpinBox()
+        self.controllerSize_controlRig_sb.setValue(10.0)
+        self.controllerSize_controlRig_sb.setFixedWidth (65)
+        self.controllerSize_controlRig_sb.setRange (0.01 , 150.0)
+        self.controllerSize_controlRig_sb.setSingleStep (0.1)
+        self.ikfkBlend_comboBox = QtWidgets.QComboBox()
+        self.ikfkBlend_comboBox.addItems(["Constraint", 
+                                    "Matrix"])
+        self.ikfkBlend_comboBox.setToolTip ("Matrix drives the bind joints with blendMatrix/multMatrix/decomposeMatrix instead of parent constraints")
+        self.blendBenchmark_btn = QtWidgets.QPushButton("Benchmark")
+        self.blendBenchmark_btn.setToolTip ("Build the rig in both blend modes and compare the playback fps")
+        self.drivers_comboBox = QtWidgets.QComboBox()
+        self.drivers_comboBox.addItems(["Driven Keys", 
+                                    "Math Nodes"])
+        self.drivers_comboBox.setToolTip ("Math Nodes builds the foot roll and follow drivers from clamp/multDoubleLinear nodes instead of driven keys")
+        self.ikStretch_comboBox = QtWidgets.QComboBox()
+        self.ikStretch_comboBox.addItems(IK_STRETCH_MODES)
+        self.ikStretch_comboBox.setToolTip ("Adds stretch (and a soft falloff near full extension) to the arm and leg IK, built from native math nodes")
+        self.stretchBenchmark_btn = QtWidgets.QPushButton("Benchmark")
+        self.stretchBenchmark_btn.setToolTip ("Build the rig in every stretch mode and compare the playback cost per frame")
+        self.spineControls_sb = QtWidgets.QSpinBox()
+        self.spineControls_sb.setRange(2, 9)
+        self.spineControls_sb.setValue(2)
+        self.spineControls_sb.setToolTip ("Number of spine controllers. Each one moves a CV of the spine curve, the spine joints follow the curve through motionPath nodes")
+        self.spineBenchmark_btn = QtWidgets.QPushButton("Benchmark")
+        self.spineBenchmark_btn.setToolTip ("Build the rig with 2 to 5 spine controllers and compare the build time and the playback fps")
+        self.handSetup_cb = QtWidgets.QCheckBox("Finger Controls")
+        self.handSetup_cb.setChecked(False)
+        self.handSetup_cb.setToolTip ("FK controllers on every finger joint below the wrists, with curl and spread attributes on the L_hand_CTRL and R_hand_CTRL controllers")
+        self.mirrorBuild_cb = QtWidgets.QCheckBox("Mirror Left to Right")
+        self.mirrorBuild_cb.setToolTip ("Build the left arm and leg, then create the right side from the mirrored result in one batch. Falls back to a regular build when the skeleton is not symmetric")
+        self.autoDetectJoints_btn = QtWidgets.QPushButton("Auto Detect Joints")
+        self.autoDetectJoints_btn.setToolTip ("Fill all the joint fields from the selected skeleton (or the biggest skeleton in the scene) using its hierarchy, joint names and positions")
+        self.batchRig_btn = QtWidgets.QPushButton("Rig From Manifest...")
+        self.saveTemplate_btn = QtWidgets.QPushButton("Save Template...")
+        self.saveTemplate_btn.setToolTip ("Save the shapes, colors, offsets and custom attribute values of every controller below MAIN_CTRL to a rig template")
+        self.loadTemplate_btn = QtWidgets.QPushButton("Load Template...")
+        self.loadTemplate_btn.setToolTip ("Apply a saved rig template to the controllers of the rebuilt rig, matched by name")
+        self.batchRig_btn.setToolTip ("Rig every character listed in a JSON manifest in parallel mayapy sessions and write a timing report")
         
-        '''
-        Windows Buttons
-        '''
-        builtIn_editor_layout1 = QtWidgets.QHBoxLayout()
-        builtIn_editor_layout1.addWidget(self.connectionWindow_built_btn)
-        builtIn_editor_layout1.addWidget(self.componentWindow_built_btn)
-        builtIn_editor_layout1.addWidget(self.nodeWindow_built_btn)
-        builtIn_editor_layout1.addWidget(self.channelWindow_built_btn)
-        builtIn_editor_layout2 = QtWidgets.QHBoxLayout()
-        builtIn_editor_layout2.addWidget(self.setDrivenKeyWindow_built_btn)
-        builtIn_editor_layout2.addWidget(self.shapeWindow_built_btn)
-        builtIn_editor_layout2.addWidget(self.poseWindow_built_btn)
-        builtIn_editor_layout2.addWidget(self.graphWindow_built_btn)
+        self.pelvis_le = QtWidgets.QLineEdit()
+        self.pelvis_btn = QtWidgets.QPushButton("<<")
+        self.spine1_le = QtWidgets.QLineEdit()
+        self.spine1_btn = QtWidgets.QPushButton("<<")
+        self.chest_le = QtWidgets.QLineEdit()
+        self.chest_btn = QtWidgets.QPushButton("<<")
+        self.neck_le = QtWidgets.QLineEdit()
+        self.neck_btn = QtWidgets.QPushButton("<<")
+        self.head_le = QtWidgets.QLineEdit()
+        self.head_btn = QtWidgets.QPushButton("<<")
         
-        builtIn_editor_layout = QtWidgets.QVBoxLayout()
-        builtIn_editor_layout.addLayout(builtIn_editor_layout1)
-        builtIn_editor_layout.addLayout(builtIn_editor_layout2)
-        builtIn_editor_layout_grp = QtWidgets.QGroupBox ("Windows")
-        builtIn_editor_layout_grp.setAlignment(QtCore.Qt.AlignCenter)
-        builtIn_editor_layout_grp.setLayout(builtIn_editor_layout)
+        self.armIK_cb = QtWidgets.QCheckBox("IK")
+        self.armIK_cb.setChecked(True)
+        self.armFK_cb = QtWidgets.QCheckBox("FK")
+        self.armFK_cb.setChecked(True)
+        self.clavicle_le = QtWidgets.QLineEdit()
+        self.clavicle_btn = QtWidgets.QPushButton("<<")
+        self.shoulder_le = QtWidgets.QLineEdit()
+        self.shoulder_btn = QtWidgets.QPushButton("<<")
+        self.elbow_le = QtWidgets.QLineEdit()
+        self.elbow_btn = QtWidgets.QPushButton("<<")
+        self.wrist_le = QtWidgets.QLineEdit()
+        self.wrist_btn = QtWidgets.QPushButton("<<")
         
+        self.legIK_cb = QtWidgets.QCheckBox("IK")
+        self.legIK_cb.setChecked(True)
+        self.legFK_cb = QtWidgets.QCheckBox("FK")
+        self.legFK_cb.setChecked(True)
+        self.thigh_le = QtWidgets.QLineEdit()
+        self.thigh_btn = QtWidgets.QPushButton("<<")
+        self.knee_le = QtWidgets.QLineEdit()
+        self.knee_btn = QtWidgets.QPushButton("<<")
+        self.ankle_le = QtWidgets.QLineEdit()
+        self.ankle_btn = QtWidgets.QPushButton("<<")
+        self.ball_le = QtWidgets.QLineEdit()
+        self.ball_btn = QtWidgets.QPushButton("<<")
         
-        '''
-        Built-In Window Items
-        '''
-        builtIn_window_layout = QtWidgets.QVBoxLayout()
-        builtIn_window_layout.addWidget (builtIn_general_layout_grp)
-        builtIn_window_layout.addWidget (builtIn_joint_layout_grp)
-        builtIn_window_layout.addWidget (builtIn_skinning_layout_grp)
-        builtIn_window_layout.addWidget (builtIn_deform_layout_grp)
-        builtIn_window_layout.addWidget (builtIn_constraint_layout_grp)
-        builtIn_window_layout.addWidget (builtIn_editor_layout_grp)
-        builtIn_window_layout.addWidget (self.builtIn_label)
-        self.builtIn_window_layout_frame = QtWidgets.QFrame()
-        self.builtIn_window_layout_frame.setLayout(builtIn_window_layout)
-        self.builtIn_window_layout_frame.hide()
-        '''
-        BUILT-IN WINDOW LAYOUT
-        END
-        '''
+        self.footRollControls_cb = QtWidgets.QCheckBox("Foot Roll Controls")
         
-        '''
-        CONTROL RIG WINDOW LAYOUT
-        START
-        '''
         '''
         Control Rig Form Layout
         '''
@@ -1129,6 +1787,31 @@ class MainDialog (QtWidgets.QDialog):
         sideIndicator_form_layout.addRow("Left Joint Indicator:", self.left_joints_le)
         sideIndicator_form_layout.addRow("Right Joint Indicator:", self.right_joints_le)
         sideIndicator_form_layout.addRow("Controller Size:", self.controllerSize_controlRig_sb)
+        
+        ikfkBlend_layout = QtWidgets.QHBoxLayout()
+        ikfkBlend_layout.addWidget(self.ikfkBlend_comboBox)
+        ikfkBlend_layout.addWidget(self.blendBenchmark_btn)
+        sideIndicator_form_layout.addRow("IK/FK Blend:", ikfkBlend_layout)
+        sideIndicator_form_layout.addRow("Drivers:", self.drivers_comboBox)
+        
+        ikStretch_layout = QtWidgets.QHBoxLayout()
+        ikStretch_layout.addWidget(self.ikStretch_comboBox)
+        ikStretch_layout.addWidget(self.stretchBenchmark_btn)
+        sideIndicator_form_layout.addRow("IK Stretch:", ikStretch_layout)
+        
+        spineControls_layout = QtWidgets.QHBoxLayout()
+        spineControls_layout.addWidget(self.spineControls_sb)
+        spineControls_layout.addWidget(self.spineBenchmark_btn)
+        sideIndicator_form_layout.addRow("Spine Controls:", spineControls_layout)
+        sideIndicator_form_layout.addRow("Hands:", self.handSetup_cb)
+        sideIndicator_form_layout.addRow("Right Side:", self.mirrorBuild_cb)
+        sideIndicator_form_layout.addRow("Batch:", self.batchRig_btn)
+        
+        rigTemplate_layout = QtWidgets.QHBoxLayout()
+        rigTemplate_layout.addWidget(self.saveTemplate_btn)
+        rigTemplate_layout.addWidget(self.loadTemplate_btn)
+        sideIndicator_form_layout.addRow("Template:", rigTemplate_layout)
+        sideIndicator_form_layout.addRow("Joints:", self.autoDetectJoints_btn)
         controlRig_layout.addLayout(sideIndicator_form_layout)
         
         pelvis_layout = QtWidgets.QHBoxLayout()
@@ -1219,315 +1902,34 @@ class MainDialog (QtWidgets.QDialog):
         self.controlRig_form_layout_frame = QtWidgets.QGroupBox("Create Biped Control Rig")
         self.controlRig_form_layout_frame.setAlignment(QtCore.Qt.AlignCenter)
         self.controlRig_form_layout_frame.setLayout(controlRig_layout)
-        self.controlRig_form_layout_frame.hide()
         
         '''
-        CONTROL RIG WINDOW LAYOUT
-        END
-        '''    
-           
-        '''
-        Main Layout
+        Custom Rig Button Connections
         '''
-        main_layout = QtWidgets.QVBoxLayout(self)
- 
-        main_layout.addLayout(mainCombo_layout)
-        main_layout.addWidget (self.custom_window_layout_frame)
-        main_layout.addWidget (self.builtIn_window_layout_frame)
-        main_layout.addWidget(self.controlRig_form_layout_frame)
-        main_layout.addWidget(self.button_grp)
-    
-
-    def create_connection (self):
-        self.cancel_btn.clicked.connect(self.close)
+        self.pelvis_btn.clicked.connect(lambda: self.controlRigButtonPressed("pelvis"))
+        self.spine1_btn.clicked.connect(lambda: self.controlRigButtonPressed("spine1"))
+        self.chest_btn.clicked.connect(lambda: self.controlRigButtonPressed("chest"))
+        self.neck_btn.clicked.connect(lambda: self.controlRigButtonPressed("neck"))
+        self.head_btn.clicked.connect(lambda: self.controlRigButtonPressed("head"))
+        self.clavicle_btn.clicked.connect(lambda: self.controlRigButtonPressed("clavicle"))
+        self.shoulder_btn.clicked.connect(lambda: self.controlRigButtonPressed("shoulder"))
+        self.elbow_btn.clicked.connect(lambda: self.controlRigButtonPressed("elbow"))
+        self.wrist_btn.clicked.connect(lambda: self.controlRigButtonPressed("wrist"))
+        self.thigh_btn.clicked.connect(lambda: self.controlRigButtonPressed("thigh"))
+        self.knee_btn.clicked.connect(lambda: self.controlRigButtonPressed("knee"))
+        self.ankle_btn.clicked.connect(lambda: self.controlRigButtonPressed("ankle"))
+        self.ball_btn.clicked.connect(lambda: self.controlRigButtonPressed("ball"))
+        self.footRollControls_cb.toggled.connect (self.footRollControlToggle)
         
-        self.helpDocs_btn.clicked.connect(showHelp)
+        self.batchRig_btn.clicked.connect (self.batchRigButtonPushed)
+        self.saveTemplate_btn.clicked.connect (self.saveTemplateButtonPushed)
+        self.loadTemplate_btn.clicked.connect (self.loadTemplateButtonPushed)
+        self.autoDetectJoints_btn.clicked.connect (self.autoDetectJointsButtonPressed)
+        self.blendBenchmark_btn.clicked.connect (lambda: benchmarkBlendModes([self.left_joints_le.text(), self.right_joints_le.text(), self.pelvis_le.text(), self.spine1_le.text(), self.chest_le.text(), self.neck_le.text(), self.head_le.text(), self.clavicle_le.text(), self.shoulder_le.text(), self.elbow_le.text(), self.wrist_le.text(), self.thigh_le.text(), self.knee_le.text(), self.ankle_le.text(), self.ball_le.text(), self.armFK_cb.checkState(), self.armIK_cb.checkState(), self.legFK_cb.checkState(), self.legIK_cb.checkState(), self.controllerSize_controlRig_sb.value(),self.footRollControls_cb.checkState()]))
+        self.stretchBenchmark_btn.clicked.connect (lambda: benchmarkStretchModes([self.left_joints_le.text(), self.right_joints_le.text(), self.pelvis_le.text(), self.spine1_le.text(), self.chest_le.text(), self.neck_le.text(), self.head_le.text(), self.clavicle_le.text(), self.shoulder_le.text(), self.elbow_le.text(), self.wrist_le.text(), self.thigh_le.text(), self.knee_le.text(), self.ankle_le.text(), self.ball_le.text(), self.armFK_cb.checkState(), self.armIK_cb.checkState(), self.legFK_cb.checkState(), self.legIK_cb.checkState(), self.controllerSize_controlRig_sb.value(),self.footRollControls_cb.checkState()]))
+        self.spineBenchmark_btn.clicked.connect (lambda: benchmarkSpineControls([self.left_joints_le.text(), self.right_joints_le.text(), self.pelvis_le.text(), self.spine1_le.text(), self.chest_le.text(), self.neck_le.text(), self.head_le.text(), self.clavicle_le.text(), self.shoulder_le.text(), self.elbow_le.text(), self.wrist_le.text(), self.thigh_le.text(), self.knee_le.text(), self.ankle_le.text(), self.ball_le.text(), self.armFK_cb.checkState(), self.armIK_cb.checkState(), self.legFK_cb.checkState(), self.legIK_cb.checkState(), self.controllerSize_controlRig_sb.value(),self.footRollControls_cb.checkState()]))
         
-        self.custom_list.currentItemChanged.connect(self.custom_list_change)
-        
-        self.main_comboBox.activated[str].connect(self.on_activated_text)
-        
-        '''
-        SEARCH/REPLACE NAMES
-        START
-        '''
-        #Search and Replace Names
-        self.search_apply_btn.clicked.connect (lambda: searchReplaceNames(self.search_name_le.text(), self.replace_name_le.text(), self.hierachy_name_rb.isChecked(), self.selected_name_rb.isChecked(), self.all_name_rb.isChecked()))
-        #Prefix Name
-        self.addPrefix_btn.clicked.connect(lambda: prefixName(self.addPrefix_le.text(), self.hierachy_name_rb.isChecked(), self.selected_name_rb.isChecked(), self.all_name_rb.isChecked()))
-        #Suffix Name
-        self.addSuffix_btn.clicked.connect(lambda: suffixName(self.addSuffix_le.text(), self.hierachy_name_rb.isChecked(), self.selected_name_rb.isChecked(), self.all_name_rb.isChecked()))
-        #Padding Rename
-        self.numRename_btn.clicked.connect (lambda: paddingRename (self.numRename_le.text(), self.startNumber_sb.value(), self.paddingNumber_sb.value(), self.stepsNumber_sb.value(), self.hierachy_name_rb.isChecked(), self.selected_name_rb.isChecked(), self.all_name_rb.isChecked()))
-        '''
-        SEARCH/REPLACE NAMES
-        END
-        '''
-        
-        '''
-        CREATE CONTROLLERS
-        START
-        '''
-        self.controllerGroup_sb.valueChanged.connect(self.groupNumber_createController)
-        self.controller_list.currentItemChanged.connect(self.controller_list_change)
-        self.controller_apply_btn.clicked.connect(lambda: createController(self.controllerName_le.text(), self.controllerSuffix_le.text(), self.controllerSize_sb.value(), self.controllerForceLabel_cb.checkState(), self.controllerSnapSelected_cb.checkState(), self.controller_list.item(self.controller_list.currentRow()).text(), self.controllerGroup_sb.value(), self.firstGroupSuffix_le.text(), self.secondGroupSuffix_le.text(), self.thirdGroupSuffix_le.text(), self.fourthGroupSuffix_le.text(), self.controllerColor_ccb.getColor()))
-        '''
-        CREATE CONTROLLERS
-        END
-        '''
-        
-        '''
-        CREATE CONTROLLER FROM TEXT CONNECTION
-        START
-        '''
-        self.controller_text_btn.clicked.connect(lambda: createControllerText(self.controller_text_name_le.text(), self.controller_text_font_combo.currentText()))
-        '''
-        CREATE CONTROLLER FROM TEXT CONNECTION
-        END
-        '''
-        
-        '''
-        EXPORT TO FBX CONNECTION
-        START
-        '''
-        self.exportSelected_rb.toggled.connect(self.deSelectAnimationBox)
-        self.exportModel_rb.toggled.connect(self.deSelectAnimationBox)
-        self.exportModelRig_rb.toggled.connect(self.deSelectAnimationBox)
-        self.exportAll_rb.toggled.connect(self.deSelectAnimationBox)
-        self.exportAnimation_rb.toggled.connect(self.selectAnimationBox)
-        self.exportAnimationModel_rb.toggled.connect(self.selectAnimationBox)
-        
-        self.exportProjecPath_btn.clicked.connect(self.select_unityUnreal_export_location)
-        
-        self.unityEngineSelected_rb.toggled.connect(self.exportPathDefUnity)
-        self.unrealEngineSelected_rb.toggled.connect(self.exportPathDefUnreal)
-        self.noneEngineSelected_rb.toggled.connect(self.exportPathDefNone)
-        
-        self.exportOptions_comboBox.activated[str].connect(self.exportOptionComboActivated)
-        
-        self.exportAnimations_cb.toggled.connect(self.exportAnimationToggle)
-        self.exportBakeAnimation_cb.toggled.connect(self.exportBakeAnimationToggle)
-        self.exportUnitsAuto_cb.toggled.connect(self.exportUnitAutoToggle)
-        
-        self.exportApply_btn.clicked.connect (self.exportButtonPressed)
-        '''
-        EXPORT TO FBX CONNECTION
-        END
-        '''
-                
-        '''
-        RANGE OF MOTION (ROM) CONNECTION
-        START
-        '''
-        self.rom_delete_key_btn.clicked.connect (cmds.DeleteKeys)
-        
-        self.rom_apply_btn.clicked.connect(lambda: createROM(self.rotXP_cb.checkState(),self.rotYP_cb.checkState(),self.rotZP_cb.checkState(),self.rotXN_cb.checkState(),self.rotYN_cb.checkState(),self.rotZN_cb.checkState(),self.angleBox_sb.value(),self.framePad_sb.value(),self.frameStart_sb.value()))
-        '''
-        RANGE OF MOTION (ROM) CONNECTION
-        START
-        '''  
-        
-        '''
-        MISCELLANEOUS TAB BUTTONS CONNECTION
-        START
-        '''
-        #Button to create the IK Chain
-        self.create_IK_btn.clicked.connect(lambda: createIKChain(self.createIKControllerSize_sb.value()))
-        
-        #Button to delete Unknown Nodes
-        self.optimize_rig_btn.clicked.connect(deleteUnknownNodes)
-        
-        #Button to selected skinned joints in a mesh
-        self.select_skinnedJnts_btn.clicked.connect(selectSkinnedJoints)
-        
-        #Button for Combine Shape Nodes
-        self.combine_shapeNode_btn.clicked.connect(combineShape)
-        '''
-        MISCELLANEOUS TAB BUTTONS CONNECTION
-        END
-        '''
-        
-        '''
-        BUILT-IN BUTTON CONNECTIONS
-        START
-        '''
-        #General Options
-        self.locator_built_btn.clicked.connect (cmds.CreateLocator)
-        
-        self.deleteKeys_built_btn.clicked.connect (cmds.DeleteKeys)
-        self.deleteKeys_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.deleteKeys_built_btn.customContextMenuRequested.connect(cmds.DeleteKeysOptions)
-        
-        self.deleteHistory_built_btn.clicked.connect (cmds.DeleteHistory())
-        
-        self.duplicate_built_btn.clicked.connect (cmds.Duplicate)
-        
-        self.parent_built_btn.clicked.connect (cmds.Parent)
-        self.parent_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.parent_built_btn.customContextMenuRequested.connect(cmds.ParentOptions)
-        
-        self.unParent_built_btn.clicked.connect (cmds.Unparent)
-        self.unParent_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.unParent_built_btn.customContextMenuRequested.connect(cmds.UnparentOptions)
-        
-        self.hierachy_built_btn.clicked.connect (cmds.SelectHierarchy)
-        
-        self.freezeTrans_built_btn.clicked.connect (cmds.FreezeTransformations)
-        self.freezeTrans_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.freezeTrans_built_btn.customContextMenuRequested.connect(cmds.FreezeTransformationsOptions)
-        
-        self.resetTrans_built_btn.clicked.connect (cmds.ResetTransformations)
-        self.resetTrans_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.resetTrans_built_btn.customContextMenuRequested.connect(cmds.ResetTransformationsOptions)
-        
-        self.centerPivot_built_btn.clicked.connect (cmds.CenterPivot)
-        
-        self.disHideLRA_built_btn.clicked.connect (cmds.ToggleLocalRotationAxes)
-        
-        #Joints
-        self.createJoint_built_btn.clicked.connect (cmds.JointTool)
-        self.createJoint_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.createJoint_built_btn.customContextMenuRequested.connect(cmds.JointToolOptions)
-        
-        self.mirrorJoint_built_btn.clicked.connect (cmds.MirrorJoint)
-        self.mirrorJoint_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.mirrorJoint_built_btn.customContextMenuRequested.connect(cmds.MirrorJointOptions)
-        
-        self.orientJoint_built_btn.clicked.connect (cmds.OrientJoint)
-        self.orientJoint_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.orientJoint_built_btn.customContextMenuRequested.connect(cmds.OrientJointOptions)
-        
-        self.createIKJoint_built_btn.clicked.connect (cmds.IKHandleTool)
-        self.createIKJoint_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.createIKJoint_built_btn.customContextMenuRequested.connect(cmds.IKHandleToolOptions)
-        
-        self.splineIKJoint_built_btn.clicked.connect (cmds.IKSplineHandleTool)
-        self.splineIKJoint_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.splineIKJoint_built_btn.customContextMenuRequested.connect(cmds.IKSplineHandleToolOptions)
-        
-        self.jointSizeJoint_built_btn.clicked.connect (cmds.JdsWin)
-        
-        #Skinning
-        self.bindSkin_built_btn.clicked.connect (cmds.SmoothBindSkin)
-        self.bindSkin_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.bindSkin_built_btn.customContextMenuRequested.connect(cmds.SmoothBindSkinOptions)
-        
-        self.unBindSkin_built_btn.clicked.connect (cmds.DetachSkin)
-        self.unBindSkin_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.unBindSkin_built_btn.customContextMenuRequested.connect(cmds.DetachSkinOptions)
-        
-        self.bindPoseSkin_built_btn.clicked.connect (cmds.GoToBindPose)
-        
-        self.paintSkin_built_btn.clicked.connect (cmds.ArtPaintSkinWeightsTool)
-        self.paintSkin_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.paintSkin_built_btn.customContextMenuRequested.connect(cmds.ArtPaintSkinWeightsToolOptions)
-        
-        self.mirrorSkin_built_btn.clicked.connect (cmds.MirrorSkinWeights)
-        self.mirrorSkin_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.mirrorSkin_built_btn.customContextMenuRequested.connect(cmds.MirrorSkinWeightsOptions)
-        
-        self.copyWeightsSkin_built_btn.clicked.connect (cmds.CopySkinWeights)
-        self.copyWeightsSkin_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.copyWeightsSkin_built_btn.customContextMenuRequested.connect(cmds.CopySkinWeightsOptions)
-        
-        self.smoothSkin_built_btn.clicked.connect (cmds.SmoothSkinWeights)
-        self.smoothSkin_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.smoothSkin_built_btn.customContextMenuRequested.connect(cmds.SmoothSkinWeightsOptions)
-        
-        self.copyVertexSkin_built_btn.clicked.connect (cmds.CopyVertexWeights)
-        
-        self.pasteVertexSkin_built_btn.clicked.connect (cmds.PasteVertexWeights)
-        
-        self.setInfluenceSkin_built_btn.clicked.connect (cmds.SetMaxInfluences)
-        
-        self.addInfluenceSkin_built_btn.clicked.connect (cmds.AddInfluence)
-        self.addInfluenceSkin_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.addInfluenceSkin_built_btn.customContextMenuRequested.connect(cmds.AddInfluenceOptions)
-        
-        self.removeInfluenceSkin_built_btn.clicked.connect (cmds.RemoveInfluence)
-        
-        self.pruneSkin_built_btn.clicked.connect (cmds.PruneSmallWeights)
-        self.pruneSkin_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.pruneSkin_built_btn.customContextMenuRequested.connect(cmds.PruneSmallWeightsOptions)
-        
-        self.bakeDeformSkin_built_btn.clicked.connect (cmds.BakeDeformerTool)
-        
-        #Deform
-        self.blendShapeDeform_built_btn.clicked.connect (cmds.CreateBlendShape)
-        self.blendShapeDeform_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.blendShapeDeform_built_btn.customContextMenuRequested.connect(cmds.CreateBlendShapeOptions)
-        
-        self.poseSpaceDeform_built_btn.clicked.connect (cmds.CreatePoseInterpolator)
-        self.poseSpaceDeform_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.poseSpaceDeform_built_btn.customContextMenuRequested.connect(cmds.CreatePoseInterpolatorOptions)
-        
-        self.clusterDeform_built_btn.clicked.connect (cmds.CreateCluster)
-        self.clusterDeform_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.clusterDeform_built_btn.customContextMenuRequested.connect(cmds.CreateClusterOptions)
-        
-        #Constraint
-        self.parentConstraint_built_btn.clicked.connect (cmds.ParentConstraint)
-        self.parentConstraint_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.parentConstraint_built_btn.customContextMenuRequested.connect(cmds.ParentConstraintOptions)
-        
-        self.pointConstraint_built_btn.clicked.connect (cmds.PointConstraint)
-        self.pointConstraint_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.pointConstraint_built_btn.customContextMenuRequested.connect(cmds.PointConstraintOptions)
-        
-        self.orientConstraint_built_btn.clicked.connect (cmds.OrientConstraint)
-        self.orientConstraint_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.orientConstraint_built_btn.customContextMenuRequested.connect(cmds.OrientConstraintOptions)
-        
-        self.scaleConstraint_built_btn.clicked.connect (cmds.ScaleConstraint)
-        self.scaleConstraint_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.scaleConstraint_built_btn.customContextMenuRequested.connect(cmds.ScaleConstraintOptions)
-        
-        self.poleVectorConstraint_built_btn.clicked.connect (cmds.PoleVectorConstraint)
-        self.poleVectorConstraint_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.poleVectorConstraint_built_btn.customContextMenuRequested.connect(cmds.PoleVectorConstraintOptions)
-        
-        self.aimConstraint_built_btn.clicked.connect (cmds.AimConstraint)
-        self.aimConstraint_built_btn.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
-        self.aimConstraint_built_btn.customContextMenuRequested.connect(cmds.AimConstraintOptions)
-        
-        #Windows 
-        self.connectionWindow_built_btn.clicked.connect(cmds.ConnectionEditor)
-        self.componentWindow_built_btn.clicked.connect(cmds.ComponentEditor)
-        self.nodeWindow_built_btn.clicked.connect(cmds.NodeEditorWindow)
-        self.channelWindow_built_btn.clicked.connect(cmds.ChannelControlEditor)
-        self.setDrivenKeyWindow_built_btn.clicked.connect(cmds.SetDrivenKey)
-        self.shapeWindow_built_btn.clicked.connect(cmds.ShapeEditor)
-        self.poseWindow_built_btn.clicked.connect(cmds.PoseEditor)
-        self.graphWindow_built_btn.clicked.connect(cmds.GraphEditor)
-        '''
-        BUILT-IN BUTTON CONNECTIONS
-        END
-        '''
-        
-        '''
-        CUSTOM RIG BUTTON CONNECTIONS
-        START
-        '''
-        self.pelvis_btn.clicked.connect(lambda: self.controlRigButtonPressed("pelvis"))
-        self.spine1_btn.clicked.connect(lambda: self.controlRigButtonPressed("spine1"))
-        self.chest_btn.clicked.connect(lambda: self.controlRigButtonPressed("chest"))
-        self.neck_btn.clicked.connect(lambda: self.controlRigButtonPressed("neck"))
-        self.head_btn.clicked.connect(lambda: self.controlRigButtonPressed("head"))
-        self.clavicle_btn.clicked.connect(lambda: self.controlRigButtonPressed("clavicle"))
-        self.shoulder_btn.clicked.connect(lambda: self.controlRigButtonPressed("shoulder"))
-        self.elbow_btn.clicked.connect(lambda: self.controlRigButtonPressed("elbow"))
-        self.wrist_btn.clicked.connect(lambda: self.controlRigButtonPressed("wrist"))
-        self.thigh_btn.clicked.connect(lambda: self.controlRigButtonPressed("thigh"))
-        self.knee_btn.clicked.connect(lambda: self.controlRigButtonPressed("knee"))
-        self.ankle_btn.clicked.connect(lambda: self.controlRigButtonPressed("ankle"))
-        self.ball_btn.clicked.connect(lambda: self.controlRigButtonPressed("ball"))
-        self.footRollControls_cb.toggled.connect (self.footRollControlToggle)
-        
-        self.accept_btn.clicked.connect (lambda: createBipedControlRig(self.left_joints_le.text(), self.right_joints_le.text(), self.pelvis_le.text(), self.spine1_le.text(), self.chest_le.text(), self.neck_le.text(), self.head_le.text(), self.clavicle_le.text(), self.shoulder_le.text(), self.elbow_le.text(), self.wrist_le.text(), self.thigh_le.text(), self.knee_le.text(), self.ankle_le.text(), self.ball_le.text(), self.armFK_cb.checkState(), self.armIK_cb.checkState(), self.legFK_cb.checkState(), self.legIK_cb.checkState(), self.controllerSize_controlRig_sb.value(),self.footRollControls_cb.checkState()))
-        '''
-        CUSTOM RIG BUTTON CONNECTIONS
-        START
-        '''
+        return self.controlRig_form_layout_frame
     
     '''
     Create Controller Group Number Change
@@ -1563,131 +1965,141 @@ class MainDialog (QtWidgets.QDialog):
     Custom List Change Method
     '''
     def custom_list_change(self, item):
-        selected_item = item.text()
-        
-        if (selected_item == "Search/Replace Names"):
-            self.search_replace_frame.show()
-            self.createController_layout_frame.hide()
-            self.controllerText_frame.hide()
-            self.exportTab_layout_frame.hide()
-            self.rom_layout_frame.hide()
-            self.misc_layout_frame.hide()
-            self.setMinimumHeight(515)
-            self.setMinimumWidth(550)
-            self.resize (550,515)
-            self.exportApply_btn.hide()
-            self.rom_apply_btn.hide()
-        elif (selected_item == "Create Controllers"):
-            self.search_replace_frame.hide()
-            self.createController_layout_frame.show()
-            self.controllerText_frame.hide()
-            self.exportTab_layout_frame.hide()
-            self.rom_layout_frame.hide()
-            self.misc_layout_frame.hide()
-            self.setMinimumHeight(515)
-            self.setMinimumWidth(560)
-            self.resize (560,515)
-            self.exportApply_btn.hide()
-            self.rom_apply_btn.hide()
-        elif (selected_item == "Create Controller from Text"):
-            self.search_replace_frame.hide()
-            self.createController_layout_frame.hide()
-            self.controllerText_frame.show()
-            self.exportTab_layout_frame.hide()
-            self.rom_layout_frame.hide()
-            self.misc_layout_frame.hide()
-            self.setMinimumHeight(300)
-            self.setMinimumWidth(460)
-            self.resize (460,300)
-            self.exportApply_btn.hide()
-            self.rom_apply_btn.hide()
-        elif (selected_item == "Export To FBX"):
-            self.search_replace_frame.hide()
-            self.createController_layout_frame.hide()
-            self.controllerText_frame.hide()
-            self.exportTab_layout_frame.show()
-            self.rom_layout_frame.hide()
-            self.misc_layout_frame.hide()
-            self.setMinimumHeight(700)
-            self.setMinimumWidth(893)
-            self.resize (893,700)
-            self.exportApply_btn.show()
-            self.rom_apply_btn.hide()
-        elif (selected_item == "Range of Motion (ROM)"):
-            self.search_replace_frame.hide()
-            self.createController_layout_frame.hide()
-            self.controllerText_frame.hide()
-            self.exportTab_layout_frame.hide()
-            self.rom_layout_frame.show()
-            self.misc_layout_frame.hide()
-            self.setMinimumHeight(350)
-            self.setMinimumWidth(490)
-            self.resize (490,350)
-            self.exportApply_btn.hide()
-            self.rom_apply_btn.show()
-        else:
-            self.search_replace_frame.hide()
-            self.createController_layout_frame.hide()
-            self.controllerText_frame.hide()
-            self.exportTab_layout_frame.hide()
-            self.rom_layout_frame.hide()
-            self.misc_layout_frame.show()
-            self.setMinimumHeight(440)
-            self.setMinimumWidth(460)
-            self.resize (460,440)
-            self.exportApply_btn.hide()
-            self.rom_apply_btn.hide()
+        self.page_change(self.custom_stack, self.HELPER_PAGES, item.text())
     
     '''
-    Controller List Changed Variable
-    '''    
-    def controller_list_change (self, item):
-        selected_controller_type = item.text()
-        
-        if (selected_controller_type == "Circle"):
-            self.controllerImage_ciw.setImage("{0}circle.png".format(self.image_path))
-        elif (selected_controller_type == "Square"):
-            self.controllerImage_ciw.setImage("{0}square.png".format(self.image_path))
-        elif (selected_controller_type == "Cube"):
-            self.controllerImage_ciw.setImage("{0}cube.png".format(self.image_path))
-        elif (selected_controller_type == "Hexagon"):
-            self.controllerImage_ciw.setImage("{0}hexagon.png".format(self.image_path))
-        elif (selected_controller_type == "Sphere"):
-            self.controllerImage_ciw.setImage("{0}sphere.png".format(self.image_path))
-        elif (selected_controller_type == "Cross"):
-            self.controllerImage_ciw.setImage("{0}cross.png".format(self.image_path))
-        elif (selected_controller_type == "Arrow"):
-            self.controllerImage_ciw.setImage("{0}arrow.png".format(self.image_path))
-        elif (selected_controller_type == "Arc Arrow"):
-            self.controllerImage_ciw.setImage("{0}arcArrow.png".format(self.image_path))
-        elif (selected_controller_type == "Double Arrow"):
-            self.controllerImage_ciw.setImage("{0}doubleArrow.png".format(self.image_path))
-        elif (selected_controller_type == "Curved Arrow"):
-            self.controllerImage_ciw.setImage("{0}curvedArrow.png".format(self.image_path))
-        elif (selected_controller_type == "Tube"):
-            self.controllerImage_ciw.setImage("{0}tube.png".format(self.image_path))
-        elif (selected_controller_type == "Gear"):
-            self.controllerImage_ciw.setImage("{0}gear.png".format(self.image_path))
-        elif (selected_controller_type == "Plus"):
-            self.controllerImage_ciw.setImage("{0}plus.png".format(self.image_path))
-        elif (selected_controller_type == "Triangle"):
-            self.controllerImage_ciw.setImage("{0}triangle.png".format(self.image_path))
-        elif (selected_controller_type == "Pyramid"):
-            self.controllerImage_ciw.setImage("{0}pyramid.png".format(self.image_path))
-        elif (selected_controller_type == "3D Diamond"):
-            self.controllerImage_ciw.setImage("{0}3dDiamond.png".format(self.image_path))
-        elif (selected_controller_type == "2D Diamond"):
-            self.controllerImage_ciw.setImage("{0}2dDiamond.png".format(self.image_path))
-        elif (selected_controller_type == "Diamond Sphere"):
-            self.controllerImage_ciw.setImage("{0}diamondSphere.png".format(self.image_path))
-            
-    '''
-    Export to FBX
+    Page Change Method
     '''
-    def deSelectAnimationBox(self):
-        self.exportAnimations_cb.setChecked(False)
+    def page_change(self, stack, pages, name):
+        #Builds the page on its first display, then sizes the dialog for it and shows its bottom button
+        builder, size, button = [page[1:] for page in pages if page[0] == name][0]
+        stack.showPage(name)
+        
+        if size:
+            self.setMinimumWidth(size[0])
+            self.setMinimumHeight(size[1])
+            self.resize (size[0], size[1])
+        
+        for pageButton in self.PAGE_BUTTONS:
+            getattr(self, pageButton).setVisible(pageButton == button)
     
-    def selectAnimationBox(self):
+    '''
+    Saved Field Values
+    '''
+    def showEvent (self, event):
+        #Reopened over another scene, the pages built so far take the values of that scene
+        super (MainDialog, self).showEvent(event)
+        
+        if currentScenePath() != self.settings_scene:
+            self.settings_scene = currentScenePath()
+            self.restore_settings(self.settings_fields.items())
+    
+    def closeEvent (self, event):
+        if self.settings.saveTimer.isActive():
+            self.settings.save()
+        
+        super (MainDialog, self).closeEvent(event)
+    
+    def bind_page_settings (self, pageName, page):
+        #Runs once per page after it is built: its fields get their saved values and save their changes from then on.
+        #A page inside another page is bound first, its fields are not bound twice
+        fields = [(name, widget) for name, widget in sorted(vars(self).items()) if isinstance(widget, self.SETTINGS_TYPES) and name not in self.SETTINGS_SKIP and name not in self.settings_fields and page.isAncestorOf(widget)]
+        
+        self.restore_settings(fields)
+        
+        for name, widget in fields:
+            self.settings_fields[name] = widget
+            self.settings_signal(widget).connect(partial(self.settings_changed, name))
+    
+    def restore_settings (self, fields):
+        values = self.settings.values(self.settings_scene)
+        self.settings_restoring = True
+        
+        try:
+            for name, widget in fields:
+                if name in values:
+                    self.set_settings_value(widget, values[name])
+        finally:
+            self.settings_restoring = False
+    
+    def settings_changed (self, name, *args):
+        if not self.settings_restoring:
+            self.settings.setValue(name, self.settings_value(self.settings_fields[name]), currentScenePath())
+    
+    def settings_signal (self, widget):
+        if isinstance(widget, CustomColorButton):
+            return widget.colorChanged
+        if isinstance(widget, QtWidgets.QLineEdit):
+            return widget.textChanged
+        if isinstance(widget, QtWidgets.QComboBox):
+            return widget.currentIndexChanged
+        if isinstance(widget, QtWidgets.QAbstractSpinBox):
+            return widget.valueChanged
+        
+        return widget.toggled
+    
+    def settings_value (self, widget):
+        if isinstance(widget, CustomColorButton):
+            color = widget.getColor()
+            return [color.red(), color.green(), color.blue()]
+        if isinstance(widget, QtWidgets.QLineEdit):
+            return widget.text()
+        if isinstance(widget, QtWidgets.QComboBox):
+            return widget.currentText()
+        if isinstance(widget, QtWidgets.QAbstractSpinBox):
+            return widget.value()
+        
+        return widget.isChecked()
+    
+    def set_settings_value (self, widget, value):
+        if isinstance(widget, CustomColorButton):
+            widget.setColor(QtGui.QColor(*value))
+        elif isinstance(widget, QtWidgets.QLineEdit):
+            widget.setText(value)
+        elif isinstance(widget, QtWidgets.QComboBox):
+            if widget.findText(value) >= 0:
+                widget.setCurrentIndex(widget.findText(value))
+        elif isinstance(widget, QtWidgets.QAbstractSpinBox):
+            widget.setValue(value)
+        else:
+            widget.setChecked(value)
+    
+    '''
+    Controller List Changed Variable
+    '''    
+    def controller_list_change (self, item):
+        #item is None while the list is refilled
+        if item:
+            self.controllerImage_ciw.setPixmap(ThumbnailCache.shared().preview(item.text(), *self.CONTROLLER_IMAGE_SIZE))
+    
+    def refresh_controller_list (self, *args):
+        #Shapes matching the filter, the current shape stays current when it is still listed
+        current = self.controller_list.currentItem().text() if self.controller_list.currentItem() else None
+        names = controllerShapeNames(self.controllerFilter_le.text())
+        
+        self.controller_list.clear()
+        self.controller_list.addItems(names)
+        self.controller_list.setCurrentRow(names.index(current) if current in names else 0)
+    
+    def save_controller_shape (self):
+        name = saveControllerShape(self.shapeName_le.text(), self.shapeTags_le.text().split(","))
+        
+        if name:
+            self.refresh_controller_list()
+            
+            items = self.controller_list.findItems(name, QtCore.Qt.MatchExactly)
+            if items:
+                self.controller_list.setCurrentItem(items[0])
+            
+            self.controller_list_change(self.controller_list.currentItem())
+            
+    '''
+    Export to FBX
+    '''
+    def deSelectAnimationBox(self):
+        self.exportAnimations_cb.setChecked(False)
+    
+    def selectAnimationBox(self):
         self.exportAnimations_cb.setChecked(True)
         
         if (self.exportOptions_comboBox.currentText() == "Automatic"):
@@ -1868,32 +2280,11 @@ class MainDialog (QtWidgets.QDialog):
         self.default_main_comboBox = textName
         print ("ComboBox Text: {0}". format (self.default_main_comboBox))
         
-        if (self.default_main_comboBox == "Built-In"):
-            self.custom_window_layout_frame.hide ()
-            self.controlRig_form_layout_frame.hide()
-            self.builtIn_window_layout_frame.show()
-            self.accept_btn.hide()
-            self.exportApply_btn.hide()
-            self.setMinimumHeight (700)
-            self.setMinimumWidth (500)
-            self.resize (500,700)
-        elif (self.default_main_comboBox == "Helper Scripts"):
-            self.custom_window_layout_frame.show ()
-            self.controlRig_form_layout_frame.hide()
-            self.builtIn_window_layout_frame.hide()
-            self.accept_btn.hide()
-            
+        self.page_change(self.window_stack, self.WINDOW_PAGES, self.default_main_comboBox)
+        
+        if (self.default_main_comboBox == "Helper Scripts"):
             customItem = self.custom_list.currentItem()
             self.custom_list_change(customItem)
-        else:
-            self.custom_window_layout_frame.hide ()
-            self.controlRig_form_layout_frame.show()
-            self.builtIn_window_layout_frame.hide()
-            self.accept_btn.show()
-            self.exportApply_btn.hide()
-            self.setMinimumHeight (750)
-            self.setMinimumWidth (500)
-            self.resize (500,750)
             
     '''
     Button Pressed Methods for Custom Rig Controls
@@ -1932,62 +2323,54 @@ class MainDialog (QtWidgets.QDialog):
             om.MGlobal.displayError("SELECT ONLY ONE JOINT PER TEXT FIELD")
             return
     
+    def autoDetectJointsButtonPressed(self):
+        selectedJoints = cmds.ls(sl = True, type = "joint", long = True)
+        jointRoles = detectJointRoles(selectedJoints[0] if selectedJoints else None)
+        if not jointRoles:
+            return
+        
+        jointFields = {"pelvis" : self.pelvis_le, "spine1" : self.spine1_le, "chest" : self.chest_le, "neck" : self.neck_le, "head" : self.head_le, 
+                       "clavicle" : self.clavicle_le, "shoulder" : self.shoulder_le, "elbow" : self.elbow_le, "wrist" : self.wrist_le, 
+                       "thigh" : self.thigh_le, "knee" : self.knee_le, "ankle" : self.ankle_le, "ball" : self.ball_le, 
+                       "leftIndicator" : self.left_joints_le, "rightIndicator" : self.right_joints_le}
+        
+        for role, jointName in jointRoles.items():
+            jointFields[role].setText(jointName)
+    
+    def batchRigButtonPushed(self):
+        manifestPath = cmds.fileDialog2 (fileMode = 1, ds = 2, fileFilter = "Rig Manifest (*.json)", caption = "Select Rig Manifest")
+        if manifestPath:
+            batchRigFromManifest(manifestPath[0])
+    
+    def saveTemplateButtonPushed(self):
+        templatePath = cmds.fileDialog2 (fileMode = 0, ds = 2, fileFilter = "Rig Template (*.json)", caption = "Save Rig Template")
+        if templatePath:
+            saveRigTemplate(templatePath[0])
+    
+    def loadTemplateButtonPushed(self):
+        templatePath = cmds.fileDialog2 (fileMode = 1, ds = 2, fileFilter = "Rig Template (*.json)", caption = "Load Rig Template")
+        if templatePath:
+            applyRigTemplate(templatePath[0])
+    
+    def romLimitsButtonPushed(self):
+        limitsPath = cmds.fileDialog2 (fileMode = 1, ds = 2, fileFilter = "ROM Limits (*.json)", caption = "Load ROM Limits")
+        if limitsPath:
+            self.romLimits_le.setText(limitsPath[0])
+    
+    def romExportButtonPushed(self):
+        exportPath = cmds.fileDialog2 (fileMode = 0, ds = 2, fileFilter = "FBX (*.fbx)", caption = "Export ROM Clip")
+        if exportPath:
+            exportROMClip(exportPath[0])
+    
+    def romBatchButtonPushed(self):
+        manifestPath = cmds.fileDialog2 (fileMode = 1, ds = 2, fileFilter = "ROM Manifest (*.json)", caption = "Batch ROM Manifest")
+        if manifestPath:
+            batchROMFromManifest(manifestPath[0])
+    
     def footRollControlToggle(self, item):
         with UndoContext():
             if item:
-                self.heelLoc = cmds.spaceLocator(n = "L_heelPos_LOC", p = (0,0,0), a = True)
-                cmds.setAttr ("L_heelPos_LOC.ty", lock = True, keyable = False, channelBox = False)
-                cmds.setAttr ("L_heelPos_LOC.rx", lock = True, keyable = False, channelBox = False)
-                cmds.setAttr ("L_heelPos_LOC.ry", lock = True, keyable = False, channelBox = False)
-                cmds.setAttr ("L_heelPos_LOC.rz", lock = True, keyable = False, channelBox = False)
-                cmds.setAttr ("L_heelPos_LOC.sx", lock = True, keyable = False, channelBox = False)
-                cmds.setAttr ("L_heelPos_LOC.sy", lock = True, keyable = False, channelBox = False)
-                cmds.setAttr ("L_heelPos_LOC.sz", lock = True, keyable = False, channelBox = False)
-                cmds.setAttr ("L_heelPos_LOC.v", lock = True, keyable = False, channelBox = False)
-                cmds.CenterPivot()
-                
-                self.ankleInLoc = cmds.spaceLocator(n = "L_ankleRollInPos_LOC", p = (0,0,0), a = True)
-                cmds.move(-0.5,0,1)
-                cmds.setAttr ("L_ankleRollInPos_LOC.ty", lock = True, keyable = False, channelBox = False)
-                cmds.setAttr ("L_ankleRollInPos_LOC.rx", lock = True, keyable = False, channelBox = False)
-                cmds.setAttr ("L_ankleRollInPos_LOC.ry", lock = True, keyable = False, channelBox = False)
-                cmds.setAttr ("L_ankleRollInPos_LOC.rz", lock = True, keyable = False, channelBox = False)
-                cmds.setAttr ("L_ankleRollInPos_LOC.sx", lock = True, keyable = False, channelBox = False)
-                cmds.setAttr ("L_ankleRollInPos_LOC.sy", lock = True, keyable = False, channelBox = False)
-                cmds.setAttr ("L_ankleRollInPos_LOC.sz", lock = True, keyable = False, channelBox = False)
-                cmds.setAttr ("L_ankleRollInPos_LOC.v", lock = True, keyable = False, channelBox = False)
-                cmds.CenterPivot()
-                
-                self.ankleOutLoc = cmds.spaceLocator(n = "L_ankleRollOutPos_LOC", p = (0,0,0), a = True)
-                cmds.move(0.5,0,1)
-                cmds.setAttr ("L_ankleRollOutPos_LOC.ty", lock = True, keyable = False, channelBox = False)
-                cmds.setAttr ("L_ankleRollOutPos_LOC.rx", lock = True, keyable = False, channelBox = False)
-                cmds.setAttr ("L_ankleRollOutPos_LOC.ry", lock = True, keyable = False, channelBox = False)
-                cmds.setAttr ("L_ankleRollOutPos_LOC.rz", lock = True, keyable = False, channelBox = False)
-                cmds.setAttr ("L_ankleRollOutPos_LOC.sx", lock = True, keyable = False, channelBox = False)
-                cmds.setAttr ("L_ankleRollOutPos_LOC.sy", lock = True, keyable = False, channelBox = False)
-                cmds.setAttr ("L_ankleRollOutPos_LOC.sz", lock = True, keyable = False, channelBox = False)
-                cmds.setAttr ("L_ankleRollOutPos_LOC.v", lock = True, keyable = False, channelBox = False)
-                cmds.CenterPivot()
-                
-                self.toeTipLoc = cmds.spaceLocator(n = "L_toeTipPos_LOC", p = (0,0,0), a = True)
-                cmds.move(0,0,2)
-                cmds.setAttr ("L_toeTipPos_LOC.ty", lock = True, keyable = False, channelBox = False)
-                cmds.setAttr ("L_toeTipPos_LOC.rx", lock = True, keyable = False, channelBox = False)
-                cmds.setAttr ("L_toeTipPos_LOC.ry", lock = True, keyable = False, channelBox = False)
-                cmds.setAttr ("L_toeTipPos_LOC.rz", lock = True, keyable = False, channelBox = False)
-                cmds.setAttr ("L_toeTipPos_LOC.sx", lock = True, keyable = False, channelBox = False)
-                cmds.setAttr ("L_toeTipPos_LOC.sy", lock = True, keyable = False, channelBox = False)
-                cmds.setAttr ("L_toeTipPos_LOC.sz", lock = True, keyable = False, channelBox = False)
-                cmds.setAttr ("L_toeTipPos_LOC.v", lock = True, keyable = False, channelBox = False)
-                cmds.CenterPivot()
-                
-                footRoll_grp = cmds.group(n = "L_footRollInfo_doNotDelete", em = True)
-                cmds.parent(self.heelLoc, self.ankleInLoc, self.ankleOutLoc, self.toeTipLoc, footRoll_grp, r = False)
-                
-                controllerScale = self.controllerSize_controlRig_sb.value()
-                cmds.select(footRoll_grp, r = True)
-                cmds.scale (controllerScale * 0.5, controllerScale * 0.5, controllerScale * 0.5, r = True)
+                createFootRollLocators(self.controllerSize_controlRig_sb.value())
             
             else:
                 if cmds.objExists ('L_footRollInfo_doNotDelete'):
@@ -2107,6 +2490,10 @@ def createController(controllerName, controllerSufix, controllerSize, forceLabel
         selectedItems = cmds.ls(selection = True)
         newControllerName = controllerName + controllerSufix
         
+        #The shape could not be read, controllerShapeCurves has said why
+        if not controllerShapeCurves(selectedController):
+            return
+        
         print ("Selected Controller Color: {0}, {1}, {2}".format(controllerColor.red(), controllerColor.green(), controllerColor.blue()))
         
         if (len(selectedItems) == 0):
@@ -2128,135 +2515,294 @@ def createController(controllerName, controllerSufix, controllerSize, forceLabel
                     makeController(name, controllerSize, selectedController, controllerColor)
                     createGroups(name, groupNumber, group1, group2, group3, group4)
          
+#CVs of Maya's 8 section circle of radius 1 on the XZ plane
+CIRCLE_CVS = [(0.783612, 0.0, -0.783612), (0.0, 0.0, -1.108194), (-0.783612, 0.0, -0.783612), (-1.108194, 0.0, 0.0),
+              (-0.783612, 0.0, 0.783612), (0.0, 0.0, 1.108194), (0.783612, 0.0, 0.783612), (1.108194, 0.0, 0.0)]
+
+def circleCurve(radius = 1.0, cvScales = None):
+    #Periodic cubic circle as curve data, cvScales moves every CV towards the center on its own
+    cvScales = cvScales or [1.0] * len(CIRCLE_CVS)
+    points = [[value * radius * cvScale for value in point] for point, cvScale in zip(CIRCLE_CVS, cvScales)]
+    
+    return {"degree" : 3, "form" : om2.MFnNurbsCurve.kPeriodic, "knots" : [float(knot) for knot in range(-2, 11)],
+            "cvs" : [value for point in points + points[:3] for value in point]}
+
+def melCurve(melCommand, scale = (1.0, 1.0, 1.0)):
+    #curve command as curve data. Without -k flags the curve gets the knots Maya gives an open curve
+    tokens = melCommand.replace(";", "").split()
+    degree = int(tokens[tokens.index("-d") + 1])
+    cvs = [float(value) * scale[axis] for index, token in enumerate(tokens) if token == "-p" for axis, value in enumerate(tokens[index + 1:index + 4])]
+    knots = [float(tokens[index + 1]) for index, token in enumerate(tokens) if token == "-k"]
+    
+    if not knots:
+        spans = len(cvs) // 3 - degree
+        knots = [0.0] * (degree - 1) + [float(knot) for knot in range(spans + 1)] + [float(spans)] * (degree - 1)
+    
+    return {"degree" : degree, "form" : om2.MFnNurbsCurve.kOpen, "knots" : knots, "cvs" : cvs}
+
+#Shapes of the Create Controllers list, every shape is a list of curves as {"degree", "form", "knots", "cvs"}.
+#The controllers and their previews are both made from these
+CONTROLLER_SHAPES = OrderedDict([("Circle", [circleCurve()]),
+                                 ("Square", [melCurve("curve -d 1 -p -1 0 1 -p -1 0 -1 -p 1 0 -1 -p 1 0 1 -p -1 0 1 -k 0 -k 1 -k 2 -k 3 -k 4 ;")]),
+                                 ("Cube", [melCurve("curve -d 1 -p -0.5 -0.5 -0.5 -p 0.5 -0.5 -0.5 -p 0.5 0.5 -0.5 -p -0.5 0.5 -0.5 -p -0.5 -0.5 -0.5 -p -0.5 -0.5 0.5 -p 0.5 -0.5 0.5 -p 0.5 -0.5 -0.5 -p 0.5 0.5 -0.5 -p 0.5 0.5 0.5 -p 0.5 -0.5 0.5 -p 0.5 0.5 0.5 -p -0.5 0.5 0.5 -p -0.5 -0.5 0.5 -p -0.5 0.5 0.5 -p -0.5 0.5 -0.5 -k 0 -k 1 -k 2 -k 3 -k 4 -k 5 -k 6 -k 7 -k 8 -k 9 -k 10 -k 11 -k 12 -k 13 -k 14 -k 15 ;")]),
+                                 ("Hexagon", [melCurve("curve -d 1 -p 0.501607 0 -0.868807 -p 1.003213 0 0 -p 0.501607 0 0.868809 -p -0.501607 0 0.868809 -p -1.003213 0 0 -p -0.501607 0 -0.868808 -p 0.501607 0 -0.868807 -p -0.501607 0 0.868809 -p -1.003213 0 0 -p -0.501607 0 -0.868808 -p 0.501607 0 0.868809 -p 1.003213 0 0 -p -1.003213 0 0 -k 0 -k 1 -k 2 -k 3 -k 4 -k 5 -k 6 -k 7 -k 8 -k 9 -k 10 -k 11 -k 12 ;")]),
+                                 ("Sphere", [melCurve("curve -d 1 -p 0 1 0 -p -0.258819 0.965926 0 -p -0.5 0.866025 0 -p -0.707107 0.707107 0 -p -0.866025 0.5 0 -p -0.965926 0.258819 0 -p -1 0 0 -p -0.965926 -0.258819 0 -p -0.866025 -0.5 0 -p -0.707107 -0.707107 0 -p -0.5 -0.866025 0 -p -0.258819 -0.965926 0 -p 0 -1 0 -p 0.258819 -0.965926 0 -p 0.5 -0.866025 0 -p 0.707107 -0.707107 0 -p 0.866025 -0.5 0 -p 0.965926 -0.258819 0 -p 1 0 0 -p 0.965926 0.258819 0 -p 0.866025 0.5 0 -p 0.707107 0.707107 0 -p 0.5 0.866025 0 -p 0.258819 0.965926 0 -p 0 1 0 -p 0 0.965926 -0.258819 -p 0 0.866025 -0.5 -p 0 0.707107 -0.707107 -p 0 0.5 -0.866025 -p 0 0.258819 -0.965926 -p 0 0 -1 -p 0 -0.258819 -0.965926 -p 0 -0.5 -0.866025 -p 0 -0.707107 -0.707107 -p 0 -0.866025 -0.5 -p 0 -0.965926 -0.258819 -p 0 -1 0 -p 0 -0.965926 0.258819 -p 0 -0.866025 0.5 -p 0 -0.707107 0.707107 -p 0 -0.5 0.866025 -p 0 -0.258819 0.965926 -p 0 0 1 -p 0 0.258819 0.965926 -p 0 0.5 0.866025 -p 0 0.707107 0.707107 -p 0 0.866025 0.5 -p 0 0.965926 0.258819 -p 0 1 0 -p 0.258819 0.965926 0 -p 0.5 0.866025 0 -p 0.707107 0.707107 0 -p 0.866025 0.5 0 -p 0.965926 0.258819 0 -p 1 0 0 -p 0.866025 0 -0.5 -p 0.5 0 -0.866025 -p 0 0 -1 -p -0.5 0 -0.866025 -p -0.866025 0 -0.5 -p -1 0 0 -p -0.866025 0 0.5 -p -0.5 0 0.866025 -p 0 0 1 -p 0.5 0 0.866025 -p 0.866025 0 0.5 -p 1 0 0 -k 0 -k 1 -k 2 -k 3 -k 4 -k 5 -k 6 -k 7 -k 8 -k 9 -k 10 -k 11 -k 12 -k 13 -k 14 -k 15 -k 16 -k 17 -k 18 -k 19 -k 20 -k 21 -k 22 -k 23 -k 24 -k 25 -k 26 -k 27 -k 28 -k 29 -k 30 -k 31 -k 32 -k 33 -k 34 -k 35 -k 36 -k 37 -k 38 -k 39 -k 40 -k 41 -k 42 -k 43 -k 44 -k 45 -k 46 -k 47 -k 48 -k 49 -k 50 -k 51 -k 52 -k 53 -k 54 -k 55 -k 56 -k 57 -k 58 -k 59 -k 60 -k 61 -k 62 -k 63 -k 64 -k 65 -k 66;")]),
+                                 ("Cross", [melCurve("curve -d 1 -p 0 0 -0.9857426965 -p -0.2950522357 0 -0.543164343 -p -0.1475261178 0 -0.543164343 -p -0.1475261178 0 -0.1475261178 -p -0.543164343 0 -0.1475261178 -p -0.543164343 0 -0.2950522357 -p -0.9857426965 0 0 -p -0.543164343 0 0.2950522357 -p -0.543164343 0 0.1475261178 -p -0.1475261178 0 0.1475261178 -p -0.1475261178 0 0.543164343 -p -0.2950522357 0 0.543164343 -p 0 0 0.9857426965 -p 0.2950522357 0 0.543164343 -p 0.1475261178 0 0.543164343 -p 0.1475261178 0 0.1475261178 -p 0.543164343 0 0.1475261178 -p 0.543164343 0 0.2950522357 -p 0.9857426965 0 0 -p 0.543164343 0 -0.2950522357 -p 0.543164343 0 -0.1475261178 -p 0.1475261178 0 -0.1475261178 -p 0.1475261178 0 -0.543164343 -p 0.2950522357 0 -0.543164343 -p 0 0 -0.98574269651;")]),
+                                 ("Arrow", [melCurve("curve -d 1 -p 0 0 0 -p 0.4 0 -0.4 -p 0.2 0 -0.4 -p 0.2 0 -1 -p -0.2 0 -1 -p -0.2 0 -0.4 -p -0.4 0 -0.4 -p 0 0 0 -k 0 -k 1 -k 2 -k 3 -k 4 -k 5 -k 6 -k 7 ;")]),
+                                 ("Arc Arrow", [melCurve("curve -d 3 -p -0.35703261 0 0.63881379 -p -0.35703261 0 0.63881379 -p -0.35703261 0 0.63881379 -p -0.43555158 0 0.28326996 -p -0.43555158 0 0.28326996 -p -0.43555158 0 0.28326996 -p -0.43555158 0 0.28326996 -p -0.10092762 0 0.88816986 -p -0.10092762 0 0.88816986 -p -0.10092762 0 0.88816986 -p -0.10092762 0 0.88816986 -p -0.79049277 0 0.83941839 -p -0.79049277 0 0.83941839 -p -0.79049277 0 0.83941839 -p -0.79049277 0 0.83941839 -p -0.45433386 0 0.76645116 -p -0.45433386 0 0.76645116 -p -0.45433386 0 0.76645116 -p -0.45433386 0 0.76645116 -p -0.64641969 0 0.64640673 -p -0.84458862 0 0.34986654 -p -0.91422432 0 0 -p -0.84458862 0 -0.34986654 -p -0.64641969 0 -0.64640673 -p -0.45283779 0 -0.76484979 -p -0.45283779 0 -0.76484979 -p -0.45283779 0 -0.76484979 -p -0.45283779 0 -0.76484979 -p -0.79049277 0 -0.83941839 -p -0.79049277 0 -0.83941839 -p -0.79049277 0 -0.83941839 -p -0.79049277 0 -0.83941839 -p -0.10092762 0 -0.88816986 -p -0.10092762 0 -0.88816986 -p -0.10092762 0 -0.88816986 -p -0.10092762 0 -0.88816986 -p -0.43555158 0 -0.28326996 -p -0.43555158 0 -0.28326996 -p -0.43555158 0 -0.28326996 -p -0.43555158 0 -0.28326996 -p -0.35575119 0 -0.63632061 -p -0.35575119 0 -0.63632061 -p -0.35575119 0 -0.63632061 -p -0.35575119 0 -0.63632061 -p -0.52874856 0 -0.52892838 -p -0.69110901 0 -0.28621998 -p -0.74792646 0 0 -p -0.69110901 0 0.28621998 -p -0.52874856 0 0.52892838 -p -0.35703261 0 0.63881379;")]),
+                                 ("Double Arrow", [melCurve("curve -d 1 -p 0 0 0 -p 0 0.4 -0.4 -p 0 0.2 -0.4 -p 0 0.2 -1 -p 0 -0.2 -1 -p 0 -0.2 -0.4 -p 0 -0.4 -0.4 -p 0 0 0 -p -0.4 0 -0.4 -p -0.2 0 -0.4 -p -0.2 0 -1 -p 0.2 0 -1 -p 0.2 0 -0.4 -p 0.4 0 -0.4 -p 0 0 0 -k 0 -k 1 -k 2 -k 3 -k 4 -k 5 -k 6 -k 7 -k 8 -k 9 -k 10 -k 11 -k 12 -k 13 -k 14 ;")]),
+                                 ("Curved Arrow", [melCurve("curve -d 3 -p 0.0959835 0.604001 -0.0987656 -p 0.500783 0.500458 -0.0987656 -p 0.751175 0.327886 -0.0987656 -p 0.751175 0.327886 -0.0987656 -p 0.751175 0.327886 -0.336638 -p 0.751175 0.327886 -0.336638 -p 1.001567 0 0 -p 1.001567 0 0 -p 0.751175 0.327886 0.336638 -p 0.751175 0.327886 0.336638 -p 0.751175 0.327886 0.0987656 -p 0.751175 0.327886 0.0987656 -p 0.500783 0.500458 0.0987656 -p 0.0959835 0.604001 0.0987656 -p 0.0959835 0.604001 0.0987656 -p 0.0959835 0.500458 0.500783 -p 0.0959835 0.327886 0.751175 -p 0.0959835 0.327886 0.751175 -p 0.336638 0.327886 0.751175 -p 0.336638 0.327886 0.751175 -p 0 0 1.001567 -p 0 0 1.001567 -p -0.336638 0.327886 0.751175 -p -0.336638 0.327886 0.751175 -p -0.0959835 0.327886 0.751175 -p -0.0959835 0.327886 0.751175 -p -0.0959835 0.500458 0.500783 -p -0.0959835 0.604001 0.0987656 -p -0.0959835 0.604001 0.0987656 -p -0.500783 0.500458 0.0987656 -p -0.751175 0.327886 0.0987656 -p -0.751175 0.327886 0.0987656 -p -0.751175 0.327886 0.336638 -p -0.751175 0.327886 0.336638 -p -1.001567 0 0 -p -1.001567 0 0 -p -0.751175 0.327886 -0.336638 -p -0.751175 0.327886 -0.336638 -p -0.751175 0.327886 -0.0987656 -p -0.751175 0.327886 -0.0987656 -p -0.500783 0.500458 -0.0987656 -p -0.0959835 0.604001 -0.0987656 -p -0.0959835 0.604001 -0.0987656 -p -0.0959835 0.500458 -0.500783 -p -0.0959835 0.327886 -0.751175 -p -0.0959835 0.327886 -0.751175 -p -0.336638 0.327886 -0.751175 -p -0.336638 0.327886 -0.751175 -p 0 0 -1.001567 -p 0 0 -1.001567 -p 0.336638 0.327886 -0.751175 -p 0.336638 0.327886 -0.751175 -p 0.0959835 0.327886 -0.751175 -p 0.0959835 0.327886 -0.751175 -p 0.0959835 0.500458 -0.500783 -p 0.0959835 0.604001 -0.0987656 -k 0 -k 0 -k 0 -k 1 -k 2 -k 3 -k 4 -k 5 -k 6 -k 7 -k 8 -k 9 -k 10 -k 11 -k 12 -k 13 -k 14 -k 15 -k 16 -k 17 -k 18 -k 19 -k 20 -k 21 -k 22 -k 23 -k 24 -k 25 -k 26 -k 27 -k 28 -k 29 -k 30 -k 31 -k 32 -k 33 -k 34 -k 35 -k 36 -k 37 -k 38 -k 39 -k 40 -k 41 -k 42 -k 43 -k 44 -k 45 -k 46 -k 47 -k 48 -k 49 -k 50 -k 51 -k 52 -k 53 -k 53 -k 53;")]),
+                                 ("Tube", [melCurve("curve -d 1 -p -1.5 0.366667 0.366667 -p -1.5 0.366667 -0.366667 -p -1.5 -0.366667 -0.366667 -p -1.5 -0.366667 0.366667 -p -1.5 0.366667 0.366667 -p -2 0.366667 0.366667 -p -2 0.366667 -0.366667 -p -1.5 0.366667 -0.366667 -p -2 0.366667 -0.366667 -p -2 -0.366667 -0.366667 -p -1.5 -0.366667 -0.366667 -p -2 -0.366667 -0.366667 -p -2 -0.366667 0.366667 -p -1.5 -0.366667 0.366667 -p -2 -0.366667 0.366667 -p -2 0.366667 0.366667 -p -1.5 0.366667 0.366667 -p -1.5 0.366667 0.366667 -p -1.5 0.366667 0.366667 -p -1.5 0.25 0.25 -p -1.5 0.25 -0.25 -p -1.5 0.366667 -0.366667 -p -1.5 -0.366667 -0.366667 -p -1.5 -0.25 -0.25 -p -1.5 -0.366667 -0.366667 -p -1.5 -0.366667 0.366667 -p -1.5 -0.25 0.25 -p -1.5 0.25 0.25 -p -1.5 0.25 -0.25 -p -1.5 -0.25 -0.25 -p -1.5 -0.25 0.25 -p 1.5 -0.25 0.25 -p 1.5 0.25 0.25 -p -1.5 0.25 0.25 -p -1.5 0.25 -0.25 -p 1.5 0.25 -0.25 -p 1.5 0.25 0.25 -p 1.5 -0.25 0.25 -p 1.5 -0.25 -0.25 -p -1.5 -0.25 -0.25 -p 1.5 -0.25 -0.25 -p 1.5 -0.25 0.25 -p 1.5 0.25 0.25 -p 1.5 0.25 -0.25 -p 1.5 -0.25 -0.25 -p 1.5 0.25 -0.25 -p 1.5 0.366667 -0.366667 -p 1.5 -0.366667 -0.366667 -p 1.5 -0.25 -0.25 -p 1.5 -0.366667 -0.366667 -p 1.5 -0.366667 0.366667 -p 1.5 -0.25 0.25 -p 1.5 -0.366667 0.366667 -p 1.5 0.366667 0.366667 -p 1.5 0.25 0.25 -p 1.5 0.366667 0.366667 -p 1.5 0.366667 -0.366667 -p 2 0.366667 -0.366667 -p 2 -0.366667 -0.366667 -p 1.5 -0.366667 -0.366667 -p 2 -0.366667 -0.366667 -p 2 -0.366667 0.366667 -p 1.5 -0.366667 0.366667 -p 2 -0.366667 0.366667 -p 2 0.366667 0.366667 -p 2 0.366667 -0.366667 -p 2 0.366667 0.366667 -p 1.5 0.366667 0.366667 -k 0 -k 1 -k 2 -k 3 -k 4 -k 5 -k 6 -k 7 -k 8 -k 9 -k 10 -k 11 -k 12 -k 13 -k 14 -k 15 -k 16 -k 17 -k 18 -k 19 -k 20 -k 21 -k 22 -k 23 -k 24 -k 25 -k 26 -k 27 -k 28 -k 29 -k 30 -k 31 -k 32 -k 33 -k 34 -k 35 -k 36 -k 37 -k 38 -k 39 -k 40 -k 41 -k 42 -k 43 -k 44 -k 45 -k 46 -k 47 -k 48 -k 49 -k 50 -k 51 -k 52 -k 53 -k 54 -k 55 -k 56 -k 57 -k 58 -k 59 -k 60 -k 61 -k 62 -k 63 -k 64 -k 65 -k 66 -k 67;", (0.5, 1.0, 1.0))]),
+                                 ("Gear", [melCurve("curve -d 1 -p -1.541097 0 -0.407608 -p -1.997943 0 -0.287409 -p -1.996633 0 0.292773 -p -1.540642 0 0.404437 -p -1.376247 0 0.800967 -p -1.614601 0 1.209387 -p -1.206218 0 1.618289 -p -0.802518 0 1.37467 -p -0.406558 0 1.538403 -p -0.285068 0 1.998563 -p 0.293543 0 1.996772 -p 0.405503 0 1.538183 -p 0.800499 0 1.376064 -p 1.209852 0 1.613362 -p 1.618868 0 1.206081 -p 1.37717 0 0.803675 -p 1.540102 0 0.406725 -p 1.997785 0 0.285372 -p 1.997147 0 -0.294228 -p 1.540467 0 -0.405926 -p 1.377365 0 -0.800905 -p 1.615038 0 -1.210376 -p 1.206209 0 -1.619887 -p 0.802833 0 -1.375844 -p 0.40785 0 -1.540751 -p 0.28608 0 -1.998594 -p -0.29285 0 -1.997769 -p -0.405278 0 -1.539256 -p -0.801016 0 -1.37748 -p -1.208227 0 -1.614979 -p -1.619464 0 -1.206488 -p -1.37182 0 -0.798064 -p -1.541097 0 -0.407608 -k 0 -k 1 -k 2 -k 3 -k 4 -k 5 -k 6 -k 7 -k 8 -k 9 -k 10 -k 11 -k 12 -k 13 -k 14 -k 15 -k 16 -k 17 -k 18 -k 19 -k 20 -k 21 -k 22 -k 23 -k 24 -k 25 -k 26 -k 27 -k 28 -k 29 -k 30 -k 31 -k 32;", (0.5, 0.5, 0.5)), circleCurve(0.4)]),
+                                 ("Plus", [melCurve("curve -d 1 -p -0.574074 0 -0.522716 -p -2 0 -0.522716 -p -2 0 0.522716 -p -0.574074 0 0.522716 -p -0.574074 0 2 -p 0.574074 0 2 -p 0.574074 0 0.522716 -p 2 0 0.522716 -p 2 0 -0.522716 -p 0.574074 0 -0.522716 -p 0.574074 0 -2 -p -0.574074 0 -2 -p -0.574074 0 -0.522716 -k 0 -k 1 -k 2 -k 3 -k 4 -k 5 -k 6 -k 7 -k 8 -k 9 -k 10 -k 11 -k 12 ;", (0.5, 0.5, 0.5))]),
+                                 ("Triangle", [melCurve("curve -d 1 -p -1 0 -1 -p 1 0 -1 -p 0 0 1 -p -1 0 -1 -k 0 -k 1 -k 2 -k 3 ;")]),
+                                 ("Pyramid", [melCurve("curve -d 1 -p 0 0 1 -p 1 0 0 -p 0 1 0 -p 0 0 1 -p -1 0 0 -p 0 1 0 -p 0 0 -1 -p -1 0 0 -p 0 0 -1 -p 1 0 0 -k 0 -k 1 -k 2 -k 3 -k 4 -k 5 -k 6 -k 7 -k 8 -k 9 ;")]),
+                                 ("3D Diamond", [melCurve("curve -d 1 -p 0 1 0 -p 0 0 1 -p 1 0 0 -p 0 0 -1 -p -1 0 0 -p 0 0 1 -p -1 0 0 -p 0 1 0 -p 0 0 -1 -p 1 0 0 -p 0 1 0 -p 1 0 0 -p 0 -1 0 -p 0 0 -1 -p -1 0 0 -p 0 -1 0 -p 0 0 1 -k 0 -k 1 -k 2 -k 3 -k 4 -k 5 -k 6 -k 7 -k 8 -k 9 -k 10 -k 11 -k 12 -k 13 -k 14 -k 15 -k 16 ;")]),
+                                 ("2D Diamond", [circleCurve(1.2, [0.26, 1.0] * 4)]),
+                                 ("Diamond Sphere", [melCurve("curve -d 1 -p -0.723607 0.525731 0.447214 -p 0 0 1 -p 0.276393 0.850651 0.447214 -p -0.723607 0.525731 0.447214 -p -0.276393 0.850651 -0.447214 -p 0.276393 0.850651 0.447214 -p 0.723607 0.525731 -0.447214 -p -0.276393 0.850651 -0.447214 -p 0 0 -1 -p 0.723607 0.525731 -0.447214 -p 0.723607 -0.525731 -0.447214 -p 0 0 -1 -p -0.276393 -0.850651 -0.447214 -p 0.723607 -0.525731 -0.447214 -p 0.276393 -0.850651 0.447214 -p -0.276393 -0.850651 -0.447214 -p -0.894427 -7.81933e-08 -0.447214 -p 0 0 -1 -p -0.276393 0.850651 -0.447214 -p -0.894427 -7.81933e-08 -0.447214 -p -0.723607 0.525731 0.447214 -p -0.723607 -0.525731 0.447214 -p -0.894427 -7.81933e-08 -0.447214 -p -0.276393 -0.850651 -0.447214 -p -0.723607 -0.525731 0.447214 -p 0.276393 -0.850651 0.447214 -p 0 0 1 -p -0.723607 -0.525731 0.447214 -p 0 0 1 -p 0.894427 0 0.447214 -p 0.276393 0.850651 0.447214 -p 0.723607 0.525731 -0.447214 -p 0.894427 0 0.447214 -p 0.276393 -0.850651 0.447214 -p 0.723607 -0.525731 -0.447214 -p 0.894427 0 0.447214 -k 0 -k 1 -k 2 -k 3 -k 4 -k 5 -k 6 -k 7 -k 8 -k 9 -k 10 -k 11 -k 12 -k 13 -k 14 -k 15 -k 16 -k 17 -k 18 -k 19 -k 20 -k 21 -k 22 -k 23 -k 24 -k 25 -k 26 -k 27 -k 28 -k 29 -k 30 -k 31 -k 32 -k 33 -k 34 -k 35 ;")])])
+
+#Shapes saved from the scene. The index file holds the tags and file of every saved shape, the curves of each shape sit
+#in their own file and are only read when the shape is created or previewed
+CONTROLLER_LIBRARY = {}
+
+#Tag every built-in shape is found by
+CONTROLLER_BUILTIN_TAG = "builtin"
+
+def controllerLibraryPath(fileName = "index.json"):
+    return os.path.join(cmds.internalVar(userAppDir = True), "URT_controllerShapes", fileName)
+
+def controllerLibrary():
+    #{"index" : {name : {"file", "tags"}}, "tags" : {tag : [names]}, "curves" : {name : curves}}, the index is read once
+    if not CONTROLLER_LIBRARY:
+        CONTROLLER_LIBRARY.update({"index" : OrderedDict(), "tags" : {}, "curves" : {}})
+        
+        #A broken index leaves only the built-in shapes
+        if os.path.isfile(controllerLibraryPath()):
+            CONTROLLER_LIBRARY["index"].update(readJsonFile(controllerLibraryPath(), "CONTROLLER LIBRARY", OrderedDict) or {})
+        
+        indexControllerTags()
+    
+    return CONTROLLER_LIBRARY
+
+def indexControllerTags():
+    tags = {CONTROLLER_BUILTIN_TAG : list(CONTROLLER_SHAPES)}
+    
+    for name, entry in CONTROLLER_LIBRARY["index"].items():
+        for tag in entry["tags"]:
+            tags.setdefault(tag, []).append(name)
+    
+    CONTROLLER_LIBRARY["tags"] = tags
+
+def controllerShapeNames(search = ""):
+    #Built-in shapes then the saved ones. search matches a whole tag or any part of a name
+    names = list(CONTROLLER_SHAPES) + list(controllerLibrary()["index"])
+    search = search.strip().lower()
+    
+    if not search:
+        return names
+    
+    tagged = set(controllerLibrary()["tags"].get(search, []))
+    
+    return [name for name in names if name in tagged or search in name.lower()]
+
+def controllerShapeCurves(name):
+    if name in CONTROLLER_SHAPES:
+        return CONTROLLER_SHAPES[name]
+    
+    library = controllerLibrary()
+    
+    if name not in library["index"]:
+        om.MGlobal.displayWarning("{0} IS NOT IN THE CONTROLLER LIBRARY".format(name.upper()))
+        return []
+    
+    #Not cached when the file can not be read, so a fixed file is read the next time
+    if name not in library["curves"]:
+        curves = readJsonFile(controllerLibraryPath(library["index"][name]["file"]), "SHAPE " + name.upper())
+        if curves is None:
+            return []
+        
+        library["curves"][name] = curves
+    
+    return library["curves"][name]
+
+def captureControllerShape(node):
+    #Every curve shape below the transform in its object space. cvPositions and knots read each shape in one call
+    dagPath = om2.MSelectionList().add(node).getDagPath(0)
+    
+    if dagPath.node().hasFn(om2.MFn.kShape):
+        dagPath.pop()
+    
+    curves = []
+    
+    for shapePath in curveShapes(dagPath):
+        fnCurve = om2.MFnNurbsCurve(shapePath)
+        curves.append({"degree" : fnCurve.degree,
+                       "form" : fnCurve.form,
+                       "knots" : list(fnCurve.knots()),
+                       "cvs" : [value for point in fnCurve.cvPositions() for value in (point.x, point.y, point.z)]})
+    
+    return curves
+
+def saveControllerShape(name, tags = None, node = None):
+    #Saves the curves of the node (the first selected one by default) as a shape of the Create Controllers list.
+    #Saving over a saved shape replaces it
+    name = name.strip()
+    tags = sorted(set([tag.strip().lower() for tag in tags or [] if tag.strip()]))
+    
+    if not name:
+        om.MGlobal.displayError("SHAPE NAME IS EMPTY")
+        return
+    
+    if name in CONTROLLER_SHAPES:
+        om.MGlobal.displayError("{0} IS A BUILT-IN SHAPE, PICK ANOTHER NAME".format(name.upper()))
+        return
+    
+    if node is None:
+        selected = cmds.ls(selection = True, long = True)
+        
+        if not selected:
+            om.MGlobal.displayError("SELECT THE CURVE TO SAVE AS A SHAPE")
+            return
+        
+        node = selected[0]
+    
+    curves = captureControllerShape(node)
+    
+    if not curves:
+        om.MGlobal.displayError("{0} HAS NO NURBS CURVE SHAPES".format(node.split("|")[-1].upper()))
+        return
+    
+    library = controllerLibrary()
+    entry = library["index"].get(name) or {"file" : "".join([character if character.isalnum() else "_" for character in name]) + "_" + hashlib.md5(name.encode("utf-8")).hexdigest()[:8] + ".json"}
+    entry["tags"] = tags
+    
+    try:
+        if not os.path.isdir(os.path.dirname(controllerLibraryPath())):
+            os.makedirs(os.path.dirname(controllerLibraryPath()))
+        
+        with open(controllerLibraryPath(entry["file"]), "w") as shapeFile:
+            json.dump(curves, shapeFile, separators = (",", ":"))
+        
+        library["index"][name] = entry
+        
+        with open(controllerLibraryPath(), "w") as indexFile:
+            json.dump(library["index"], indexFile, indent = 4)
+    except (IOError, OSError):
+        om.MGlobal.displayError("SHAPE LIBRARY COULD NOT BE SAVED TO {0}".format(os.path.dirname(controllerLibraryPath())))
+        return
+    
+    library["curves"][name] = curves
+    indexControllerTags()
+    
+    #An old preview of the name would show the shape it replaced
+    if ThumbnailCache.cache_instance:
+        ThumbnailCache.cache_instance.discardPreview(name)
+    
+    print ("Shape {0} saved with {1} curves".format(name, len(curves)))
+    
+    return name
+
+def controllerCurveData(curve, scale = 1.0):
+    cvs = curve["cvs"]
+    curveData = om2.MFnNurbsCurveData().create()
+    om2.MFnNurbsCurve().create([om2.MPoint(cvs[i] * scale, cvs[i + 1] * scale, cvs[i + 2] * scale) for i in range(0, len(cvs), 3)], curve["knots"], curve["degree"], curve["form"], False, True, curveData)
+    
+    return curveData
+
 def makeController(newControllerName, controllerSize, selectedController, controllerColor):
-    if (selectedController == "Circle"):
-        newController = cmds.circle (c = (0,0,0), nr = (0,1,0), sw = 360, r = 1, d = 3, ut = 0, tol = 0.01, s = 8, ch = 1, n = newControllerName)[0]
-        cmds.scale(controllerSize, controllerSize, controllerSize, r = True)
-        cmds.makeIdentity (apply = True, r = 1, t = 1, s = 1, n = 0)
-        cmds.DeleteHistory()
-    elif (selectedController == "Square"):
-        newController = mel.eval ("curve -d 1 -p -1 0 1 -p -1 0 -1 -p 1 0 -1 -p 1 0 1 -p -1 0 1 -k 0 -k 1 -k 2 -k 3 -k 4 ;")
-        newController = cmds.rename (newController, newControllerName)
-        cmds.scale(controllerSize, controllerSize, controllerSize, r = True)
-        cmds.makeIdentity (apply = True, r = 1, t = 1, s = 1, n = 0)
-        cmds.DeleteHistory()
-    elif (selectedController == "Cube"):
-        newController = mel.eval ("curve -d 1 -p -0.5 -0.5 -0.5 -p 0.5 -0.5 -0.5 -p 0.5 0.5 -0.5 -p -0.5 0.5 -0.5 -p -0.5 -0.5 -0.5 -p -0.5 -0.5 0.5 -p 0.5 -0.5 0.5 -p 0.5 -0.5 -0.5 -p 0.5 0.5 -0.5 -p 0.5 0.5 0.5 -p 0.5 -0.5 0.5 -p 0.5 0.5 0.5 -p -0.5 0.5 0.5 -p -0.5 -0.5 0.5 -p -0.5 0.5 0.5 -p -0.5 0.5 -0.5 -k 0 -k 1 -k 2 -k 3 -k 4 -k 5 -k 6 -k 7 -k 8 -k 9 -k 10 -k 11 -k 12 -k 13 -k 14 -k 15 ;")
-        newController = cmds.rename (newController, newControllerName)
-        cmds.scale(controllerSize, controllerSize, controllerSize, r = True)
-        cmds.makeIdentity (apply = True, r = 1, t = 1, s = 1, n = 0)
-        cmds.DeleteHistory()
-    elif (selectedController == "Hexagon"):
-        newController = mel.eval ("curve -d 1 -p 0.501607 0 -0.868807 -p 1.003213 0 0 -p 0.501607 0 0.868809 -p -0.501607 0 0.868809 -p -1.003213 0 0 -p -0.501607 0 -0.868808 -p 0.501607 0 -0.868807 -p -0.501607 0 0.868809 -p -1.003213 0 0 -p -0.501607 0 -0.868808 -p 0.501607 0 0.868809 -p 1.003213 0 0 -p -1.003213 0 0 -k 0 -k 1 -k 2 -k 3 -k 4 -k 5 -k 6 -k 7 -k 8 -k 9 -k 10 -k 11 -k 12 ;")
-        newController = cmds.rename (newController, newControllerName)
-        cmds.scale(controllerSize, controllerSize, controllerSize, r = True)
-        cmds.makeIdentity (apply = True, r = 1, t = 1, s = 1, n = 0)
-        cmds.DeleteHistory()
-    elif (selectedController == "Sphere"):
-        newController = mel.eval ("curve -d 1 -p 0 1 0 -p -0.258819 0.965926 0 -p -0.5 0.866025 0 -p -0.707107 0.707107 0 -p -0.866025 0.5 0 -p -0.965926 0.258819 0 -p -1 0 0 -p -0.965926 -0.258819 0 -p -0.866025 -0.5 0 -p -0.707107 -0.707107 0 -p -0.5 -0.866025 0 -p -0.258819 -0.965926 0 -p 0 -1 0 -p 0.258819 -0.965926 0 -p 0.5 -0.866025 0 -p 0.707107 -0.707107 0 -p 0.866025 -0.5 0 -p 0.965926 -0.258819 0 -p 1 0 0 -p 0.965926 0.258819 0 -p 0.866025 0.5 0 -p 0.707107 0.707107 0 -p 0.5 0.866025 0 -p 0.258819 0.965926 0 -p 0 1 0 -p 0 0.965926 -0.258819 -p 0 0.866025 -0.5 -p 0 0.707107 -0.707107 -p 0 0.5 -0.866025 -p 0 0.258819 -0.965926 -p 0 0 -1 -p 0 -0.258819 -0.965926 -p 0 -0.5 -0.866025 -p 0 -0.707107 -0.707107 -p 0 -0.866025 -0.5 -p 0 -0.965926 -0.258819 -p 0 -1 0 -p 0 -0.965926 0.258819 -p 0 -0.866025 0.5 -p 0 -0.707107 0.707107 -p 0 -0.5 0.866025 -p 0 -0.258819 0.965926 -p 0 0 1 -p 0 0.258819 0.965926 -p 0 0.5 0.866025 -p 0 0.707107 0.707107 -p 0 0.866025 0.5 -p 0 0.965926 0.258819 -p 0 1 0 -p 0.258819 0.965926 0 -p 0.5 0.866025 0 -p 0.707107 0.707107 0 -p 0.866025 0.5 0 -p 0.965926 0.258819 0 -p 1 0 0 -p 0.866025 0 -0.5 -p 0.5 0 -0.866025 -p 0 0 -1 -p -0.5 0 -0.866025 -p -0.866025 0 -0.5 -p -1 0 0 -p -0.866025 0 0.5 -p -0.5 0 0.866025 -p 0 0 1 -p 0.5 0 0.866025 -p 0.866025 0 0.5 -p 1 0 0 -k 0 -k 1 -k 2 -k 3 -k 4 -k 5 -k 6 -k 7 -k 8 -k 9 -k 10 -k 11 -k 12 -k 13 -k 14 -k 15 -k 16 -k 17 -k 18 -k 19 -k 20 -k 21 -k 22 -k 23 -k 24 -k 25 -k 26 -k 27 -k 28 -k 29 -k 30 -k 31 -k 32 -k 33 -k 34 -k 35 -k 36 -k 37 -k 38 -k 39 -k 40 -k 41 -k 42 -k 43 -k 44 -k 45 -k 46 -k 47 -k 48 -k 49 -k 50 -k 51 -k 52 -k 53 -k 54 -k 55 -k 56 -k 57 -k 58 -k 59 -k 60 -k 61 -k 62 -k 63 -k 64 -k 65 -k 66;")
-        newController = cmds.rename (newController, newControllerName)
-        cmds.scale(controllerSize, controllerSize, controllerSize, r = True)
-        cmds.makeIdentity (apply = True, r = 1, t = 1, s = 1, n = 0)
-        cmds.DeleteHistory()
-    elif (selectedController == "Cross"):
-        newController = mel.eval ("curve -d 1 -p 0 0 -0.9857426965 -p -0.2950522357 0 -0.543164343 -p -0.1475261178 0 -0.543164343 -p -0.1475261178 0 -0.1475261178 -p -0.543164343 0 -0.1475261178 -p -0.543164343 0 -0.2950522357 -p -0.9857426965 0 0 -p -0.543164343 0 0.2950522357 -p -0.543164343 0 0.1475261178 -p -0.1475261178 0 0.1475261178 -p -0.1475261178 0 0.543164343 -p -0.2950522357 0 0.543164343 -p 0 0 0.9857426965 -p 0.2950522357 0 0.543164343 -p 0.1475261178 0 0.543164343 -p 0.1475261178 0 0.1475261178 -p 0.543164343 0 0.1475261178 -p 0.543164343 0 0.2950522357 -p 0.9857426965 0 0 -p 0.543164343 0 -0.2950522357 -p 0.543164343 0 -0.1475261178 -p 0.1475261178 0 -0.1475261178 -p 0.1475261178 0 -0.543164343 -p 0.2950522357 0 -0.543164343 -p 0 0 -0.98574269651;")
-        newController = cmds.rename (newController, newControllerName)
-        cmds.scale(controllerSize, controllerSize, controllerSize, r = True)
-        cmds.makeIdentity (apply = True, r = 1, t = 1, s = 1, n = 0)
-        cmds.DeleteHistory()
-    elif (selectedController == "Arrow"):
-        newController = mel.eval ("curve -d 1 -p 0 0 0 -p 0.4 0 -0.4 -p 0.2 0 -0.4 -p 0.2 0 -1 -p -0.2 0 -1 -p -0.2 0 -0.4 -p -0.4 0 -0.4 -p 0 0 0 -k 0 -k 1 -k 2 -k 3 -k 4 -k 5 -k 6 -k 7 ;")
-        newController = cmds.rename (newController, newControllerName)
-        cmds.scale(controllerSize, controllerSize, controllerSize, r = True)
-        cmds.makeIdentity (apply = True, r = 1, t = 1, s = 1, n = 0)
-        cmds.DeleteHistory()
-    elif (selectedController == "Arc Arrow"):
-        newController = mel.eval ("curve -d 3 -p -0.35703261 0 0.63881379 -p -0.35703261 0 0.63881379 -p -0.35703261 0 0.63881379 -p -0.43555158 0 0.28326996 -p -0.43555158 0 0.28326996 -p -0.43555158 0 0.28326996 -p -0.43555158 0 0.28326996 -p -0.10092762 0 0.88816986 -p -0.10092762 0 0.88816986 -p -0.10092762 0 0.88816986 -p -0.10092762 0 0.88816986 -p -0.79049277 0 0.83941839 -p -0.79049277 0 0.83941839 -p -0.79049277 0 0.83941839 -p -0.79049277 0 0.83941839 -p -0.45433386 0 0.76645116 -p -0.45433386 0 0.76645116 -p -0.45433386 0 0.76645116 -p -0.45433386 0 0.76645116 -p -0.64641969 0 0.64640673 -p -0.84458862 0 0.34986654 -p -0.91422432 0 0 -p -0.84458862 0 -0.34986654 -p -0.64641969 0 -0.64640673 -p -0.45283779 0 -0.76484979 -p -0.45283779 0 -0.76484979 -p -0.45283779 0 -0.76484979 -p -0.45283779 0 -0.76484979 -p -0.79049277 0 -0.83941839 -p -0.79049277 0 -0.83941839 -p -0.79049277 0 -0.83941839 -p -0.79049277 0 -0.83941839 -p -0.10092762 0 -0.88816986 -p -0.10092762 0 -0.88816986 -p -0.10092762 0 -0.88816986 -p -0.10092762 0 -0.88816986 -p -0.43555158 0 -0.28326996 -p -0.43555158 0 -0.28326996 -p -0.43555158 0 -0.28326996 -p -0.43555158 0 -0.28326996 -p -0.35575119 0 -0.63632061 -p -0.35575119 0 -0.63632061 -p -0.35575119 0 -0.63632061 -p -0.35575119 0 -0.63632061 -p -0.52874856 0 -0.52892838 -p -0.69110901 0 -0.28621998 -p -0.74792646 0 0 -p -0.69110901 0 0.28621998 -p -0.52874856 0 0.52892838 -p -0.35703261 0 0.63881379;")
-        newController = cmds.rename (newController, newControllerName)
-        cmds.scale(controllerSize, controllerSize, controllerSize, r = True)
-        cmds.makeIdentity (apply = True, r = 1, t = 1, s = 1, n = 0)
-        cmds.DeleteHistory()
-    elif (selectedController == "Double Arrow"):
-        newController = mel.eval ("curve -d 1 -p 0 0 0 -p 0 0.4 -0.4 -p 0 0.2 -0.4 -p 0 0.2 -1 -p 0 -0.2 -1 -p 0 -0.2 -0.4 -p 0 -0.4 -0.4 -p 0 0 0 -p -0.4 0 -0.4 -p -0.2 0 -0.4 -p -0.2 0 -1 -p 0.2 0 -1 -p 0.2 0 -0.4 -p 0.4 0 -0.4 -p 0 0 0 -k 0 -k 1 -k 2 -k 3 -k 4 -k 5 -k 6 -k 7 -k 8 -k 9 -k 10 -k 11 -k 12 -k 13 -k 14 ;")
-        newController = cmds.rename (newController, newControllerName)
-        cmds.scale(controllerSize, controllerSize, controllerSize, r = True)
-        cmds.makeIdentity (apply = True, r = 1, t = 1, s = 1, n = 0)
-        cmds.DeleteHistory()
-    elif (selectedController == "Curved Arrow"):
-        newController = mel.eval ("curve -d 3 -p 0.0959835 0.604001 -0.0987656 -p 0.500783 0.500458 -0.0987656 -p 0.751175 0.327886 -0.0987656 -p 0.751175 0.327886 -0.0987656 -p 0.751175 0.327886 -0.336638 -p 0.751175 0.327886 -0.336638 -p 1.001567 0 0 -p 1.001567 0 0 -p 0.751175 0.327886 0.336638 -p 0.751175 0.327886 0.336638 -p 0.751175 0.327886 0.0987656 -p 0.751175 0.327886 0.0987656 -p 0.500783 0.500458 0.0987656 -p 0.0959835 0.604001 0.0987656 -p 0.0959835 0.604001 0.0987656 -p 0.0959835 0.500458 0.500783 -p 0.0959835 0.327886 0.751175 -p 0.0959835 0.327886 0.751175 -p 0.336638 0.327886 0.751175 -p 0.336638 0.327886 0.751175 -p 0 0 1.001567 -p 0 0 1.001567 -p -0.336638 0.327886 0.751175 -p -0.336638 0.327886 0.751175 -p -0.0959835 0.327886 0.751175 -p -0.0959835 0.327886 0.751175 -p -0.0959835 0.500458 0.500783 -p -0.0959835 0.604001 0.0987656 -p -0.0959835 0.604001 0.0987656 -p -0.500783 0.500458 0.0987656 -p -0.751175 0.327886 0.0987656 -p -0.751175 0.327886 0.0987656 -p -0.751175 0.327886 0.336638 -p -0.751175 0.327886 0.336638 -p -1.001567 0 0 -p -1.001567 0 0 -p -0.751175 0.327886 -0.336638 -p -0.751175 0.327886 -0.336638 -p -0.751175 0.327886 -0.0987656 -p -0.751175 0.327886 -0.0987656 -p -0.500783 0.500458 -0.0987656 -p -0.0959835 0.604001 -0.0987656 -p -0.0959835 0.604001 -0.0987656 -p -0.0959835 0.500458 -0.500783 -p -0.0959835 0.327886 -0.751175 -p -0.0959835 0.327886 -0.751175 -p -0.336638 0.327886 -0.751175 -p -0.336638 0.327886 -0.751175 -p 0 0 -1.001567 -p 0 0 -1.001567 -p 0.336638 0.327886 -0.751175 -p 0.336638 0.327886 -0.751175 -p 0.0959835 0.327886 -0.751175 -p 0.0959835 0.327886 -0.751175 -p 0.0959835 0.500458 -0.500783 -p 0.0959835 0.604001 -0.0987656 -k 0 -k 0 -k 0 -k 1 -k 2 -k 3 -k 4 -k 5 -k 6 -k 7 -k 8 -k 9 -k 10 -k 11 -k 12 -k 13 -k 14 -k 15 -k 16 -k 17 -k 18 -k 19 -k 20 -k 21 -k 22 -k 23 -k 24 -k 25 -k 26 -k 27 -k 28 -k 29 -k 30 -k 31 -k 32 -k 33 -k 34 -k 35 -k 36 -k 37 -k 38 -k 39 -k 40 -k 41 -k 42 -k 43 -k 44 -k 45 -k 46 -k 47 -k 48 -k 49 -k 50 -k 51 -k 52 -k 53 -k 53 -k 53;")
-        newController = cmds.rename (newController, newControllerName)
-        cmds.scale(controllerSize, controllerSize, controllerSize, r = True)
-        cmds.makeIdentity (apply = True, r = 1, t = 1, s = 1, n = 0)
-        cmds.DeleteHistory()
-    elif (selectedController == "Tube"):
-        newController = mel.eval ("curve -d 1 -p -1.5 0.366667 0.366667 -p -1.5 0.366667 -0.366667 -p -1.5 -0.366667 -0.366667 -p -1.5 -0.366667 0.366667 -p -1.5 0.366667 0.366667 -p -2 0.366667 0.366667 -p -2 0.366667 -0.366667 -p -1.5 0.366667 -0.366667 -p -2 0.366667 -0.366667 -p -2 -0.366667 -0.366667 -p -1.5 -0.366667 -0.366667 -p -2 -0.366667 -0.366667 -p -2 -0.366667 0.366667 -p -1.5 -0.366667 0.366667 -p -2 -0.366667 0.366667 -p -2 0.366667 0.366667 -p -1.5 0.366667 0.366667 -p -1.5 0.366667 0.366667 -p -1.5 0.366667 0.366667 -p -1.5 0.25 0.25 -p -1.5 0.25 -0.25 -p -1.5 0.366667 -0.366667 -p -1.5 -0.366667 -0.366667 -p -1.5 -0.25 -0.25 -p -1.5 -0.366667 -0.366667 -p -1.5 -0.366667 0.366667 -p -1.5 -0.25 0.25 -p -1.5 0.25 0.25 -p -1.5 0.25 -0.25 -p -1.5 -0.25 -0.25 -p -1.5 -0.25 0.25 -p 1.5 -0.25 0.25 -p 1.5 0.25 0.25 -p -1.5 0.25 0.25 -p -1.5 0.25 -0.25 -p 1.5 0.25 -0.25 -p 1.5 0.25 0.25 -p 1.5 -0.25 0.25 -p 1.5 -0.25 -0.25 -p -1.5 -0.25 -0.25 -p 1.5 -0.25 -0.25 -p 1.5 -0.25 0.25 -p 1.5 0.25 0.25 -p 1.5 0.25 -0.25 -p 1.5 -0.25 -0.25 -p 1.5 0.25 -0.25 -p 1.5 0.366667 -0.366667 -p 1.5 -0.366667 -0.366667 -p 1.5 -0.25 -0.25 -p 1.5 -0.366667 -0.366667 -p 1.5 -0.366667 0.366667 -p 1.5 -0.25 0.25 -p 1.5 -0.366667 0.366667 -p 1.5 0.366667 0.366667 -p 1.5 0.25 0.25 -p 1.5 0.366667 0.366667 -p 1.5 0.366667 -0.366667 -p 2 0.366667 -0.366667 -p 2 -0.366667 -0.366667 -p 1.5 -0.366667 -0.366667 -p 2 -0.366667 -0.366667 -p 2 -0.366667 0.366667 -p 1.5 -0.366667 0.366667 -p 2 -0.366667 0.366667 -p 2 0.366667 0.366667 -p 2 0.366667 -0.366667 -p 2 0.366667 0.366667 -p 1.5 0.366667 0.366667 -k 0 -k 1 -k 2 -k 3 -k 4 -k 5 -k 6 -k 7 -k 8 -k 9 -k 10 -k 11 -k 12 -k 13 -k 14 -k 15 -k 16 -k 17 -k 18 -k 19 -k 20 -k 21 -k 22 -k 23 -k 24 -k 25 -k 26 -k 27 -k 28 -k 29 -k 30 -k 31 -k 32 -k 33 -k 34 -k 35 -k 36 -k 37 -k 38 -k 39 -k 40 -k 41 -k 42 -k 43 -k 44 -k 45 -k 46 -k 47 -k 48 -k 49 -k 50 -k 51 -k 52 -k 53 -k 54 -k 55 -k 56 -k 57 -k 58 -k 59 -k 60 -k 61 -k 62 -k 63 -k 64 -k 65 -k 66 -k 67;")
-        cmds.scale( 0.5, 1, 1, newController, r = True)
-        newController = cmds.rename (newController, newControllerName)
-        cmds.scale(controllerSize, controllerSize, controllerSize, r = True)
-        cmds.makeIdentity (apply = True, r = 1, t = 1, s = 1, n = 0)
-        cmds.DeleteHistory()
-    elif (selectedController == "Gear"):
-        newController = mel.eval ("curve -d 1 -p -1.541097 0 -0.407608 -p -1.997943 0 -0.287409 -p -1.996633 0 0.292773 -p -1.540642 0 0.404437 -p -1.376247 0 0.800967 -p -1.614601 0 1.209387 -p -1.206218 0 1.618289 -p -0.802518 0 1.37467 -p -0.406558 0 1.538403 -p -0.285068 0 1.998563 -p 0.293543 0 1.996772 -p 0.405503 0 1.538183 -p 0.800499 0 1.376064 -p 1.209852 0 1.613362 -p 1.618868 0 1.206081 -p 1.37717 0 0.803675 -p 1.540102 0 0.406725 -p 1.997785 0 0.285372 -p 1.997147 0 -0.294228 -p 1.540467 0 -0.405926 -p 1.377365 0 -0.800905 -p 1.615038 0 -1.210376 -p 1.206209 0 -1.619887 -p 0.802833 0 -1.375844 -p 0.40785 0 -1.540751 -p 0.28608 0 -1.998594 -p -0.29285 0 -1.997769 -p -0.405278 0 -1.539256 -p -0.801016 0 -1.37748 -p -1.208227 0 -1.614979 -p -1.619464 0 -1.206488 -p -1.37182 0 -0.798064 -p -1.541097 0 -0.407608 -k 0 -k 1 -k 2 -k 3 -k 4 -k 5 -k 6 -k 7 -k 8 -k 9 -k 10 -k 11 -k 12 -k 13 -k 14 -k 15 -k 16 -k 17 -k 18 -k 19 -k 20 -k 21 -k 22 -k 23 -k 24 -k 25 -k 26 -k 27 -k 28 -k 29 -k 30 -k 31 -k 32;")
-        delController = mel.eval ("circle -c 0 0 0 -r 0.8 -nr 0 1 0")
-        delControllerShapes = cmds.listRelatives(delController, shapes = True)
-        cmds.select (delControllerShapes, r = True)
-        cmds.select (newController, add = True)
-        cmds.parent (r = True, s = True)
-        cmds.delete (delController)
-        cmds.scale( 0.5, 0.5, 0.5, newController, r = True)
-        newController = cmds.rename (newController, newControllerName)
-        cmds.scale(controllerSize, controllerSize, controllerSize, r = True)
-        cmds.makeIdentity (apply = True, r = 1, t = 1, s = 1, n = 0)
-        cmds.DeleteHistory()
-    elif (selectedController == "Plus"):
-        newController = mel.eval ("curve -d 1 -p -0.574074 0 -0.522716 -p -2 0 -0.522716 -p -2 0 0.522716 -p -0.574074 0 0.522716 -p -0.574074 0 2 -p 0.574074 0 2 -p 0.574074 0 0.522716 -p 2 0 0.522716 -p 2 0 -0.522716 -p 0.574074 0 -0.522716 -p 0.574074 0 -2 -p -0.574074 0 -2 -p -0.574074 0 -0.522716 -k 0 -k 1 -k 2 -k 3 -k 4 -k 5 -k 6 -k 7 -k 8 -k 9 -k 10 -k 11 -k 12 ;")
-        cmds.scale( 0.5, 0.5, 0.5, newController, r = True)
-        newController = cmds.rename (newController, newControllerName)
-        cmds.scale(controllerSize, controllerSize, controllerSize, r = True)
-        cmds.makeIdentity (apply = True, r = 1, t = 1, s = 1, n = 0)
-        cmds.DeleteHistory()
-    elif (selectedController == "Triangle"):
-        newController = mel.eval ("curve -d 1 -p -1 0 -1 -p 1 0 -1 -p 0 0 1 -p -1 0 -1 -k 0 -k 1 -k 2 -k 3 ;")
-        newController = cmds.rename (newController, newControllerName)
-        cmds.scale(controllerSize, controllerSize, controllerSize, r = True)
-        cmds.makeIdentity (apply = True, r = 1, t = 1, s = 1, n = 0)
-        cmds.DeleteHistory()
-    elif (selectedController == "Pyramid"):
-        newController = mel.eval ("curve -d 1 -p 0 0 1 -p 1 0 0 -p 0 1 0 -p 0 0 1 -p -1 0 0 -p 0 1 0 -p 0 0 -1 -p -1 0 0 -p 0 0 -1 -p 1 0 0 -k 0 -k 1 -k 2 -k 3 -k 4 -k 5 -k 6 -k 7 -k 8 -k 9 ;")
-        newController = cmds.rename (newController, newControllerName)
-        cmds.scale(controllerSize, controllerSize, controllerSize, r = True)
-        cmds.makeIdentity (apply = True, r = 1, t = 1, s = 1, n = 0)
-        cmds.DeleteHistory()
-    elif (selectedController == "3D Diamond"):
-        newController = mel.eval ("curve -d 1 -p 0 1 0 -p 0 0 1 -p 1 0 0 -p 0 0 -1 -p -1 0 0 -p 0 0 1 -p -1 0 0 -p 0 1 0 -p 0 0 -1 -p 1 0 0 -p 0 1 0 -p 1 0 0 -p 0 -1 0 -p 0 0 -1 -p -1 0 0 -p 0 -1 0 -p 0 0 1 -k 0 -k 1 -k 2 -k 3 -k 4 -k 5 -k 6 -k 7 -k 8 -k 9 -k 10 -k 11 -k 12 -k 13 -k 14 -k 15 -k 16 ;")
-        newController = cmds.rename (newController, newControllerName)
-        cmds.scale(controllerSize, controllerSize, controllerSize, r = True)
-        cmds.makeIdentity (apply = True, r = 1, t = 1, s = 1, n = 0)
-        cmds.DeleteHistory()
-    elif (selectedController == "2D Diamond"):
-        newController = mel.eval ("$diamondCurve = `circle -c 0 0 0 -nr 0 1 0 -sw 360 -r 1 -d 3 -ut 0 -tol 0.01 -s 8 -ch 1`; \nselect -r $diamondCurve.cv[0] $diamondCurve.cv[2] $diamondCurve.cv[4] $diamondCurve.cv[6] ; \nhilite $diamondCurve.cv[0] $diamondCurve.cv[2] $diamondCurve.cv[4] $diamondCurve $diamondCurve.cv[6] ;\nscale -r -p 0cm 0cm 0cm 0.26 0.26 0.26 ;\nhilite -u $diamondCurve ;\nselect -r $diamondCurve;\nscale -ws -r 1.2 1.2 1.2;\nmakeIdentity -a true -r 1 -t 1 -s 1 -n 0;")
-        newController = cmds.rename (newController, newControllerName)
-        cmds.scale(controllerSize, controllerSize, controllerSize, r = True)
-        cmds.makeIdentity (apply = True, r = 1, t = 1, s = 1, n = 0)
-        cmds.DeleteHistory()
-    elif (selectedController == "Diamond Sphere"):
-        newController = mel.eval ("curve -d 1 -p -0.723607 0.525731 0.447214 -p 0 0 1 -p 0.276393 0.850651 0.447214 -p -0.723607 0.525731 0.447214 -p -0.276393 0.850651 -0.447214 -p 0.276393 0.850651 0.447214 -p 0.723607 0.525731 -0.447214 -p -0.276393 0.850651 -0.447214 -p 0 0 -1 -p 0.723607 0.525731 -0.447214 -p 0.723607 -0.525731 -0.447214 -p 0 0 -1 -p -0.276393 -0.850651 -0.447214 -p 0.723607 -0.525731 -0.447214 -p 0.276393 -0.850651 0.447214 -p -0.276393 -0.850651 -0.447214 -p -0.894427 -7.81933e-08 -0.447214 -p 0 0 -1 -p -0.276393 0.850651 -0.447214 -p -0.894427 -7.81933e-08 -0.447214 -p -0.723607 0.525731 0.447214 -p -0.723607 -0.525731 0.447214 -p -0.894427 -7.81933e-08 -0.447214 -p -0.276393 -0.850651 -0.447214 -p -0.723607 -0.525731 0.447214 -p 0.276393 -0.850651 0.447214 -p 0 0 1 -p -0.723607 -0.525731 0.447214 -p 0 0 1 -p 0.894427 0 0.447214 -p 0.276393 0.850651 0.447214 -p 0.723607 0.525731 -0.447214 -p 0.894427 0 0.447214 -p 0.276393 -0.850651 0.447214 -p 0.723607 -0.525731 -0.447214 -p 0.894427 0 0.447214 -k 0 -k 1 -k 2 -k 3 -k 4 -k 5 -k 6 -k 7 -k 8 -k 9 -k 10 -k 11 -k 12 -k 13 -k 14 -k 15 -k 16 -k 17 -k 18 -k 19 -k 20 -k 21 -k 22 -k 23 -k 24 -k 25 -k 26 -k 27 -k 28 -k 29 -k 30 -k 31 -k 32 -k 33 -k 34 -k 35 ;")
-        newController = cmds.rename (newController, newControllerName)
-        cmds.scale(controllerSize, controllerSize, controllerSize, r = True)
-        cmds.makeIdentity (apply = True, r = 1, t = 1, s = 1, n = 0)
-        cmds.DeleteHistory()
+    #Transform and curve shapes of the shape in one batch. The CVs are written at the controller size, so there is nothing
+    #to freeze and no history to delete. The controller is left selected for createGroups
+    curves = controllerShapeCurves(selectedController)
     
-    #Adding in Color to the New Controllers
-    cmds.select (newController, r = True)
-    shapesSelect = cmds.ls (selection = 1, shapes = True, dag = True)
+    batch = BatchModifier()
+    transform = batch.createNode("transform", newControllerName)
+    shapes = [batch.createNode("nurbsCurve", None, transform) for curve in curves]
+    batch.doIt()
+    
+    newController = batch.name(transform)
     
     #Going through all the shapes and changing the RGB color through the 'Drawing Overrides'
-    for shape in shapesSelect:
-        cmds.setAttr(shape + ".overrideEnabled", 1)
-        cmds.setAttr(shape + ".overrideRGBColors", 1)
-        cmds.setAttr(shape + ".overrideColorRGB", controllerColor.red(), controllerColor.green(), controllerColor.blue())
+    for i, (curve, shape) in enumerate(zip(curves, shapes)):
+        batch.setAttr(shape, "cached", controllerCurveData(curve, controllerSize))
+        batch.setAttr(shape, "overrideEnabled", True)
+        batch.setAttr(shape, "overrideRGBColors", True)
+        
+        for attr, value in zip(["overrideColorR", "overrideColorG", "overrideColorB"], [controllerColor.red(), controllerColor.green(), controllerColor.blue()]):
+            batch.setAttr(shape, attr, float(value))
+        
+        batch.modifier.renameNode(shape, "{0}Shape{1}".format(newController, i if i else ""))
+    
+    batch.doIt()
+    
+    cmds.select (newController, r = True)
+    
+    return newController
+
+#Yaw and pitch in degrees of the isometric camera the controller previews are drawn with
+CONTROLLER_PREVIEW_VIEW = (45.0, 35.264)
+
+#Points per span drawn for curves above degree 1, and the empty border of the previews in pixels
+CONTROLLER_PREVIEW_SAMPLES = 8
+CONTROLLER_PREVIEW_MARGIN = 4
+
+def controllerPreviewLines(curves):
+    #Polylines of the curves: degree 1 curves are their CVs, the others are sampled along the knot domain
+    lines = []
+    
+    for curve in curves:
+        cvs = curve["cvs"]
+        
+        if curve["degree"] == 1:
+            lines.append([cvs[i:i + 3] for i in range(0, len(cvs), 3)])
+            continue
+        
+        fnCurve = om2.MFnNurbsCurve(controllerCurveData(curve))
+        start, end = fnCurve.knotDomain
+        count = fnCurve.numSpans * CONTROLLER_PREVIEW_SAMPLES
+        
+        lines.append([[point.x, point.y, point.z] for point in [fnCurve.getPointAtParam(start + (end - start) * i / float(count)) for i in range(count + 1)]])
+    
+    return lines
+
+def renderControllerPreview(curves, width, height, color):
+    #The curves seen by the isometric camera, fitted into a transparent image of the size with their aspect kept
+    yaw, pitch = [math.radians(angle) for angle in CONTROLLER_PREVIEW_VIEW]
+    lines = []
     
+    for line in controllerPreviewLines(curves):
+        projected = []
+        
+        for x, y, z in line:
+            depth = x * math.sin(yaw) + z * math.cos(yaw)
+            projected.append((x * math.cos(yaw) - z * math.sin(yaw), depth * math.sin(pitch) - y * math.cos(pitch)))
         
+        lines.append(projected)
+    
+    image = QtGui.QImage(width, height, QtGui.QImage.Format_ARGB32_Premultiplied)
+    image.fill(QtCore.Qt.transparent)
+    
+    points = [point for line in lines for point in line]
+    if not points:
+        return image
+    
+    left, right = min([point[0] for point in points]), max([point[0] for point in points])
+    top, bottom = min([point[1] for point in points]), max([point[1] for point in points])
+    
+    scale = min((width - 2 * CONTROLLER_PREVIEW_MARGIN) / max(right - left, POLE_EPSILON), (height - 2 * CONTROLLER_PREVIEW_MARGIN) / max(bottom - top, POLE_EPSILON))
+    offsetX = (width - (right + left) * scale) / 2.0
+    offsetY = (height - (bottom + top) * scale) / 2.0
+    
+    painter = QtGui.QPainter(image)
+    painter.setRenderHint(QtGui.QPainter.Antialiasing)
+    painter.setPen(QtGui.QPen(color, 1.5))
+    
+    for line in lines:
+        painter.drawPolyline(QtGui.QPolygonF([QtCore.QPointF(x * scale + offsetX, y * scale + offsetY) for x, y in line]))
+    
+    painter.end()
+    
+    return image
+    
 def createGroups(controllerName, groupNumber, group1, group2, group3, group4):
     if (groupNumber == 0):
         return controllerName
@@ -2292,32 +2838,149 @@ CREATE CONTROLLER FROM TEXT
 START
 ####################################################################################################
 '''
-def createControllerText (controlText, font):
-    with UndoContext():
-        if (controlText != ""):
-            cmds.textCurves (f = font, t = controlText)
-            
-            transformNode = cmds.ls (selection = True)
-            selected = cmds.ls(selection = True, dag = True, s = True)
-            
-            immediateChildren = cmds.listRelatives(transformNode, children = True)
-            cmds.select(immediateChildren, r = True)
+#Font : {character : glyph}, also kept on disk per font in the maya app dir between sessions
+GLYPH_CACHE = {}
+
+def glyphCachePath(font):
+    fileName = "".join([character if character.isalnum() else "_" for character in font]) + ".json"
+    
+    return os.path.join(cmds.internalVar(userAppDir = True), "URT_glyphs", fileName)
+
+def textLetters(text, font):
+    #World position of every letter transform textCurves makes, and the curves below each one relative to its letter
+    textNodes = cmds.textCurves(f = font, t = text)
+    topPath = om2.MSelectionList().add(textNodes[0]).getDagPath(0)
+    letters = []
+    
+    for i in range(topPath.childCount()):
+        letterPath = om2.MDagPath.getAPathTo(topPath.child(i))
+        letterInverse = letterPath.inclusiveMatrixInverse()
+        curves = []
+        
+        iterator = om2.MItDag(om2.MItDag.kDepthFirst, om2.MFn.kNurbsCurve)
+        iterator.reset(letterPath, om2.MItDag.kDepthFirst, om2.MFn.kNurbsCurve)
+        
+        while not iterator.isDone():
+            shapePath = iterator.getPath()
             
-            for child in immediateChildren:
-                mel.eval("source channelBoxCommand; CBdeleteConnection {0}.translate;". format (child))
+            if not om2.MFnDagNode(shapePath).isIntermediateObject:
+                fnCurve = om2.MFnNurbsCurve(shapePath)
+                bakeMatrix = shapePath.inclusiveMatrix() * letterInverse
+                curves.append({"degree" : fnCurve.degree,
+                               "form" : fnCurve.form,
+                               "knots" : list(fnCurve.knots()),
+                               "cvs" : [value for point in fnCurve.cvPositions() for point in [point * bakeMatrix] for value in (point.x, point.y, point.z)]})
             
-            cmds.select (transformNode, r = True)
-            cmds.makeIdentity (apply = True, r = 1, t = 1, s = 1, n = 0)
-            cmds.DeleteHistory()
+            iterator.next()
+        
+        letters.append({"x" : om2.MTransformationMatrix(letterPath.inclusiveMatrix()).translation(om2.MSpace.kWorld).x, "curves" : curves})
+    
+    cmds.delete(textNodes)
+    
+    return letters
+
+def captureGlyphs(font, characters):
+    #One textCurves call per new character. The character is written twice, the second letter gives the advance width
+    glyphs = {}
+    spaceWidth = None
+    
+    for character in characters:
+        letters = textLetters(character * 2, font)
+        
+        if len(letters) == 2:
+            glyphs[character] = {"advance" : letters[1]["x"] - letters[0]["x"], "curves" : letters[0]["curves"]}
+            continue
+        
+        #Spaces and characters the font can not draw only move the next letter
+        if not character.isspace():
+            om.MGlobal.displayWarning("{0} CAN NOT DRAW {1}, LEFT AS A SPACE".format(font.upper(), repr(character)))
+        
+        if spaceWidth is None:
+            pair = textLetters("xx", font)
+            spaced = textLetters("x x", font)
+            spaceWidth = (spaced[1]["x"] - spaced[0]["x"]) - (pair[1]["x"] - pair[0]["x"]) if len(pair) == 2 and len(spaced) == 2 else 0.0
+        
+        glyphs[character] = {"advance" : spaceWidth, "curves" : []}
+    
+    return glyphs
+
+def fontGlyphs(font, text):
+    #Cached glyphs of the font for every character of the text, the missing ones are captured once and saved
+    if font not in GLYPH_CACHE:
+        GLYPH_CACHE[font] = {}
+        
+        #A broken cache only costs a capture, the glyphs are captured again and the file is rewritten
+        if os.path.isfile(glyphCachePath(font)):
+            GLYPH_CACHE[font].update(readJsonFile(glyphCachePath(font), "GLYPH CACHE") or {})
+    
+    missing = sorted(set([character for character in text if character not in GLYPH_CACHE[font]]))
+    
+    if missing:
+        GLYPH_CACHE[font].update(captureGlyphs(font, missing))
+        
+        try:
+            if not os.path.isdir(os.path.dirname(glyphCachePath(font))):
+                os.makedirs(os.path.dirname(glyphCachePath(font)))
             
-            cmds.select(selected, transformNode, r = True)
-            cmds.parent (r = True, s= True)
+            with open(glyphCachePath(font), "w") as cacheFile:
+                json.dump(GLYPH_CACHE[font], cacheFile, separators = (",", ":"))
+        except (IOError, OSError):
+            om.MGlobal.displayWarning("GLYPH CACHE COULD NOT BE SAVED")
+    
+    return GLYPH_CACHE[font]
+
+def createTextControllers (texts, font, kerning = 0.0):
+    #One transform per text with a curve shape per glyph stroke, all made by one batch. kerning is added between letters
+    texts = [text for text in texts if text.strip()]
+    
+    if not texts:
+        om.MGlobal.displayError("TEXT FIELD IS EMPTY")
+        return
+    
+    timeStart = time.time()
+    
+    with UndoContext():
+        glyphs = fontGlyphs(font, "".join(texts))
+        
+        batch = BatchModifier()
+        controllers = []
+        
+        for text in texts:
+            transform = batch.createNode("transform", "Text_" + "".join([character if character.isalnum() else "_" for character in text]) + "_1")
+            strokes = []
+            offset = 0.0
             
-            cmds.delete(immediateChildren)          
+            for character in text:
+                for curve in glyphs[character]["curves"]:
+                    strokes.append((curve, offset, batch.createNode("nurbsCurve", None, transform)))
+                
+                offset += glyphs[character]["advance"] + kerning
             
-        else:
-            om.MGlobal.displayError("TEXT FIELD IS EMPTY")
-            return
+            controllers.append((transform, strokes))
+        
+        batch.doIt()
+        
+        for transform, strokes in controllers:
+            for i, (curve, offset, shape) in enumerate(strokes):
+                cvs = curve["cvs"]
+                curveData = om2.MFnNurbsCurveData().create()
+                om2.MFnNurbsCurve().create([om2.MPoint(cvs[j] + offset, cvs[j + 1], cvs[j + 2]) for j in range(0, len(cvs), 3)], curve["knots"], curve["degree"], curve["form"], False, True, curveData)
+                batch.setAttr(shape, "cached", curveData)
+                batch.modifier.renameNode(shape, "{0}Shape{1}".format(batch.name(transform), i + 1))
+        
+        batch.doIt()
+        
+        names = [batch.name(transform) for transform, strokes in controllers]
+        cmds.select(names, r = True)
+    
+    print ("Created {0} text controllers in {1:.3f} sec".format(len(names), time.time() - timeStart))
+    
+    return names
+
+def createControllerText (controlText, font, kerning = 0.0):
+    names = createTextControllers([controlText], font, kerning)
+    
+    return names[0] if names else None
 '''
 ####################################################################################################
 CREATE CONTROLLER FROM TEXT
@@ -2463,10 +3126,162 @@ CREATE IK CHAIN METHOD
 START
 ####################################################################################################
 '''    
-def createIKChain(controllerScale):
+#Sphere used for the pole vector controller
+POLE_CONTROLLER_MEL = "curve -d 1 -p 0 1 0 -p -0.258819 0.965926 0 -p -0.5 0.866025 0 -p -0.707107 0.707107 0 -p -0.866025 0.5 0 -p -0.965926 0.258819 0 -p -1 0 0 -p -0.965926 -0.258819 0 -p -0.866025 -0.5 0 -p -0.707107 -0.707107 0 -p -0.5 -0.866025 0 -p -0.258819 -0.965926 0 -p 0 -1 0 -p 0.258819 -0.965926 0 -p 0.5 -0.866025 0 -p 0.707107 -0.707107 0 -p 0.866025 -0.5 0 -p 0.965926 -0.258819 0 -p 1 0 0 -p 0.965926 0.258819 0 -p 0.866025 0.5 0 -p 0.707107 0.707107 0 -p 0.5 0.866025 0 -p 0.258819 0.965926 0 -p 0 1 0 -p 0 0.965926 -0.258819 -p 0 0.866025 -0.5 -p 0 0.707107 -0.707107 -p 0 0.5 -0.866025 -p 0 0.258819 -0.965926 -p 0 0 -1 -p 0 -0.258819 -0.965926 -p 0 -0.5 -0.866025 -p 0 -0.707107 -0.707107 -p 0 -0.866025 -0.5 -p 0 -0.965926 -0.258819 -p 0 -1 0 -p 0 -0.965926 0.258819 -p 0 -0.866025 0.5 -p 0 -0.707107 0.707107 -p 0 -0.5 0.866025 -p 0 -0.258819 0.965926 -p 0 0 1 -p 0 0.258819 0.965926 -p 0 0.5 0.866025 -p 0 0.707107 0.707107 -p 0 0.866025 0.5 -p 0 0.965926 0.258819 -p 0 1 0 -p 0.258819 0.965926 0 -p 0.5 0.866025 0 -p 0.707107 0.707107 0 -p 0.866025 0.5 0 -p 0.965926 0.258819 0 -p 1 0 0 -p 0.866025 0 -0.5 -p 0.5 0 -0.866025 -p 0 0 -1 -p -0.5 0 -0.866025 -p -0.866025 0 -0.5 -p -1 0 0 -p -0.866025 0 0.5 -p -0.5 0 0.866025 -p 0 0 1 -p 0.5 0 0.866025 -p 0.866025 0 0.5 -p 1 0 0 -k 0 -k 1 -k 2 -k 3 -k 4 -k 5 -k 6 -k 7 -k 8 -k 9 -k 10 -k 11 -k 12 -k 13 -k 14 -k 15 -k 16 -k 17 -k 18 -k 19 -k 20 -k 21 -k 22 -k 23 -k 24 -k 25 -k 26 -k 27 -k 28 -k 29 -k 30 -k 31 -k 32 -k 33 -k 34 -k 35 -k 36 -k 37 -k 38 -k 39 -k 40 -k 41 -k 42 -k 43 -k 44 -k 45 -k 46 -k 47 -k 48 -k 49 -k 50 -k 51 -k 52 -k 53 -k 54 -k 55 -k 56 -k 57 -k 58 -k 59 -k 60 -k 61 -k 62 -k 63 -k 64 -k 65 -k 66;"
+
+def melCurvePoints(melCommand):
+    tokens = melCommand.replace(";", "").split()
+    
+    return [[float(value) for value in tokens[index + 1:index + 4]] for index, token in enumerate(tokens) if token == "-p"]
+
+def linearCurveData(points, scale = 1.0):
+    curveData = om2.MFnNurbsCurveData().create()
+    om2.MFnNurbsCurve().create([om2.MPoint(point[0] * scale, point[1] * scale, point[2] * scale) for point in points], [float(knot) for knot in range(len(points))], 1, om2.MFnNurbsCurve.kOpen, False, True, curveData)
+    
+    return curveData
+
+def chainFromRoot(root):
+    #The root and the first child joint below it, down to the last joint
+    chain = [root]
+    children = cmds.listRelatives(root, children = True, type = "joint", path = True)
+    
+    while children:
+        chain.append(children[0])
+        children = cmds.listRelatives(children[0], children = True, type = "joint", path = True)
+    
+    return chain
+
+def isChainRoot(joint, selection, segmentJoints = 3):
+    #A joint starts a chain when no other selected joint is above or below it and its chain holds at least one segment
+    if not cmds.objectType(joint, isType = 'joint'):
+        return False
+    
+    path = cmds.ls(joint, long = True)[0]
+    
+    for other in cmds.ls(selection, long = True):
+        if other != path and (other.startswith(path + "|") or path.startswith(other + "|")):
+            return False
+    
+    return len(chainFromRoot(joint)) >= max(3, int(segmentJoints))
+
+def splitJointChains(rootJoints, segmentJoints = 3):
+    #Follows the first child joint down from every root and cuts the chain into segments of segmentJoints joints.
+    #Segments do not share joints, so the end joint of one segment is never the start joint of the next one's IK handle
+    chains = []
+    size = max(3, int(segmentJoints))
+    
+    for root in rootJoints:
+        if not cmds.objectType(root, isType = 'joint'):
+            om.MGlobal.displayError("ONE OR MORE OF THE SELECTED ITEM/S IS NOT A JOINT")
+            return []
+        
+        chain = chainFromRoot(root)
+        
+        for start in range(0, len(chain) - size + 1, size):
+            chains.append(chain[start:start + size])
+        
+        leftover = len(chain) % size
+        
+        if leftover:
+            om.MGlobal.displayWarning("{0} : LAST {1} JOINT/S OF THE CHAIN LEFT WITHOUT IK".format(root, leftover))
+    
+    return chains
+
+def createIKChains(chains, controllerScale, driverMode = "Driven Keys", stretchMode = "Rigid"):
+    #createIKChain setup for many chains. Controllers and groups are made by two batched modifiers, handles and constraints by command so Maya computes their offsets
+    if not chains:
+        om.MGlobal.displayError("SELECT THE FIRST JOINT OF EACH CHAIN TO SETUP IK")
+        return
+    
+    with UndoContext():
+        poles = limbPoleVectors([[chain[0], chain[len(chain) // 2], chain[-1]] for chain in chains])
+        poleCurve = linearCurveData(melCurvePoints(POLE_CONTROLLER_MEL), controllerScale / 2.0)
+        #Square rotated 90 degrees in Z, as in createIKChain
+        mainCurve = linearCurveData([(0, -1, -1), (0, 1, -1), (0, 1, 1), (0, -1, 1), (0, -1, -1)], controllerScale)
+        
+        batch = BatchModifier()
+        setups = []
+        
+        for chain in chains:
+            midJNT = chain[len(chain) // 2].split("|")[-1]
+            endJNT = chain[-1].split("|")[-1]
+            
+            setup = {"chain" : chain}
+            setup["poleOffset"] = batch.createNode("transform", midJNT + "_IK_CTRL_0")
+            setup["poleCon"] = batch.createNode("transform", midJNT + "_IK_CTRL_CON", setup["poleOffset"])
+            setup["poleCTRL"] = batch.createNode("transform", midJNT + "_IK_CTRL", setup["poleCon"])
+            setup["poleShape"] = batch.createNode("nurbsCurve", midJNT + "_IK_CTRLShape", setup["poleCTRL"])
+            setup["mainOffset"] = batch.createNode("transform", endJNT + "_IK_CTRL_0")
+            mainCon = batch.createNode("transform", endJNT + "_IK_CTRL_CON", setup["mainOffset"])
+            setup["mainCTRL"] = batch.createNode("transform", endJNT + "_IK_CTRL", mainCon)
+            setup["mainShape"] = batch.createNode("nurbsCurve", endJNT + "_IK_CTRLShape", setup["mainCTRL"])
+            
+            #Arrow from the pole vector controller to the mid joint
+            setup["annoteLoc"] = batch.createNode("transform", midJNT + "_annotation_LOC", chain[len(chain) // 2])
+            setup["annoteLocShape"] = batch.createNode("locator", midJNT + "_annotation_LOCShape", setup["annoteLoc"])
+            annote = batch.createNode("transform", midJNT + "_annotation", setup["poleCTRL"])
+            setup["annotationShape"] = batch.createNode("annotationShape", midJNT + "_annotationShape", annote)
+            
+            batch.addAttr(setup["poleCTRL"], "follow", "enum", 0, enumNames = "<none>:{0}:".format(endJNT + "_IK_CTRL"))
+            setups.append(setup)
+        
+        batch.doIt()
+        
+        for setup, poleVectorPos in zip(setups, poles):
+            mainMatrix = om2.MTransformationMatrix(worldMatrix(setup["chain"][-1]))
+            mainTranslate = mainMatrix.translation(om2.MSpace.kWorld)
+            mainRotate = mainMatrix.rotation()
+            
+            for i, axis in enumerate("XYZ"):
+                batch.setAttr(setup["poleOffset"], "translate" + axis, poleVectorPos[i])
+                batch.setAttr(setup["mainOffset"], "translate" + axis, [mainTranslate.x, mainTranslate.y, mainTranslate.z][i])
+                batch.setAttr(setup["mainOffset"], "rotate" + axis, [mainRotate.x, mainRotate.y, mainRotate.z][i])
+            
+            batch.setAttr(setup["poleShape"], "cached", poleCurve)
+            batch.setAttr(setup["mainShape"], "cached", mainCurve)
+            batch.setAttr(setup["annoteLoc"], "visibility", False)
+            batch.setAttr(setup["annotationShape"], "overrideEnabled", True)
+            batch.setAttr(setup["annotationShape"], "overrideDisplayType", 1)
+            batch.connectAttr(setup["annoteLocShape"], "worldMatrix[0]", setup["annotationShape"], "dagObjectMatrix[0]")
+        
+        batch.doIt()
+        
+        for setup in setups:
+            chain = setup["chain"]
+            poleCTRL = batch.name(setup["poleCTRL"])
+            mainCTRL = batch.name(setup["mainCTRL"])
+            endJNT = chain[-1].split("|")[-1]
+            
+            IKHandle = cmds.ikHandle (n = endJNT + "_IKH", shf = False, s = "sticky", fs = True, sj = chain[0], ee = chain[-1])
+            cmds.rename(IKHandle[1], endJNT + "_EFF")
+            IKHandle = cmds.parent(IKHandle[0], mainCTRL)
+            
+            cmds.poleVectorConstraint (poleCTRL, IKHandle[0], weight = 1)
+            cmds.orientConstraint (mainCTRL, chain[-1], offset = (0,0,0), weight = 1)
+            poleGrpCONST = cmds.parentConstraint (mainCTRL, batch.name(setup["poleCon"]), maintainOffset = True, weight = 1)
+            
+            batch.setAttr(IKHandle[0], "visibility", False)
+            addStretchyIK (chain, IKHandle[0], mainCTRL, stretchMode)
+            
+            if driverMode == "Math Nodes":
+                batch.connectAttr(poleCTRL, "follow", poleGrpCONST[0], mainCTRL.split("|")[-1] + "W0")
+            else:
+                cmds.setDrivenKeyframe (poleGrpCONST[0] + "." + mainCTRL.split("|")[-1] + "W0", dv = 0, v = 0, cd = poleCTRL + '.follow')
+                cmds.setDrivenKeyframe (poleGrpCONST[0] + "." + mainCTRL.split("|")[-1] + "W0", dv = 1, v = 1, cd = poleCTRL + '.follow')
+        
+        batch.doIt()
+        cmds.select([batch.name(setup["mainCTRL"]) for setup in setups], r = True)
+        
+        return [batch.name(setup["mainCTRL"]) for setup in setups]
+
+def createIKChain(controllerScale, driverMode = "Driven Keys", segmentJoints = 3, stretchMode = "Rigid"):
     with UndoContext():
         selectedJoints = cmds.ls(selection = True)
         
+        #Root joints of separate chains are set up in one batch. Any other selection goes through the 3 joint setup below
+        if selectedJoints and all(isChainRoot(joint, selectedJoints, segmentJoints) for joint in selectedJoints):
+            return createIKChains(splitJointChains(selectedJoints, segmentJoints), controllerScale, driverMode, stretchMode)
+        
         if (len(selectedJoints) == 3):
             
             for items in selectedJoints:
@@ -2481,7 +3296,7 @@ def createIKChain(controllerScale):
             
             #Creating IK Controllers for the Setup
             #Pole Vector Controller
-            secondCTRL = mel.eval ("curve -d 1 -p 0 1 0 -p -0.258819 0.965926 0 -p -0.5 0.866025 0 -p -0.707107 0.707107 0 -p -0.866025 0.5 0 -p -0.965926 0.258819 0 -p -1 0 0 -p -0.965926 -0.258819 0 -p -0.866025 -0.5 0 -p -0.707107 -0.707107 0 -p -0.5 -0.866025 0 -p -0.258819 -0.965926 0 -p 0 -1 0 -p 0.258819 -0.965926 0 -p 0.5 -0.866025 0 -p 0.707107 -0.707107 0 -p 0.866025 -0.5 0 -p 0.965926 -0.258819 0 -p 1 0 0 -p 0.965926 0.258819 0 -p 0.866025 0.5 0 -p 0.707107 0.707107 0 -p 0.5 0.866025 0 -p 0.258819 0.965926 0 -p 0 1 0 -p 0 0.965926 -0.258819 -p 0 0.866025 -0.5 -p 0 0.707107 -0.707107 -p 0 0.5 -0.866025 -p 0 0.258819 -0.965926 -p 0 0 -1 -p 0 -0.258819 -0.965926 -p 0 -0.5 -0.866025 -p 0 -0.707107 -0.707107 -p 0 -0.866025 -0.5 -p 0 -0.965926 -0.258819 -p 0 -1 0 -p 0 -0.965926 0.258819 -p 0 -0.866025 0.5 -p 0 -0.707107 0.707107 -p 0 -0.5 0.866025 -p 0 -0.258819 0.965926 -p 0 0 1 -p 0 0.258819 0.965926 -p 0 0.5 0.866025 -p 0 0.707107 0.707107 -p 0 0.866025 0.5 -p 0 0.965926 0.258819 -p 0 1 0 -p 0.258819 0.965926 0 -p 0.5 0.866025 0 -p 0.707107 0.707107 0 -p 0.866025 0.5 0 -p 0.965926 0.258819 0 -p 1 0 0 -p 0.866025 0 -0.5 -p 0.5 0 -0.866025 -p 0 0 -1 -p -0.5 0 -0.866025 -p -0.866025 0 -0.5 -p -1 0 0 -p -0.866025 0 0.5 -p -0.5 0 0.866025 -p 0 0 1 -p 0.5 0 0.866025 -p 0.866025 0 0.5 -p 1 0 0 -k 0 -k 1 -k 2 -k 3 -k 4 -k 5 -k 6 -k 7 -k 8 -k 9 -k 10 -k 11 -k 12 -k 13 -k 14 -k 15 -k 16 -k 17 -k 18 -k 19 -k 20 -k 21 -k 22 -k 23 -k 24 -k 25 -k 26 -k 27 -k 28 -k 29 -k 30 -k 31 -k 32 -k 33 -k 34 -k 35 -k 36 -k 37 -k 38 -k 39 -k 40 -k 41 -k 42 -k 43 -k 44 -k 45 -k 46 -k 47 -k 48 -k 49 -k 50 -k 51 -k 52 -k 53 -k 54 -k 55 -k 56 -k 57 -k 58 -k 59 -k 60 -k 61 -k 62 -k 63 -k 64 -k 65 -k 66;")
+            secondCTRL = mel.eval (POLE_CONTROLLER_MEL)
             secondCTRL = cmds.rename (secondCTRL, secondJNT + "_IK_CTRL")
             cmds.select(secondCTRL, r = True)
             cmds.scale(controllerScale/2, controllerScale/2, controllerScale/2, r = True)
@@ -2521,11 +3336,7 @@ def createIKChain(controllerScale):
             mainGRP_off = cmds.group (n = mainCTRL + "_0")
             
             #Setting up the Pole-Vector position
-            firstJNTPos = cmds.xform (firstJNT, q = True, ws = True, translation = True)
-            secondJNTPos = cmds.xform (secondJNT, q = True, ws = True, translation = True)
-            thirdJNTPos = cmds.xform (thirdJNT, q = True, ws = True, translation = True)
-
-            poleVectorPos = getPoleVectorPos (firstJNTPos, secondJNTPos, thirdJNTPos)
+            poleVectorPos = limbPoleVectors([[firstJNT, secondJNT, thirdJNT]])[0]
             cmds.xform (secondGRP_off, ws = True, translation = poleVectorPos)
             
             #Position the Main Controller
@@ -2556,9 +3367,14 @@ def createIKChain(controllerScale):
             cmds.select(mainCTRL, secondGRP_con, r = True)
             secondGrpCONST = cmds.parentConstraint (maintainOffset = True, weight = 1)
             
-            #Creating connection for the above created attributes using SDK
-            cmds.setDrivenKeyframe (secondGrpCONST[0] + "." + mainCTRL + "W0", dv = 0, v = 0, cd = secondCTRL + '.follow')
-            cmds.setDrivenKeyframe (secondGrpCONST[0] + "." + mainCTRL + "W0", dv = 1, v = 1, cd = secondCTRL + '.follow')
+            #Creating connection for the above created attributes using SDK or a direct connection
+            if driverMode == "Math Nodes":
+                cmds.connectAttr (secondCTRL + '.follow', secondGrpCONST[0] + "." + mainCTRL + "W0")
+            else:
+                cmds.setDrivenKeyframe (secondGrpCONST[0] + "." + mainCTRL + "W0", dv = 0, v = 0, cd = secondCTRL + '.follow')
+                cmds.setDrivenKeyframe (secondGrpCONST[0] + "." + mainCTRL + "W0", dv = 1, v = 1, cd = secondCTRL + '.follow')
+            
+            addStretchyIK ([firstJNT, secondJNT, thirdJNT], IKHandle[0], mainCTRL, stretchMode)
         
         else:
             om.MGlobal.displayError("SELECT 3 JOINTS THAT ARE IN A CHAIN TO SETUP IK")
@@ -2577,24 +3393,297 @@ START
 ####################################################################################################
 '''
 def deleteUnknownNodes():
-    with UndoContext():
-        unknownNodes = cmds.ls (type = "unknown")
-        unknownNodes += cmds.ls(type = "unknownDag")
-        
-        if (len(unknownNodes) == 0):
-            print ("No Unknown Objects in the Scene")
-            return
-        
-        for item in unknownNodes:
-            if cmds.objExists(item):
-                print ("Removed Unknown Node : {0}".format(item))
-                cmds.lockNode(item, lock=False)
-                cmds.delete(item)
+    return optimizeScene(["unknownNodes", "unknownPlugins"], measureFileSize = False)
 '''
 ####################################################################################################
 REMOVE UNKOWN NODES
 END
 ####################################################################################################
+'''
+
+'''
+####################################################################################################
+SCENE OPTIMIZER
+START
+####################################################################################################
+'''
+OPTIMIZE_CATEGORIES = ["unknownNodes", "unknownPlugins", "utilityNodes", "animCurves", "emptyGroups", "shadingNetworks"]
+
+OPTIMIZE_UNKNOWN_TYPES = ["unknown", "unknownDag", "unknownTransform"]
+
+#Removed when nothing reads their outputs
+OPTIMIZE_UTILITY_TYPES = ["reverse",
+                          "multDoubleLinear",
+                          "addDoubleLinear",
+                          "multiplyDivide",
+                          "plusMinusAverage",
+                          "condition",
+                          "clamp",
+                          "setRange",
+                          "remapValue",
+                          "blendColors",
+                          "blendTwoAttr",
+                          "blendWeighted",
+                          "pairBlend",
+                          "distanceBetween",
+                          "multMatrix",
+                          "decomposeMatrix",
+                          "composeMatrix",
+                          "wtAddMatrix",
+                          "blendMatrix",
+                          "pointMatrixMult",
+                          "pointOnCurveInfo",
+                          "motionPath",
+                          "unitConversion"]
+
+#Connections to these do not keep a node alive. Utility nodes made with shadingNode -asUtility hang on the renderUtilityList by message
+OPTIMIZE_IGNORED_DESTINATIONS = ["hyperLayout",
+                                 "nodeGraphEditorInfo",
+                                 "renderUtilityList"]
+
+#Compared to find materials that render the same
+OPTIMIZE_MATERIAL_ATTRS = ["color",
+                           "transparency",
+                           "ambientColor",
+                           "incandescence",
+                           "diffuse",
+                           "translucence",
+                           "specularColor",
+                           "eccentricity",
+                           "specularRollOff",
+                           "cosinePower",
+                           "reflectivity",
+                           "baseColor",
+                           "base",
+                           "metalness",
+                           "specular",
+                           "specularRoughness",
+                           "outColor"]
+
+def sceneFileSize():
+    #Size of the scene written as mayaAscii, the scene itself is not saved
+    exportPath = os.path.join(tempfile.gettempdir(), "URT_optimizeScene.ma")
+    cmds.file(exportPath, exportAll = True, type = "mayaAscii", force = True, preserveReferences = True)
+    
+    fileSize = os.path.getsize(exportPath)
+    os.remove(exportPath)
+    
+    return fileSize
+
+def materialSignature(fnMaterial):
+    values = [fnMaterial.typeName]
+    
+    for attr in OPTIMIZE_MATERIAL_ATTRS:
+        if not fnMaterial.hasAttribute(attr):
+            continue
+        
+        plug = fnMaterial.findPlug(attr, False)
+        plugs = [plug.child(i) for i in range(plug.numChildren())] if plug.isCompound else [plug]
+        values.append((attr, tuple([round(child.asDouble(), 5) for child in plugs])))
+    
+    return tuple(values)
+
+def sceneGraph():
+    #One pass over every node: type, downstream nodes and the handful of checks the optimizer needs
+    nodes = {}
+    iterator = om2.MItDependencyNodes()
+    
+    while not iterator.isDone():
+        nodeObject = iterator.thisNode()
+        fnNode = om2.MFnDependencyNode(nodeObject)
+        key = om2.MObjectHandle(nodeObject).hashCode()
+        
+        node = {"object" : nodeObject,
+                "type" : fnNode.typeName,
+                "protected" : fnNode.isDefaultNode or fnNode.isFromReferencedFile or fnNode.isShared,
+                "locked" : fnNode.isLocked,
+                "destinations" : set(),
+                "messages" : set(),
+                "inputs" : 0,
+                "children" : om2.MFnDagNode(nodeObject).childCount() if nodeObject.hasFn(om2.MFn.kDagNode) else 0}
+        
+        for plug in fnNode.getConnections():
+            if plug.isDestination:
+                node["inputs"] += 1
+            
+            if not plug.isSource:
+                continue
+            
+            #Nodes that only hold a message link (rig lookups, sets, containers) still use the node
+            consumers = node["messages"] if plug.partialName(useLongNames = True) == "message" else node["destinations"]
+            
+            for destination in plug.destinations():
+                destinationObject = destination.node()
+                if om2.MFnDependencyNode(destinationObject).typeName not in OPTIMIZE_IGNORED_DESTINATIONS:
+                    consumers.add(om2.MObjectHandle(destinationObject).hashCode())
+        
+        nodes[key] = node
+        iterator.next()
+    
+    return nodes
+
+def findDeadNodes(nodes, categories):
+    #Utility nodes and anim curves die when everything downstream of them is dead, so chains left by rebuilds go in one run
+    dead = {}
+    
+    for key, node in nodes.items():
+        if node["protected"]:
+            continue
+        
+        if "unknownNodes" in categories and node["type"] in OPTIMIZE_UNKNOWN_TYPES:
+            dead[key] = "unknownNodes"
+        elif "emptyGroups" in categories and node["type"] == "transform" and not node["locked"] and not node["children"] and not node["inputs"] and not node["destinations"] and not node["messages"]:
+            dead[key] = "emptyGroups"
+    
+    candidates = {}
+    for key, node in nodes.items():
+        if node["protected"] or node["locked"] or key in dead:
+            continue
+        
+        if "utilityNodes" in categories and node["type"] in OPTIMIZE_UTILITY_TYPES:
+            candidates[key] = "utilityNodes"
+        elif "animCurves" in categories and node["object"].hasFn(om2.MFn.kAnimCurve):
+            candidates[key] = "animCurves"
+    
+    changed = True
+    while changed:
+        changed = False
+        
+        for key, category in candidates.items():
+            if key not in dead and all([destination in dead for destination in nodes[key]["destinations"] | nodes[key]["messages"]]):
+                dead[key] = category
+                changed = True
+    
+    return dead
+
+def duplicateShadingNetworks(nodes, dead):
+    #shadingEngine : the shadingEngine with the same material that keeps its members. Only whole object assignments of
+    #materials without inputs are merged
+    merges = {}
+    kept = {}
+    
+    for key, node in sorted(nodes.items(), key = lambda item: om2.MFnDependencyNode(item[1]["object"]).name()):
+        if node["type"] != "shadingEngine" or node["protected"] or key in dead:
+            continue
+        
+        fnEngine = om2.MFnDependencyNode(node["object"])
+        if fnEngine.findPlug("displacementShader", False).isDestination or fnEngine.findPlug("volumeShader", False).isDestination:
+            continue
+        
+        surfacePlug = fnEngine.findPlug("surfaceShader", False)
+        if not surfacePlug.isDestination:
+            continue
+        
+        memberPlug = fnEngine.findPlug("dagSetMembers", False)
+        members = [memberPlug.elementByLogicalIndex(index) for index in memberPlug.getExistingArrayAttributeIndices()]
+        if any([member.isDestination and "objectGroups" in member.source().partialName(useLongNames = True) for member in members]):
+            continue
+        
+        material = surfacePlug.source().node()
+        materialNode = nodes.get(om2.MObjectHandle(material).hashCode())
+        if not materialNode or materialNode["protected"] or materialNode["inputs"] or len(materialNode["destinations"]) > 2:
+            continue
+        
+        signature = materialSignature(om2.MFnDependencyNode(material))
+        
+        if signature in kept:
+            merges[key] = kept[signature]
+        else:
+            kept[signature] = key
+    
+    return merges
+
+def optimizeScene(categories = None, measureFileSize = True):
+    #Finds the cruft in one pass over the scene and removes it with one modifier. Returns the removed node names per category
+    categories = OPTIMIZE_CATEGORIES if categories is None else categories
+    timeStart = time.time()
+    
+    nodeCountBefore = len(cmds.ls())
+    fileSizeBefore = sceneFileSize() if measureFileSize else None
+    
+    nodes = sceneGraph()
+    dead = findDeadNodes(nodes, categories)
+    merges = duplicateShadingNetworks(nodes, dead) if "shadingNetworks" in categories else {}
+    
+    removed = dict([(category, []) for category in categories])
+    
+    with UndoContext():
+        batch = BatchModifier()
+        nextMember = {}
+        
+        #Members of a duplicate shading group move to the one that is kept, then the group, its material and materialInfo go
+        for key, keepKey in merges.items():
+            fnEngine = om2.MFnDependencyNode(nodes[key]["object"])
+            keepPlug = om2.MFnDependencyNode(nodes[keepKey]["object"]).findPlug("dagSetMembers", False)
+            
+            if keepKey not in nextMember:
+                nextMember[keepKey] = max(list(keepPlug.getExistingArrayAttributeIndices()) or [-1]) + 1
+            
+            memberPlug = fnEngine.findPlug("dagSetMembers", False)
+            for index in memberPlug.getExistingArrayAttributeIndices():
+                member = memberPlug.elementByLogicalIndex(index)
+                if not member.isDestination:
+                    continue
+                
+                batch.modifier.disconnect(member.source(), member)
+                batch.modifier.connect(member.source(), keepPlug.elementByLogicalIndex(nextMember[keepKey]))
+                nextMember[keepKey] += 1
+            
+            shadingNodes = [nodes[key]["object"], fnEngine.findPlug("surfaceShader", False).source().node()]
+            shadingNodes += [destination.node() for destination in fnEngine.findPlug("message", False).destinations() if destination.node().hasFn(om2.MFn.kMaterialInfo)]
+            
+            for shadingNode in shadingNodes:
+                removed["shadingNetworks"].append(om2.MFnDependencyNode(shadingNode).name())
+                batch.modifier.deleteNode(shadingNode)
+        
+        for key, category in dead.items():
+            nodeObject = nodes[key]["object"]
+            fnNode = om2.MFnDependencyNode(nodeObject)
+            
+            name = om2.MFnDagNode(nodeObject).fullPathName() if nodeObject.hasFn(om2.MFn.kDagNode) else fnNode.name()
+            
+            #Unknown nodes are often locked by the file they came from. Unlocked by command so the undo chunk locks them again
+            if fnNode.isLocked:
+                cmds.lockNode(name, lock = False)
+            
+            removed[category].append(name)
+        
+        #Deepest dag nodes go first so no parent is deleted before its children
+        deadObjects = [nodes[key]["object"] for key in dead]
+        dagObjects = sorted([nodeObject for nodeObject in deadObjects if nodeObject.hasFn(om2.MFn.kDagNode)], key = lambda nodeObject: -om2.MFnDagNode(nodeObject).fullPathName().count("|"))
+        
+        for nodeObject in dagObjects + [nodeObject for nodeObject in deadObjects if not nodeObject.hasFn(om2.MFn.kDagNode)]:
+            batch.modifier.deleteNode(nodeObject)
+        
+        batch.doIt()
+    
+    if "unknownPlugins" in categories:
+        for plugin in cmds.unknownPlugin(q = True, list = True) or []:
+            try:
+                cmds.unknownPlugin(plugin, remove = True)
+                removed["unknownPlugins"].append(plugin)
+            except RuntimeError:
+                om.MGlobal.displayWarning("UNKNOWN PLUGIN {0} IS STILL USED BY THE SCENE".format(plugin))
+    
+    nodeCountAfter = len(cmds.ls())
+    
+    for category in categories:
+        print ("{0}: {1} removed".format(category, len(removed[category])))
+    
+    print ("Nodes: {0} -> {1} ({2} fewer)".format(nodeCountBefore, nodeCountAfter, nodeCountBefore - nodeCountAfter))
+    
+    if measureFileSize:
+        fileSizeAfter = sceneFileSize()
+        print ("File size as mayaAscii: {0:.1f} KB -> {1:.1f} KB ({2:.1f} KB saved)".format(fileSizeBefore / 1024.0, fileSizeAfter / 1024.0, (fileSizeBefore - fileSizeAfter) / 1024.0))
+    
+    print ("Scene optimized in {0:.2f} sec".format(time.time() - timeStart))
+    
+    return removed
+'''
+####################################################################################################
+SCENE OPTIMIZER
+END
+####################################################################################################
 '''   
 
 '''
@@ -2632,27 +3721,494 @@ COMBINE SHAPE FOR SELECTED TRANSFORM NODES
 START
 ####################################################################################################
 '''
-def combineShape ():
+def shapeOverrideColor(shapePath, rootPath):
+    #Override color of the shape, or of the closest transform above it up to the merged source
+    dagPath = om2.MDagPath(shapePath)
+    
+    while True:
+        fnNode = om2.MFnDependencyNode(dagPath.node())
+        if fnNode.findPlug("overrideEnabled", False).asBool():
+            return [fnNode.findPlug(attr, False).asDouble() for attr in RIG_TEMPLATE_COLOR_ATTRS]
+        
+        if dagPath == rootPath or dagPath.length() <= 1:
+            return None
+        
+        dagPath.pop()
+
+def emptiedNodes(nodeObject, mergedShapes):
+    #(True, []) when nothing but merged shapes is left below the node, else (False, the topmost nodes below it that are left empty)
+    fnDagNode = om2.MFnDagNode(nodeObject)
+    emptied = []
+    keep = False
+    
+    for i in range(fnDagNode.childCount()):
+        child = fnDagNode.child(i)
+        
+        if om2.MObjectHandle(child).hashCode() in mergedShapes:
+            emptied.append(child)
+        elif child.apiType() == om2.MFn.kTransform:
+            childEmpty, childEmptied = emptiedNodes(child, mergedShapes)
+            
+            if childEmpty:
+                emptied.append(child)
+            else:
+                emptied += childEmptied
+                keep = True
+        else:
+            keep = True
+    
+    return not keep, emptied
+
+def mergeShapes(groups):
+    #groups is a list of (target, [sources]). Every curve shape below the sources is rebuilt under its target with the
+    #world transform baked into the CVs and the old shape is deleted. Transforms are only deleted when nothing else is left
+    #below them, meshes, joints and other children stay where they are. One batch for all the groups, no history left behind
+    timeStart = time.time()
+    merges = []
+    sourceObjects = []
+    mergedShapes = set()
+    shapeCount = {}
+    
+    for target, sources in groups:
+        targetPath = om2.MSelectionList().add(target).getDagPath(0)
+        targetInverse = targetPath.inclusiveMatrixInverse()
+        
+        for source in sources:
+            sourcePath = om2.MSelectionList().add(source).getDagPath(0)
+            
+            if targetPath == sourcePath or targetPath.fullPathName().startswith(sourcePath.fullPathName() + "|"):
+                om.MGlobal.displayWarning("{0} IS ABOVE {1} AND CAN NOT BE MERGED INTO IT".format(source, target))
+                continue
+            
+            iterator = om2.MItDag(om2.MItDag.kDepthFirst, om2.MFn.kNurbsCurve)
+            iterator.reset(sourcePath, om2.MItDag.kDepthFirst, om2.MFn.kNurbsCurve)
+            
+            while not iterator.isDone():
+                shapePath = iterator.getPath()
+                shapeHash = om2.MObjectHandle(shapePath.node()).hashCode()
+                
+                #A source below another source of the same run gives its shapes only once
+                if not om2.MFnDagNode(shapePath).isIntermediateObject and shapeHash not in mergedShapes:
+                    mergedShapes.add(shapeHash)
+                    fnCurve = om2.MFnNurbsCurve(shapePath)
+                    bakeMatrix = shapePath.inclusiveMatrix() * targetInverse
+                    
+                    shapeCount[target] = shapeCount.get(target, targetPath.numberOfShapesDirectlyBelow()) + 1
+                    
+                    merges.append({"target" : targetPath.node(),
+                                   "name" : "{0}Shape{1}".format(targetPath.partialPathName().split("|")[-1], shapeCount[target]),
+                                   "degree" : fnCurve.degree,
+                                   "form" : fnCurve.form,
+                                   "knots" : fnCurve.knots(),
+                                   "cvs" : [point * bakeMatrix for point in fnCurve.cvPositions()],
+                                   "color" : shapeOverrideColor(shapePath, sourcePath)})
+                
+                iterator.next()
+            
+            if sourcePath.node() not in sourceObjects:
+                sourceObjects.append(sourcePath.node())
+    
+    if not merges:
+        om.MGlobal.displayError("NO CURVE SHAPES FOUND TO MERGE")
+        return
+    
     with UndoContext():
-        cmds.makeIdentity (apply = True, r = 1, t = 1, s = 1, n = 0)
-        selected = cmds.ls(selection = True)
-        allSelectedShapes = []
+        batch = BatchModifier()
+        
+        for merge in merges:
+            merge["shape"] = batch.createNode("nurbsCurve", None, merge["target"])
+        
+        batch.doIt()
+        
+        for merge in merges:
+            curveData = om2.MFnNurbsCurveData().create()
+            om2.MFnNurbsCurve().create(merge["cvs"], merge["knots"], merge["degree"], merge["form"], False, True, curveData)
+            batch.setAttr(merge["shape"], "cached", curveData)
+            
+            if merge["color"]:
+                for attr, value in zip(RIG_TEMPLATE_COLOR_ATTRS, merge["color"]):
+                    batch.setAttr(merge["shape"], attr, bool(value) if attr in RIG_TEMPLATE_COLOR_ATTRS[:2] else (int(value) if attr == "overrideColor" else value))
+            
+            batch.modifier.renameNode(merge["shape"], merge["name"])
+        
+        #Only the merged shapes go, and the transforms left with nothing below them. Nodes below another deleted node go with it
+        removals = []
+        for sourceObject in sourceObjects:
+            empty, emptied = emptiedNodes(sourceObject, mergedShapes)
+            removals += [sourceObject] if empty and sourceObject.apiType() == om2.MFn.kTransform else emptied
+        
+        removals = dict((om2.MDagPath.getAPathTo(node).fullPathName(), node) for node in removals)
+        for path, node in removals.items():
+            if not any(path.startswith(other + "|") for other in removals):
+                batch.modifier.deleteNode(node)
+        
+        batch.doIt()
+    
+    print ("Merged {0} shapes from {1} transforms into {2} targets in {3:.3f} sec".format(len(merges), len(sourceObjects), len(groups), time.time() - timeStart))
+    
+    return [batch.name(merge["shape"]) for merge in merges]
 
+def combineShape (eachGroup = False):
+    #Shapes of the selected objects go to the first selected one, or with eachGroup every selected group takes the shapes of its children
+    selected = cmds.ls(selection = True, long = True, type = "transform")
+    
+    if eachGroup:
+        groups = [(item, cmds.listRelatives(item, children = True, type = "transform", fullPath = True) or []) for item in selected]
+        groups = [group for group in groups if group[1]]
+        
+        if not groups:
+            om.MGlobal.displayError("SELECT 1 OR MORE GROUPS WITH CHILD TRANSFORM NODES")
+            return
+    else:
         if (len(selected) == 0 or len(selected) == 1):
             om.MGlobal.displayError("SELECT 2 OR MORE TRANSFORM NODES")
             return
+        
+        groups = [(selected[0], selected[1:])]
+    
+    shapes = mergeShapes(groups)
+    
+    cmds.select([group[0] for group in groups if cmds.objExists(group[0])], r = True)
+    
+    return shapes
+'''
+####################################################################################################
+COMBINE SHAPE FOR SELECTED TRANSFORM NODES
+END
+####################################################################################################
+'''
+
+'''
+####################################################################################################
+JOINT ROLE DETECTION
+START
+####################################################################################################
+'''
+#Control Rig panel joint fields, same keys as controlRigButtonPressed
+JOINT_ROLE_FIELDS = ["pelvis", "spine1", "chest", "neck", "head", "clavicle", "shoulder", "elbow", "wrist", "thigh", "knee", "ankle", "ball"]
+
+#Name parts that point at a role. Helper joints found by JOINT_ROLE_HELPERS lose the name score
+JOINT_ROLE_NAMES = {"pelvis" : ["pelvis", "hips", "hip", "root", "cog"],
+                    "spine1" : ["spine"],
+                    "chest" : ["chest", "spine", "torso"],
+                    "neck" : ["neck"],
+                    "head" : ["head"],
+                    "clavicle" : ["clavicle", "collar", "clav"],
+                    "shoulder" : ["shoulder", "upperarm", "uparm", "arm"],
+                    "elbow" : ["elbow", "forearm", "lowerarm", "lowarm"],
+                    "wrist" : ["wrist", "hand"],
+                    "thigh" : ["thigh", "upleg", "upperleg", "hip"],
+                    "knee" : ["knee", "calf", "shin", "lowerleg", "lowleg", "leg"],
+                    "ankle" : ["ankle", "foot"],
+                    "ball" : ["ball", "toe"]}
+JOINT_ROLE_HELPERS = ["twist", "roll", "end", "nub", "tip", "helper", "corrective"]
+
+#Skeleton hash : detected roles, also kept in the maya app dir between sessions
+JOINT_ROLE_CACHE = {}
+
+def jointRoleCachePath():
+    return os.path.join(cmds.internalVar(userAppDir = True), "URT_jointRoles.json")
+
+def isHelperJoint(joint):
+    name = joint["short"].lower()
+    
+    return any([helper in name for helper in JOINT_ROLE_HELPERS])
+
+def jointRoleNameScore(joint, role):
+    name = joint["short"].lower()
+    score = 0.0
+    
+    for keyword in JOINT_ROLE_NAMES[role]:
+        if keyword in name:
+            score = 1.0
+            break
+    
+    if isHelperJoint(joint):
+        score -= 1.0
+    
+    return score
+
+def skeletonJoints(root):
+    #One depth first walk from the root joint. Children always come after their parent
+    rootPath = om2.MSelectionList().add(root).getDagPath(0)
+    iterator = om2.MItDag(om2.MItDag.kDepthFirst, om2.MFn.kJoint)
+    iterator.reset(rootPath, om2.MItDag.kDepthFirst, om2.MFn.kJoint)
+    
+    joints = []
+    indices = {}
+    
+    while not iterator.isDone():
+        dagPath = iterator.getPath()
+        parentPath = om2.MDagPath(dagPath)
+        parentPath.pop()
+        
+        #Skip the transforms sitting between two joints
+        while parentPath.length() and parentPath.fullPathName() not in indices:
+            parentPath.pop()
+        
+        parentIndex = indices.get(parentPath.fullPathName(), -1) if parentPath.length() else -1
+        indices[dagPath.fullPathName()] = len(joints)
+        
+        name = dagPath.partialPathName()
+        joints.append({"name" : name, 
+                       "short" : name.split("|")[-1].split(":")[-1], 
+                       "parent" : parentIndex, 
+                       "children" : [], 
+                       "depth" : iterator.depth(), 
+                       "position" : om2.MTransformationMatrix(dagPath.inclusiveMatrix()).translation(om2.MSpace.kWorld)})
+        
+        if parentIndex >= 0:
+            joints[parentIndex]["children"].append(len(joints) - 1)
+        
+        iterator.next()
+    
+    return joints
+
+def skeletonHash(joints):
+    description = ";".join(["{0}|{1}|{2:.3f},{3:.3f},{4:.3f}".format(joint["name"], joint["parent"], joint["position"].x, joint["position"].y, joint["position"].z) for joint in joints])
+    
+    return hashlib.md5(description.encode("utf-8")).hexdigest()
+
+def jointPath(joints, start, end):
+    #Joints from start down to end, start excluded
+    path = []
+    
+    while end != start and end >= 0:
+        path.append(end)
+        end = joints[end]["parent"]
+    
+    path.reverse()
+    
+    return path
+
+def pickBendJoint(joints, candidates, start, end, role):
+    #Knee and elbow: away from the straight line between the ends and close to its middle. Twist joints sit on the line
+    line = joints[end]["position"] - joints[start]["position"]
+    length = line.length()
+    best = None
+    bestScore = None
+    
+    for index in candidates:
+        offset = joints[index]["position"] - joints[start]["position"]
+        fraction = (offset * line) / (length * length) if length else 0.5
+        bend = (offset - line * fraction).length() / length if length else 0.0
+        score = jointRoleNameScore(joints[index], role) + (1.0 - abs(fraction - 0.5) * 2.0) + bend * 10.0
+        
+        if bestScore is None or score > bestScore:
+            best = index
+            bestScore = score
+    
+    return best
+
+def sideIndicators(leftName, rightName):
+    #L_thigh / R_thigh gives L_ and R_, thigh_l / thigh_r gives _l and _r
+    prefix = os.path.commonprefix([leftName, rightName])
+    suffix = os.path.commonprefix([leftName[::-1], rightName[::-1]])[::-1]
+    
+    if len(prefix) + len(suffix) >= min(len(leftName), len(rightName)):
+        return None
+    
+    leftIndicator = leftName[len(prefix):len(leftName) - len(suffix)]
+    rightIndicator = rightName[len(prefix):len(rightName) - len(suffix)]
+    
+    if suffix.startswith("_"):
+        leftIndicator += "_"
+        rightIndicator += "_"
+    elif prefix.endswith("_"):
+        leftIndicator = "_" + leftIndicator
+        rightIndicator = "_" + rightIndicator
+    
+    if leftName.replace(leftIndicator, rightIndicator, 1) != rightName:
+        return None
+    
+    return leftIndicator, rightIndicator
+
+def scoreJointRoles(joints):
+    #Character stands on the ground plane, Y up, facing +Z with the left side on +X
+    count = len(joints)
+    ends = [count] * count
+    stack = []
+    
+    for index, joint in enumerate(joints):
+        while stack and joints[stack[-1]]["depth"] >= joint["depth"]:
+            ends[stack.pop()] = index
+        stack.append(index)
+    
+    def subtree(index):
+        return range(index, ends[index])
+    
+    def position(index):
+        return joints[index]["position"]
+    
+    groundY = min([joint["position"].y for joint in joints])
+    roles = {}
+    
+    #Pelvis: one branch climbs, two branches reach the ground on opposite sides
+    def branchScore(index):
+        height = position(index).y - groundY
+        
+        if height <= 0 or len(joints[index]["children"]) < 2:
+            return 0
+        
+        up = left = right = 0
+        
+        for child in joints[index]["children"]:
+            lowest = min(subtree(child), key = lambda i: position(i).y)
+            
+            if max([position(i).y for i in subtree(child)]) > position(index).y + height * 0.2:
+                up = 1
+            
+            if position(lowest).y < groundY + height * 0.2:
+                if position(lowest).x > position(index).x:
+                    left = 1
+                else:
+                    right = 1
+        
+        return up + left + right
+    
+    pelvis = max(range(count), key = lambda i: branchScore(i) * 3 + jointRoleNameScore(joints[i], "pelvis") - joints[i]["depth"] * 0.01)
+    roles["pelvis"] = pelvis
+    height = position(pelvis).y - groundY
+    
+    if branchScore(pelvis) < 3:
+        return roles, None
+    
+    children = joints[pelvis]["children"]
+    legRoots = [child for child in children if min([position(i).y for i in subtree(child)]) < groundY + height * 0.2]
+    leftLeg = min([child for child in legRoots if position(min(subtree(child), key = lambda i: position(i).y)).x > position(pelvis).x], 
+                  key = lambda child: min([position(i).y for i in subtree(child)]))
+    rightLeg = min([child for child in legRoots if position(min(subtree(child), key = lambda i: position(i).y)).x <= position(pelvis).x], 
+                   key = lambda child: min([position(i).y for i in subtree(child)]))
+    spineRoot = max([child for child in children if child not in legRoots] or children, key = lambda child: max([position(i).y for i in subtree(child)]))
+    
+    #Leg: thigh starts the long drop, ankle starts the forward run of the foot
+    footJoints = [i for i in subtree(leftLeg) if not joints[i]["children"] and position(i).y < groundY + height * 0.1]
+    legPath = jointPath(joints, pelvis, max(footJoints or [ends[leftLeg] - 1], key = lambda i: position(i).z))
+    
+    thigh = None
+    ankle = None
+    
+    for step in range(len(legPath) - 1):
+        segment = position(legPath[step + 1]) - position(legPath[step])
+        
+        if thigh is None and -segment.y > height * 0.25:
+            thigh = step
+        elif thigh is not None and ankle is None and step > thigh + 1 and abs(segment.z) > abs(segment.y):
+            ankle = step
+    
+    if thigh is not None:
+        roles["thigh"] = legPath[thigh]
+    
+    if ankle is not None:
+        roles["ankle"] = legPath[ankle]
+        roles["ball"] = legPath[ankle + 1]
+        roles["knee"] = pickBendJoint(joints, legPath[thigh + 1:ankle], legPath[thigh], legPath[ankle], "knee")
+    
+    #Spine: path to the highest joint, the arms branch off the chest
+    top = max(subtree(spineRoot), key = lambda i: position(i).y)
+    upPath = [spineRoot] + jointPath(joints, spineRoot, top)
+    branches = [child for index in upPath for child in joints[index]["children"] if child not in upPath]
+    roles["spine1"] = spineRoot
+    
+    if branches:
+        leftArm = max(branches, key = lambda child: max([position(i).x for i in subtree(child)]))
+        rightArm = min(branches, key = lambda child: min([position(i).x for i in subtree(child)]))
+        chest = joints[leftArm]["parent"]
+        roles["chest"] = chest
+        headPath = upPath[upPath.index(chest) + 1:]
+        
+        if headPath:
+            roles["neck"] = headPath[0]
+            named = [index for index in headPath[1:] if jointRoleNameScore(joints[index], "head") > 0]
+            
+            if named:
+                roles["head"] = named[0]
+            elif len(headPath) > 1:
+                head = headPath[-1]
+                if jointRoleNameScore(joints[head], "head") < 0 and len(headPath) > 2:
+                    head = headPath[-2]
+                roles["head"] = head
+        
+        #Arm: path to the furthest joint on the left, the wrist is where the fingers branch
+        armPath = [leftArm] + jointPath(joints, leftArm, max(subtree(leftArm), key = lambda i: position(i).x))
+        
+        if len(armPath) >= 4:
+            roles["clavicle"] = armPath[0]
+            roles["shoulder"] = armPath[1]
+            wrists = [index for index in armPath[3:] if len([child for child in joints[index]["children"] if not isHelperJoint(joints[child])]) > 1]
+            
+            if not wrists:
+                wrists = [index for index in armPath[3:] if jointRoleNameScore(joints[index], "wrist") > 0] or [armPath[-1]]
+            
+            wrist = armPath.index(wrists[0])
+            roles["wrist"] = armPath[wrist]
+            roles["elbow"] = pickBendJoint(joints, armPath[2:wrist], armPath[1], armPath[wrist], "elbow")
+        
+        indicators = sideIndicators(joints[leftArm]["short"], joints[rightArm]["short"]) or sideIndicators(joints[leftLeg]["short"], joints[rightLeg]["short"])
+    else:
+        indicators = sideIndicators(joints[leftLeg]["short"], joints[rightLeg]["short"])
+    
+    return roles, indicators
+
+def skeletonRoot(joint = None):
+    #Top joint above the given joint, or the biggest skeleton in the scene
+    if joint:
+        parents = cmds.listRelatives(joint, parent = True, type = "joint", fullPath = True)
+        while parents:
+            joint = parents[0]
+            parents = cmds.listRelatives(joint, parent = True, type = "joint", fullPath = True)
+        return joint
+    
+    roots = [joint for joint in cmds.ls(type = "joint", long = True) if not cmds.listRelatives(joint, parent = True, type = "joint")]
+    
+    if not roots:
+        return None
+    
+    return max(roots, key = lambda root: len(cmds.listRelatives(root, allDescendents = True, type = "joint") or []))
 
-        for item in selected:
-            if (item != selected[0]):
-                shapes = cmds.listRelatives(item, shapes = True)
-                if (shapes != []):
-                    allSelectedShapes.extend(shapes)
+def detectJointRoles(joint = None):
+    #Returns the joint name for every field of JOINT_ROLE_FIELDS it could find, plus the side indicators
+    root = skeletonRoot(joint)
+    
+    if root is None:
+        om.MGlobal.displayError("NO SKELETON FOUND IN THE SCENE")
+        return
+    
+    joints = skeletonJoints(root)
+    key = skeletonHash(joints)
+    
+    if not JOINT_ROLE_CACHE and os.path.isfile(jointRoleCachePath()):
+        #A broken cache is only a missed lookup, the roles are scored again and the file is rewritten
+        JOINT_ROLE_CACHE.update(readJsonFile(jointRoleCachePath(), "JOINT ROLE CACHE") or {})
+    
+    if key in JOINT_ROLE_CACHE:
+        return dict(JOINT_ROLE_CACHE[key])
+    
+    roles, indicators = scoreJointRoles(joints)
+    result = dict([(role, joints[index]["name"]) for role, index in roles.items() if index is not None])
+    
+    if indicators:
+        result["leftIndicator"], result["rightIndicator"] = indicators
+    
+    missing = [role for role in JOINT_ROLE_FIELDS if role not in result]
+    
+    if missing:
+        om.MGlobal.displayWarning("COULD NOT DETECT {0}. FILL THE REMAINING FIELDS BY HAND".format(", ".join(missing).upper()))
+        return result
+    
+    JOINT_ROLE_CACHE[key] = result
+    
+    try:
+        with open(jointRoleCachePath(), "w") as cacheFile:
+            json.dump(JOINT_ROLE_CACHE, cacheFile, indent = 4)
+    except IOError:
+        om.MGlobal.displayWarning("JOINT ROLE CACHE COULD NOT BE SAVED")
+    
+    return dict(result)
 
-        cmds.select(allSelectedShapes, selected[0], r = True)
-        cmds.parent (r = True, s= True)
 '''
 ####################################################################################################
-COMBINE SHAPE FOR SELECTED TRANSFORM NODES
+JOINT ROLE DETECTION
 END
 ####################################################################################################
 '''
@@ -2663,7 +4219,41 @@ BIPED CONTROL RIG SETUP
 START
 ####################################################################################################
 '''
-def createBipedControlRig (leftIndicator, rightIndicator, pelvis, spine1, chest, neck, head, l_clavicle, l_shoulder, l_elbow, l_wrist, l_thigh, l_knee, l_ankle, l_ball, armFK, armIK, legFK, legIK, controllerSize, footRollControl):   
+#Manifest key, locator name and default position of the foot roll pivots read by bipedLegBuild
+FOOT_ROLL_LOCATORS = [("heel", "L_heelPos_LOC", (0, 0, 0)),
+                      ("ankleRollIn", "L_ankleRollInPos_LOC", (-0.5, 0, 1)),
+                      ("ankleRollOut", "L_ankleRollOutPos_LOC", (0.5, 0, 1)),
+                      ("toeTip", "L_toeTipPos_LOC", (0, 0, 2))]
+
+def createFootRollLocators(controllerSize, positions = None):
+    #positions maps a manifest key to the world [x, z] of the pivot, the height stays locked
+    locators = []
+    
+    for key, locatorName, defaultPosition in FOOT_ROLL_LOCATORS:
+        locator = cmds.spaceLocator(n = locatorName, p = (0,0,0), a = True)
+        cmds.move(defaultPosition[0], defaultPosition[1], defaultPosition[2])
+        
+        for attr in ["ty", "rx", "ry", "rz", "sx", "sy", "sz", "v"]:
+            cmds.setAttr(locator[0] + "." + attr, lock = True, keyable = False, channelBox = False)
+        
+        cmds.CenterPivot()
+        locators.append(locator[0])
+    
+    footRoll_grp = cmds.group(n = "L_footRollInfo_doNotDelete", em = True)
+    cmds.parent(locators, footRoll_grp, r = False)
+    
+    cmds.select(footRoll_grp, r = True)
+    cmds.scale(controllerSize*0.5, controllerSize*0.5, controllerSize*0.5, r = True)
+    
+    if positions:
+        for key, locatorName, defaultPosition in FOOT_ROLL_LOCATORS:
+            if key in positions:
+                cmds.move(positions[key][0], locatorName, x = True, absolute = True, worldSpace = True)
+                cmds.move(positions[key][1], locatorName, z = True, absolute = True, worldSpace = True)
+    
+    return footRoll_grp
+
+def createBipedControlRig (leftIndicator, rightIndicator, pelvis, spine1, chest, neck, head, l_clavicle, l_shoulder, l_elbow, l_wrist, l_thigh, l_knee, l_ankle, l_ball, armFK, armIK, legFK, legIK, controllerSize, footRollControl, blendMode = "Constraint", driverMode = "Driven Keys", mirrorBuild = False, stretchMode = "Rigid", spineControls = 2, handSetup = False):   
         
     argumentsDict = locals()
     argumentKeys = argumentsDict.keys()
@@ -2681,6 +4271,14 @@ def createBipedControlRig (leftIndicator, rightIndicator, pelvis, spine1, chest,
         om.MGlobal.displayError("SELECT EITHER FK,IK OR BOTH FOR THE ARM AND THE LEG SETUP")
         return
     
+    if len(jointChain(spine1, chest) or []) < 2:
+        om.MGlobal.displayError("CHEST HAS TO BE BELOW THE BASE SPINE JOINT")
+        return
+    
+    if not jointChain(neck, head):
+        om.MGlobal.displayError("HEAD HAS TO BE BELOW THE NECK JOINT")
+        return
+    
     r_clavicle = l_clavicle.replace(leftIndicator, rightIndicator)
     r_shoulder = l_shoulder.replace(leftIndicator, rightIndicator)
     r_elbow = l_elbow.replace(leftIndicator, rightIndicator)
@@ -2690,113 +4288,150 @@ def createBipedControlRig (leftIndicator, rightIndicator, pelvis, spine1, chest,
     r_ankle = l_ankle.replace(leftIndicator, rightIndicator)
     r_ball = l_ball.replace(leftIndicator, rightIndicator)
         
-    with UndoContext():
-        bipedSpineBuild(pelvis, spine1, chest, neck, head, controllerSize)
-        bipedArmBuild("L", l_clavicle, l_shoulder, l_elbow, l_wrist, armFK, armIK, controllerSize)
-        bipedArmBuild("R", r_clavicle, r_shoulder, r_elbow, r_wrist, armFK, armIK, controllerSize)
-        bipedLegBuild("L", l_thigh, l_knee, l_ankle, l_ball, legFK, legIK, footRollControl, pelvis, controllerSize)
-        bipedLegBuild("R", r_thigh, r_knee, r_ankle, r_ball, legFK, legIK, footRollControl, pelvis, controllerSize)
-        finalConnections (armFK, legFK, controllerSize)
-
-def bipedSpineBuild(pelvisJNT, spineBaseJNT, chestJNT, neckJNT, headJNT, controllerScale):         
-    with UndoContext():   
-        spineBaseIKJNT = spineBaseJNT + "_ik"
-        cmds.duplicate(spineBaseJNT, rr = True, name = spineBaseIKJNT)
-        cmds.select (spineBaseIKJNT, r = True)
-        cmds.parent (world = True)
-        
-        chestIKFound = False
-        newSpineJnt = [spineBaseIKJNT]
-        spineJointNumber = 0
-        midSpineJNT = []
-        midSpineIKJNT = []
-        midSpineFKJNT = []
+    #Pole vectors of all four limbs in one solve, the IK joints are duplicated from these so the positions match
+    poles = limbPoleVectors([[l_shoulder, l_elbow, l_wrist], [r_shoulder, r_elbow, r_wrist], [l_thigh, l_knee, l_ankle], [r_thigh, r_knee, r_ankle]], 
+                            [POLE_HINT_ARM, POLE_HINT_ARM, POLE_HINT_LEG, POLE_HINT_LEG])
         
-        while chestIKFound == False:        
-            children = cmds.listRelatives(newSpineJnt[spineJointNumber], c = True)
-            
-            if (children[0] == chestJNT):
-                chestIKFound = True
-                chestIKJNT = cmds.rename ((newSpineJnt[spineJointNumber] + "|" + children[0]), chestJNT + "_ik")
-                
-                jointsToDelete = cmds.listRelatives (chestIKJNT, c = True, f = True)
-                cmds.delete (jointsToDelete)
-            else:
-                midSpineJNT.append(children[0])
-                addJoint = newSpineJnt[spineJointNumber] + "|" + children[0]
-                newSpineJnt.append(addJoint)
-                spineJointNumber = spineJointNumber + 1
+    leftArm = ["L", l_clavicle, l_shoulder, l_elbow, l_wrist, armFK, armIK, controllerSize, blendMode, driverMode, poles[0], stretchMode]
+    rightArm = ["R", r_clavicle, r_shoulder, r_elbow, r_wrist, armFK, armIK, controllerSize, blendMode, driverMode, poles[1], stretchMode]
+    leftLeg = ["L", l_thigh, l_knee, l_ankle, l_ball, legFK, legIK, footRollControl, pelvis, controllerSize, blendMode, driverMode, poles[2], stretchMode]
+    rightLeg = ["R", r_thigh, r_knee, r_ankle, r_ball, legFK, legIK, footRollControl, pelvis, controllerSize, blendMode, driverMode, poles[3], stretchMode]
         
-        newSpineJnt.remove (spineBaseIKJNT)
-        midSpineCount = len (newSpineJnt)
+    with UndoContext():
+        bipedSpineBuild(pelvis, spine1, chest, neck, head, controllerSize, spineControls)
         
-        if midSpineCount > 0:
-            jointCount = 1
-            for joint in newSpineJnt:
-                newName = cmds.rename ((newSpineJnt[midSpineCount-jointCount]), (midSpineJNT[midSpineCount-jointCount]) + '_ik')
-                midSpineIKJNT.insert(0, newName)
-                jointCount = jointCount + 1
+        if mirrorBuild:
+            #The right side is emitted from the mirrored node plan of the left side
+            buildMirroredLimb(bipedArmBuild, leftArm, rightArm, leftIndicator, rightIndicator)
+            buildMirroredLimb(bipedLegBuild, leftLeg, rightLeg, leftIndicator, rightIndicator)
+        else:
+            bipedArmBuild(*leftArm)
+            bipedArmBuild(*rightArm)
+            bipedLegBuild(*leftLeg)
+            bipedLegBuild(*rightLeg)
         
-        spineBaseFKJNT = spineBaseJNT + "_fk"
-        cmds.duplicate(spineBaseIKJNT, rr = True, n = spineBaseFKJNT)
+        if handSetup:
+            bipedHandBuild("L", l_wrist, leftIndicator, controllerSize, blendMode)
+            bipedHandBuild("R", r_wrist, rightIndicator, controllerSize, blendMode)
+            
+        finalConnections (armFK, legFK, controllerSize)
+
+SPINE_CONTROLLER_MEL = "curve -d 1 -p -0.5 -0.5 -0.5 -p 0.5 -0.5 -0.5 -p 0.5 0.5 -0.5 -p -0.5 0.5 -0.5 -p -0.5 -0.5 -0.5 -p -0.5 -0.5 0.5 -p 0.5 -0.5 0.5 -p 0.5 -0.5 -0.5 -p 0.5 0.5 -0.5 -p 0.5 0.5 0.5 -p 0.5 -0.5 0.5 -p 0.5 0.5 0.5 -p -0.5 0.5 0.5 -p -0.5 -0.5 0.5 -p -0.5 0.5 0.5 -p -0.5 0.5 -0.5 -k 0 -k 1 -k 2 -k 3 -k 4 -k 5 -k 6 -k 7 -k 8 -k 9 -k 10 -k 11 -k 12 -k 13 -k 14 -k 15 ;"
+
+def jointChain(startJNT, endJNT):
+    #Joints from startJNT down to endJNT, read from the long name of endJNT in one query
+    longName = cmds.ls(endJNT, long = True)
+    if not longName:
+        return None
+    
+    chain = longName[0].split("|")
+    startJNT = startJNT.split("|")[-1]
+    
+    if startJNT not in chain:
+        return None
+    
+    return chain[chain.index(startJNT):]
+
+def duplicateChain(joints, suffix):
+    #Copies of the joints without their other children, parented in the same order under the world
+    newChain = []
+    
+    for joint in joints:
+        newJNT = cmds.duplicate(joint, po = True, n = joint + suffix)[0]
         
-        mel.eval ("searchReplaceNames {0} {1} {2};".format("_ik", "_fk", "hierarchy"))
+        if newChain:
+            newJNT = cmds.parent(newJNT, newChain[-1])[0]
+        elif cmds.listRelatives(newJNT, parent = True):
+            newJNT = cmds.parent(newJNT, world = True)[0]
         
-        chestFKJNT = "{0}_fk".format(chestJNT)
+        newChain.append(newJNT)
+    
+    return newChain
+
+def spineControlPositions(joints, spineControls):
+    #Controllers spread evenly along the length of the chain, each one with the joint it takes its orientation from
+    points = [om2.MVector(cmds.xform(joint, q = True, ws = True, translation = True)) for joint in joints]
+    lengths = [0.0]
+    
+    for startPoint, endPoint in zip(points[:-1], points[1:]):
+        lengths.append(lengths[-1] + (endPoint - startPoint).length())
+    
+    positions = []
+    
+    for i in range(spineControls):
+        target = lengths[-1] * i / float(spineControls - 1)
+        segment = min(max([j for j in range(len(lengths)) if lengths[j] <= target]), len(points) - 2)
+        segmentLength = max(lengths[segment + 1] - lengths[segment], POLE_EPSILON)
         
-        cmds.select (spineBaseFKJNT, hi = True)
+        position = points[segment] + (points[segment + 1] - points[segment]) * ((target - lengths[segment]) / segmentLength)
+        positions.append((position, joints[-1] if i == spineControls - 1 else joints[segment]))
+    
+    return positions
+
+#Spine Setup
+def bipedSpineBuild(pelvisJNT, spineBaseJNT, chestJNT, neckJNT, headJNT, controllerScale, spineControls = 2):
+    with UndoContext():
+        spineJNT = jointChain(spineBaseJNT, chestJNT)
+        spineControls = max(2, int(spineControls))
         
-        midSpineFKJNT = cmds.ls(selection = True)
-        midSpineFKJNT.remove(spineBaseFKJNT)
-        midSpineFKJNT.remove(chestFKJNT)
+        spineFKJNT = duplicateChain(spineJNT, "_fk")
+        spineBaseFKJNT = spineFKJNT[0]
+        chestFKJNT = spineFKJNT[-1]
+        midSpineFKJNT = spineFKJNT[1:-1]
         
-        cmds.select(spineBaseIKJNT, spineBaseJNT, r = True)
-        cmds.parentConstraint (weight = 1)
+        spineJNT_grp = cmds.group(em = True, n = "spine_JNT_GRP")
+        spineMISC_grp = cmds.group (em = True, n = "spine_MISC_GRP")
         
-        cmds.select(chestIKJNT, chestJNT, r = True)
-        cmds.parentConstraint (weight = 1)
+        #The curve driven joints sit side by side instead of in a chain, so each one evaluates on its own
+        spineIKJNT = []
         
-        for i in range (len(midSpineIKJNT)):
-            cmds.select(midSpineIKJNT[i], midSpineJNT[i], r = True)
-            cmds.parentConstraint(weight = 1)
+        for joint in spineJNT:
+            newJNT = cmds.duplicate(joint, po = True, n = joint + "_ik")[0]
+            newJNT = cmds.parent(newJNT, spineJNT_grp)[0]
             
-        splineBaseJNT = cmds.duplicate (spineBaseIKJNT, rr = True, n = "spineBase_JNT")
-        cmds.delete(cmds.listRelatives(splineBaseJNT, c = True, f = True))
-        splineTipJNT = cmds.duplicate (chestIKJNT, rr = True, n = "spineTip_JNT")
-        cmds.select(splineTipJNT, r = True)
-        cmds.parent (world = True)
-        
-        splineIkSolver = cmds.ikHandle (name = "spine_IKH", sj = spineBaseIKJNT, ee = chestIKJNT, sol = "ikSplineSolver", scv = False)
+            cmds.setAttr("{0}.inheritsTransform".format(newJNT), 0)
+            cmds.setAttr("{0}.jointOrient".format(newJNT), 0, 0, 0)
+            spineIKJNT.append(newJNT)
         
-        splineCurve = splineIkSolver[2]
-        splineCurve = cmds.rename(splineCurve, "spline_CUR")
-        cmds.rename(splineIkSolver[1], "spline_EFF")
+        chestIKJNT = spineIKJNT[-1]
         
-        splineIkSolver = splineIkSolver[0]
-        
-        cmds.skinCluster (splineBaseJNT, splineTipJNT, splineCurve, tsb = True, n = "splineIK_skinCluster")
+        controlPositions = spineControlPositions(spineJNT, spineControls)
         
+        splineCurve = cmds.curve(d = min(3, spineControls - 1), p = [[position.x, position.y, position.z] for position, joint in controlPositions], n = "spline_CUR")
+        splineCurve = cmds.parent(splineCurve, spineMISC_grp)[0]
+        splineCurveShape = cmds.listRelatives(splineCurve, shapes = True)[0]
         cmds.setAttr("{0}.inheritsTransform".format(splineCurve), 0)
-
-        splineBaseJNT_ctrl =  mel.eval ("curve -d 1 -p -0.5 -0.5 -0.5 -p 0.5 -0.5 -0.5 -p 0.5 0.5 -0.5 -p -0.5 0.5 -0.5 -p -0.5 -0.5 -0.5 -p -0.5 -0.5 0.5 -p 0.5 -0.5 0.5 -p 0.5 -0.5 -0.5 -p 0.5 0.5 -0.5 -p 0.5 0.5 0.5 -p 0.5 -0.5 0.5 -p 0.5 0.5 0.5 -p -0.5 0.5 0.5 -p -0.5 -0.5 0.5 -p -0.5 0.5 0.5 -p -0.5 0.5 -0.5 -k 0 -k 1 -k 2 -k 3 -k 4 -k 5 -k 6 -k 7 -k 8 -k 9 -k 10 -k 11 -k 12 -k 13 -k 14 -k 15 ;") 
-        splineBaseJNT_ctrl = cmds.rename (splineBaseJNT_ctrl, "splineBase_CTRL")
-        cmds.rotate (0,0,90, splineBaseJNT_ctrl)
-        cmds.scale(controllerScale * 5, controllerScale/2, controllerScale * 5, r = True)
-        cmds.makeIdentity (apply = True, r = 1, t = 1, s = 1, n = 0)
-        cmds.DeleteHistory()
         
-        splineBaseJNT_con = cmds.group(n = "splineBase_CTRL_CON")
-        splineBaseJNT_offset = cmds.group(n = "splineBase_CTRL_0")
+        splineCTRL = []
+        splineOffset = []
         
-        splineTipJNT_ctrl =  mel.eval ("curve -d 1 -p -0.5 -0.5 -0.5 -p 0.5 -0.5 -0.5 -p 0.5 0.5 -0.5 -p -0.5 0.5 -0.5 -p -0.5 -0.5 -0.5 -p -0.5 -0.5 0.5 -p 0.5 -0.5 0.5 -p 0.5 -0.5 -0.5 -p 0.5 0.5 -0.5 -p 0.5 0.5 0.5 -p 0.5 -0.5 0.5 -p 0.5 0.5 0.5 -p -0.5 0.5 0.5 -p -0.5 -0.5 0.5 -p -0.5 0.5 0.5 -p -0.5 0.5 -0.5 -k 0 -k 1 -k 2 -k 3 -k 4 -k 5 -k 6 -k 7 -k 8 -k 9 -k 10 -k 11 -k 12 -k 13 -k 14 -k 15 ;") 
-        splineTipJNT_ctrl = cmds.rename (splineTipJNT_ctrl, "splineTip_CTRL")
-        cmds.rotate (0,0,90, splineTipJNT_ctrl)
-        cmds.scale(controllerScale * 5, controllerScale/2, controllerScale * 5, r = True)
-        cmds.makeIdentity (apply = True, r = 1, t = 1, s = 1, n = 0)
-        cmds.DeleteHistory()
+        for i, (position, joint) in enumerate(controlPositions):
+            if i == 0:
+                ctrlName = "splineBase_CTRL"
+            elif i == spineControls - 1:
+                ctrlName = "splineTip_CTRL"
+            else:
+                ctrlName = "splineMid{0}_CTRL".format(i)
+            
+            newCTRL = cmds.rename (mel.eval(SPINE_CONTROLLER_MEL), ctrlName)
+            cmds.rotate (0,0,90, newCTRL)
+            cmds.scale(controllerScale * 5, controllerScale/2, controllerScale * 5, r = True)
+            cmds.makeIdentity (apply = True, r = 1, t = 1, s = 1, n = 0)
+            cmds.DeleteHistory()
+            
+            cmds.group(n = newCTRL + "_CON")
+            newGRP = cmds.group(n = newCTRL + "_0")
+            
+            cmds.delete (cmds.parentConstraint(joint, newGRP, weight = 1))
+            cmds.xform (newGRP, ws = True, translation = [position.x, position.y, position.z])
+            
+            splineCTRL.append(newCTRL)
+            splineOffset.append(newGRP)
         
-        splineTipJNT_con = cmds.group(n = "splineTip_CTRL_CON")
-        splineTipJNT_offset = cmds.group(n = "splineTip_CTRL_0")
+        splineBaseJNT_ctrl = splineCTRL[0]
+        splineTipJNT_ctrl = splineCTRL[-1]
+        splineBaseJNT_offset = splineOffset[0]
+        splineTipJNT_offset = splineOffset[-1]
         
         pelvisJNT_ctrl = mel.eval ("curve -d 1 -p -1 0 1 -p -1 0 -1 -p 1 0 -1 -p 1 0 1 -p -1 0 1 -k 0 -k 1 -k 2 -k 3 -k 4 ;")
         pelvisJNT_ctrl = cmds.rename (pelvisJNT_ctrl, "pelvis_CTRL")
@@ -2807,36 +4442,84 @@ def bipedSpineBuild(pelvisJNT, spineBaseJNT, chestJNT, neckJNT, headJNT, control
         pelvisJNT_con = cmds.group(n = "pelvis_CTRL_CON")
         pelvisJNT_offset = cmds.group(n = "pelvis_CTRL_0")
         
-        cmds.select (splineBaseJNT, splineBaseJNT_offset, r = True)
-        cmds.delete (cmds.parentConstraint (weight = 1))
-        
-        cmds.select (splineTipJNT, splineTipJNT_offset, r = True)
-        cmds.delete (cmds.parentConstraint (weight = 1))
-        
         cmds.select (pelvisJNT, pelvisJNT_offset, r = True)
         cmds.delete (cmds.pointConstraint (offset = (0,0,0), weight = 1))
         
-        cmds.select (splineBaseJNT_ctrl, splineBaseJNT, r = True)
-        cmds.parentConstraint (weight = 1)
+        cmds.parent (splineOffset, pelvisJNT_ctrl)
         
-        cmds.select (splineTipJNT_ctrl, splineTipJNT, r = True)
-        cmds.parentConstraint (weight = 1)
+        #Each controller moves one CV, the joints read the curve through one motionPath each
+        fnSelection = om2.MSelectionList()
+        fnSelection.add(splineCurveShape)
+        fnCurve = om2.MFnNurbsCurve(fnSelection.getDagPath(0))
         
-        cmds.select (splineBaseJNT_offset, splineTipJNT_offset, pelvisJNT_ctrl, r = True)
-        cmds.parent()
+        minParameter, maxParameter = fnCurve.knotDomain
+        frontAxis = "XYZ".index(boneAxis(spineJNT[1]))
+        upAxis = (frontAxis + 1) % 3
+        
+        batch = BatchModifier()
+        
+        for i, ctrl in enumerate(splineCTRL):
+            cvDecompose = batch.createNode('decomposeMatrix', ctrl + '_decomposeMatrix')
+            batch.connectAttr(ctrl, 'worldMatrix[0]', cvDecompose, 'inputMatrix')
+            batch.connectAttr(cvDecompose, 'outputTranslate', splineCurveShape, 'controlPoints[{0}]'.format(i))
+        
+        for joint, ikJNT in zip(spineJNT, spineIKJNT):
+            parameter = fnCurve.closestPoint(om2.MPoint(cmds.xform(joint, q = True, ws = True, translation = True)), space = om2.MSpace.kWorld)[1]
+            
+            spinePath = batch.createNode('motionPath', ikJNT + '_motionPath')
+            batch.connectAttr(splineCurveShape, 'worldSpace[0]', spinePath, 'geometryPath')
+            batch.setAttr(spinePath, 'uValue', parameter)
+            batch.connectAttr(spinePath, 'allCoordinates', ikJNT, 'translate')
+            
+            #The chest takes its rotation from the tip controller
+            if ikJNT == chestIKJNT:
+                continue
+            
+            #Twist blends from the base to the tip controller along the curve
+            weight = (parameter - minParameter) / max(maxParameter - minParameter, POLE_EPSILON)
+            
+            twistMatrix = batch.createNode('wtAddMatrix', ikJNT + '_wtAddMatrix')
+            batch.connectAttr(splineBaseJNT_ctrl, 'worldMatrix[0]', twistMatrix, 'wtMatrix[0].matrixIn')
+            batch.setAttr(twistMatrix, 'wtMatrix[0].weightIn', 1.0 - weight)
+            batch.connectAttr(splineTipJNT_ctrl, 'worldMatrix[0]', twistMatrix, 'wtMatrix[1].matrixIn')
+            batch.setAttr(twistMatrix, 'wtMatrix[1].weightIn', weight)
+            
+            batch.setAttr(spinePath, 'follow', True)
+            batch.setAttr(spinePath, 'frontAxis', frontAxis)
+            batch.setAttr(spinePath, 'upAxis', upAxis)
+            batch.setAttr(spinePath, 'worldUpType', 2)
+            batch.setAttr(spinePath, 'worldUpVectorX', 1.0 if upAxis == 0 else 0.0)
+            batch.setAttr(spinePath, 'worldUpVectorY', 1.0 if upAxis == 1 else 0.0)
+            batch.setAttr(spinePath, 'worldUpVectorZ', 1.0 if upAxis == 2 else 0.0)
+            batch.connectAttr(twistMatrix, 'matrixSum', spinePath, 'worldUpMatrix')
+            batch.connectAttr(spinePath, 'rotate', ikJNT, 'rotate')
+        
+        batch.doIt()
+        
+        cmds.orientConstraint(splineTipJNT_ctrl, chestIKJNT, mo = True, weight = 1)
+        
+        #The curve joints sit on the curve, the offsets keep the bind joints where they are
+        for bindJoint, ikJoint in zip(spineJNT, spineIKJNT):
+            cmds.parentConstraint(ikJoint, bindJoint, mo = True, weight = 1)
         
         cmds.select (splineBaseJNT_ctrl, pelvisJNT, r = True)
         cmds.parentConstraint(mo = True, weight = 1)
         
-        cmds.select (splineTipJNT_ctrl, chestIKJNT, r = True)
-        cmds.orientConstraint(offset = (0,0,0), weight = 1)
-        
         cmds.select(chestFKJNT, splineTipJNT_offset, r = True)
         cmds.parentConstraint (weight = 1)
         
         cmds.select(pelvisJNT_ctrl, spineBaseFKJNT, r = True)
         cmds.parentConstraint (mo = True, weight = 1)
         
+        #Mid controllers ride between the base and the tip controller
+        for i in range(1, spineControls - 1):
+            weight = i / float(spineControls - 1)
+            
+            midConstraint = cmds.parentConstraint(splineBaseJNT_ctrl, splineTipJNT_ctrl, splineOffset[i], mo = True, weight = 1)[0]
+            weightAliases = cmds.parentConstraint(midConstraint, q = True, weightAliasList = True)
+            cmds.setAttr("{0}.{1}".format(midConstraint, weightAliases[0]), 1.0 - weight)
+            cmds.setAttr("{0}.{1}".format(midConstraint, weightAliases[1]), weight)
+        
         midSpineFK_ctrl = []
         midSpineFK_off = []
         
@@ -2847,8 +4530,8 @@ def bipedSpineBuild(pelvisJNT, spineBaseJNT, chestJNT, neckJNT, headJNT, control
             cmds.makeIdentity (apply = True, r = 1, t = 1, s = 1, n = 0)
             cmds.DeleteHistory()
             
-            midSpineFK_ctrl.append(newCTRL[0])             
-        
+            midSpineFK_ctrl.append(newCTRL[0])
+            
             cmds.group(n = newCTRL[0] + "_CON")
             newGRP = cmds.group(n = newCTRL[0] + "_0")
             
@@ -2860,74 +4543,23 @@ def bipedSpineBuild(pelvisJNT, spineBaseJNT, chestJNT, neckJNT, headJNT, control
             cmds.select (midSpineFK_ctrl[i], midSpineFKJNT[i], r = True)
             cmds.parentConstraint(weight = 1)
         
+        midSpineCount = len(midSpineFKJNT)
         if midSpineCount > 1:
             for i in range (midSpineCount-1):
                 cmds.select(midSpineFK_off[(midSpineCount - (i+1))], midSpineFK_ctrl[(midSpineCount - (i+2))], r = True)
                 cmds.parent()
-            
-        cmds.select(midSpineFK_off[0], pelvisJNT_ctrl, r= True)
-        cmds.parent()        
         
-        cmds.setAttr("{0}.dTwistControlEnable".format(splineIkSolver), 1)    
-        cmds.setAttr("{0}.dWorldUpType".format(splineIkSolver), 4)     
-        cmds.connectAttr("{0}.worldMatrix".format(splineBaseJNT_ctrl), "{0}.dWorldUpMatrix".format(splineIkSolver))
-        cmds.connectAttr("{0}.worldMatrix".format(splineTipJNT_ctrl), "{0}.dWorldUpMatrixEnd".format(splineIkSolver)) 
+        if midSpineCount > 0:
+            cmds.select(midSpineFK_off[0], pelvisJNT_ctrl, r= True)
+            cmds.parent()
         
-        cmds.select (spineBaseFKJNT, spineBaseIKJNT, splineBaseJNT, splineTipJNT, r = True)
-        spineJNT_grp = cmds.group(n = "spine_JNT_GRP")
+        cmds.parent (spineBaseFKJNT, spineJNT_grp)
         
         cmds.select (pelvisJNT_offset, r = True)
         spineCTRL_grp = cmds.group (n = "spine_CTRL_GRP")
         
-        cmds.select (splineIkSolver, splineCurve, r = True)
-        spineMISC_grp = cmds.group (n = "spine_MISC_GRP")
-        
-        neckBaseFKJNT = neckJNT + "_fk"
-        cmds.duplicate(neckJNT, rr = True, name = neckBaseFKJNT)
-        cmds.select (neckBaseFKJNT, r = True)
-        cmds.parent (world = True)
-        
-        headFound = False
-        newNeckJnt = [neckBaseFKJNT]
-        neckJointNumber = 0
-        midNeckJNT = []
-        midNeckFKJNT = []
-        
-        neckHeadJointsList = [neckJNT]
-        neckHeadFKJointsList = [neckBaseFKJNT]
-        
-        while headFound == False:        
-            children = cmds.listRelatives(newNeckJnt[neckJointNumber], c = True)
-            
-            if (children[0] == headJNT):
-                headFound = True
-                headFKJNT = cmds.rename ((newNeckJnt[neckJointNumber] + "|" + children[0]), headJNT + "_fk")
-                
-                jointsToDelete = cmds.listRelatives (headFKJNT, c = True, f = True)
-                cmds.delete (jointsToDelete)
-            else:
-                midNeckJNT.append(children[0])
-                addJoint = newNeckJnt[neckJointNumber] + "|" + children[0]
-                newNeckJnt.append(addJoint)
-                neckJointNumber = neckJointNumber + 1
-        
-            
-        newNeckJnt.remove (neckBaseFKJNT)
-        midNeckCount = len (newNeckJnt)
-        
-        if midNeckCount > 0:
-            jointCount = 1
-            for joint in newNeckJnt:
-                newName = cmds.rename((newNeckJnt[midNeckCount-jointCount]), (midNeckJNT[midNeckCount-jointCount] + '_fk'))
-                midNeckFKJNT.insert(0, newName)
-                jointCount = jointCount + 1        
-        
-        for fkneck, neckjnt in zip (midNeckFKJNT, midNeckJNT):
-            neckHeadJointsList.append (neckjnt)
-            neckHeadFKJointsList.append (fkneck)
-        
-        neckHeadJointsList.append(headJNT)
-        neckHeadFKJointsList.append(headFKJNT)
+        neckHeadJointsList = jointChain(neckJNT, headJNT)
+        neckHeadFKJointsList = duplicateChain(neckHeadJointsList, "_fk")
         
         for bindJoint, fkJoint in zip (neckHeadJointsList, neckHeadFKJointsList):
             cmds.parentConstraint (fkJoint, bindJoint, weight = 1)
@@ -2970,7 +4602,7 @@ def bipedSpineBuild(pelvisJNT, spineBaseJNT, chestJNT, neckJNT, headJNT, control
         cmds.select (chestJNT, neckFK_off[0], r = True)
         cmds.parentConstraint (mo = True, weight = 1)
         
-        cmds.select (splineBaseJNT_ctrl, splineTipJNT_ctrl, neckFK_ctrl, midSpineFK_ctrl, pelvisJNT_ctrl, r = True)
+        cmds.select (splineCTRL, neckFK_ctrl, midSpineFK_ctrl, pelvisJNT_ctrl, r = True)
         shapesSelect = cmds.ls (selection = 1, shapes = True, dag = True)
         
         for shape in shapesSelect:
@@ -2979,7 +4611,7 @@ def bipedSpineBuild(pelvisJNT, spineBaseJNT, chestJNT, neckJNT, headJNT, control
             cmds.setAttr(shape + ".overrideColorRGB", 255, 255, 0)
     
 #Arm Setup
-def bipedArmBuild(side, clavicleJNT, shoulderJNT, elbowJNT, wristJNT, armfkSetup, armikSetup, controllerScale):        
+def bipedArmBuild(side, clavicleJNT, shoulderJNT, elbowJNT, wristJNT, armfkSetup, armikSetup, controllerScale, blendMode = "Constraint", driverMode = "Driven Keys", poleVectorPos = None, stretchMode = "Rigid"):        
     with UndoContext():
         clavicleFKJNT = clavicleJNT + "_fk"
         cmds.duplicate (clavicleJNT, rr = True, name = clavicleFKJNT)
@@ -3253,11 +4885,10 @@ def bipedArmBuild(side, clavicleJNT, shoulderJNT, elbowJNT, wristJNT, armfkSetup
             cmds.select (armIKCTRL+".cv[0:4]", r = True)
             cmds.rotate (0, 0, -90, r = True, os = True, fo = True)
             
-            shoulderPos = cmds.xform (shoulderIKJNT, q = True, ws = True, translation = True)
-            elbowPos = cmds.xform (elbowIKJNT, q = True, ws = True, translation = True)
-            wristPos = cmds.xform (wristIKJNT, q = True, ws = True, translation = True)
-
-            poleVectorPos = getPoleVectorPos (shoulderPos, elbowPos, wristPos)
+            #The biped build solves every limb at once and passes the pole in
+            if poleVectorPos is None:
+                poleVectorPos = limbPoleVectors([[shoulderIKJNT, elbowIKJNT, wristIKJNT]], [POLE_HINT_ARM])[0]
+            
             cmds.xform (elbowIKOFF, ws = True, translation = poleVectorPos)
             
             cmds.group (em = True, n = side + "_armIK_CTRL_GRP")
@@ -3282,8 +4913,11 @@ def bipedArmBuild(side, clavicleJNT, shoulderJNT, elbowJNT, wristJNT, armfkSetup
             cmds.select(armIKCTRL, elbowIKOFF, r = True)
             secondGrpCONST = cmds.parentConstraint (maintainOffset = True, weight = 1)
             
-            cmds.setDrivenKeyframe (secondGrpCONST[0] + "." + armIKCTRL + "W0", dv = 0, v = 0, cd = elbowIKCTRL + '.follow')
-            cmds.setDrivenKeyframe (secondGrpCONST[0] + "." + armIKCTRL + "W0", dv = 1, v = 1, cd = elbowIKCTRL + '.follow')
+            if driverMode == "Math Nodes":
+                cmds.connectAttr (elbowIKCTRL + '.follow', secondGrpCONST[0] + "." + armIKCTRL + "W0")
+            else:
+                cmds.setDrivenKeyframe (secondGrpCONST[0] + "." + armIKCTRL + "W0", dv = 0, v = 0, cd = elbowIKCTRL + '.follow')
+                cmds.setDrivenKeyframe (secondGrpCONST[0] + "." + armIKCTRL + "W0", dv = 1, v = 1, cd = elbowIKCTRL + '.follow')
             
             cmds.parentConstraint (clavicleCTRL, shoulderIKJNT, weight = 1, mo = True)
             
@@ -3330,6 +4964,7 @@ def bipedArmBuild(side, clavicleJNT, shoulderJNT, elbowJNT, wristJNT, armfkSetup
                 cmds.select (elbowTwistIKJNT, elbowIKJNT, r = True)
                 cmds.parent()
             
+            addStretchyIK ([shoulderIKJNT, elbowIKJNT, wristIKJNT], ArmIKHandle[0], armIKCTRL, stretchMode)
             
         if (armfkSetup and armikSetup):            
             # IK-FK Switch
@@ -3353,9 +4988,12 @@ def bipedArmBuild(side, clavicleJNT, shoulderJNT, elbowJNT, wristJNT, armfkSetup
 
             cmds.parent (ikFkControl, side + '_armSwitch_CTRL_GRP')
 
-            cmds.select (wristJNT, side + '_armSwitch_CTRL_GRP', r = True)
-            cmds.pointConstraint(weight = 1)
-            cmds.orientConstraint(weight = 1, maintainOffset = 1)
+            if blendMode == "Matrix" and matrixNodesAvailable():
+                matrixFollow(wristJNT, side + '_armSwitch_CTRL_GRP')
+            else:
+                cmds.select (wristJNT, side + '_armSwitch_CTRL_GRP', r = True)
+                cmds.pointConstraint(weight = 1)
+                cmds.orientConstraint(weight = 1, maintainOffset = 1)
 
             cmds.select (ikFkControl + '.cv[0:32]', r = True)
             cmds.move (0, 0, (-3 * controllerScale), os = True, wd = True, r = True)
@@ -3369,6 +5007,10 @@ def bipedArmBuild(side, clavicleJNT, shoulderJNT, elbowJNT, wristJNT, armfkSetup
             ikJnts = [shoulderIKJNT, elbowIKJNT, wristIKJNT] + shoulderTwistIKJNT + elbowTwistIKJNT
             
             for bind, fk, ik in zip (bindJnts, fkJnts, ikJnts):
+               if blendMode == "Matrix":
+                   matrixBlendJoint(bind, fk, ik, ikFkControl + '.FKIK')
+                   continue
+               
                constraintStore = cmds.parentConstraint (fk, ik, bind, mo = False, weight = 1)[0]
                reverseNode = cmds.createNode('reverse', n = constraintStore + '_armFK_rev')
                cmds.connectAttr(ikFkControl + '.FKIK', reverseNode +'.inputX')
@@ -3413,7 +5055,10 @@ def bipedArmBuild(side, clavicleJNT, shoulderJNT, elbowJNT, wristJNT, armfkSetup
             fkJnts = [shoulderFKJNT, elbowFKJNT, wristFKJNT] + shoulderTwistFKJNT + elbowTwistFKJNT
             
             for bind, fk in zip (bindJnts, fkJnts):
-               constraintStore = cmds.parentConstraint (fk, bind, mo = False, weight = 1)[0]
+               if blendMode == "Matrix":
+                   matrixBlendJoint(bind, fk, None, None)
+               else:
+                   constraintStore = cmds.parentConstraint (fk, bind, mo = False, weight = 1)[0]
                
             armCTRL_grp = cmds.group (em = True, n = side + "_arm_CTRL_GRP")
             cmds.parent (side + "_armFK_CTRL_GRP", side + "_arm_CTRL_GRP", r = False)
@@ -3432,7 +5077,10 @@ def bipedArmBuild(side, clavicleJNT, shoulderJNT, elbowJNT, wristJNT, armfkSetup
             ikJnts = [shoulderIKJNT, elbowIKJNT, wristIKJNT] + shoulderTwistIKJNT + elbowTwistIKJNT
             
             for bind, ik in zip (bindJnts, ikJnts):
-               constraintStore = cmds.parentConstraint (ik, bind, mo = False, weight = 1)[0]
+               if blendMode == "Matrix":
+                   matrixBlendJoint(bind, None, ik, None)
+               else:
+                   constraintStore = cmds.parentConstraint (ik, bind, mo = False, weight = 1)[0]
                
             armCTRL_grp = cmds.group (em = True, n = side + "_arm_CTRL_GRP")
             cmds.parent (side + "_armIK_CTRL_GRP", side + "_arm_CTRL_GRP", r = False)
@@ -3449,8 +5097,313 @@ def bipedArmBuild(side, clavicleJNT, shoulderJNT, elbowJNT, wristJNT, armfkSetup
             om.MGlobal.displayError("SELECT EITHER FK,IK OR BOTH FOR THE ARM SETUP")
             return
                 
+FINGER_THUMB_NAMES = ["thumb", "pollex"]
+#Helper names that only mark where a finger stops, the last joint of a finger gets no controller whatever its name
+FINGER_END_NAMES = ["end", "nub", "tip"]
+
+def nameTokens(name):
+    #index_end_l -> index, end, l. LeftHandIndex4End -> left, hand, index, end
+    words = "".join([character if character.isalpha() else " " for character in name.split("|")[-1].split(":")[-1]]).split()
+    tokens = []
+    
+    for word in words:
+        token = word[0]
+        for previous, character in zip(word, word[1:]):
+            if character.isupper() and previous.islower():
+                tokens.append(token.lower())
+                token = ""
+            token += character
+        tokens.append(token.lower())
+    
+    return tokens
+
+def fingerChains(wristJNT):
+    #Joint chains below the wrist from one listRelatives query. A chain follows single children and splits where a joint
+    #has more than one. Helper joints (and everything below them) and the end joint of each finger get no controller
+    wristPath = cmds.ls(wristJNT, long = True)[0]
+    descendants = sorted(cmds.listRelatives(wristJNT, allDescendents = True, type = "joint", fullPath = True) or [])
+    helpers = [helper for helper in JOINT_ROLE_HELPERS if helper not in FINGER_END_NAMES]
+    children = {}
+    
+    for path in descendants:
+        if any([set(nameTokens(name)) & set(helpers) for name in path[len(wristPath):].split("|") if name]):
+            continue
+        
+        children.setdefault(path.rsplit("|", 1)[0], []).append(path)
+    
+    chains = []
+    pending = [(child, wristPath) for child in children.get(wristPath, [])]
+    
+    while pending:
+        start, parent = pending.pop(0)
+        chain = [start]
+        
+        while len(children.get(chain[-1], [])) == 1:
+            chain.append(children[chain[-1]][0])
+        
+        shortName = start.split("|")[-1].lower()
+        pending.extend([(child, chain[-1]) for child in children.get(chain[-1], [])])
+        
+        #bones keeps the end joint for the shape of the finger
+        leaf = not children.get(chain[-1])
+        bones = list(chain)
+        if leaf:
+            chain.pop()
+        
+        if chain:
+            chains.append({"joints" : chain,
+                           "bones" : bones,
+                           "parent" : parent,
+                           "leaf" : leaf,
+                           "thumb" : any([name in shortName for name in FINGER_THUMB_NAMES])})
+    
+    return chains
+
+def fingerAttributeName(joint, indicator, usedNames):
+    #index_01_l -> index, LeftHandIndex1 -> handIndex
+    name = joint.split("|")[-1].split(":")[-1]
+    if indicator:
+        name = name.replace(indicator, " ")
+    
+    words = "".join([character if character.isalpha() else " " for character in name]).split() or ["finger"]
+    name = words[0][0].lower() + words[0][1:] + "".join([word[0].upper() + word[1:] for word in words[1:]])
+    
+    attributeName = name
+    index = 2
+    while attributeName in usedNames:
+        attributeName = "{0}{1}".format(name, index)
+        index += 1
+    
+    usedNames.append(attributeName)
+    return attributeName
+
+def chainBendNormal(points):
+    #Axis the chain bends around in its rest pose, zero for a straight chain
+    normal = om2.MVector()
+    
+    for startPoint, midPoint, endPoint in zip(points, points[1:], points[2:]):
+        normal += (midPoint - startPoint) ^ (endPoint - midPoint)
+    
+    return normal
+
+def localAxisAlong(matrix, direction):
+    #Index and sign of the local axis of the matrix closest to direction
+    dots = [om2.MVector(matrix.getElement(row, 0), matrix.getElement(row, 1), matrix.getElement(row, 2)).normal() * direction for row in range(3)]
+    axis = max(range(3), key = lambda row: abs(dots[row]))
+    
+    return axis, 1.0 if dots[axis] >= 0 else -1.0
+
+def circleCurveData(axis, radius):
+    points = []
+    
+    for i in range(9):
+        point = [0.0, 0.0, 0.0]
+        point[(axis + 1) % 3] = math.cos(math.pi * i / 4.0)
+        point[(axis + 2) % 3] = math.sin(math.pi * i / 4.0)
+        points.append(point)
+    
+    return linearCurveData(points, radius)
+
+#Hand Setup
+def bipedHandBuild(side, wristJNT, indicator, controllerScale, blendMode = "Constraint"):
+    #FK controllers on every finger joint below the wrist plus curl and spread on the hand controller. Controllers, math nodes and
+    #connections of the hand are one batch, the finger joints are driven by multMatrix/decomposeMatrix instead of constraints
+    chains = fingerChains(wristJNT)
+    
+    if not chains:
+        om.MGlobal.displayWarning("{0} : NO FINGER JOINTS FOUND BELOW THE WRIST".format(wristJNT))
+        return
+    
+    with UndoContext():
+        positions = dict([(joint, om2.MVector(cmds.xform(joint, q = True, ws = True, translation = True))) for chain in chains for joint in chain["bones"]])
+        wristPos = om2.MVector(cmds.xform(wristJNT, q = True, ws = True, translation = True))
+        
+        fingers = [chain for chain in chains if chain["leaf"] and not chain["thumb"]]
+        thumbs = [chain for chain in chains if chain["thumb"]]
+        bases = [positions[chain["joints"][0]] for chain in fingers] or [positions[chains[0]["joints"][0]]]
+        
+        #Across the knuckles, from the finger next to the thumb to the one furthest from it
+        firstBase, lastBase = max([(a, b) for a in bases for b in bases], key = lambda pair: (pair[1] - pair[0]).length())
+        if thumbs:
+            thumbBase = positions[thumbs[0]["joints"][0]]
+            if (firstBase - thumbBase).length() > (lastBase - thumbBase).length():
+                firstBase, lastBase = lastBase, firstBase
+        
+        across = (lastBase - firstBase).normal()
+        
+        #Positive curl turns the fingers the way they bend in the rest pose
+        handNormal = om2.MVector()
+        for chain in fingers:
+            handNormal += chainBendNormal([positions[joint] for joint in chain["bones"]])
+        
+        handNormal = handNormal.normal() if handNormal.length() > POLE_EPSILON else across
+        
+        fingerDirection = om2.MVector()
+        for base in bases:
+            fingerDirection += base - wristPos
+        
+        baseCenter = wristPos + fingerDirection / float(len(bases))
+        backOfHand = (fingerDirection.normal() ^ handNormal).normal()
+        
+        spreadFactors = {}
+        spreadOrder = sorted(fingers, key = lambda chain: positions[chain["joints"][0]] * across)
+        for i, chain in enumerate(spreadOrder):
+            spreadFactors[chain["joints"][0]] = -1.0 + 2.0 * i / (len(spreadOrder) - 1) if len(spreadOrder) > 1 else 0.0
+        
+        wristPath = cmds.ls(wristJNT, long = True)[0]
+        batch = BatchModifier()
+        
+        handGRP = batch.createNode("transform", side + "_hand_CTRL_GRP")
+        handOffset = batch.createNode("transform", side + "_hand_CTRL_0", handGRP)
+        handCon = batch.createNode("transform", side + "_hand_CTRL_CON", handOffset)
+        handCTRL = batch.createNode("transform", side + "_hand_CTRL", handCon)
+        handShape = batch.createNode("nurbsCurve", side + "_hand_CTRLShape", handCTRL)
+        
+        batch.addAttr(handCTRL, "curl", "double", 0, -90, 90)
+        batch.addAttr(handCTRL, "spread", "double", 0, -45, 45)
+        
+        usedNames = ["curl", "spread"]
+        controls = {wristPath : handGRP}
+        setups = []
+        
+        for chain in chains:
+            setup = {"chain" : chain}
+            setup["curlAttr"] = fingerAttributeName(chain["joints"][0], indicator, usedNames) + "Curl"
+            batch.addAttr(handCTRL, setup["curlAttr"], "double", 0, -90, 90)
+            
+            #Shared by every joint of the finger
+            firstJNT = chain["joints"][0].split("|")[-1]
+            setup["curlSum"] = batch.createNode("plusMinusAverage", firstJNT + "_curl_plusMinusAverage")
+            setup["curlMult"] = batch.createNode("multiplyDivide", firstJNT + "_curl_multiplyDivide")
+            
+            setup["joints"] = []
+            parentCTRL = controls[chain["parent"]]
+            
+            for joint in chain["joints"]:
+                jointName = joint.split("|")[-1]
+                jointSetup = {"joint" : joint}
+                jointSetup["offset"] = batch.createNode("transform", jointName + "_CTRL_0", parentCTRL)
+                jointSetup["con"] = batch.createNode("transform", jointName + "_CTRL_CON", jointSetup["offset"])
+                jointSetup["ctrl"] = batch.createNode("transform", jointName + "_CTRL", jointSetup["con"])
+                jointSetup["shape"] = batch.createNode("nurbsCurve", jointName + "_CTRLShape", jointSetup["ctrl"])
+                jointSetup["multMatrix"] = batch.createNode("multMatrix", jointName + "_multMatrix")
+                jointSetup["decomposeMatrix"] = batch.createNode("decomposeMatrix", jointName + "_decomposeMatrix")
+                
+                controls[joint] = jointSetup["ctrl"]
+                parentCTRL = jointSetup["ctrl"]
+                setup["joints"].append(jointSetup)
+            
+            setups.append(setup)
+        
+        batch.doIt()
+        
+        wristMatrix = om2.MMatrix()
+        wristMatrix.setElement(3, 0, wristPos.x)
+        wristMatrix.setElement(3, 1, wristPos.y)
+        wristMatrix.setElement(3, 2, wristPos.z)
+        
+        for i, axis in enumerate("XYZ"):
+            batch.setAttr(handGRP, "translate" + axis, wristPos[i])
+            batch.setAttr(handOffset, "translate" + axis, (baseCenter - wristPos + backOfHand * 2 * controllerScale)[i])
+        
+        batch.setAttr(handShape, "cached", linearCurveData(melCurvePoints(POLE_CONTROLLER_MEL), controllerScale / 2.0))
+        
+        #Raw connections pass internal units, the multipliers turn the degrees of the hand attributes into radians
+        for setup in setups:
+            chain = setup["chain"]
+            thumbNormal = chainBendNormal([positions[joint] for joint in chain["bones"]]) if chain["thumb"] else om2.MVector()
+            curlAxis = thumbNormal.normal() if thumbNormal.length() > POLE_EPSILON else handNormal
+            
+            batch.connectAttr(handCTRL, "curl", setup["curlSum"], "input1D[0]")
+            batch.connectAttr(handCTRL, setup["curlAttr"], setup["curlSum"], "input1D[1]")
+            batch.connectAttr(setup["curlSum"], "output1D", setup["curlMult"], "input1X")
+            batch.connectAttr(setup["curlSum"], "output1D", setup["curlMult"], "input1Y")
+            batch.connectAttr(handCTRL, "spread", setup["curlMult"], "input1Z")
+            batch.setAttr(setup["curlMult"], "input2X", math.radians(1))
+            batch.setAttr(setup["curlMult"], "input2Y", -math.radians(1))
+            batch.setAttr(setup["curlMult"], "input2Z", 0.0)
+            
+            for index, jointSetup in enumerate(setup["joints"]):
+                joint = jointSetup["joint"]
+                jointWorld = worldMatrix(joint)
+                
+                #The offset is the rest pose of the joint, so each controller sits on its joint
+                if index == 0 and chain["parent"] == wristPath:
+                    offsetMatrix = om2.MTransformationMatrix(jointWorld * wristMatrix.inverse())
+                else:
+                    offsetMatrix = om2.MTransformationMatrix(om2.MMatrix(cmds.getAttr(joint + ".matrix")))
+                
+                offsetTranslate = offsetMatrix.translation(om2.MSpace.kTransform)
+                offsetRotate = offsetMatrix.rotation()
+                
+                for i, axis in enumerate("XYZ"):
+                    batch.setAttr(jointSetup["offset"], "translate" + axis, offsetTranslate[i])
+                    batch.setAttr(jointSetup["offset"], "rotate" + axis, [offsetRotate.x, offsetRotate.y, offsetRotate.z][i])
+                
+                childJNT = chain["bones"][index + 1] if index + 1 < len(chain["bones"]) else joint
+                boneIndex = "XYZ".index(boneAxis(childJNT))
+                batch.setAttr(jointSetup["shape"], "cached", circleCurveData(boneIndex, controllerScale * 0.4))
+                
+                #joint rotate = controller * curl * rest rotate, the joint orient stays on the joint
+                rotateOrder = cmds.getAttr(joint + ".rotateOrder")
+                restRotate = [math.radians(value) for value in cmds.getAttr(joint + ".rotate")[0]]
+                
+                batch.connectAttr(jointSetup["ctrl"], "matrix", jointSetup["multMatrix"], "matrixIn[0]")
+                batch.connectAttr(jointSetup["con"], "matrix", jointSetup["multMatrix"], "matrixIn[1]")
+                batch.setAttr(jointSetup["multMatrix"], "matrixIn[2]", om2.MEulerRotation(restRotate[0], restRotate[1], restRotate[2], rotateOrder).asMatrix())
+                batch.connectAttr(jointSetup["multMatrix"], "matrixSum", jointSetup["decomposeMatrix"], "inputMatrix")
+                batch.setAttr(jointSetup["decomposeMatrix"], "inputRotateOrder", rotateOrder)
+                batch.connectAttr(jointSetup["decomposeMatrix"], "outputRotate", joint, "rotate")
+                
+                curlIndex, curlSign = localAxisAlong(jointWorld, curlAxis)
+                batch.connectAttr(setup["curlMult"], "outputX" if curlSign > 0 else "outputY", jointSetup["con"], "rotate" + "XYZ"[curlIndex])
+                
+                #Spread fans the fingers out from the middle of the hand around the first joint
+                if index or spreadFactors.get(joint, 0.0) == 0.0:
+                    continue
+                
+                spreadIndex = 3 - boneIndex - curlIndex if boneIndex != curlIndex else (curlIndex + 1) % 3
+                spreadAxis = om2.MVector(jointWorld.getElement(spreadIndex, 0), jointWorld.getElement(spreadIndex, 1), jointWorld.getElement(spreadIndex, 2))
+                spreadSign = 1.0 if (spreadAxis ^ (positions[childJNT] - positions[joint])) * across >= 0 else -1.0
+                
+                batch.setAttr(setup["curlMult"], "input2Z", spreadFactors[joint] * spreadSign * math.radians(1))
+                batch.connectAttr(setup["curlMult"], "outputZ", jointSetup["con"], "rotate" + "XYZ"[spreadIndex])
+        
+        batch.doIt()
+        
+        handGroup = batch.name(handGRP)
+        handControl = batch.name(handCTRL)
+        fingerControls = [batch.name(jointSetup["ctrl"]) for setup in setups for jointSetup in setup["joints"]]
+        
+        if cmds.objExists(side + "_arm_CTRL_GRP"):
+            handGroup = cmds.parent(handGroup, side + "_arm_CTRL_GRP")[0]
+        
+        if blendMode == "Matrix" and matrixNodesAvailable():
+            matrixFollow(wristJNT, handGroup)
+        else:
+            cmds.select (wristJNT, handGroup, r = True)
+            cmds.pointConstraint(weight = 1)
+            cmds.orientConstraint(weight = 1, maintainOffset = 1)
+        
+        for attr in ["tx", "ty", "tz", "rx", "ry", "rz", "sx", "sy", "sz", "v"]:
+            cmds.setAttr(handControl + "." + attr, lock = True, keyable = False, channelBox = False)
+        
+        #Finger controllers only rotate
+        for ctrl in fingerControls:
+            for attr in ["tx", "ty", "tz", "sx", "sy", "sz", "v"]:
+                cmds.setAttr(ctrl + "." + attr, lock = True, keyable = False, channelBox = False)
+        
+        if (wristPos.x > 0):
+            controllerColorAssign(255, 0, 0, handControl, *fingerControls)
+        else:
+            controllerColorAssign(0, 0, 255, handControl, *fingerControls)
+        
+        cmds.select(cl = True)
+        
+        return handControl
+
 #Leg Setup
-def bipedLegBuild(side, thighJNT, kneeJNT, ankleJNT, ballJNT, legfkSetup, legikSetup, footRollSetup, pelvisJNT, controllerScale):         
+def bipedLegBuild(side, thighJNT, kneeJNT, ankleJNT, ballJNT, legfkSetup, legikSetup, footRollSetup, pelvisJNT, controllerScale, blendMode = "Constraint", driverMode = "Driven Keys", poleVectorPos = None, stretchMode = "Rigid"):         
     with UndoContext():          
         heelLoc = "L_heelPos_LOC"
         ankleRollInLoc = "L_ankleRollInPos_LOC"
@@ -3731,11 +5684,12 @@ def bipedLegBuild(side, thighJNT, kneeJNT, ankleJNT, ballJNT, legfkSetup, legikS
             cmds.select(legIKCTRL + '.cv[0:4]', r = True)
             cmds.move (0, a = True, y = True)
             
-            thighPos = cmds.xform (thighIKJNT, q = True, ws = True, translation = True)
-            kneePos = cmds.xform (kneeIKJNT, q = True, ws = True, translation = True)
+            #The side of the foot roll mappings is read from the ankle
             anklePos = cmds.xform (ankleIKJNT, q = True, ws = True, translation = True)
-
-            poleVectorPos = getPoleVectorPos (thighPos, kneePos, anklePos)
+            
+            if poleVectorPos is None:
+                poleVectorPos = limbPoleVectors([[thighIKJNT, kneeIKJNT, ankleIKJNT]], [POLE_HINT_LEG])[0]
+            
             cmds.xform (kneeIKOFF, ws = True, translation = poleVectorPos)
             
             cmds.group (em = True, n = side + "_legIK_CTRL_GRP")
@@ -3769,8 +5723,11 @@ def bipedLegBuild(side, thighJNT, kneeJNT, ankleJNT, ballJNT, legfkSetup, legikS
             cmds.select(legIKCTRL, kneeIKOFF, r = True)
             secondGrpCONST = cmds.parentConstraint (maintainOffset = True, weight = 1)
             
-            cmds.setDrivenKeyframe (secondGrpCONST[0] + "." + legIKCTRL + "W0", dv = 0, v = 0, cd = kneeIKCTRL + '.follow')
-            cmds.setDrivenKeyframe (secondGrpCONST[0] + "." + legIKCTRL + "W0", dv = 1, v = 1, cd = kneeIKCTRL + '.follow')
+            if driverMode == "Math Nodes":
+                cmds.connectAttr (kneeIKCTRL + '.follow', secondGrpCONST[0] + "." + legIKCTRL + "W0")
+            else:
+                cmds.setDrivenKeyframe (secondGrpCONST[0] + "." + legIKCTRL + "W0", dv = 0, v = 0, cd = kneeIKCTRL + '.follow')
+                cmds.setDrivenKeyframe (secondGrpCONST[0] + "." + legIKCTRL + "W0", dv = 1, v = 1, cd = kneeIKCTRL + '.follow')
             
             cmds.select (legIKCTRL, r = True)
             cmds.addAttr (ln = "follow", at = "enum", en = "<none>:Hip:", k = True)
@@ -3832,93 +5789,107 @@ def bipedLegBuild(side, thighJNT, kneeJNT, ankleJNT, ballJNT, legfkSetup, legikS
                 cmds.parent (BallIKHandle[0], ankleRollIn_loc[0], r = False)
                 cmds.parent (LegIKHandle[0], roll_loc[0], r = False)
                                 
-                if (anklePos[0] > 0):
-                    #Toe Wiggle
-                    cmds.setDrivenKeyframe (toeWiggle_loc[0] + ".rx", dv = 0, v = 0, cd = legIKCTRL + '.toeWiggle')
-                    cmds.setDrivenKeyframe (toeWiggle_loc[0] + ".rx", dv = 10, v = 45, cd = legIKCTRL + '.toeWiggle')
-                    cmds.setDrivenKeyframe (toeWiggle_loc[0] + ".rx", dv = -10, v = -45, cd = legIKCTRL + '.toeWiggle')
-                    #Toe Pivot
-                    cmds.setDrivenKeyframe (toePivot_loc[0] + ".ry", dv = 0, v = 0, cd = legIKCTRL + '.toePivot')
-                    cmds.setDrivenKeyframe (toePivot_loc[0] + ".ry", dv = 10, v = -45, cd = legIKCTRL + '.toePivot')
-                    cmds.setDrivenKeyframe (toePivot_loc[0] + ".ry", dv = -10, v = 45, cd = legIKCTRL + '.toePivot')
-                    #Ball Pivot
-                    cmds.setDrivenKeyframe (ballPivot_loc[0] + ".ry", dv = 0, v = 0, cd = legIKCTRL + '.ballPivot')
-                    cmds.setDrivenKeyframe (ballPivot_loc[0] + ".ry", dv = 10, v = -45, cd = legIKCTRL + '.ballPivot')
-                    cmds.setDrivenKeyframe (ballPivot_loc[0] + ".ry", dv = -10, v = 45, cd = legIKCTRL + '.ballPivot')
-                    #Heel Pivot
-                    cmds.setDrivenKeyframe (heel_loc[0] + ".ry", dv = 0, v = 0, cd = legIKCTRL + '.heelPivot')
-                    cmds.setDrivenKeyframe (heel_loc[0] + ".ry", dv = 10, v = -45, cd = legIKCTRL + '.heelPivot')
-                    cmds.setDrivenKeyframe (heel_loc[0] + ".ry", dv = -10, v = 45, cd = legIKCTRL + '.heelPivot')
-                    #Toe Roll
-                    cmds.setDrivenKeyframe (toePivot_loc[0] + ".rx", dv = 0, v = 0, cd = legIKCTRL + '.toeRoll')
-                    cmds.setDrivenKeyframe (toePivot_loc[0] + ".rx", dv = 10, v = 45, cd = legIKCTRL + '.toeRoll')
-                    #Ankle Roll
-                    cmds.setDrivenKeyframe (ankleRollOut_loc[0] + ".rz", dv = 0, v = 0, cd = legIKCTRL + '.ankleRoll')
-                    cmds.setDrivenKeyframe (ankleRollOut_loc[0] + ".rz", dv = 10, v = -45, cd = legIKCTRL + '.ankleRoll')
-                    cmds.setDrivenKeyframe (ankleRollIn_loc[0] + ".rz", dv = 0, v = 0, cd = legIKCTRL + '.ankleRoll')
-                    cmds.setDrivenKeyframe (ankleRollIn_loc[0] + ".rz", dv = -10, v = 45, cd = legIKCTRL + '.ankleRoll')
-                    #Foot Roll
-                    cmds.setDrivenKeyframe (roll_loc[0] + ".rx", dv = 0, v = 0, cd = legIKCTRL + '.footRoll')
-                    cmds.setDrivenKeyframe (roll_loc[0] + ".rx", dv = 10, v = 45, cd = legIKCTRL + '.footRoll')
-                    cmds.setDrivenKeyframe (heel_loc[0] + ".rx", dv = 0, v = 0, cd = legIKCTRL + '.footRoll')
-                    cmds.setDrivenKeyframe (heel_loc[0] + ".rx", dv = -10, v = -45, cd = legIKCTRL + '.footRoll')
+                if driverMode == "Math Nodes":
+                    #Same mappings as the driven keys below (10 -> 45 degrees), built from clamp and multDoubleLinear nodes
+                    pivotScale = -4.5 if anklePos[0] > 0 else 4.5
+                    
+                    createLinearDriver (legIKCTRL + '.toeWiggle', toeWiggle_loc[0] + ".rx", 4.5)
+                    createLinearDriver (legIKCTRL + '.toePivot', toePivot_loc[0] + ".ry", pivotScale)
+                    createLinearDriver (legIKCTRL + '.ballPivot', ballPivot_loc[0] + ".ry", pivotScale)
+                    createLinearDriver (legIKCTRL + '.heelPivot', heel_loc[0] + ".ry", pivotScale)
+                    createLinearDriver (legIKCTRL + '.toeRoll', toePivot_loc[0] + ".rx", 4.5, inputRange = (0, None))
+                    createLinearDriver (legIKCTRL + '.ankleRoll', ankleRollOut_loc[0] + ".rz", pivotScale, inputRange = (0, None))
+                    createLinearDriver (legIKCTRL + '.ankleRoll', ankleRollIn_loc[0] + ".rz", pivotScale, inputRange = (None, 0))
+                    createLinearDriver (legIKCTRL + '.footRoll', roll_loc[0] + ".rx", 4.5, inputRange = (0, None))
+                    createLinearDriver (legIKCTRL + '.footRoll', heel_loc[0] + ".rx", 4.5, inputRange = (None, 0))
+                else:
+                    if (anklePos[0] > 0):
+                        #Toe Wiggle
+                        cmds.setDrivenKeyframe (toeWiggle_loc[0] + ".rx", dv = 0, v = 0, cd = legIKCTRL + '.toeWiggle')
+                        cmds.setDrivenKeyframe (toeWiggle_loc[0] + ".rx", dv = 10, v = 45, cd = legIKCTRL + '.toeWiggle')
+                        cmds.setDrivenKeyframe (toeWiggle_loc[0] + ".rx", dv = -10, v = -45, cd = legIKCTRL + '.toeWiggle')
+                        #Toe Pivot
+                        cmds.setDrivenKeyframe (toePivot_loc[0] + ".ry", dv = 0, v = 0, cd = legIKCTRL + '.toePivot')
+                        cmds.setDrivenKeyframe (toePivot_loc[0] + ".ry", dv = 10, v = -45, cd = legIKCTRL + '.toePivot')
+                        cmds.setDrivenKeyframe (toePivot_loc[0] + ".ry", dv = -10, v = 45, cd = legIKCTRL + '.toePivot')
+                        #Ball Pivot
+                        cmds.setDrivenKeyframe (ballPivot_loc[0] + ".ry", dv = 0, v = 0, cd = legIKCTRL + '.ballPivot')
+                        cmds.setDrivenKeyframe (ballPivot_loc[0] + ".ry", dv = 10, v = -45, cd = legIKCTRL + '.ballPivot')
+                        cmds.setDrivenKeyframe (ballPivot_loc[0] + ".ry", dv = -10, v = 45, cd = legIKCTRL + '.ballPivot')
+                        #Heel Pivot
+                        cmds.setDrivenKeyframe (heel_loc[0] + ".ry", dv = 0, v = 0, cd = legIKCTRL + '.heelPivot')
+                        cmds.setDrivenKeyframe (heel_loc[0] + ".ry", dv = 10, v = -45, cd = legIKCTRL + '.heelPivot')
+                        cmds.setDrivenKeyframe (heel_loc[0] + ".ry", dv = -10, v = 45, cd = legIKCTRL + '.heelPivot')
+                        #Toe Roll
+                        cmds.setDrivenKeyframe (toePivot_loc[0] + ".rx", dv = 0, v = 0, cd = legIKCTRL + '.toeRoll')
+                        cmds.setDrivenKeyframe (toePivot_loc[0] + ".rx", dv = 10, v = 45, cd = legIKCTRL + '.toeRoll')
+                        #Ankle Roll
+                        cmds.setDrivenKeyframe (ankleRollOut_loc[0] + ".rz", dv = 0, v = 0, cd = legIKCTRL + '.ankleRoll')
+                        cmds.setDrivenKeyframe (ankleRollOut_loc[0] + ".rz", dv = 10, v = -45, cd = legIKCTRL + '.ankleRoll')
+                        cmds.setDrivenKeyframe (ankleRollIn_loc[0] + ".rz", dv = 0, v = 0, cd = legIKCTRL + '.ankleRoll')
+                        cmds.setDrivenKeyframe (ankleRollIn_loc[0] + ".rz", dv = -10, v = 45, cd = legIKCTRL + '.ankleRoll')
+                        #Foot Roll
+                        cmds.setDrivenKeyframe (roll_loc[0] + ".rx", dv = 0, v = 0, cd = legIKCTRL + '.footRoll')
+                        cmds.setDrivenKeyframe (roll_loc[0] + ".rx", dv = 10, v = 45, cd = legIKCTRL + '.footRoll')
+                        cmds.setDrivenKeyframe (heel_loc[0] + ".rx", dv = 0, v = 0, cd = legIKCTRL + '.footRoll')
+                        cmds.setDrivenKeyframe (heel_loc[0] + ".rx", dv = -10, v = -45, cd = legIKCTRL + '.footRoll')
                 
-                elif (anklePos[0] < 0):
-                    #Toe Wiggle
-                    cmds.setDrivenKeyframe (toeWiggle_loc[0] + ".rx", dv = 0, v = 0, cd = legIKCTRL + '.toeWiggle')
-                    cmds.setDrivenKeyframe (toeWiggle_loc[0] + ".rx", dv = 10, v = 45, cd = legIKCTRL + '.toeWiggle')
-                    cmds.setDrivenKeyframe (toeWiggle_loc[0] + ".rx", dv = -10, v = -45, cd = legIKCTRL + '.toeWiggle')
-                    #Toe Pivot
-                    cmds.setDrivenKeyframe (toePivot_loc[0] + ".ry", dv = 0, v = 0, cd = legIKCTRL + '.toePivot')
-                    cmds.setDrivenKeyframe (toePivot_loc[0] + ".ry", dv = 10, v = 45, cd = legIKCTRL + '.toePivot')
-                    cmds.setDrivenKeyframe (toePivot_loc[0] + ".ry", dv = -10, v = -45, cd = legIKCTRL + '.toePivot')
-                    #Ball Pivot
-                    cmds.setDrivenKeyframe (ballPivot_loc[0] + ".ry", dv = 0, v = 0, cd = legIKCTRL + '.ballPivot')
-                    cmds.setDrivenKeyframe (ballPivot_loc[0] + ".ry", dv = 10, v = 45, cd = legIKCTRL + '.ballPivot')
-                    cmds.setDrivenKeyframe (ballPivot_loc[0] + ".ry", dv = -10, v = -45, cd = legIKCTRL + '.ballPivot')
-                    #Heel Pivot
-                    cmds.setDrivenKeyframe (heel_loc[0] + ".ry", dv = 0, v = 0, cd = legIKCTRL + '.heelPivot')
-                    cmds.setDrivenKeyframe (heel_loc[0] + ".ry", dv = 10, v = 45, cd = legIKCTRL + '.heelPivot')
-                    cmds.setDrivenKeyframe (heel_loc[0] + ".ry", dv = -10, v = -45, cd = legIKCTRL + '.heelPivot')
-                    #Toe Roll
-                    cmds.setDrivenKeyframe (toePivot_loc[0] + ".rx", dv = 0, v = 0, cd = legIKCTRL + '.toeRoll')
-                    cmds.setDrivenKeyframe (toePivot_loc[0] + ".rx", dv = 10, v = 45, cd = legIKCTRL + '.toeRoll')
-                    #Ankle Roll
-                    cmds.setDrivenKeyframe (ankleRollOut_loc[0] + ".rz", dv = 0, v = 0, cd = legIKCTRL + '.ankleRoll')
-                    cmds.setDrivenKeyframe (ankleRollOut_loc[0] + ".rz", dv = 10, v = 45, cd = legIKCTRL + '.ankleRoll')
-                    cmds.setDrivenKeyframe (ankleRollIn_loc[0] + ".rz", dv = 0, v = 0, cd = legIKCTRL + '.ankleRoll')
-                    cmds.setDrivenKeyframe (ankleRollIn_loc[0] + ".rz", dv = -10, v = -45, cd = legIKCTRL + '.ankleRoll')
-                    #Foot Roll
-                    cmds.setDrivenKeyframe (roll_loc[0] + ".rx", dv = 0, v = 0, cd = legIKCTRL + '.footRoll')
-                    cmds.setDrivenKeyframe (roll_loc[0] + ".rx", dv = 10, v = 45, cd = legIKCTRL + '.footRoll')
-                    cmds.setDrivenKeyframe (heel_loc[0] + ".rx", dv = 0, v = 0, cd = legIKCTRL + '.footRoll')
-                    cmds.setDrivenKeyframe (heel_loc[0] + ".rx", dv = -10, v = -45, cd = legIKCTRL + '.footRoll')
+                    elif (anklePos[0] < 0):
+                        #Toe Wiggle
+                        cmds.setDrivenKeyframe (toeWiggle_loc[0] + ".rx", dv = 0, v = 0, cd = legIKCTRL + '.toeWiggle')
+                        cmds.setDrivenKeyframe (toeWiggle_loc[0] + ".rx", dv = 10, v = 45, cd = legIKCTRL + '.toeWiggle')
+                        cmds.setDrivenKeyframe (toeWiggle_loc[0] + ".rx", dv = -10, v = -45, cd = legIKCTRL + '.toeWiggle')
+                        #Toe Pivot
+                        cmds.setDrivenKeyframe (toePivot_loc[0] + ".ry", dv = 0, v = 0, cd = legIKCTRL + '.toePivot')
+                        cmds.setDrivenKeyframe (toePivot_loc[0] + ".ry", dv = 10, v = 45, cd = legIKCTRL + '.toePivot')
+                        cmds.setDrivenKeyframe (toePivot_loc[0] + ".ry", dv = -10, v = -45, cd = legIKCTRL + '.toePivot')
+                        #Ball Pivot
+                        cmds.setDrivenKeyframe (ballPivot_loc[0] + ".ry", dv = 0, v = 0, cd = legIKCTRL + '.ballPivot')
+                        cmds.setDrivenKeyframe (ballPivot_loc[0] + ".ry", dv = 10, v = 45, cd = legIKCTRL + '.ballPivot')
+                        cmds.setDrivenKeyframe (ballPivot_loc[0] + ".ry", dv = -10, v = -45, cd = legIKCTRL + '.ballPivot')
+                        #Heel Pivot
+                        cmds.setDrivenKeyframe (heel_loc[0] + ".ry", dv = 0, v = 0, cd = legIKCTRL + '.heelPivot')
+                        cmds.setDrivenKeyframe (heel_loc[0] + ".ry", dv = 10, v = 45, cd = legIKCTRL + '.heelPivot')
+                        cmds.setDrivenKeyframe (heel_loc[0] + ".ry", dv = -10, v = -45, cd = legIKCTRL + '.heelPivot')
+                        #Toe Roll
+                        cmds.setDrivenKeyframe (toePivot_loc[0] + ".rx", dv = 0, v = 0, cd = legIKCTRL + '.toeRoll')
+                        cmds.setDrivenKeyframe (toePivot_loc[0] + ".rx", dv = 10, v = 45, cd = legIKCTRL + '.toeRoll')
+                        #Ankle Roll
+                        cmds.setDrivenKeyframe (ankleRollOut_loc[0] + ".rz", dv = 0, v = 0, cd = legIKCTRL + '.ankleRoll')
+                        cmds.setDrivenKeyframe (ankleRollOut_loc[0] + ".rz", dv = 10, v = 45, cd = legIKCTRL + '.ankleRoll')
+                        cmds.setDrivenKeyframe (ankleRollIn_loc[0] + ".rz", dv = 0, v = 0, cd = legIKCTRL + '.ankleRoll')
+                        cmds.setDrivenKeyframe (ankleRollIn_loc[0] + ".rz", dv = -10, v = -45, cd = legIKCTRL + '.ankleRoll')
+                        #Foot Roll
+                        cmds.setDrivenKeyframe (roll_loc[0] + ".rx", dv = 0, v = 0, cd = legIKCTRL + '.footRoll')
+                        cmds.setDrivenKeyframe (roll_loc[0] + ".rx", dv = 10, v = 45, cd = legIKCTRL + '.footRoll')
+                        cmds.setDrivenKeyframe (heel_loc[0] + ".rx", dv = 0, v = 0, cd = legIKCTRL + '.footRoll')
+                        cmds.setDrivenKeyframe (heel_loc[0] + ".rx", dv = -10, v = -45, cd = legIKCTRL + '.footRoll')
                 
-                cmds.select(heel_loc[0], ballPivot_loc[0], toePivot_loc[0], ankleRollIn_loc[0], ankleRollOut_loc[0], roll_loc[0], toeWiggle_loc[0], r = True)
-                cmds.selectKey (clear = True)
-                cmds.selectKey (heel_loc[0] + "_rotateX", add = True, k = True, f = (-10,0))
-                cmds.selectKey (toePivot_loc[0] + "_rotateX", add = True, k = True, f = (0,10))
-                cmds.selectKey (ankleRollOut_loc[0] + "_rotateZ", add = True, k = True, f = (0,10))
-                cmds.selectKey (ankleRollIn_loc[0] + "_rotateZ", add = True, k = True, f = (-10,0))
-                cmds.selectKey (roll_loc[0] + "_rotateX", add = True, k = True, f = (0,10))
-                cmds.selectKey ((heel_loc[0] + "_rotateY"), (ballPivot_loc[0] + "_rotateY"), (toePivot_loc[0] + "_rotateY"), (toeWiggle_loc[0] + "_rotateX"), add = True, k = True)
-                cmds.keyTangent (itt = "linear", ott = "linear")
+                    cmds.select(heel_loc[0], ballPivot_loc[0], toePivot_loc[0], ankleRollIn_loc[0], ankleRollOut_loc[0], roll_loc[0], toeWiggle_loc[0], r = True)
+                    cmds.selectKey (clear = True)
+                    cmds.selectKey (heel_loc[0] + "_rotateX", add = True, k = True, f = (-10,0))
+                    cmds.selectKey (toePivot_loc[0] + "_rotateX", add = True, k = True, f = (0,10))
+                    cmds.selectKey (ankleRollOut_loc[0] + "_rotateZ", add = True, k = True, f = (0,10))
+                    cmds.selectKey (ankleRollIn_loc[0] + "_rotateZ", add = True, k = True, f = (-10,0))
+                    cmds.selectKey (roll_loc[0] + "_rotateX", add = True, k = True, f = (0,10))
+                    cmds.selectKey ((heel_loc[0] + "_rotateY"), (ballPivot_loc[0] + "_rotateY"), (toePivot_loc[0] + "_rotateY"), (toeWiggle_loc[0] + "_rotateX"), add = True, k = True)
+                    cmds.keyTangent (itt = "linear", ott = "linear")
                 
-                cmds.selectKey (clear = True)
-                cmds.selectKey ((heel_loc[0] + "_rotateY"), (ballPivot_loc[0] + "_rotateY"), (toePivot_loc[0] + "_rotateY"), (toeWiggle_loc[0] + "_rotateX"), add = True, k = True)
-                cmds.setInfinity (pri = "cycleRelative")
-                cmds.setInfinity (poi = "cycleRelative")
+                    cmds.selectKey (clear = True)
+                    cmds.selectKey ((heel_loc[0] + "_rotateY"), (ballPivot_loc[0] + "_rotateY"), (toePivot_loc[0] + "_rotateY"), (toeWiggle_loc[0] + "_rotateX"), add = True, k = True)
+                    cmds.setInfinity (pri = "cycleRelative")
+                    cmds.setInfinity (poi = "cycleRelative")
                 
-                cmds.selectKey (clear = True)
-                cmds.selectKey (heel_loc[0] + "_rotateX", add = True, k = True, f = (-10,0))
-                cmds.selectKey (ankleRollIn_loc[0] + "_rotateZ", add = True, k = True, f = (-10,0))
-                cmds.setInfinity (pri = "cycleRelative")
+                    cmds.selectKey (clear = True)
+                    cmds.selectKey (heel_loc[0] + "_rotateX", add = True, k = True, f = (-10,0))
+                    cmds.selectKey (ankleRollIn_loc[0] + "_rotateZ", add = True, k = True, f = (-10,0))
+                    cmds.setInfinity (pri = "cycleRelative")
                 
-                cmds.selectKey (clear = True)
-                cmds.selectKey (ankleRollOut_loc[0] + "_rotateZ", add = True, k = True, f = (0,10))
-                cmds.selectKey (roll_loc[0] + "_rotateX", add = True, k = True, f = (0,10))
-                cmds.selectKey (toePivot_loc[0] + "_rotateX", add = True, k = True, f = (0,10))
-                cmds.setInfinity (poi = "cycleRelative")
+                    cmds.selectKey (clear = True)
+                    cmds.selectKey (ankleRollOut_loc[0] + "_rotateZ", add = True, k = True, f = (0,10))
+                    cmds.selectKey (roll_loc[0] + "_rotateX", add = True, k = True, f = (0,10))
+                    cmds.selectKey (toePivot_loc[0] + "_rotateX", add = True, k = True, f = (0,10))
+                    cmds.setInfinity (poi = "cycleRelative")
                 
                 cmds.setAttr (heel_loc[0] + ".v", 0)
                 
@@ -3968,6 +5939,8 @@ def bipedLegBuild(side, thighJNT, kneeJNT, ankleJNT, ballJNT, legfkSetup, legikS
                 cmds.select (kneeTwistIKJNT, kneeIKJNT, r = True)
                 cmds.parent()
             
+            addStretchyIK ([thighIKJNT, kneeIKJNT, ankleIKJNT], LegIKHandle[0], legIKCTRL, stretchMode)
+            
         if (legfkSetup and legikSetup):
             
             # IK-FK Switch
@@ -3991,9 +5964,12 @@ def bipedLegBuild(side, thighJNT, kneeJNT, ankleJNT, ballJNT, legfkSetup, legikS
 
             cmds.parent (ikFkControl, side + '_legSwitch_CTRL_GRP')
 
-            cmds.select (ankleJNT, side + '_legSwitch_CTRL_GRP', r = True)
-            cmds.pointConstraint(weight = 1)
-            cmds.orientConstraint(weight = 1, maintainOffset = 1)
+            if blendMode == "Matrix" and matrixNodesAvailable():
+                matrixFollow(ankleJNT, side + '_legSwitch_CTRL_GRP')
+            else:
+                cmds.select (ankleJNT, side + '_legSwitch_CTRL_GRP', r = True)
+                cmds.pointConstraint(weight = 1)
+                cmds.orientConstraint(weight = 1, maintainOffset = 1)
 
             cmds.select (ikFkControl + '.cv[0:32]', r = True)
             checkSide = cmds.xform(ikFkControl, q = True, ws = True, translation = True)
@@ -4011,6 +5987,10 @@ def bipedLegBuild(side, thighJNT, kneeJNT, ankleJNT, ballJNT, legfkSetup, legikS
             ikJnts = [thighIKJNT, kneeIKJNT, ankleIKJNT, ballIKJNT] + thighTwistIKJNT + kneeTwistIKJNT
                 
             for bind, fk, ik in zip (bindJnts, fkJnts, ikJnts):
+               if blendMode == "Matrix":
+                   matrixBlendJoint(bind, fk, ik, ikFkControl + '.FKIK')
+                   continue
+               
                constraintStore = cmds.parentConstraint (fk, ik, bind, mo = False, weight = 1)[0]
                reverseNode = cmds.createNode('reverse', n = constraintStore + '_legFK_rev')
                cmds.connectAttr(ikFkControl + '.FKIK', reverseNode +'.inputX')
@@ -4056,7 +6036,10 @@ def bipedLegBuild(side, thighJNT, kneeJNT, ankleJNT, ballJNT, legfkSetup, legikS
             fkJnts = [thighFKJNT, kneeFKJNT, ankleFKJNT, ballFKJNT] + thighTwistFKJNT + kneeTwistFKJNT
                 
             for bind, fk in zip (bindJnts, fkJnts):
-               constraintStore = cmds.parentConstraint (fk, bind, mo = False, weight = 1)[0]          
+               if blendMode == "Matrix":
+                   matrixBlendJoint(bind, fk, None, None)
+               else:
+                   constraintStore = cmds.parentConstraint (fk, bind, mo = False, weight = 1)[0]
                
             legCTRL_grp = cmds.group (em = True, n = side + "_leg_CTRL_GRP")
             cmds.parent (side + "_legFK_CTRL_GRP", side + "_leg_CTRL_GRP", r = False)
@@ -4075,7 +6058,10 @@ def bipedLegBuild(side, thighJNT, kneeJNT, ankleJNT, ballJNT, legfkSetup, legikS
             ikJnts = [thighIKJNT, kneeIKJNT, ankleIKJNT, ballIKJNT] + thighTwistIKJNT + kneeTwistIKJNT
                 
             for bind, ik in zip (bindJnts, ikJnts):
-               constraintStore = cmds.parentConstraint (ik, bind, mo = False, weight = 1)[0]        
+               if blendMode == "Matrix":
+                   matrixBlendJoint(bind, None, ik, None)
+               else:
+                   constraintStore = cmds.parentConstraint (ik, bind, mo = False, weight = 1)[0]
                
             legCTRL_grp = cmds.group (em = True, n = side + "_leg_CTRL_GRP")
             cmds.parent (side + "_legIK_CTRL_GRP", side + "_leg_CTRL_GRP", r = False)
@@ -4141,59 +6127,2182 @@ def finalConnections (armFKSetup, legFKSetup, controllerScale):
         cmds.group (em = True, n = "JNT_GRP")
         cmds.parent ("spine_JNT_GRP", "neck_JNT_GRP", "clavicle_JNT_GRP", "arm_JNT_GRP", "leg_JNT_GRP", "JNT_GRP", r = False)
         
-        #CTRL Group
-        cmds.group (em = True, n = "CTRL_GRP")
-        cmds.parent ("spine_CTRL_GRP", "neck_CTRL_GRP", "arm_CTRL_GRP", "leg_CTRL_GRP", "clavicle_CTRL_GRP", "CTRL_GRP", r = False)
+        #CTRL Group
+        cmds.group (em = True, n = "CTRL_GRP")
+        cmds.parent ("spine_CTRL_GRP", "neck_CTRL_GRP", "arm_CTRL_GRP", "leg_CTRL_GRP", "clavicle_CTRL_GRP", "CTRL_GRP", r = False)
+        
+        cmds.select ("splineTip_CTRL","clavicle_CTRL_GRP", r = True)
+        cmds.parentConstraint (mo = True, weight = 1)
+        
+        mainCTRL = mel.eval ("curve -d 1 -p 0 0 -0.9857426965 -p -0.2950522357 0 -0.543164343 -p -0.1475261178 0 -0.543164343 -p -0.1475261178 0 -0.1475261178 -p -0.543164343 0 -0.1475261178 -p -0.543164343 0 -0.2950522357 -p -0.9857426965 0 0 -p -0.543164343 0 0.2950522357 -p -0.543164343 0 0.1475261178 -p -0.1475261178 0 0.1475261178 -p -0.1475261178 0 0.543164343 -p -0.2950522357 0 0.543164343 -p 0 0 0.9857426965 -p 0.2950522357 0 0.543164343 -p 0.1475261178 0 0.543164343 -p 0.1475261178 0 0.1475261178 -p 0.543164343 0 0.1475261178 -p 0.543164343 0 0.2950522357 -p 0.9857426965 0 0 -p 0.543164343 0 -0.2950522357 -p 0.543164343 0 -0.1475261178 -p 0.1475261178 0 -0.1475261178 -p 0.1475261178 0 -0.543164343 -p 0.2950522357 0 -0.543164343 -p 0 0 -0.98574269651;")
+        mainCTRL = cmds.rename (mainCTRL, "MAIN_CTRL")
+        cmds.scale(10 * controllerScale, 10 * controllerScale, 10 * controllerScale, r = True)
+        cmds.makeIdentity (apply = True, r = 1, t = 1, s = 1, n = 0)
+        cmds.DeleteHistory()
+        
+        controllerColorAssign (255, 255, 255, mainCTRL)
+        
+        cmds.select(mainCTRL, r = True)
+        cmds.connectAttr (mainCTRL + '.sy' , mainCTRL + '.sx', f = True)
+        cmds.connectAttr (mainCTRL + '.sy' , mainCTRL + '.sz', f = True)
+        cmds.setAttr (mainCTRL + '.sx', keyable = False, channelBox = False)
+        cmds.setAttr (mainCTRL + '.sz', keyable = False, channelBox = False)
+        
+        cmds.select (all = True)
+        cmds.select (mainCTRL, d = True)
+        
+        cmds.select (mainCTRL, add = True)
+        cmds.parent()
+        
+        
+        cmds.SelectAllPolygonGeometry()
+        geoMeshes = cmds.ls(selection = True)
+        
+        for mesh in geoMeshes:
+            cmds.setAttr (mesh + ".inheritsTransform", 0)
+            
+        cmds.setAttr ("MISC_GRP.v", 0)
+        cmds.setAttr ("JNT_GRP.v", 0)
+        
+        cmds.select(cl = True)
+        
+        
+def controllerColorAssign (r, g, b, *args):
+    cmds.select (args, r = True)
+    shapesSelect = cmds.ls (selection = 1, shapes = True, dag = True)
+    
+    
+    for shape in shapesSelect:
+        cmds.setAttr(shape + ".overrideEnabled", 1)
+        cmds.setAttr(shape + ".overrideRGBColors", 1)
+        cmds.setAttr(shape + ".overrideColorRGB", r, g, b)
+    
+'''
+####################################################################################################
+BIPED CONTROL RIG SETUP
+END
+####################################################################################################
+'''
+
+'''
+####################################################################################################
+MATRIX IK/FK BLEND
+START
+####################################################################################################
+'''
+def matrixNodesAvailable():
+    #blendMatrix and offsetParentMatrix were introduced in Maya 2020
+    return cmds.about(apiVersion = True) >= 20200000
+
+def matrixBlendJoint(bindJNT, fkJNT, ikJNT, switchAttr):
+    #Drives the bind joint from the FK and/or IK joint without any constraint
+    createdNodes = []
+    
+    if fkJNT and ikJNT:
+        if matrixNodesAvailable():
+            blendNode = cmds.createNode('blendMatrix', n = bindJNT + '_FKIK_blendMatrix')
+            createdNodes.append(blendNode)
+            cmds.connectAttr(fkJNT + '.worldMatrix[0]', blendNode + '.inputMatrix')
+            cmds.connectAttr(ikJNT + '.worldMatrix[0]', blendNode + '.target[0].targetMatrix')
+            cmds.connectAttr(switchAttr, blendNode + '.target[0].weight')
+            worldMatrixAttr = blendNode + '.outputMatrix'
+        else:
+            #No blendMatrix: both chains are taken to the bind joint's parent space and blended there by a pairBlend, the translation
+            #linearly and the rotation as a quaternion, so the joint never shears half way like a weighted sum of the matrices does
+            pairBlend = cmds.createNode('pairBlend', n = bindJNT + '_FKIK_pairBlend')
+            createdNodes.append(pairBlend)
+            cmds.setAttr(pairBlend + '.rotInterpolation', 1)
+            cmds.connectAttr(switchAttr, pairBlend + '.weight')
+            
+            for index, chainJNT in enumerate([fkJNT, ikJNT]):
+                chainMatrix = cmds.createNode('multMatrix', n = chainJNT + '_FKIK_multMatrix')
+                chainDecompose = cmds.createNode('decomposeMatrix', n = chainJNT + '_FKIK_decomposeMatrix')
+                createdNodes += [chainMatrix, chainDecompose]
+                cmds.connectAttr(chainJNT + '.worldMatrix[0]', chainMatrix + '.matrixIn[0]')
+                cmds.connectAttr(bindJNT + '.parentInverseMatrix[0]', chainMatrix + '.matrixIn[1]')
+                cmds.connectAttr(chainMatrix + '.matrixSum', chainDecompose + '.inputMatrix')
+                cmds.connectAttr(chainDecompose + '.outputTranslate', pairBlend + '.inTranslate' + str(index + 1))
+                cmds.connectAttr(chainDecompose + '.outputRotate', pairBlend + '.inRotate' + str(index + 1))
+            
+            composeNode = cmds.createNode('composeMatrix', n = bindJNT + '_FKIK_composeMatrix')
+            createdNodes.append(composeNode)
+            cmds.connectAttr(pairBlend + '.outTranslate', composeNode + '.inputTranslate')
+            cmds.connectAttr(pairBlend + '.outRotate', composeNode + '.inputRotate')
+            localMatrixAttr = composeNode + '.outputMatrix'
+            worldMatrixAttr = None
+    else:
+        worldMatrixAttr = (fkJNT or ikJNT) + '.worldMatrix[0]'
+    
+    #World to local space of the bind joint
+    if worldMatrixAttr:
+        localMatrix = cmds.createNode('multMatrix', n = bindJNT + '_FKIK_multMatrix')
+        createdNodes.append(localMatrix)
+        cmds.connectAttr(worldMatrixAttr, localMatrix + '.matrixIn[0]')
+        cmds.connectAttr(bindJNT + '.parentInverseMatrix[0]', localMatrix + '.matrixIn[1]')
+        localMatrixAttr = localMatrix + '.matrixSum'
+    
+    decomposeNode = cmds.createNode('decomposeMatrix', n = bindJNT + '_FKIK_decomposeMatrix')
+    createdNodes.append(decomposeNode)
+    cmds.connectAttr(localMatrixAttr, decomposeNode + '.inputMatrix')
+    cmds.connectAttr(decomposeNode + '.outputTranslate', bindJNT + '.translate')
+    
+    #The joint orient sits between rotate and translate, so it has to be taken back out before driving the rotation
+    jointOrient = [0.0, 0.0, 0.0]
+    if cmds.objectType(bindJNT, isAType = 'joint'):
+        jointOrient = cmds.getAttr(bindJNT + '.jointOrient')[0]
+    
+    if max(abs(value) for value in jointOrient) > 0.0001:
+        orientMatrix = om2.MEulerRotation(math.radians(jointOrient[0]), math.radians(jointOrient[1]), math.radians(jointOrient[2])).asMatrix()
+        
+        rotateMatrix = cmds.createNode('multMatrix', n = bindJNT + '_FKIK_orient_multMatrix')
+        cmds.connectAttr(localMatrixAttr, rotateMatrix + '.matrixIn[0]')
+        cmds.setAttr(rotateMatrix + '.matrixIn[1]', list(orientMatrix.inverse()), type = 'matrix')
+        
+        rotateNode = cmds.createNode('decomposeMatrix', n = bindJNT + '_FKIK_orient_decomposeMatrix')
+        createdNodes += [rotateMatrix, rotateNode]
+        cmds.connectAttr(rotateMatrix + '.matrixSum', rotateNode + '.inputMatrix')
+    else:
+        rotateNode = decomposeNode
+    
+    cmds.connectAttr(bindJNT + '.rotateOrder', rotateNode + '.inputRotateOrder')
+    cmds.connectAttr(rotateNode + '.outputRotate', bindJNT + '.rotate')
+    
+    recordBuildOperation(matrixBlendJoint, [bindJNT, fkJNT, ikJNT, switchAttr], createdNodes)
+
+def matrixFollow(driver, follower):
+    #Point and orient (maintain offset) follow through the offsetParentMatrix, the follower has to be at rest in world space
+    driverMatrix = cmds.getAttr(driver + '.worldMatrix[0]')
+    restRotation = om2.MMatrix(driverMatrix[:12] + [0.0, 0.0, 0.0, 1.0]).inverse()
+    
+    cmds.xform(follower, ws = True, matrix = list(om2.MMatrix()))
+    
+    followMatrix = cmds.createNode('multMatrix', n = follower + '_follow_multMatrix')
+    cmds.setAttr(followMatrix + '.matrixIn[0]', list(restRotation), type = 'matrix')
+    cmds.connectAttr(driver + '.worldMatrix[0]', followMatrix + '.matrixIn[1]')
+    cmds.connectAttr(follower + '.parentInverseMatrix[0]', followMatrix + '.matrixIn[2]')
+    cmds.connectAttr(followMatrix + '.matrixSum', follower + '.offsetParentMatrix')
+    
+    recordBuildOperation(matrixFollow, [driver, follower], [followMatrix])
+    
+'''
+####################################################################################################
+MATRIX IK/FK BLEND
+END
+####################################################################################################
+'''
+
+'''
+####################################################################################################
+LINEAR DRIVERS
+START
+####################################################################################################
+'''
+def createLinearDriver(driverAttr, drivenAttr, scale, inputRange = None):
+    #Linear replacement for a driven key with linear tangents and cycleRelative infinity. 
+    #inputRange clamps the driver first, None leaves that end open (constant infinity on the driven key)
+    nodeName = drivenAttr.replace(".", "_")
+    sourceAttr = driverAttr
+    
+    if inputRange:
+        clampNode = cmds.createNode('clamp', n = nodeName + '_clamp')
+        cmds.setAttr(clampNode + '.minR', -1000000 if inputRange[0] is None else inputRange[0])
+        cmds.setAttr(clampNode + '.maxR', 1000000 if inputRange[1] is None else inputRange[1])
+        cmds.connectAttr(driverAttr, clampNode + '.inputR')
+        sourceAttr = clampNode + '.outputR'
+    
+    #The unitConversion to the angle is added by Maya when the output is connected
+    multNode = cmds.createNode('multDoubleLinear', n = nodeName + '_mdl')
+    cmds.setAttr(multNode + '.input2', scale)
+    cmds.connectAttr(sourceAttr, multNode + '.input1')
+    cmds.connectAttr(multNode + '.output', drivenAttr)
+    
+    return multNode
+
+'''
+####################################################################################################
+LINEAR DRIVERS
+END
+####################################################################################################
+'''
+
+'''
+####################################################################################################
+STRETCHY IK
+START
+####################################################################################################
+'''
+IK_STRETCH_MODES = ["Rigid", "Stretch", "Soft Stretch"]
+
+def boneAxis(childJNT):
+    #Axis the bone runs along, read from the child joint translate
+    translate = cmds.getAttr(childJNT + ".translate")[0]
+    
+    return "XYZ"[max(range(3), key = lambda i: abs(translate[i]))]
+
+def addStretchyIK(joints, ikHandle, ikCTRL, stretchMode = "Stretch"):
+    #joints run from the start to the end joint of the handle. Native math nodes only, distances are measured in the space of
+    #the handle's offset group so the global scale of the rig cancels out
+    if stretchMode not in IK_STRETCH_MODES[1:]:
+        return
+    
+    nodeName = joints[-1].split("|")[-1] + "_stretch"
+    chainLength = sum([om2.MVector(cmds.getAttr(joint + ".translate")[0]).length() for joint in joints[1:]])
+    
+    cmds.addAttr (ikCTRL, ln = "stretch", at = "double", min = 0, max = 1, dv = 1, k = True)
+    
+    #The handle sits at the origin of its own group so the soft falloff can pull it towards the start joint
+    softGRP = cmds.group (em = True, n = ikHandle.split("|")[-1] + "_soft_0")
+    cmds.xform (softGRP, ws = True, translation = cmds.xform(ikHandle, q = True, ws = True, rotatePivot = True))
+    softGRP = cmds.parent (softGRP, cmds.listRelatives(ikHandle, parent = True)[0])[0]
+    ikHandle = cmds.parent (ikHandle, softGRP)[0]
+    
+    spaceMatrix = cmds.createNode('multMatrix', n = nodeName + '_multMatrix')
+    cmds.connectAttr(joints[0] + '.parentMatrix[0]', spaceMatrix + '.matrixIn[0]')
+    cmds.connectAttr(softGRP + '.worldInverseMatrix[0]', spaceMatrix + '.matrixIn[1]')
+    
+    startPoint = cmds.createNode('pointMatrixMult', n = nodeName + '_pointMatrixMult')
+    cmds.connectAttr(joints[0] + '.translate', startPoint + '.inPoint')
+    cmds.connectAttr(spaceMatrix + '.matrixSum', startPoint + '.inMatrix')
+    
+    distance = cmds.createNode('distanceBetween', n = nodeName + '_distanceBetween')
+    cmds.connectAttr(startPoint + '.output', distance + '.point1')
+    
+    scaleBlend = cmds.createNode('blendTwoAttr', n = nodeName + '_blendTwoAttr')
+    cmds.setAttr(scaleBlend + '.input[0]', 1)
+    cmds.connectAttr(ikCTRL + '.stretch', scaleBlend + '.attributesBlender')
+    
+    if stretchMode == "Stretch":
+        #scale = max(1, distance / chainLength)
+        ratio = cmds.createNode('multiplyDivide', n = nodeName + '_multiplyDivide')
+        cmds.setAttr(ratio + '.operation', 2)
+        cmds.setAttr(ratio + '.input2X', chainLength)
+        cmds.connectAttr(distance + '.distance', ratio + '.input1X')
+        
+        ratioClamp = cmds.createNode('clamp', n = nodeName + '_clamp')
+        cmds.setAttr(ratioClamp + '.minR', 1)
+        cmds.setAttr(ratioClamp + '.maxR', 1000)
+        cmds.connectAttr(ratio + '.outputX', ratioClamp + '.inputR')
+        cmds.connectAttr(ratioClamp + '.outputR', scaleBlend + '.input[1]')
+    
+    else:
+        #Past chainLength - softDistance the reach eases in as chainLength - softDistance * e^(-(distance - chainLength + softDistance) / softDistance)
+        cmds.addAttr (ikCTRL, ln = "softness", at = "double", min = 0, max = 1, dv = 0, k = True)
+        
+        softMult = cmds.createNode('multDoubleLinear', n = nodeName + '_soft_mdl')
+        cmds.setAttr(softMult + '.input2', chainLength)
+        cmds.connectAttr(ikCTRL + '.softness', softMult + '.input1')
+        
+        #Keeps the falloff away from a division by zero
+        softDistance = cmds.createNode('clamp', n = nodeName + '_soft_clamp')
+        cmds.setAttr(softDistance + '.minR', chainLength * 0.001)
+        cmds.setAttr(softDistance + '.maxR', chainLength)
+        cmds.connectAttr(softMult + '.output', softDistance + '.inputR')
+        
+        overshoot = cmds.createNode('plusMinusAverage', n = nodeName + '_overshoot_plusMinusAverage')
+        cmds.connectAttr(distance + '.distance', overshoot + '.input1D[0]')
+        cmds.setAttr(overshoot + '.input1D[1]', -chainLength)
+        cmds.connectAttr(softDistance + '.outputR', overshoot + '.input1D[2]')
+        
+        exponent = cmds.createNode('multiplyDivide', n = nodeName + '_exponent_multiplyDivide')
+        cmds.setAttr(exponent + '.operation', 2)
+        cmds.connectAttr(overshoot + '.output1D', exponent + '.input1X')
+        cmds.connectAttr(softDistance + '.outputR', exponent + '.input2X')
+        
+        falloff = cmds.createNode('multiplyDivide', n = nodeName + '_falloff_multiplyDivide')
+        cmds.setAttr(falloff + '.operation', 3)
+        cmds.setAttr(falloff + '.input1X', math.exp(-1))
+        cmds.connectAttr(exponent + '.outputX', falloff + '.input2X')
+        
+        falloffMult = cmds.createNode('multDoubleLinear', n = nodeName + '_falloff_mdl')
+        cmds.connectAttr(falloff + '.outputX', falloffMult + '.input1')
+        cmds.connectAttr(softDistance + '.outputR', falloffMult + '.input2')
+        
+        softLength = cmds.createNode('plusMinusAverage', n = nodeName + '_softLength_plusMinusAverage')
+        cmds.setAttr(softLength + '.operation', 2)
+        cmds.setAttr(softLength + '.input1D[0]', chainLength)
+        cmds.connectAttr(falloffMult + '.output', softLength + '.input1D[1]')
+        
+        reach = cmds.createNode('condition', n = nodeName + '_condition')
+        cmds.setAttr(reach + '.operation', 2)
+        cmds.connectAttr(overshoot + '.output1D', reach + '.firstTerm')
+        cmds.connectAttr(softLength + '.output1D', reach + '.colorIfTrueR')
+        cmds.connectAttr(distance + '.distance', reach + '.colorIfFalseR')
+        
+        #X: how far the handle reaches along the line, Y: scale that brings the end back to the controller
+        ratio = cmds.createNode('multiplyDivide', n = nodeName + '_multiplyDivide')
+        cmds.setAttr(ratio + '.operation', 2)
+        cmds.connectAttr(reach + '.outColorR', ratio + '.input1X')
+        cmds.connectAttr(distance + '.distance', ratio + '.input2X')
+        cmds.connectAttr(distance + '.distance', ratio + '.input1Y')
+        cmds.connectAttr(reach + '.outColorR', ratio + '.input2Y')
+        cmds.connectAttr(ratio + '.outputY', scaleBlend + '.input[1]')
+        
+        #Stretching takes the handle all the way to the controller
+        reachBlend = cmds.createNode('blendTwoAttr', n = nodeName + '_reach_blendTwoAttr')
+        cmds.connectAttr(ratio + '.outputX', reachBlend + '.input[0]')
+        cmds.setAttr(reachBlend + '.input[1]', 1)
+        cmds.connectAttr(ikCTRL + '.stretch', reachBlend + '.attributesBlender')
+        
+        #color1 * reach + start * (1 - reach), the controller is the origin of the handle group
+        handlePull = cmds.createNode('blendColors', n = nodeName + '_blendColors')
+        cmds.setAttr(handlePull + '.color1', 0, 0, 0, type = 'double3')
+        cmds.connectAttr(startPoint + '.output', handlePull + '.color2')
+        cmds.connectAttr(reachBlend + '.output', handlePull + '.blender')
+        cmds.connectAttr(handlePull + '.output', ikHandle + '.translate')
+    
+    for joint, childJNT in zip(joints[:-1], joints[1:]):
+        cmds.connectAttr(scaleBlend + '.output', joint + '.scale' + boneAxis(childJNT))
+    
+    return scaleBlend
+
+'''
+####################################################################################################
+STRETCHY IK
+END
+####################################################################################################
+'''
+
+'''
+####################################################################################################
+BATCH MODIFIER
+START
+####################################################################################################
+'''
+BATCH_NUMERIC_TYPES = {"bool" : om2.MFnNumericData.kBoolean,
+                        "long" : om2.MFnNumericData.kInt,
+                        "short" : om2.MFnNumericData.kShort,
+                        "float" : om2.MFnNumericData.kFloat,
+                        "double" : om2.MFnNumericData.kDouble}
+
+class BatchModifier(object):
+    #Queues node creation, attributes and connections on one MDagModifier. doIt() runs everything queued so far as one undo step
+    def __init__(self):
+        self.modifier = om2.MDagModifier()
+        self.nodes = {}
+        self.attributes = {}
+        self.steps = []
+
+    def object(self, node):
+        if isinstance(node, om2.MObject):
+            return node
+
+        if node in self.nodes:
+            return self.nodes[node]
+
+        selection = om2.MSelectionList()
+        selection.add(node)
+        return selection.getDependNode(0)
+
+    def name(self, node):
+        nodeObject = self.object(node)
+        if nodeObject.hasFn(om2.MFn.kDagNode):
+            return om2.MFnDagNode(nodeObject).partialPathName()
+
+        return om2.MFnDependencyNode(nodeObject).name()
+
+    def plug(self, node, attribute):
+        #attr, attr[0] and attr[0].child paths
+        fnNode = om2.MFnDependencyNode(self.object(node))
+        plug = None
+
+        for token in attribute.split("."):
+            attributeName, _, index = token.partition("[")
+
+            if plug is None:
+                #Attributes queued by addAttr are not on the node before doIt
+                pending = self.attributes.get((om2.MObjectHandle(fnNode.object()).hashCode(), attributeName))
+                plug = om2.MPlug(fnNode.object(), pending) if pending else fnNode.findPlug(attributeName, False)
+            else:
+                plug = plug.child(fnNode.attribute(attributeName))
+
+            if index:
+                plug = plug.elementByLogicalIndex(int(index[:-1]))
+
+        return plug
+
+    def createNode(self, nodeType, name = None, parent = None):
+        if "dagNode" in cmds.nodeType(nodeType, isTypeName = True, inherited = True):
+            parentObject = self.object(parent) if parent else om2.MObject.kNullObj
+            nodeObject = self.modifier.createNode(nodeType, parentObject)
+        else:
+            nodeObject = om2.MDGModifier.createNode(self.modifier, nodeType)
+
+        if name:
+            self.modifier.renameNode(nodeObject, name)
+            self.nodes[name] = nodeObject
+
+        return nodeObject
+
+    def addAttr(self, node, longName, attributeType, defaultValue = 0, minValue = None, maxValue = None, enumNames = None, keyable = True):
+        if attributeType == "enum":
+            fnAttribute = om2.MFnEnumAttribute()
+            attribute = fnAttribute.create(longName, longName, int(defaultValue))
+
+            #"<none>:Wrist" or "Off=0:On=1"
+            index = 0
+            for field in (enumNames or "").split(":"):
+                if not field:
+                    continue
+
+                fieldName, _, fieldValue = field.partition("=")
+                index = int(fieldValue) if fieldValue else index
+                fnAttribute.addField(fieldName, index)
+                index += 1
+        else:
+            fnAttribute = om2.MFnNumericAttribute()
+            attribute = fnAttribute.create(longName, longName, BATCH_NUMERIC_TYPES[attributeType], defaultValue)
+
+            if minValue is not None:
+                fnAttribute.setMin(minValue)
+            if maxValue is not None:
+                fnAttribute.setMax(maxValue)
+
+        fnAttribute.keyable = keyable
+        self.modifier.addAttribute(self.object(node), attribute)
+        self.attributes[(om2.MObjectHandle(self.object(node)).hashCode(), longName)] = attribute
+
+    def setAttr(self, node, attribute, value):
+        #Values are in internal units (centimeters and radians), MObject values are plug data like nurbsCurve
+        plug = self.plug(node, attribute)
+
+        if isinstance(value, om2.MObject):
+            self.modifier.newPlugValue(plug, value)
+        elif isinstance(value, bool):
+            self.modifier.newPlugValueBool(plug, value)
+        elif isinstance(value, int):
+            self.modifier.newPlugValueInt(plug, value)
+        elif isinstance(value, (list, tuple, om2.MMatrix)):
+            self.modifier.newPlugValue(plug, om2.MFnMatrixData().create(om2.MMatrix(value)))
+        else:
+            self.modifier.newPlugValueDouble(plug, value)
+
+    def connectAttr(self, sourceNode, sourceAttr, destinationNode, destinationAttr):
+        self.modifier.connect(self.plug(sourceNode, sourceAttr), self.plug(destinationNode, destinationAttr))
+
+    def run(self):
+        #Runs what is queued so far without putting it on the undo queue yet, see commit()
+        self.modifier.doIt()
+        self.steps.append((self.modifier.undoIt, self.modifier.doIt))
+        self.modifier = om2.MDagModifier()
+
+    def record(self, undo, redo):
+        #Edits already made through the API outside the modifier (anim curve keys, plug flags), undone with the batch
+        self.steps.append((undo, redo))
+
+    def commit(self):
+        #Everything run or recorded since the last commit becomes one undo step
+        steps = self.steps
+        self.steps = []
+
+        def undo():
+            for stepUndo, stepRedo in reversed(steps):
+                stepUndo()
+
+        def redo():
+            for stepUndo, stepRedo in steps:
+                stepRedo()
+
+        if steps:
+            apiUndo.commit(undo, redo)
+
+    def doIt(self):
+        self.run()
+        self.commit()
+
+'''
+####################################################################################################
+BATCH MODIFIER
+END
+####################################################################################################
+'''
+
+'''
+####################################################################################################
+MIRROR BUILD
+START
+####################################################################################################
+'''
+MIRROR_X = om2.MMatrix([-1.0, 0.0, 0.0, 0.0,
+                        0.0, 1.0, 0.0, 0.0,
+                        0.0, 0.0, 1.0, 0.0,
+                        0.0, 0.0, 0.0, 1.0])
+MIRROR_BUILD_TOLERANCE = 0.001
+
+#Rebuilt by command on the mirrored side so offsets and solvers are computed there
+MIRROR_CONSTRAINT_TYPES = ["parentConstraint", "pointConstraint", "orientConstraint", "poleVectorConstraint"]
+MIRROR_COMMAND_TYPES = MIRROR_CONSTRAINT_TYPES + ["ikHandle", "ikEffector"]
+#Inputs of an IK handle made by the ikHandle and poleVectorConstraint commands, the rest (soft IK translate) is reconnected
+MIRROR_IK_HANDLE_INPUTS = ["startJoint", "endEffector", "ikSolver", "poleVector", "poleVectorX", "poleVectorY", "poleVectorZ"]
+
+#Set from the mirrored world matrix instead of being copied
+MIRROR_PLACED_ATTRS = ["translate", "rotate", "scale", "shear", "jointOrient", "rotateAxis", "rotatePivot", "scalePivot", "preferredAngle", "inverseScale", "localPosition", "controlPoints", "xValue", "yValue", "zValue", "weights"]
+MIRROR_CHANNELS = ["translateX", "translateY", "translateZ", "rotateX", "rotateY", "rotateZ", "scaleX", "scaleY", "scaleZ", "visibility"]
+
+#A mirror across YZ flips translateX, rotateY and rotateZ, so the drivers of those channels change sign
+MIRROR_NEGATED_CHANNELS = ["translateX", "rotateY", "rotateZ"]
+MIRROR_NEGATED_ATTRS = {"multDoubleLinear" : "input2"}
+
+BUILD_PLAN_STACK = []
+
+def mirrorJointName(name, leftIndicator, rightIndicator):
+    #The side indicator of a skeleton joint sits at the start or the end of its name
+    if leftIndicator and name.startswith(leftIndicator):
+        return rightIndicator + name[len(leftIndicator):]
+    if leftIndicator and name.endswith(leftIndicator):
+        return name[:-len(leftIndicator)] + rightIndicator
+
+    return name
+
+def mirrorName(name, jointNames):
+    #Per path segment: nodes of the builders swap their L_ prefix, names made from a left joint (l_elbow_fk) take the right joint's name.
+    #jointNames maps the left joint names to the right ones
+    prefixes = sorted(jointNames, key = len, reverse = True)
+    segments = []
+
+    for segment in name.split("|"):
+        if segment.startswith("L_"):
+            segment = "R_" + segment[2:]
+        else:
+            for prefix in prefixes:
+                if segment.startswith(prefix):
+                    segment = jointNames[prefix] + segment[len(prefix):]
+                    break
+
+        segments.append(segment)
+
+    return "|".join(segments)
+
+def mirrorMatrix(matrix):
+    return MIRROR_X * matrix * MIRROR_X
+
+def mirrorPoint(point):
+    return om2.MPoint(-point.x, point.y, point.z)
+
+def findPlug(plugName):
+    selection = om2.MSelectionList()
+    try:
+        selection.add(plugName)
+        return selection.getPlug(0)
+    except (RuntimeError, TypeError):
+        return None
+
+def plugValue(plug):
+    #Internal units, None for the types the plan does not copy
+    attribute = plug.attribute()
+
+    if attribute.hasFn(om2.MFn.kNumericAttribute):
+        numericType = om2.MFnNumericAttribute(attribute).numericType()
+        if numericType == om2.MFnNumericData.kBoolean:
+            return plug.asBool()
+        if numericType in (om2.MFnNumericData.kByte, om2.MFnNumericData.kChar, om2.MFnNumericData.kShort, om2.MFnNumericData.kInt):
+            return plug.asInt()
+        return plug.asDouble()
+
+    if attribute.hasFn(om2.MFn.kEnumAttribute):
+        return plug.asInt()
+
+    if attribute.hasFn(om2.MFn.kUnitAttribute):
+        return plug.asDouble()
+
+    return None
+
+def splitPlug(plugName):
+    node, attribute = plugName.split(".", 1)
+    return cmds.ls(node, long = True)[0], attribute
+
+def worldMatrix(node):
+    selection = om2.MSelectionList()
+    selection.add(node)
+    return selection.getDagPath(0).inclusiveMatrix()
+
+def beginBuildPlan():
+    #Every node added to the scene until captureBuildPlan() is part of the plan
+    plan = {"handles" : [], "operations" : []}
+    plan["callback"] = om2.MDGMessage.addNodeAddedCallback(lambda node, clientData: plan["handles"].append(om2.MObjectHandle(node)), "dependNode")
+    BUILD_PLAN_STACK.append(plan)
+    return plan
+
+def recordBuildOperation(function, arguments, nodes):
+    #Helpers that compute values from the skeleton are called again on the mirrored side instead of being copied
+    if BUILD_PLAN_STACK:
+        BUILD_PLAN_STACK[-1]["operations"].append((function, arguments, cmds.ls(nodes, uuid = True)))
+
+def captureBuildPlan(plan):
+    if plan in BUILD_PLAN_STACK:
+        BUILD_PLAN_STACK.remove(plan)
+
+    om2.MMessage.removeCallback(plan.pop("callback"))
+
+    ownedUuids = set()
+    for operation in plan["operations"]:
+        ownedUuids.update(operation[2])
+
+    plan["owned"] = set()
+    createdNodes = []
+
+    for handle in plan.pop("handles"):
+        #Nodes the build deleted again (temporary constraints, construction history) are not valid any more
+        if not handle.isValid():
+            continue
+
+        nodeObject = handle.object()
+        fnNode = om2.MFnDependencyNode(nodeObject)
+        path = om2.MDagPath.getAPathTo(nodeObject).fullPathName() if nodeObject.hasFn(om2.MFn.kDagNode) else fnNode.name()
+
+        if fnNode.uuid().asString() in ownedUuids:
+            plan["owned"].add(path)
+        elif path not in createdNodes:
+            createdNodes.append(path)
+
+    plan["created"] = set(createdNodes)
+    plan["commandNodes"] = set(node for node in createdNodes if cmds.nodeType(node) in MIRROR_COMMAND_TYPES)
+    plan["nodes"] = []
+    plan["constraints"] = []
+    plan["ikHandles"] = []
+
+    #Parents before children
+    for node in sorted(createdNodes, key = lambda path: path.count("|")):
+        nodeType = cmds.nodeType(node)
+
+        if nodeType in MIRROR_CONSTRAINT_TYPES:
+            plan["constraints"].append(captureConstraint(node))
+        elif nodeType == "ikHandle":
+            plan["ikHandles"].append(captureIKHandle(node))
+        elif nodeType != "ikEffector":
+            plan["nodes"].append(captureNode(node))
+
+    plan["connections"] = captureConnections(plan)
+    return plan
+
+def captureNode(node):
+    nodeType = cmds.nodeType(node)
+    entry = {"path" : node, "name" : node.split("|")[-1], "type" : nodeType, "parent" : None, "dynamic" : [], "channels" : [], "keys" : None}
+    userDefined = set(cmds.listAttr(node, userDefined = True) or [])
+
+    if cmds.objectType(node, isAType = "dagNode"):
+        parents = cmds.listRelatives(node, parent = True, fullPath = True)
+        entry["parent"] = parents[0] if parents else None
+
+        selection = om2.MSelectionList()
+        selection.add(node)
+        dagPath = selection.getDagPath(0)
+
+        if dagPath.hasFn(om2.MFn.kTransform):
+            entry["world"] = dagPath.inclusiveMatrix()
+            entry["rotateOrder"] = cmds.getAttr(node + ".rotateOrder")
+
+            #Frozen locators keep their pivot at the old position
+            if any(abs(value) > 0.000001 for value in cmds.getAttr(node + ".rotatePivot")[0] + cmds.getAttr(node + ".scalePivot")[0]):
+                entry["pivots"] = (cmds.xform(node, q = True, ws = True, rotatePivot = True), cmds.xform(node, q = True, ws = True, scalePivot = True))
+
+            for channel in MIRROR_CHANNELS:
+                state = (cmds.getAttr(node + "." + channel, lock = True), cmds.getAttr(node + "." + channel, keyable = True), cmds.getAttr(node + "." + channel, channelBox = True))
+                if state != (False, True, False):
+                    entry["channels"].append((channel,) + state)
+
+        elif nodeType == "nurbsCurve":
+            fnCurve = om2.MFnNurbsCurve(dagPath)
+            entry["curve"] = (fnCurve.cvPositions(om2.MSpace.kWorld), fnCurve.knots(), fnCurve.degree, fnCurve.form)
+
+        elif nodeType == "locator":
+            localPosition = findPlug(node + ".localPosition")
+            entry["localPosition"] = om2.MPoint([localPosition.child(i).asDouble() for i in range(3)]) * dagPath.inclusiveMatrix()
+
+    if cmds.objectType(node, isAType = "animCurve"):
+        #Driven keys in internal units, as MFnAnimCurve.addKey takes them
+        attributes = ["preInfinity", "postInfinity"]
+        selection = om2.MSelectionList()
+        selection.add(node)
+        fnCurve = oma2.MFnAnimCurve(selection.getDependNode(0))
+        entry["keys"] = [(fnCurve.unitlessInput(i) if fnCurve.isUnitlessInput else fnCurve.input(i), fnCurve.value(i), fnCurve.inTangentType(i), fnCurve.outTangentType(i)) for i in range(fnCurve.numKeys)]
+    else:
+        attributes = cmds.listAttr(node, settable = True, scalar = True, multi = True) or []
+
+    entry["attributes"] = []
+    for attribute in attributes:
+        leafName = attribute.split(".")[-1].split("[")[0]
+        if leafName in userDefined or any(leafName.startswith(placed) for placed in MIRROR_PLACED_ATTRS + ["rotateOrder"]):
+            continue
+
+        plug = findPlug(node + "." + attribute)
+        if plug is None or plug.isDefaultValue():
+            continue
+
+        value = plugValue(plug)
+        if value is not None:
+            #Children of plain compounds by their own name (overrideColorR)
+            entry["attributes"].append((attribute if "[" in attribute else attribute.split(".")[-1], value))
+
+    for attribute in userDefined:
+        plugName = node + "." + attribute
+        attributeType = cmds.addAttr(plugName, q = True, attributeType = True)
+        plug = findPlug(plugName)
+
+        if plug is None or (attributeType != "enum" and attributeType not in BATCH_NUMERIC_TYPES):
+            continue
+
+        entry["dynamic"].append({"name" : attribute,
+                                 "type" : attributeType,
+                                 "default" : cmds.addAttr(plugName, q = True, defaultValue = True) or 0,
+                                 "min" : cmds.addAttr(plugName, q = True, minValue = True) if cmds.addAttr(plugName, q = True, hasMinValue = True) else None,
+                                 "max" : cmds.addAttr(plugName, q = True, maxValue = True) if cmds.addAttr(plugName, q = True, hasMaxValue = True) else None,
+                                 "enum" : cmds.addAttr(plugName, q = True, enumName = True) if attributeType == "enum" else None,
+                                 "keyable" : cmds.getAttr(plugName, keyable = True),
+                                 "value" : plugValue(plug)})
+
+    return entry
+
+def captureConstraint(node):
+    nodeType = cmds.nodeType(node)
+    command = getattr(cmds, nodeType)
+    constrained = cmds.listRelatives(node, parent = True, fullPath = True)[0]
+    targets = command(node, q = True, targetList = True) or []
+
+    offsets = []
+    if nodeType == "parentConstraint":
+        for i in range(len(targets)):
+            offsets += cmds.getAttr("{0}.target[{1}].targetOffsetTranslate".format(node, i))[0]
+            offsets += cmds.getAttr("{0}.target[{1}].targetOffsetRotate".format(node, i))[0]
+    elif nodeType != "poleVectorConstraint":
+        offsets += cmds.getAttr(node + ".offset")[0]
+
+    #Outputs the build disconnected again (the twist joints drive rotateX themselves)
+    outputs = set()
+    pairs = cmds.listConnections(node, source = False, destination = True, plugs = True, connections = True) or []
+    for source, destination in zip(pairs[::2], pairs[1::2]):
+        destinationNode, destinationAttr = splitPlug(destination)
+        if destinationNode == constrained:
+            outputs.add((source.split(".", 1)[1], destinationAttr))
+
+    return {"path" : node,
+            "name" : node.split("|")[-1],
+            "type" : nodeType,
+            "targets" : [cmds.ls(target, long = True)[0] for target in targets],
+            "constrained" : constrained,
+            "maintainOffset" : any(abs(value) > 0.0001 for value in offsets),
+            "outputs" : outputs,
+            "weights" : command(node, q = True, weightAliasList = True) or []}
+
+def captureIKHandle(node):
+    effector = cmds.ikHandle(node, q = True, endEffector = True)
+    parents = cmds.listRelatives(node, parent = True, fullPath = True)
+
+    return {"path" : node,
+            "name" : node.split("|")[-1],
+            "effector" : effector.split("|")[-1],
+            "startJoint" : cmds.ls(cmds.ikHandle(node, q = True, startJoint = True), long = True)[0],
+            "endJoint" : cmds.ls(cmds.listConnections(effector + ".translateX", source = True, destination = False)[0], long = True)[0],
+            "solver" : cmds.ikHandle(node, q = True, solver = True),
+            "sticky" : cmds.getAttr(node + ".stickiness"),
+            "visibility" : cmds.getAttr(node + ".visibility"),
+            "parent" : parents[0] if parents else None}
+
+def captureConnections(plan):
+    connections = []
+    weights = dict((constraint["path"], constraint["weights"]) for constraint in plan["constraints"])
+
+    for node in plan["created"]:
+        incoming = cmds.listConnections(node, source = True, destination = False, plugs = True, connections = True) or []
+        outgoing = cmds.listConnections(node, source = False, destination = True, plugs = True, connections = True) or []
+
+        pairs = list(zip(incoming[1::2], incoming[::2]))
+        #Connections into nodes the build did not create
+        pairs += [(source, destination) for source, destination in zip(outgoing[::2], outgoing[1::2]) if splitPlug(destination)[0] not in plan["created"]]
+
+        for source, destination in pairs:
+            sourceNode, sourceAttr = splitPlug(source)
+            destinationNode, destinationAttr = splitPlug(destination)
+
+            if sourceNode in plan["owned"] or destinationNode in plan["owned"] or sourceNode in plan["commandNodes"]:
+                continue
+
+            if destinationNode in plan["commandNodes"] and cmds.nodeType(destinationNode) == "ikHandle":
+                if destinationAttr.split("[")[0] in MIRROR_IK_HANDLE_INPUTS:
+                    continue
+
+            elif destinationNode in plan["commandNodes"]:
+                #Only the weights of a constraint are driven from outside, stored by their index
+                destinationPlug = findPlug(destination)
+                weightPlugs = [findPlug(destinationNode + "." + weight) for weight in weights.get(destinationNode, [])]
+                if destinationPlug not in weightPlugs:
+                    continue
+
+                destinationAttr = weightPlugs.index(destinationPlug)
+
+            connections.append((sourceNode, sourceAttr, destinationNode, destinationAttr))
+
+    return connections
+
+def negatedNodes(plan):
+    #Nodes that drive a flipped channel, through unit conversions
+    nodeTypes = dict((node["path"], node["type"]) for node in plan["nodes"])
+    negated = set()
+
+    for node in plan["nodes"]:
+        if node["type"] not in MIRROR_NEGATED_ATTRS and not node["keys"]:
+            continue
+
+        pending = [node["path"]]
+        while pending:
+            current = pending.pop()
+            for sourceNode, sourceAttr, destinationNode, destinationAttr in plan["connections"]:
+                if sourceNode != current:
+                    continue
+                if nodeTypes.get(destinationNode) == "unitConversion":
+                    pending.append(destinationNode)
+                elif destinationAttr in MIRROR_NEGATED_CHANNELS:
+                    negated.add(node["path"])
+
+    return negated
+
+def mirroredWorldMatrix(matrix, references):
+    #Nodes snapped to a skeleton joint take the other side's joint, everything else is mirrored across YZ
+    mirrored = mirrorMatrix(matrix)
+    position = om2.MTransformationMatrix(matrix).translation(om2.MSpace.kWorld)
+
+    for reference, (leftMatrix, rightMatrix) in references.items():
+        if matrix.isEquivalent(leftMatrix, MIRROR_BUILD_TOLERANCE):
+            return rightMatrix, reference
+
+    for reference, (leftMatrix, rightMatrix) in references.items():
+        leftPosition = om2.MTransformationMatrix(leftMatrix).translation(om2.MSpace.kWorld)
+        if (position - leftPosition).length() > MIRROR_BUILD_TOLERANCE:
+            continue
+
+        #Same position, own orientation
+        transformMatrix = om2.MTransformationMatrix(mirrored)
+        transformMatrix.setTranslation(om2.MTransformationMatrix(rightMatrix).translation(om2.MSpace.kWorld), om2.MSpace.kWorld)
+        return transformMatrix.asMatrix(), None
+
+    return mirrored, None
+
+def emitMirroredPlan(plan, leftIndicator, rightIndicator, jointPairs = None):
+    #Emits the right side of a captured left side build. Returns False, without touching the scene, when the plan can not be mirrored.
+    #jointPairs maps the left joints the build was given to the right ones
+    created = plan["created"]
+
+    #Modifier changes can only be undone through the plug-in, the regular build can always be undone
+    if not apiUndo.available():
+        om.MGlobal.displayWarning("MIRROR BUILD: " + apiUndo.PLUGIN_NAME + " PLUG-IN NOT FOUND, BUILDING THE RIGHT SIDE DIRECTLY")
+        return False
+
+    #Everything outside the plan has to exist on the other side, nothing inside it may exist yet
+    externalNodes = set()
+    for node in plan["nodes"] + plan["ikHandles"]:
+        if node["parent"] and node["parent"] not in created:
+            externalNodes.add(node["parent"])
+    for constraint in plan["constraints"]:
+        externalNodes.update(node for node in constraint["targets"] + [constraint["constrained"]] if node not in created)
+    for sourceNode, sourceAttr, destinationNode, destinationAttr in plan["connections"]:
+        externalNodes.update(node for node in (sourceNode, destinationNode) if node not in created)
+
+    #Left joint names to right ones: the limb joints of the build, and the other skeleton joints around the plan by their indicator
+    jointNames = dict(jointPairs or {})
+    for node in externalNodes:
+        segments = node.split("|")
+        for i in range(2, len(segments) + 1):
+            if segments[i - 1] not in jointNames and cmds.objectType("|".join(segments[:i]), isAType = "joint"):
+                jointNames[segments[i - 1]] = mirrorJointName(segments[i - 1], leftIndicator, rightIndicator)
+
+    jointNames = dict((left, right) for left, right in jointNames.items() if left != right)
+    createdNames = dict((path, mirrorName(path.split("|")[-1], jointNames)) for path in created)
+
+    def external(node):
+        return mirrorName(node, jointNames)
+
+    for node in externalNodes:
+        if len(cmds.ls(external(node))) != 1:
+            om.MGlobal.displayWarning("MIRROR BUILD: " + external(node) + " NOT FOUND, BUILDING THE RIGHT SIDE DIRECTLY")
+            return False
+
+    for path, name in createdNames.items():
+        if name != path.split("|")[-1] and cmds.objExists(name):
+            om.MGlobal.displayWarning("MIRROR BUILD: " + name + " ALREADY EXISTS, BUILDING THE RIGHT SIDE DIRECTLY")
+            return False
+
+    #Skeleton joints the plan was snapped to, with their counterpart
+    references = {}
+    for node in externalNodes:
+        if cmds.objectType(node, isAType = "joint") and external(node) != node:
+            references[node] = (worldMatrix(node), worldMatrix(external(node)))
+
+            leftPosition = om2.MTransformationMatrix(references[node][0]).translation(om2.MSpace.kWorld)
+            rightPosition = om2.MTransformationMatrix(references[node][1]).translation(om2.MSpace.kWorld)
+            if (mirrorPoint(om2.MPoint(leftPosition)) - om2.MPoint(rightPosition)).length() > MIRROR_BUILD_TOLERANCE * max(1.0, leftPosition.length()):
+                om.MGlobal.displayWarning("MIRROR BUILD: " + node + " AND " + external(node) + " ARE NOT SYMMETRIC, BUILDING THE RIGHT SIDE DIRECTLY")
+                return False
+
+    batch = BatchModifier()
+    objects = {}
+    rightWorld = {}
+    matches = {}
+
+    def rightNode(node):
+        return objects[node] if node in objects else external(node)
+
+    def rightParentWorld(node):
+        if not node["parent"]:
+            return om2.MMatrix()
+        if node["parent"] in rightWorld:
+            return rightWorld[node["parent"]]
+        return worldMatrix(rightNode(node["parent"]))
+
+    #Nodes, dynamic attributes, values and connections all go on the one modifier
+    for node in plan["nodes"]:
+        name = createdNames[node["path"]]
+        parent = rightNode(node["parent"]) if node["parent"] else None
+        objects[node["path"]] = batch.createNode(node["type"], name if name != node["name"] else None, parent)
+
+        if "world" in node:
+            rightWorld[node["path"]], matches[node["path"]] = mirroredWorldMatrix(node["world"], references)
+
+        for dynamic in node["dynamic"]:
+            batch.addAttr(objects[node["path"]], dynamic["name"], dynamic["type"], dynamic["default"], dynamic["min"], dynamic["max"], dynamic["enum"], dynamic["keyable"])
+
+    negated = negatedNodes(plan)
+
+    for node in plan["nodes"]:
+        nodeObject = objects[node["path"]]
+
+        if "world" in node:
+            localMatrix = om2.MTransformationMatrix(rightWorld[node["path"]] * rightParentWorld(node).inverse())
+            translate = localMatrix.translation(om2.MSpace.kTransform)
+            scale = localMatrix.scale(om2.MSpace.kTransform)
+            reference = matches[node["path"]]
+
+            batch.setAttr(nodeObject, "rotateOrder", node["rotateOrder"])
+
+            if node["type"] == "joint":
+                #Rotation of the counterpart, the rest of the orientation goes into the joint orient
+                rotate = [0.0, 0.0, 0.0]
+                if reference and cmds.objectType(external(reference), isAType = "joint"):
+                    rotate = [findPlug(external(reference) + ".rotate").child(i).asDouble() for i in range(3)]
+                    preferredAngle = findPlug(external(reference) + ".preferredAngle")
+                    for i, axis in enumerate("XYZ"):
+                        batch.setAttr(nodeObject, "preferredAngle" + axis, preferredAngle.child(i).asDouble())
+
+                rotateMatrix = om2.MEulerRotation(rotate[0], rotate[1], rotate[2], node["rotateOrder"]).asMatrix()
+                orient = om2.MTransformationMatrix(rotateMatrix.inverse() * localMatrix.asRotateMatrix()).rotation()
+
+                for i, axis in enumerate("XYZ"):
+                    batch.setAttr(nodeObject, "rotate" + axis, rotate[i])
+                    batch.setAttr(nodeObject, "jointOrient" + axis, [orient.x, orient.y, orient.z][i])
+            else:
+                rotate = localMatrix.rotation().reorder(node["rotateOrder"])
+                for i, axis in enumerate("XYZ"):
+                    batch.setAttr(nodeObject, "rotate" + axis, [rotate.x, rotate.y, rotate.z][i])
+
+            for i, axis in enumerate("XYZ"):
+                batch.setAttr(nodeObject, "translate" + axis, [translate.x, translate.y, translate.z][i])
+                batch.setAttr(nodeObject, "scale" + axis, scale[i])
+
+            if "pivots" in node:
+                #Pivots in the node's own space, the pivot translations keep its matrix in place like xform -worldSpace does
+                worldInverse = rightWorld[node["path"]].inverse()
+                rotatePivot, scalePivot = [om2.MPoint(-pivot[0], pivot[1], pivot[2]) * worldInverse for pivot in node["pivots"]]
+                rotatePivotTranslate = rotatePivot * localMatrix.asRotateMatrix() - rotatePivot
+
+                for i, axis in enumerate("XYZ"):
+                    batch.setAttr(nodeObject, "rotatePivot" + axis, rotatePivot[i])
+                    batch.setAttr(nodeObject, "rotatePivotTranslate" + axis, rotatePivotTranslate[i])
+                    batch.setAttr(nodeObject, "scalePivot" + axis, scalePivot[i])
+                    batch.setAttr(nodeObject, "scalePivotTranslate" + axis, scalePivot[i] * scale[i] - scalePivot[i])
+
+        if "curve" in node:
+            cvs, knots, degree, form = node["curve"]
+            parentInverse = rightParentWorld(node).inverse()
+
+            curveData = om2.MFnNurbsCurveData().create()
+            om2.MFnNurbsCurve().create([mirrorPoint(cv) * parentInverse for cv in cvs], knots, degree, form, False, True, curveData)
+            batch.setAttr(nodeObject, "cached", curveData)
+
+        if "localPosition" in node:
+            localPosition = mirrorPoint(node["localPosition"]) * rightParentWorld(node).inverse()
+            for i, axis in enumerate("XYZ"):
+                batch.setAttr(nodeObject, "localPosition" + axis, [localPosition.x, localPosition.y, localPosition.z][i])
+
+        attributes = dict(node["attributes"])
+
+        #Side colours of controllerColorAssign
+        if attributes.get("overrideColorG", 0) == 0:
+            attributes["overrideColorR"], attributes["overrideColorB"] = attributes.get("overrideColorB", 0), attributes.get("overrideColorR", 0)
+            attributes = dict((attribute, value) for attribute, value in attributes.items() if value != 0 or not attribute.startswith("overrideColor"))
+
+        if node["path"] in negated and MIRROR_NEGATED_ATTRS.get(node["type"]) in attributes:
+            attributes[MIRROR_NEGATED_ATTRS[node["type"]]] *= -1
+
+        for attribute, value in attributes.items():
+            batch.setAttr(nodeObject, attribute, value)
+
+        for dynamic in node["dynamic"]:
+            if dynamic["value"] is not None:
+                batch.setAttr(nodeObject, dynamic["name"], dynamic["value"])
+
+    commandConnections = []
+    for sourceNode, sourceAttr, destinationNode, destinationAttr in plan["connections"]:
+        if destinationNode in plan["commandNodes"]:
+            commandConnections.append((sourceNode, sourceAttr, destinationNode, destinationAttr))
+        else:
+            batch.connectAttr(rightNode(sourceNode), sourceAttr, rightNode(destinationNode), destinationAttr)
+
+    batch.run()
+
+    #Driven keys, undone with the modifier
+    for node in plan["nodes"]:
+        if node["keys"]:
+            sign = -1 if node["path"] in negated else 1
+            fnCurve = oma2.MFnAnimCurve(objects[node["path"]])
+            change = oma2.MAnimCurveChange()
+
+            for inputValue, value, inTangent, outTangent in node["keys"]:
+                fnCurve.addKey(inputValue, value * sign, inTangent, outTangent, change)
+
+            batch.record(change.undoIt, change.redoIt)
+
+    #The one commit of the right side. Everything below is made by command after it, in the same undo chunk, so an undo
+    #removes the handles and constraints before the nodes they were made on
+    batch.commit()
+
+    rightNames = dict((path, batch.name(nodeObject)) for path, nodeObject in objects.items())
+
+    def rightName(node):
+        return rightNames.get(node) or createdNames.get(node) or external(node)
+
+    #Commands
+    for handle in plan["ikHandles"]:
+        newHandle = cmds.ikHandle(n = createdNames[handle["path"]], shf = False, s = "sticky" if handle["sticky"] else "off", fs = True, sol = handle["solver"], sj = rightName(handle["startJoint"]), ee = rightName(handle["endJoint"]))
+        cmds.rename(newHandle[1], mirrorName(handle["effector"], jointNames))
+        rightNames[handle["path"]] = newHandle[0]
+
+        if handle["parent"]:
+            rightNames[handle["path"]] = cmds.parent(newHandle[0], rightName(handle["parent"]))[0]
+
+        cmds.setAttr(rightNames[handle["path"]] + ".v", handle["visibility"])
+
+    for constraint in plan["constraints"]:
+        command = getattr(cmds, constraint["type"])
+        flags = {"weight" : 1}
+        if constraint["type"] != "poleVectorConstraint":
+            flags["maintainOffset"] = constraint["maintainOffset"]
+
+        constrained = rightName(constraint["constrained"])
+        newConstraint = command(*([rightName(target) for target in constraint["targets"]] + [constrained]), **flags)[0]
+        if createdNames[constraint["path"]] != constraint["name"]:
+            newConstraint = cmds.rename(newConstraint, createdNames[constraint["path"]])
+        rightNames[constraint["path"]] = newConstraint
+
+        pairs = cmds.listConnections(newConstraint, source = False, destination = True, plugs = True, connections = True) or []
+        for source, destination in zip(pairs[::2], pairs[1::2]):
+            destinationNode, destinationAttr = splitPlug(destination)
+            if destinationNode == cmds.ls(constrained, long = True)[0] and (source.split(".", 1)[1], destinationAttr) not in constraint["outputs"]:
+                cmds.disconnectAttr(source, destination)
+
+    #Constraint weights by their index, IK handle inputs by their name
+    for sourceNode, sourceAttr, destinationNode, destinationAttr in commandConnections:
+        if isinstance(destinationAttr, int):
+            command = getattr(cmds, cmds.nodeType(rightName(destinationNode)))
+            destinationAttr = command(rightName(destinationNode), q = True, weightAliasList = True)[destinationAttr]
+        cmds.connectAttr(rightName(sourceNode) + "." + sourceAttr, rightName(destinationNode) + "." + destinationAttr)
+
+    for function, arguments, nodes in plan["operations"]:
+        function(*[external(argument) if argument else argument for argument in arguments])
+
+    #Channel states last, the constraints can not connect to locked channels
+    for node in plan["nodes"]:
+        for channel, locked, keyable, channelBox in node["channels"]:
+            plugName = rightName(node["path"]) + "." + channel
+            cmds.setAttr(plugName, keyable = keyable)
+            if not keyable:
+                cmds.setAttr(plugName, channelBox = channelBox)
+            cmds.setAttr(plugName, lock = locked)
+
+    return True
+
+def buildMirroredLimb(build, leftArguments, rightArguments, leftIndicator, rightIndicator):
+    #Builds the left side and emits the right side from its mirrored plan, falls back to building the right side when that is not possible
+    plan = beginBuildPlan()
+    try:
+        build(*leftArguments)
+    finally:
+        captureBuildPlan(plan)
+
+    #Joints the two sides were given, by their short names
+    jointPairs = dict((left.split("|")[-1], right.split("|")[-1]) for left, right in zip(leftArguments, rightArguments) if hasattr(left, "split") and left != right and cmds.ls(left, type = "joint"))
+
+    if not emitMirroredPlan(plan, leftIndicator, rightIndicator, jointPairs):
+        build(*rightArguments)
+
+'''
+####################################################################################################
+MIRROR BUILD
+END
+####################################################################################################
+'''
+
+'''
+####################################################################################################
+PLAYBACK BENCHMARK
+START
+####################################################################################################
+'''
+def playbackBenchmark(startFrame = None, endFrame = None, loops = 3):
+    if startFrame is None:
+        startFrame = cmds.playbackOptions(q = True, minTime = True)
+    if endFrame is None:
+        endFrame = cmds.playbackOptions(q = True, maxTime = True)
+    
+    if endFrame <= startFrame:
+        om.MGlobal.displayError("END FRAME HAS TO BE GREATER THAN THE START FRAME")
+        return
+    
+    currentFrame = cmds.currentTime(q = True)
+    frameCount = int(endFrame - startFrame) + 1
+    bestTime = None
+    
+    for loop in range(loops):
+        timeStart = time.time()
+        evaluateFrameRange(startFrame, frameCount)
+        
+        loopTime = time.time() - timeStart
+        if bestTime is None or loopTime < bestTime:
+            bestTime = loopTime
+    
+    cmds.currentTime(currentFrame)
+    
+    return frameCount / max(bestTime, 0.000001)
+
+def evaluateFrameRange(startFrame, frameCount):
+    batchMode = cmds.about(batch = True)
+    pullJoints = cmds.ls(type = 'joint')
+    
+    for i in range(frameCount):
+        cmds.currentTime(startFrame + i, update = True)
+        
+        #Nothing is drawn in batch mode, pull the joints so the rig still evaluates
+        if batchMode:
+            for jnt in pullJoints:
+                cmds.getAttr(jnt + '.worldMatrix[0]')
+        else:
+            cmds.refresh(force = True)
+
+def animateRigControllers(startFrame, endFrame, rootNode = "MAIN_CTRL"):
+    #Keys a simple back and forth rotation on every controller so the whole rig evaluates during playback
+    controllers = cmds.listRelatives(rootNode, ad = True, type = 'transform') or []
+    midFrame = (startFrame + endFrame) / 2.0
+    
+    for ctrl in controllers:
+        if not ctrl.endswith("_CTRL"):
+            continue
+        
+        for attr in ['rotateX', 'rotateY', 'rotateZ']:
+            if cmds.getAttr(ctrl + '.' + attr, lock = True) or cmds.listConnections(ctrl + '.' + attr, s = True, d = False):
+                continue
+            
+            cmds.setKeyframe(ctrl, at = attr, t = startFrame, v = 0)
+            cmds.setKeyframe(ctrl, at = attr, t = midFrame, v = 15)
+            cmds.setKeyframe(ctrl, at = attr, t = endFrame, v = 0)
+        
+        if cmds.attributeQuery('FKIK', node = ctrl, exists = True):
+            cmds.setKeyframe(ctrl, at = 'FKIK', t = startFrame, v = 0)
+            cmds.setKeyframe(ctrl, at = 'FKIK', t = endFrame, v = 1)
+        
+        #Keeps the soft IK falloff evaluating
+        if cmds.attributeQuery('softness', node = ctrl, exists = True):
+            cmds.setKeyframe(ctrl, at = 'softness', t = startFrame, v = 0)
+            cmds.setKeyframe(ctrl, at = 'softness', t = endFrame, v = 0.5)
+        
+        if cmds.attributeQuery('curl', node = ctrl, exists = True):
+            cmds.setKeyframe(ctrl, at = 'curl', t = startFrame, v = 0)
+            cmds.setKeyframe(ctrl, at = 'curl', t = midFrame, v = 45)
+            cmds.setKeyframe(ctrl, at = 'curl', t = endFrame, v = 0)
+
+def benchmarkRigScene(benchmark, resultPath):
+    #Runs inside a headless mayapy: builds the rig once per value of the option from the same scene and times the playback
+    results = []
+    
+    for value in benchmark["values"]:
+        cmds.file(benchmark["scene"], open = True, force = True)
+        
+        timeStart = time.time()
+        createBipedControlRig(*benchmark["rigArguments"], **{benchmark["option"] : value})
+        buildTime = time.time() - timeStart
+        
+        if not cmds.objExists("MAIN_CTRL"):
+            results.append({"value" : value, "error" : "CONTROL RIG WAS NOT CREATED. BENCHMARK CANCELLED"})
+            break
+        
+        animateRigControllers(benchmark["startFrame"], benchmark["endFrame"])
+        results.append({"value" : value, "build" : buildTime, "fps" : playbackBenchmark(benchmark["startFrame"], benchmark["endFrame"], benchmark["loops"])})
+    
+    with open(resultPath, "w") as resultFile:
+        json.dump(results, resultFile, indent = 4)
+    
+    return results
+
+def benchmarkRigOption(rigArguments, option, values, startFrame = 1, endFrame = 120, loops = 3):
+    #Builds the biped rig once per value of a createBipedControlRig option and compares the playback cost. The builds run in a headless
+    #mayapy on an exported copy of the scene, so the open scene keeps its name, its changes and its undo queue
+    benchmarkDir = tempfile.gettempdir()
+    resultPath = os.path.join(benchmarkDir, "URT_rigBenchmark_result.json")
+    logPath = os.path.join(benchmarkDir, "URT_rigBenchmark_log.txt")
+    benchmark = {"scene" : os.path.join(benchmarkDir, "URT_rigBenchmark.ma"), "rigArguments" : rigArguments, "option" : option, "values" : list(values), 
+                 "startFrame" : startFrame, "endFrame" : endFrame, "loops" : loops}
+    
+    cmds.file(benchmark["scene"], exportAll = True, preserveReferences = True, type = 'mayaAscii', force = True)
+    
+    if os.path.exists(resultPath):
+        os.remove(resultPath)
+    
+    #Check boxes of the panel come in as Qt check states
+    scriptText = "\n".join(["import json",
+                            "import maya.standalone",
+                            "maya.standalone.initialize(name = 'python')",
+                            "from urt.tools import URT_atulshakya",
+                            "URT_atulshakya.benchmarkRigScene(json.loads({0!r}), {1!r})".format(json.dumps(benchmark, default = int), resultPath),
+                            "maya.standalone.uninitialize()"])
+    
+    with open(logPath, "w") as logFile:
+        waitForMayapy(startMayapy(scriptText, logFile))
+    
+    if not os.path.exists(resultPath):
+        om.MGlobal.displayError("RIG BENCHMARK FAILED. CHECK THE LOG AT {0}".format(logPath))
+        return
+    
+    with open(resultPath) as resultFile:
+        benchmarkResults = json.load(resultFile)
+    
+    results = {}
+    
+    for result in benchmarkResults:
+        if "error" in result:
+            om.MGlobal.displayError(result["error"])
+            continue
+        
+        results[result["value"]] = result
+        print ("{0}: {1:.2f} fps ({2:.3f} ms per frame), built in {3:.2f} sec".format(result["value"], result["fps"], 1000.0 / result["fps"], result["build"]))
+    
+    return results
+
+def benchmarkBlendModes(rigArguments, startFrame = 1, endFrame = 120, loops = 3):
+    return benchmarkRigOption(rigArguments, "blendMode", ["Constraint", "Matrix"], startFrame, endFrame, loops)
+
+def benchmarkStretchModes(rigArguments, startFrame = 1, endFrame = 120, loops = 3):
+    return benchmarkRigOption(rigArguments, "stretchMode", IK_STRETCH_MODES, startFrame, endFrame, loops)
+
+def benchmarkSpineControls(rigArguments, counts = (2, 3, 4, 5), startFrame = 1, endFrame = 120, loops = 3):
+    return benchmarkRigOption(rigArguments, "spineControls", list(counts), startFrame, endFrame, loops)
+
+'''
+####################################################################################################
+PLAYBACK BENCHMARK
+END
+####################################################################################################
+'''
+
+'''
+####################################################################################################
+RIG EVALUATION ANALYZER
+START
+####################################################################################################
+'''
+#Relative evaluation cost per node type, only meant for comparing rigs with each other
+RIG_NODE_COST = {"parentConstraint" : 4.0,
+                 "orientConstraint" : 3.0,
+                 "aimConstraint" : 3.0,
+                 "pointConstraint" : 2.0,
+                 "scaleConstraint" : 2.0,
+                 "poleVectorConstraint" : 2.0,
+                 "ikHandle" : 8.0,
+                 "ikEffector" : 0.5,
+                 "expression" : 10.0,
+                 "motionPath" : 2.0,
+                 "pointOnCurveInfo" : 1.5,
+                 "animCurveUA" : 1.5,
+                 "animCurveUL" : 1.5,
+                 "animCurveUU" : 1.5,
+                 "animCurveUT" : 1.5,
+                 "animCurveTA" : 1.0,
+                 "animCurveTL" : 1.0,
+                 "animCurveTU" : 1.0,
+                 "animCurveTT" : 1.0,
+                 "pairBlend" : 1.5,
+                 "blendWeighted" : 1.0,
+                 "remapValue" : 1.0,
+                 "blendMatrix" : 1.0,
+                 "wtAddMatrix" : 1.0,
+                 "multMatrix" : 0.8,
+                 "decomposeMatrix" : 0.8,
+                 "composeMatrix" : 0.8,
+                 "multiplyDivide" : 0.6,
+                 "plusMinusAverage" : 0.6,
+                 "condition" : 0.6,
+                 "blendTwoAttr" : 0.5,
+                 "clamp" : 0.5,
+                 "distanceBetween" : 0.5,
+                 "multDoubleLinear" : 0.4,
+                 "addDoubleLinear" : 0.4,
+                 "reverse" : 0.4,
+                 "unitConversion" : 0.2,
+                 "joint" : 1.0,
+                 "transform" : 0.5,
+                 "nurbsCurve" : 0.3,
+                 "locator" : 0.2}
+
+#Extra cost of a spline IK handle on top of the regular ikHandle cost
+SPLINE_IK_COST = 25.0
+
+#The walk stops at these, they belong to the scene or the deformation rather than the rig
+RIG_WALK_STOP_TYPES = ["time", 
+                       "dagPose", 
+                       "displayLayer", 
+                       "renderLayer", 
+                       "animLayer", 
+                       "hyperLayout", 
+                       "nodeGraphEditorInfo", 
+                       "mesh", 
+                       "nurbsSurface"]
+
+#Outputs that never feed back into the node's own transform, skipped when looking for cycles
+RIG_CYCLE_IGNORED_ATTRS = ["message", 
+                           "parentInverseMatrix", 
+                           "rotatePivot", 
+                           "rotatePivotTranslate", 
+                           "rotateOrder", 
+                           "jointOrient", 
+                           "segmentScaleCompensate", 
+                           "inverseScale"]
+
+def collectRigGraph(rootNode = "MAIN_CTRL"):
+    #Walks every DAG node under the root and then the DG both ways from there
+    selection = om2.MSelectionList()
+    selection.add(rootNode)
+    
+    dagIter = om2.MItDag()
+    dagIter.reset(selection.getDagPath(0))
+    
+    nodes = {}
+    edges = {}
+    queue = []
+    
+    while not dagIter.isDone():
+        nodeObj = dagIter.currentItem()
+        nodeHash = om2.MObjectHandle(nodeObj).hashCode()
+        if nodeHash not in nodes:
+            nodes[nodeHash] = nodeObj
+            queue.append(nodeObj)
+        dagIter.next()
+    
+    while queue:
+        nodeObj = queue.pop()
+        nodeHash = om2.MObjectHandle(nodeObj).hashCode()
+        edges.setdefault(nodeHash, set())
+        
+        for plug in om2.MFnDependencyNode(nodeObj).getConnections():
+            attrName = om2.MFnAttribute(plug.attribute()).name
+            
+            if plug.isDestination:
+                otherPlugs = [(plug.source(), False)]
+            else:
+                otherPlugs = []
+            otherPlugs += [(dst, True) for dst in plug.destinations()]
+            
+            for otherPlug, downstream in otherPlugs:
+                otherObj = otherPlug.node()
+                otherFn = om2.MFnDependencyNode(otherObj)
+                
+                if otherFn.isDefaultNode or otherFn.typeName in RIG_WALK_STOP_TYPES or otherObj.hasFn(om2.MFn.kGeometryFilt) or otherObj.hasFn(om2.MFn.kSet):
+                    continue
+                
+                otherHash = om2.MObjectHandle(otherObj).hashCode()
+                if otherHash not in nodes:
+                    nodes[otherHash] = otherObj
+                    queue.append(otherObj)
+                
+                if downstream:
+                    if attrName not in RIG_CYCLE_IGNORED_ATTRS:
+                        edges[nodeHash].add(otherHash)
+                else:
+                    if om2.MFnAttribute(otherPlug.attribute()).name not in RIG_CYCLE_IGNORED_ATTRS:
+                        edges.setdefault(otherHash, set()).add(nodeHash)
+    
+    #A child transform evaluates after its parent, constraints and effectors only live under their node
+    for nodeHash, nodeObj in nodes.items():
+        if not nodeObj.hasFn(om2.MFn.kDagNode) or nodeObj.hasFn(om2.MFn.kConstraint) or nodeObj.hasFn(om2.MFn.kIkEffector):
+            continue
+        
+        dagFn = om2.MFnDagNode(nodeObj)
+        for i in range(dagFn.parentCount()):
+            parentHash = om2.MObjectHandle(dagFn.parent(i)).hashCode()
+            if parentHash in nodes:
+                edges.setdefault(parentHash, set()).add(nodeHash)
+    
+    return nodes, edges
+
+def findGraphCycles(nodes, edges):
+    #Iterative Tarjan, every strongly connected component with more than one node is a cycle
+    index = {}
+    lowLink = {}
+    onStack = set()
+    stack = []
+    cycles = []
+    counter = 0
+    
+    for startHash in nodes:
+        if startHash in index:
+            continue
+        
+        work = [(startHash, iter(edges.get(startHash, ())))]
+        index[startHash] = lowLink[startHash] = counter
+        counter += 1
+        stack.append(startHash)
+        onStack.add(startHash)
+        
+        while work:
+            nodeHash, children = work[-1]
+            advanced = False
+            
+            for childHash in children:
+                if childHash not in index:
+                    index[childHash] = lowLink[childHash] = counter
+                    counter += 1
+                    stack.append(childHash)
+                    onStack.add(childHash)
+                    work.append((childHash, iter(edges.get(childHash, ()))))
+                    advanced = True
+                    break
+                elif childHash in onStack:
+                    lowLink[nodeHash] = min(lowLink[nodeHash], index[childHash])
+            
+            if advanced:
+                continue
+            
+            work.pop()
+            if work:
+                parentHash = work[-1][0]
+                lowLink[parentHash] = min(lowLink[parentHash], lowLink[nodeHash])
+            
+            if lowLink[nodeHash] == index[nodeHash]:
+                component = []
+                while True:
+                    memberHash = stack.pop()
+                    onStack.discard(memberHash)
+                    component.append(memberHash)
+                    if memberHash == nodeHash:
+                        break
+                
+                if len(component) > 1 or nodeHash in edges.get(nodeHash, ()):
+                    cycles.append(component)
+    
+    return cycles
+
+def analyzeRigEvaluation(rootNode = "MAIN_CTRL"):
+    if not cmds.objExists(rootNode):
+        om.MGlobal.displayError("{0} DOES NOT EXIST IN THE SCENE. CREATE THE CONTROL RIG FIRST".format(rootNode.upper()))
+        return
+    
+    nodes, edges = collectRigGraph(rootNode)
+    
+    typeCounts = {}
+    costByType = {}
+    nodeNames = {}
+    splineIKHandles = []
+    expressions = []
+    
+    for nodeHash, nodeObj in nodes.items():
+        if nodeObj.hasFn(om2.MFn.kDagNode):
+            nodeName = om2.MFnDagNode(nodeObj).partialPathName()
+        else:
+            nodeName = om2.MFnDependencyNode(nodeObj).name()
+        nodeNames[nodeHash] = nodeName
+        
+        nodeType = om2.MFnDependencyNode(nodeObj).typeName
+        typeCounts[nodeType] = typeCounts.get(nodeType, 0) + 1
+        costByType[nodeType] = costByType.get(nodeType, 0.0) + RIG_NODE_COST.get(nodeType, 0.5)
+        
+        if nodeType == "ikHandle":
+            solver = cmds.listConnections(nodeName + ".ikSolver", s = True, d = False) or []
+            if solver and cmds.nodeType(solver[0]) == "ikSplineSolver":
+                splineIKHandles.append(nodeName)
+                costByType[nodeType] += SPLINE_IK_COST
+        elif nodeType == "expression":
+            expressions.append(nodeName)
+    
+    cycles = [sorted(nodeNames[nodeHash] for nodeHash in component) for component in findGraphCycles(nodes, edges)]
+    
+    constraintCount = sum(count for nodeType, count in typeCounts.items() if nodeType.endswith("Constraint"))
+    drivenKeyCount = sum(count for nodeType, count in typeCounts.items() if nodeType.startswith("animCurveU"))
+    
+    report = {"root" : rootNode,
+              "nodeCount" : len(nodes),
+              "typeCounts" : typeCounts,
+              "costByType" : costByType,
+              "estimatedCost" : sum(costByType.values()),
+              "constraints" : constraintCount,
+              "drivenKeyCurves" : drivenKeyCount,
+              "splineIK" : splineIKHandles,
+              "expressions" : expressions,
+              "cycles" : cycles}
+    
+    printRigEvaluationReport(report)
+    
+    return report
+
+def printRigEvaluationReport(report):
+    print ("URT Rig Evaluation Report : {0}".format(report["root"]))
+    print ("    Nodes: {0}".format(report["nodeCount"]))
+    print ("    Estimated Cost: {0:.1f}".format(report["estimatedCost"]))
+    print ("    Constraints: {0}".format(report["constraints"]))
+    print ("    Driven Key Curves: {0}".format(report["drivenKeyCurves"]))
+    
+    print ("    Cost by Node Type:")
+    for nodeType in sorted(report["costByType"], key = lambda item: report["costByType"][item], reverse = True):
+        print ("        {0:<24}{1:>6}{2:>10.1f}".format(nodeType, report["typeCounts"][nodeType], report["costByType"][nodeType]))
+    
+    for handle in report["splineIK"]:
+        print ("    Spline IK (expensive): {0}".format(handle))
+    
+    for expression in report["expressions"]:
+        print ("    Expression (expensive, not parallel): {0}".format(expression))
+    
+    for cycle in report["cycles"]:
+        print ("    Cycle: {0}".format(", ".join(cycle)))
+    
+    if not report["cycles"]:
+        print ("    No Cycles Found")
+
+def profileRigEvaluation(frameCount = 100, startFrame = None, outputDir = None):
+    if startFrame is None:
+        startFrame = cmds.playbackOptions(q = True, minTime = True)
+    if outputDir is None:
+        outputDir = tempfile.gettempdir()
+    
+    sceneName = os.path.splitext(os.path.basename(cmds.file(q = True, sceneName = True)))[0] or "untitled"
+    profilePath = os.path.join(outputDir, sceneName + "_evaluationProfile.txt")
+    timingPath = os.path.join(outputDir, sceneName + "_nodeTiming.txt")
+    
+    currentFrame = cmds.currentTime(q = True)
+    
+    #Evaluation profiler, recorded in the current evaluation mode
+    cmds.profiler(reset = True)
+    cmds.profiler(sampling = True)
+    evaluateFrameRange(startFrame, frameCount)
+    cmds.profiler(sampling = False)
+    cmds.profiler(output = profilePath)
+    
+    #Per node timing, dgtimer only sees DG evaluation so the evaluation manager is switched off for this pass
+    evaluationMode = cmds.evaluationManager(q = True, mode = True)[0]
+    cmds.evaluationManager(mode = "off")
+    
+    cmds.dgtimer(on = True, reset = True)
+    evaluateFrameRange(startFrame, frameCount)
+    cmds.dgtimer(off = True)
+    cmds.dgtimer(query = True, outputFile = timingPath, sortType = "self", sortMetric = "compute", maxDisplay = 200)
+    
+    cmds.evaluationManager(mode = evaluationMode)
+    cmds.currentTime(currentFrame)
+    
+    print ("Evaluation Profile : {0}".format(profilePath))
+    print ("Per Node Timing : {0}".format(timingPath))
+    
+    return {"profile" : profilePath, "timing" : timingPath}
+
+def mayapyExecutable():
+    mayaLocation = os.environ.get("MAYA_LOCATION", os.path.dirname(os.path.dirname(sys.executable)))
+    executable = os.path.join(mayaLocation, "bin", "mayapy")
+    
+    if sys.platform.startswith("win"):
+        executable += ".exe"
+    
+    return executable
+
+def startMayapy(scriptText, logFile = None):
+    #Starts a headless mayapy that can import the urt package. Output goes to logFile when given, so long jobs never block on a full pipe
+    environment = dict(os.environ)
+    scriptsDir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    environment["PYTHONPATH"] = os.pathsep.join([scriptsDir, environment.get("PYTHONPATH", "")])
+    
+    if logFile is None:
+        logFile = subprocess.PIPE
+    
+    return subprocess.Popen([mayapyExecutable(), "-c", scriptText], stdout = logFile, stderr = subprocess.STDOUT, env = environment)
+
+def waitWithEvents(seconds):
+    #Sleeps between polls of headless mayapy sessions while the Maya UI keeps handling its events
+    application = QtWidgets.QApplication.instance()
+    endTime = time.time() + seconds
+    
+    while True:
+        if application:
+            application.processEvents(QtCore.QEventLoop.AllEvents, 20)
+        
+        remaining = endTime - time.time()
+        if remaining <= 0:
+            break
+        
+        time.sleep(min(remaining, 0.02))
+
+def waitForMayapy(process):
+    while process.poll() is None:
+        waitWithEvents(0.1)
+    
+    return process.returncode
+
+def profileRigHeadless(frameCount = 100, outputDir = None):
+    scenePath = cmds.file(q = True, sceneName = True)
+    
+    if not scenePath or cmds.file(q = True, modified = True):
+        om.MGlobal.displayError("SAVE THE SCENE BEFORE PROFILING THE RIG")
+        return
+    
+    if outputDir is None:
+        outputDir = os.path.dirname(scenePath)
+    
+    sceneName = os.path.splitext(os.path.basename(scenePath))[0]
+    logPath = os.path.join(outputDir, sceneName + "_profileLog.txt")
+    
+    scriptText = "\n".join(["import maya.standalone",
+                            "maya.standalone.initialize(name = 'python')",
+                            "import maya.cmds as cmds",
+                            "from urt.tools import URT_atulshakya",
+                            "cmds.file({0!r}, open = True, force = True)".format(scenePath),
+                            "URT_atulshakya.analyzeRigEvaluation()",
+                            "URT_atulshakya.profileRigEvaluation({0}, outputDir = {1!r})".format(int(frameCount), outputDir),
+                            "maya.standalone.uninitialize()"])
+    
+    #The output goes to a log file and the process is polled, so the UI stays responsive while mayapy plays the frames
+    with open(logPath, "w") as logFile:
+        returnCode = waitForMayapy(startMayapy(scriptText, logFile))
+    
+    with open(logPath, "rb") as logFile:
+        print (logFile.read().decode("utf-8", "replace"))
+    
+    if returnCode != 0:
+        om.MGlobal.displayError("HEADLESS PROFILING FAILED. CHECK THE SCRIPT EDITOR FOR DETAILS")
+        return
+    
+    return {"profile" : os.path.join(outputDir, sceneName + "_evaluationProfile.txt"), 
+            "timing" : os.path.join(outputDir, sceneName + "_nodeTiming.txt")}
+
+'''
+####################################################################################################
+RIG EVALUATION ANALYZER
+END
+####################################################################################################
+'''
+
+'''
+####################################################################################################
+RIG TEMPLATE
+START
+####################################################################################################
+'''
+RIG_TEMPLATE_VERSION = 1
+
+#Override plugs stored per controller shape, in this order
+RIG_TEMPLATE_COLOR_ATTRS = ["overrideEnabled", "overrideRGBColors", "overrideColor", "overrideColorR", "overrideColorG", "overrideColorB"]
+
+def rigTransforms(rootNode = "MAIN_CTRL"):
+    #One depth first walk below the root. Short name without namespace : dag path of every transform
+    rootPath = om2.MSelectionList().add(rootNode).getDagPath(0)
+    iterator = om2.MItDag(om2.MItDag.kDepthFirst, om2.MFn.kTransform)
+    iterator.reset(rootPath, om2.MItDag.kDepthFirst, om2.MFn.kTransform)
+    
+    transforms = {}
+    
+    while not iterator.isDone():
+        dagPath = iterator.getPath()
+        transforms[dagPath.partialPathName().split("|")[-1].split(":")[-1]] = dagPath
+        iterator.next()
+    
+    return transforms
+
+def curveShapes(dagPath):
+    shapes = []
+    
+    for i in range(dagPath.numberOfShapesDirectlyBelow()):
+        shapePath = om2.MDagPath(dagPath)
+        shapePath.extendToShape(i)
+        
+        if shapePath.hasFn(om2.MFn.kNurbsCurve) and not om2.MFnDagNode(shapePath).isIntermediateObject:
+            shapes.append(shapePath)
+    
+    return shapes
+
+def captureAttribute(fnNode, attribute):
+    #Numeric, angle, distance and enum attributes. None for anything that can not be stored as one value
+    plug = fnNode.findPlug(attribute, False)
+    
+    if plug.isArray or plug.isCompound or plug.isChild:
+        return None
+    
+    data = {}
+    
+    if attribute.hasFn(om2.MFn.kEnumAttribute):
+        fnEnum = om2.MFnEnumAttribute(attribute)
+        fields = []
+        
+        for index in range(fnEnum.getMin(), fnEnum.getMax() + 1):
+            try:
+                fields.append("{0}={1}".format(fnEnum.fieldName(index), index))
+            except RuntimeError:
+                continue
+        
+        data["type"] = "enum"
+        data["enumNames"] = ":".join(fields)
+        data["value"] = plug.asInt()
+    
+    elif attribute.hasFn(om2.MFn.kNumericAttribute):
+        fnNumeric = om2.MFnNumericAttribute(attribute)
+        numericType = fnNumeric.numericType()
+        
+        if numericType == om2.MFnNumericData.kBoolean:
+            data["type"] = "bool"
+            data["value"] = plug.asBool()
+        elif numericType in [om2.MFnNumericData.kInt, om2.MFnNumericData.kShort, om2.MFnNumericData.kLong, om2.MFnNumericData.kByte]:
+            data["type"] = "long"
+            data["value"] = plug.asInt()
+        elif numericType in [om2.MFnNumericData.kFloat, om2.MFnNumericData.kDouble]:
+            data["type"] = "double"
+            data["value"] = plug.asDouble()
+        else:
+            return None
+        
+        if fnNumeric.hasMin():
+            data["min"] = fnNumeric.getMin()
+        if fnNumeric.hasMax():
+            data["max"] = fnNumeric.getMax()
+    
+    elif attribute.hasFn(om2.MFn.kUnitAttribute):
+        #Internal units, radians and centimeters
+        data["type"] = "double"
+        data["value"] = plug.asDouble()
+    
+    else:
+        return None
+    
+    data["keyable"] = plug.isKeyable
+    
+    return data
+
+def captureRigTemplate(rootNode = "MAIN_CTRL"):
+    #Shapes, colors, offset group and custom attribute values of every _CTRL transform below the root
+    if not cmds.objExists(rootNode):
+        om.MGlobal.displayError("{0} DOES NOT EXIST. BUILD THE CONTROL RIG FIRST".format(rootNode.upper()))
+        return
+    
+    transforms = rigTransforms(rootNode)
+    controllers = {}
+    
+    for name, dagPath in transforms.items():
+        if not name.endswith("_CTRL"):
+            continue
+        
+        fnNode = om2.MFnDependencyNode(dagPath.node())
+        controller = {"shapes" : [], "attributes" : {}}
+        
+        for shapePath in curveShapes(dagPath):
+            fnCurve = om2.MFnNurbsCurve(shapePath)
+            fnShape = om2.MFnDependencyNode(shapePath.node())
+            
+            controller["shapes"].append({"name" : fnShape.name().split(":")[-1],
+                                         "degree" : fnCurve.degree,
+                                         "form" : fnCurve.form,
+                                         "knots" : list(fnCurve.knots()),
+                                         "cvs" : [value for point in fnCurve.cvPositions() for value in (point.x, point.y, point.z)],
+                                         "color" : [fnShape.findPlug(attr, False).asDouble() for attr in RIG_TEMPLATE_COLOR_ATTRS]})
+        
+        #Dynamic attributes come after the static ones, the walk stops at the first static attribute
+        for index in reversed(range(fnNode.attributeCount())):
+            attribute = fnNode.attribute(index)
+            if fnNode.attributeClass(attribute) != om2.MFnDependencyNode.kLocalDynamicAttr:
+                break
+            
+            data = captureAttribute(fnNode, attribute)
+            if data is not None:
+                controller["attributes"][om2.MFnAttribute(attribute).name] = data
+        
+        offsetPath = transforms.get(name + "_0")
+        if offsetPath:
+            fnOffset = om2.MFnTransform(offsetPath)
+            translate = fnOffset.translation(om2.MSpace.kTransform)
+            rotate = fnOffset.rotation()
+            controller["offset"] = [translate.x, translate.y, translate.z, rotate.x, rotate.y, rotate.z] + list(fnOffset.scale())
+        
+        controllers[name] = controller
+    
+    return {"version" : RIG_TEMPLATE_VERSION, "controllers" : controllers}
+
+def saveRigTemplate(templatePath, rootNode = "MAIN_CTRL"):
+    timeStart = time.time()
+    template = captureRigTemplate(rootNode)
+    
+    if template is None:
+        return
+    
+    with open(templatePath, "w") as templateFile:
+        json.dump(template, templateFile, separators = (",", ":"))
+    
+    print ("RIG TEMPLATE SAVED: {0} controllers in {1:.3f} sec to {2}".format(len(template["controllers"]), time.time() - timeStart, templatePath))
+    
+    return template
+
+def loadRigTemplate(templatePath):
+    with open(templatePath) as templateFile:
+        template = json.load(templateFile)
+    
+    if template.get("version") != RIG_TEMPLATE_VERSION:
+        om.MGlobal.displayError("UNSUPPORTED RIG TEMPLATE VERSION: {0}".format(template.get("version")))
+        return
+    
+    return template
+
+def settablePlug(fnNode, attribute):
+    #Driven and locked plugs keep what the rig build gave them
+    plug = fnNode.findPlug(attribute, False)
+    
+    return not plug.isLocked and not plug.isDestination
+
+def applyRigTemplate(template, rootNode = "MAIN_CTRL", offsets = True):
+    #template is a path or the dictionary from captureRigTemplate. Controllers are matched by name without the namespace,
+    #everything is set by one batch: new shapes first, then values, then the old shapes are deleted
+    timeStart = time.time()
+    
+    if not isinstance(template, dict):
+        template = loadRigTemplate(template)
+    
+    if template is None:
+        return
+    
+    if not cmds.objExists(rootNode):
+        om.MGlobal.displayError("{0} DOES NOT EXIST. BUILD THE CONTROL RIG FIRST".format(rootNode.upper()))
+        return
+    
+    transforms = rigTransforms(rootNode)
+    missing = [name for name in template["controllers"] if name not in transforms]
+    
+    with UndoContext():
+        batch = BatchModifier()
+        setups = []
+        
+        for name, controller in template["controllers"].items():
+            dagPath = transforms.get(name)
+            if dagPath is None:
+                continue
+            
+            fnNode = om2.MFnDependencyNode(dagPath.node())
+            setup = {"controller" : controller, "node" : dagPath.node(), "offset" : transforms.get(name + "_0"), "oldShapes" : [], "newShapes" : []}
+            
+            #A transform left without shapes would be deleted with them, so the new shapes are made while the old ones are still there
+            if controller["shapes"]:
+                setup["oldShapes"] = [shapePath.node() for shapePath in curveShapes(dagPath)]
+                setup["newShapes"] = [batch.createNode("nurbsCurve", None, setup["node"]) for shape in controller["shapes"]]
+            
+            for attributeName, data in controller["attributes"].items():
+                if not fnNode.hasAttribute(attributeName):
+                    batch.addAttr(setup["node"], attributeName, data["type"], data["value"], data.get("min"), data.get("max"), data.get("enumNames"), data["keyable"])
+            
+            setups.append(setup)
+        
+        batch.doIt()
+        
+        for setup in setups:
+            controller = setup["controller"]
+            fnNode = om2.MFnDependencyNode(setup["node"])
+            
+            for shape, shapeObject in zip(controller["shapes"], setup["newShapes"]):
+                cvs = shape["cvs"]
+                curveData = om2.MFnNurbsCurveData().create()
+                om2.MFnNurbsCurve().create([om2.MPoint(cvs[i], cvs[i + 1], cvs[i + 2]) for i in range(0, len(cvs), 3)], shape["knots"], shape["degree"], shape["form"], False, True, curveData)
+                batch.setAttr(shapeObject, "cached", curveData)
+                
+                for attr, value in zip(RIG_TEMPLATE_COLOR_ATTRS, shape["color"]):
+                    batch.setAttr(shapeObject, attr, bool(value) if attr in RIG_TEMPLATE_COLOR_ATTRS[:2] else (int(value) if attr == "overrideColor" else value))
+            
+            for shapeObject in setup["oldShapes"]:
+                batch.modifier.deleteNode(shapeObject)
+            
+            for shape, shapeObject in zip(controller["shapes"], setup["newShapes"]):
+                batch.modifier.renameNode(shapeObject, shape["name"])
+            
+            for attributeName, data in controller["attributes"].items():
+                if settablePlug(fnNode, attributeName):
+                    batch.setAttr(setup["node"], attributeName, data["value"])
+            
+            if offsets and controller.get("offset") and setup["offset"]:
+                offsetObject = setup["offset"].node()
+                fnOffset = om2.MFnDependencyNode(offsetObject)
+                
+                for attr, value in zip(["translateX", "translateY", "translateZ", "rotateX", "rotateY", "rotateZ", "scaleX", "scaleY", "scaleZ"], controller["offset"]):
+                    if settablePlug(fnOffset, attr):
+                        batch.setAttr(offsetObject, attr, value)
+        
+        batch.doIt()
+    
+    if missing:
+        om.MGlobal.displayWarning("{0} CONTROLLER/S OF THE TEMPLATE NOT FOUND IN THE RIG: {1}".format(len(missing), ", ".join(sorted(missing)[:10])))
+    
+    print ("RIG TEMPLATE APPLIED: {0} controllers in {1:.3f} sec".format(len(setups), time.time() - timeStart))
+    
+    return len(setups)
+
+'''
+####################################################################################################
+RIG TEMPLATE
+END
+####################################################################################################
+'''
+
+'''
+####################################################################################################
+BATCH RIGGING
+START
+####################################################################################################
+'''
+#createBipedControlRig arguments in call order, a manifest sets them by name
+BATCH_RIG_ARGUMENTS = ["leftIndicator", "rightIndicator", "pelvis", "spine1", "chest", "neck", "head", 
+                       "l_clavicle", "l_shoulder", "l_elbow", "l_wrist", "l_thigh", "l_knee", "l_ankle", "l_ball", 
+                       "armFK", "armIK", "legFK", "legIK", "controllerSize", "footRollControl", "blendMode", "driverMode", "mirrorBuild", "stretchMode", "spineControls", "handSetup"]
+
+#Manifest characters start from these. Unlike the empty Control Rig panel the indicators are L_ and R_, and the foot roll is on since the
+#rig can not be built without it
+BATCH_RIG_DEFAULTS = {"leftIndicator" : "L_", "rightIndicator" : "R_", 
+                      "armFK" : True, "armIK" : True, "legFK" : True, "legIK" : True, 
+                      "controllerSize" : 10.0, "footRollControl" : True, 
+                      "blendMode" : "Constraint", "driverMode" : "Driven Keys", "mirrorBuild" : False, "stretchMode" : "Rigid", "spineControls" : 2, "handSetup" : False}
+
+BATCH_RIG_TIMINGS = ["open", "build", "save", "total", "wall"]
+
+def loadRigManifest(manifestPath, outputDir = None, defaults = None, outputFolder = "rigs", outputSuffix = None):
+    #Characters get the defaults first, then the manifest defaults, then their own keys. Paths are relative to the manifest.
+    #Outputs are <name>_rig with the scene extension, or <name><outputSuffix>
+    with open(manifestPath) as manifestFile:
+        manifest = json.load(manifestFile)
+    
+    manifestDir = os.path.dirname(os.path.abspath(manifestPath))
+    manifest["outputDir"] = os.path.join(manifestDir, outputDir or manifest.get("outputDir", outputFolder))
+    
+    characters = []
+    
+    for entry in manifest.get("characters", []):
+        character = dict(BATCH_RIG_DEFAULTS if defaults is None else defaults)
+        character.update(manifest.get("defaults", {}))
+        character.update(entry)
+        character["scene"] = os.path.join(manifestDir, character.get("scene", ""))
+        
+        for pathKey in ["template", "limits"]:
+            if character.get(pathKey):
+                character[pathKey] = os.path.join(manifestDir, character[pathKey])
+        
+        if not character.get("name"):
+            character["name"] = character.get("namespace") or os.path.splitext(os.path.basename(character["scene"]))[0]
+        
+        if not character.get("output"):
+            if outputSuffix is None:
+                character["output"] = character["name"] + "_rig" + (os.path.splitext(character["scene"])[1] or ".ma")
+            else:
+                character["output"] = character["name"] + outputSuffix
+        
+        character["output"] = os.path.join(manifest["outputDir"], character["output"])
+        characters.append(character)
+    
+    manifest["characters"] = characters
+    
+    return manifest
+
+def rigCharacter(character, resultPath):
+    #Runs inside a headless mayapy, one character per process. The result is written even when the build fails
+    result = {"name" : character["name"], "scene" : character["scene"], "output" : character["output"], "status" : "failed", "error" : ""}
+    startTime = time.time()
+    
+    try:
+        cmds.file(character["scene"], open = True, force = True)
+        result["open"] = time.time() - startTime
+        
+        buildStart = time.time()
+        namespace = character.get("namespace")
+        
+        if namespace:
+            cmds.namespace(relativeNames = True)
+            cmds.namespace(set = ":" + namespace)
         
-        cmds.select ("splineTip_CTRL","clavicle_CTRL_GRP", r = True)
-        cmds.parentConstraint (mo = True, weight = 1)
+        try:
+            if character["footRollControl"]:
+                createFootRollLocators(character["controllerSize"], character.get("footRoll"))
+            
+            createBipedControlRig(*[character[argument] for argument in BATCH_RIG_ARGUMENTS])
+            rigBuilt = cmds.objExists("MAIN_CTRL")
+            
+            #Controller shapes and colors reworked on an earlier build
+            if rigBuilt and character.get("template"):
+                applyRigTemplate(character["template"])
         
-        mainCTRL = mel.eval ("curve -d 1 -p 0 0 -0.9857426965 -p -0.2950522357 0 -0.543164343 -p -0.1475261178 0 -0.543164343 -p -0.1475261178 0 -0.1475261178 -p -0.543164343 0 -0.1475261178 -p -0.543164343 0 -0.2950522357 -p -0.9857426965 0 0 -p -0.543164343 0 0.2950522357 -p -0.543164343 0 0.1475261178 -p -0.1475261178 0 0.1475261178 -p -0.1475261178 0 0.543164343 -p -0.2950522357 0 0.543164343 -p 0 0 0.9857426965 -p 0.2950522357 0 0.543164343 -p 0.1475261178 0 0.543164343 -p 0.1475261178 0 0.1475261178 -p 0.543164343 0 0.1475261178 -p 0.543164343 0 0.2950522357 -p 0.9857426965 0 0 -p 0.543164343 0 -0.2950522357 -p 0.543164343 0 -0.1475261178 -p 0.1475261178 0 -0.1475261178 -p 0.1475261178 0 -0.543164343 -p 0.2950522357 0 -0.543164343 -p 0 0 -0.98574269651;")
-        mainCTRL = cmds.rename (mainCTRL, "MAIN_CTRL")
-        cmds.scale(10 * controllerScale, 10 * controllerScale, 10 * controllerScale, r = True)
-        cmds.makeIdentity (apply = True, r = 1, t = 1, s = 1, n = 0)
-        cmds.DeleteHistory()
+        finally:
+            #Back to the root namespace even when the build failed
+            if namespace:
+                cmds.namespace(set = ":")
+                cmds.namespace(relativeNames = False)
         
-        controllerColorAssign (255, 255, 255, mainCTRL)
+        result["build"] = time.time() - buildStart
         
-        cmds.select(mainCTRL, r = True)
-        cmds.connectAttr (mainCTRL + '.sy' , mainCTRL + '.sx', f = True)
-        cmds.connectAttr (mainCTRL + '.sy' , mainCTRL + '.sz', f = True)
-        cmds.setAttr (mainCTRL + '.sx', keyable = False, channelBox = False)
-        cmds.setAttr (mainCTRL + '.sz', keyable = False, channelBox = False)
+        if not rigBuilt:
+            raise RuntimeError("CONTROL RIG WAS NOT BUILT. CHECK THE JOINT NAMES IN THE MANIFEST")
         
-        cmds.select (all = True)
-        cmds.select (mainCTRL, d = True)
+        saveStart = time.time()
+        cmds.file(rename = character["output"])
         
-        cmds.select (mainCTRL, add = True)
-        cmds.parent()
+        if character["output"].lower().endswith(".mb"):
+            cmds.file(save = True, type = 'mayaBinary', force = True)
+        else:
+            cmds.file(save = True, type = 'mayaAscii', force = True)
         
+        result["save"] = time.time() - saveStart
+        result["status"] = "done"
+    
+    except Exception as error:
+        result["error"] = str(error)
+    
+    result["total"] = time.time() - startTime
+    
+    with open(resultPath, "w") as resultFile:
+        json.dump(result, resultFile, indent = 4)
+    
+    return result
+
+def startRigWorker(character, logDir, job = "rigCharacter"):
+    #job is the module function the headless mayapy runs with the character and the result path
+    resultPath = os.path.join(logDir, character["name"] + "_result.json")
+    logPath = os.path.join(logDir, character["name"] + "_log.txt")
+    
+    if os.path.exists(resultPath):
+        os.remove(resultPath)
+    
+    scriptText = "\n".join(["import json",
+                            "import maya.standalone",
+                            "maya.standalone.initialize(name = 'python')",
+                            "from urt.tools import URT_atulshakya",
+                            "URT_atulshakya.{0}(json.loads({1!r}), {2!r})".format(job, json.dumps(character), resultPath),
+                            "maya.standalone.uninitialize()"])
+    
+    logFile = open(logPath, "w")
+    
+    return {"character" : character, "process" : startMayapy(scriptText, logFile), "logFile" : logFile, 
+            "log" : logPath, "resultPath" : resultPath, "start" : time.time()}
+
+def finishRigWorker(worker):
+    worker["logFile"].close()
+    
+    if os.path.exists(worker["resultPath"]):
+        with open(worker["resultPath"]) as resultFile:
+            result = json.load(resultFile)
+    else:
+        #mayapy died before the worker could write its result
+        character = worker["character"]
+        result = {"name" : character["name"], "scene" : character["scene"], "output" : character["output"], "status" : "failed", 
+                  "error" : "MAYAPY EXITED WITH CODE {0}".format(worker["process"].returncode)}
+    
+    result["wall"] = time.time() - worker["start"]
+    result["log"] = worker["log"]
+    
+    return result
+
+def batchRigFromManifest(manifestPath, workers = None, outputDir = None):
+    #Rigs every character of the manifest in parallel headless mayapy sessions and writes a timing report
+    manifest = loadRigManifest(manifestPath, outputDir)
+    outputDir = manifest["outputDir"]
+    
+    if workers is None:
+        workers = manifest.get("workers", min(4, multiprocessing.cpu_count()))
+    
+    workers = max(1, int(workers))
+    logDir = os.path.join(outputDir, "batchRigLogs")
+    
+    if not os.path.isdir(logDir):
+        os.makedirs(logDir)
+    
+    pending = []
+    results = []
+    
+    for character in manifest["characters"]:
+        missing = [argument for argument in BATCH_RIG_ARGUMENTS if character.get(argument) is None or character.get(argument) == ""]
         
-        cmds.SelectAllPolygonGeometry()
-        geoMeshes = cmds.ls(selection = True)
+        if missing:
+            results.append({"name" : character["name"], "status" : "skipped", "error" : "MISSING {0}".format(", ".join(missing))})
+        elif not os.path.isfile(character["scene"]):
+            results.append({"name" : character["name"], "status" : "skipped", "error" : "SCENE NOT FOUND {0}".format(character["scene"])})
+        else:
+            pending.append(character)
+    
+    if not pending:
+        om.MGlobal.displayError("NO CHARACTERS TO RIG IN THE MANIFEST")
+        return
+    
+    startTime = time.time()
+    results += runRigWorkers(pending, workers, logDir)
+    
+    return writeBatchRigReport(results, time.time() - startTime, workers, outputDir)
+
+def runRigWorkers(characters, workers, logDir, job = "rigCharacter", label = "Batch Rig"):
+    #Keeps up to workers mayapy sessions busy until every character has a result
+    pending = list(characters)
+    running = []
+    results = []
+    
+    while pending or running:
+        while pending and len(running) < workers:
+            running.append(startRigWorker(pending.pop(0), logDir, job))
         
-        for mesh in geoMeshes:
-            cmds.setAttr (mesh + ".inheritsTransform", 0)
-            
-        cmds.setAttr ("MISC_GRP.v", 0)
-        cmds.setAttr ("JNT_GRP.v", 0)
+        for worker in list(running):
+            if worker["process"].poll() is not None:
+                running.remove(worker)
+                results.append(finishRigWorker(worker))
+                print ("{0} : {1} {2}".format(label, results[-1]["name"], results[-1]["status"]))
         
-        cmds.select(cl = True)
+        waitWithEvents(0.25)
+    
+    return results
+
+def writeBatchRigReport(results, wallTime, workers, outputDir, reportName = "batchRig", title = "URT BATCH RIG REPORT"):
+    workerTime = sum([result.get("wall", 0.0) for result in results])
+    doneCount = len([result for result in results if result["status"] == "done"])
+    
+    lines = [title, 
+             "Workers : {0}".format(workers), 
+             "Characters : {0} done, {1} failed".format(doneCount, len(results) - doneCount), 
+             "Wall Time : {0:.2f}s".format(wallTime), 
+             "Worker Time : {0:.2f}s ({1:.2f}x speedup)".format(workerTime, workerTime / wallTime if wallTime else 0.0), 
+             "", 
+             "{0:<24}{1:<10}".format("Character", "Status") + "".join(["{0:>10}".format(timing.capitalize()) for timing in BATCH_RIG_TIMINGS])]
+    
+    for result in sorted(results, key = lambda result: result["name"]):
+        line = "{0:<24}{1:<10}".format(result["name"], result["status"])
         
+        for timing in BATCH_RIG_TIMINGS:
+            if timing in result:
+                line += "{0:>10.2f}".format(result[timing])
+            else:
+                line += "{0:>10}".format("-")
         
-def controllerColorAssign (r, g, b, *args):
-    cmds.select (args, r = True)
-    shapesSelect = cmds.ls (selection = 1, shapes = True, dag = True)
+        lines.append(line)
+        
+        if result.get("error"):
+            lines.append("    " + result["error"])
     
+    reportPath = os.path.join(outputDir, reportName + "Report.txt")
     
-    for shape in shapesSelect:
-        cmds.setAttr(shape + ".overrideEnabled", 1)
-        cmds.setAttr(shape + ".overrideRGBColors", 1)
-        cmds.setAttr(shape + ".overrideColorRGB", r, g, b)
+    with open(reportPath, "w") as reportFile:
+        reportFile.write("\n".join(lines) + "\n")
+    
+    with open(os.path.join(outputDir, reportName + "Report.json"), "w") as reportFile:
+        json.dump({"workers" : workers, "wall" : wallTime, "characters" : results}, reportFile, indent = 4)
     
+    print ("\n".join(lines))
+    print ("Report File : {0}".format(reportPath))
+    
+    return results
+
 '''
 ####################################################################################################
-BIPED CONTROL RIG SETUP
+BATCH RIGGING
 END
 ####################################################################################################
 '''
@@ -4204,74 +8313,332 @@ RANGE OF MOTION SETUP
 START
 ####################################################################################################
 '''   
-def createROM (rotXP, rotYP, rotZP, rotXN, rotYN, rotZN, rotAngle, keyFramePadding, keyFrameStart):
-    selected = cmds.ls (selection = True)
+#Pose order of the ROM: (axis index, sign). Every pose is followed by a key back to zero
+ROM_POSES = [(1, 1), (1, -1), (2, -1), (2, 1), (0, 1), (0, -1)]
+ROM_CHANNELS = ["rotateX", "rotateY", "rotateZ"]
+ROM_AXES = ["X", "Y", "Z"]
+
+#Serial keys the objects one after the other, Hierarchy Level keys every object of the same depth at once and
+#Mirrored keys left and right counterparts at once
+ROM_SCHEDULE_MODES = ["Serial", "Hierarchy Level", "Mirrored"]
+ROM_SIDE_TOKENS = [("L_", "R_"), ("_L", "_R"), ("l_", "r_"), ("_l", "_r"), ("Left", "Right"), ("left", "right")]
+
+def romKeySchedule(poseAngles, keyFramePadding, keyFrameStart, restValues, slots):
+    #poseAngles holds the (axis, angle in degrees) poses of every object and restValues its current rotate values (radians).
+    #Objects of the same slot are keyed at once, a slot starts when the longest object of the slot before it ends.
+    #Returns [(times, [X values, Y values, Z values])] and the last frame
+    slotSpans = {}
+    for poses, slot in zip(poseAngles, slots):
+        slotSpans[slot] = max(slotSpans.get(slot, 0), 2 * len(poses) * keyFramePadding)
+    
+    slotStarts = {}
     frameNumber = keyFrameStart
+    for slot in sorted(slotSpans):
+        slotStarts[slot] = frameNumber
+        frameNumber += slotSpans[slot]
+    
+    schedule = []
+    
+    for poses, rest, slot in zip(poseAngles, restValues, slots):
+        times = [slotStarts[slot] + i * keyFramePadding for i in range(2 * len(poses) + 1)]
+        values = [[rest[axis]] for axis in range(3)]
+        
+        for poseAxis, angle in poses:
+            for axis in range(3):
+                values[axis].append(math.radians(angle) if axis == poseAxis else 0.0)
+                values[axis].append(0.0)
+        
+        schedule.append((times, values))
+    
+    return schedule, frameNumber
+
+def loadROMLimits(limitsPath):
+    #{"name or pattern" : {"X" : [min, max], "Y" : [min, max], "Z" : [min, max]}} in degrees, a missing axis is not limited.
+    #A table that can not be read leaves the poses unlimited
+    return readJsonFile(limitsPath, "ROM LIMITS")
 
-    for selection in selected:
-        cmds.select ( selection, r = 1)
-        cmds.setKeyframe (t = frameNumber)
+def romPoseAngles(fnNode, poses, rotAngle, limits = None):
+    #Pose angles clamped by the limits table and the rotation limits of the object. Poses clamped to zero are left out
+    name = fnNode.name().split(":")[-1]
+    entry = None
+    
+    if limits:
+        entry = limits.get(name)
+        if entry is None:
+            entry = next((limits[pattern] for pattern in sorted(limits) if fnmatch.fnmatchcase(name, pattern)), None)
+    
+    poseAngles = []
+    
+    for axis, sign in poses:
+        angle = sign * rotAngle
+        limit = (entry or {}).get(ROM_AXES[axis])
         
-        if rotYP:
-            frameNumber = frameNumber + keyFramePadding
-            cmds.rotate (0, rotAngle, 0, a= 1)
-            cmds.setKeyframe (t = frameNumber)
-            
-            frameNumber = frameNumber + keyFramePadding
-            cmds.rotate (0, 0, 0, a= 1)
-            cmds.setKeyframe (t = frameNumber)
+        if limit:
+            angle = max(limit[0], min(limit[1], angle))
         
-        if rotYN:
-            frameNumber = frameNumber + keyFramePadding    
-            cmds.rotate (0, -rotAngle, 0, a = 1)
-            cmds.setKeyframe (t = frameNumber)
+        if fnNode.findPlug("minRot{0}LimitEnable".format(ROM_AXES[axis]), False).asBool():
+            angle = max(math.degrees(fnNode.findPlug("minRot{0}Limit".format(ROM_AXES[axis]), False).asDouble()), angle)
+        if fnNode.findPlug("maxRot{0}LimitEnable".format(ROM_AXES[axis]), False).asBool():
+            angle = min(math.degrees(fnNode.findPlug("maxRot{0}Limit".format(ROM_AXES[axis]), False).asDouble()), angle)
+        
+        if abs(angle) > POLE_EPSILON:
+            poseAngles.append((axis, angle))
+    
+    return poseAngles
+
+def romSlots(selected, mode):
+    #Slot of every selected object for the schedule mode
+    if mode == "Hierarchy Level":
+        depths = [om2.MSelectionList().add(item).getDagPath(0).length() for item in selected]
+        levels = sorted(set(depths))
+        
+        return [levels.index(depth) for depth in depths]
+    
+    if mode == "Mirrored":
+        shortNames = [item.split("|")[-1].split(":")[-1] for item in selected]
+        slots = [None] * len(selected)
+        slot = 0
+        
+        for index, name in enumerate(shortNames):
+            if slots[index] is not None:
+                continue
+            
+            slots[index] = slot
+            
+            for leftToken, rightToken in ROM_SIDE_TOKENS:
+                counterpart = None
+                if leftToken in name:
+                    counterpart = name.replace(leftToken, rightToken)
+                elif rightToken in name:
+                    counterpart = name.replace(rightToken, leftToken)
+                
+                if counterpart in shortNames and slots[shortNames.index(counterpart)] is None:
+                    slots[shortNames.index(counterpart)] = slot
+                    break
             
-            frameNumber = frameNumber + keyFramePadding
-            cmds.rotate (0, 0, 0, a= 1)
-            cmds.setKeyframe (t = frameNumber)
+            slot += 1
+        
+        return slots
+    
+    return range(len(selected))
+
+def romChannelCurve(plug):
+    #Anim curve already keying the channel, None when it is free and False when something else drives it
+    if plug.isLocked:
+        return False
+    
+    if not plug.isDestination:
+        return None
+    
+    source = plug.source().node()
+    
+    return source if source.hasFn(om2.MFn.kAnimCurveTimeToAngular) else False
+
+def createROM (rotXP, rotYP, rotZP, rotXN, rotYN, rotZN, rotAngle, keyFramePadding, keyFrameStart, scheduleMode = "Serial", limitsPath = None):
+    #The key schedule of all the selected joints is computed first, then every channel gets its keys from one addKeys call
+    timeStart = time.time()
+    selected = cmds.ls (selection = True, type = "transform", long = True)
+    
+    if not selected:
+        om.MGlobal.displayError("SELECT THE JOINTS OR CONTROLLERS FOR THE RANGE OF MOTION")
+        return
+    
+    limits = None
+    if limitsPath:
+        if not os.path.isfile(limitsPath):
+            om.MGlobal.displayError("ROM LIMITS FILE NOT FOUND: {0}".format(limitsPath))
+            return
+        
+        limits = loadROMLimits(limitsPath)
+    
+    enabled = {(1, 1) : rotYP, (1, -1) : rotYN, (2, -1) : rotZN, (2, 1) : rotZP, (0, 1) : rotXP, (0, -1) : rotXN}
+    poses = [pose for pose in ROM_POSES if enabled[pose]]
+    
+    fnNodes = [om2.MFnDependencyNode(om2.MSelectionList().add(item).getDependNode(0)) for item in selected]
+    plugs = [[fnNode.findPlug(channel, False) for channel in ROM_CHANNELS] for fnNode in fnNodes]
+    poseAngles = [romPoseAngles(fnNode, poses, rotAngle, limits) for fnNode in fnNodes]
+    
+    schedule, frameNumber = romKeySchedule(poseAngles, keyFramePadding, keyFrameStart, [[plug.asDouble() for plug in nodePlugs] for nodePlugs in plugs], romSlots(selected, scheduleMode))
+    
+    with UndoContext():
+        batch = BatchModifier()
+        curves = []
+        skipped = []
+        
+        for item, nodePlugs in zip(selected, plugs):
+            nodeCurves = []
             
-        if rotZN:
-            frameNumber = frameNumber + keyFramePadding    
-            cmds.rotate (0, 0, -rotAngle, a = 1)
-            cmds.setKeyframe (t = frameNumber)
+            for channel, plug in zip(ROM_CHANNELS, nodePlugs):
+                curve = romChannelCurve(plug)
+                
+                if curve is None:
+                    curve = batch.createNode("animCurveTA", "{0}_{1}".format(item.split("|")[-1].split(":")[-1], channel))
+                    batch.modifier.connect(om2.MFnDependencyNode(curve).findPlug("output", False), plug)
+                elif curve is False:
+                    skipped.append("{0}.{1}".format(item, channel))
+                
+                nodeCurves.append(curve)
             
-            frameNumber = frameNumber + keyFramePadding
-            cmds.rotate (0, 0, 0, a= 1)
-            cmds.setKeyframe (t = frameNumber)
+            curves.append(nodeCurves)
         
-        if rotZP:
-            frameNumber = frameNumber + keyFramePadding
-            cmds.rotate (0, 0, rotAngle, a= 1)
-            cmds.setKeyframe (t = frameNumber)
-            
-            frameNumber = frameNumber + keyFramePadding
-            cmds.rotate (0, 0, 0, a= 1)
-            cmds.setKeyframe (t = frameNumber)
+        batch.doIt()
         
-        if rotXP:
-            frameNumber = frameNumber + keyFramePadding
-            cmds.rotate (rotAngle, 0, 0, a= 1)
-            cmds.setKeyframe (t = frameNumber)
-            
-            frameNumber = frameNumber + keyFramePadding
-            cmds.rotate (0, 0, 0, a= 1)
-            cmds.setKeyframe (t = frameNumber)
+        uiUnit = om2.MTime.uiUnit()
+        change = oma2.MAnimCurveChange()
         
-        if rotXN:
-            frameNumber = frameNumber + keyFramePadding    
-            cmds.rotate (-rotAngle, 0, 0, a = 1)
-            cmds.setKeyframe (t = frameNumber)
+        for (times, values), nodeCurves in zip(schedule, curves):
+            timeArray = om2.MTimeArray([om2.MTime(frame, uiUnit) for frame in times])
             
-            frameNumber = frameNumber + keyFramePadding
-            cmds.rotate (0, 0, 0, a= 1)
-            cmds.setKeyframe (t = frameNumber)
+            for curve, channelValues in zip(nodeCurves, values):
+                if curve is not False:
+                    oma2.MFnAnimCurve(curve).addKeys(timeArray, om2.MDoubleArray(channelValues), oma2.MFnAnimCurve.kTangentGlobal, oma2.MFnAnimCurve.kTangentGlobal, True, change)
+        
+        apiUndo.commit(change.undoIt, change.redoIt)
+    
+    if skipped:
+        om.MGlobal.displayWarning("{0} LOCKED OR DRIVEN CHANNEL/S NOT KEYED: {1}".format(len(skipped), ", ".join(skipped[:10])))
     
     currentMaxTimeline = cmds.playbackOptions(query=True, maxTime=True)
     if (currentMaxTimeline > frameNumber):
         cmds.playbackOptions(maxTime = currentMaxTimeline)
-    else:        
+    else:
         cmds.playbackOptions(maxTime = frameNumber)
+    
+    print ("ROM keyed on {0} objects in {1:.3f} sec".format(len(selected), time.time() - timeStart))
+    
+    return selected
+
+#createROM settings of a ROM manifest character, "joints" or "root" picks what gets keyed (every joint when neither is set)
+BATCH_ROM_DEFAULTS = {"rotXP" : True, "rotYP" : True, "rotZP" : True, "rotXN" : True, "rotYN" : True, "rotZN" : True,
+                      "rotAngle" : 60.0, "keyFramePadding" : 20, "keyFrameStart" : 0, "scheduleMode" : "Mirrored", "limits" : None}
+
+def keyedJoints():
+    #Joints with an anim curve on any transform channel, walked once with the API
+    channels = [axis + channel for axis in ["translate", "rotate", "scale"] for channel in ["X", "Y", "Z"]]
+    joints = []
+    iterator = om2.MItDag(om2.MItDag.kDepthFirst, om2.MFn.kJoint)
+    
+    while not iterator.isDone():
+        fnNode = om2.MFnDependencyNode(iterator.currentItem())
+        
+        for channel in channels:
+            plug = fnNode.findPlug(channel, False)
+            if plug.isDestination and plug.source().node().hasFn(om2.MFn.kAnimCurve):
+                joints.append(iterator.fullPathName())
+                break
+        
+        iterator.next()
+    
+    return joints
+
+def exportROMClip(exportPath, joints = None):
+    #The ROM keys already sit on the joints, so the curves are written as they are: no bake, no constraints, no meshes.
+    #The joints above the keyed ones are exported with them to keep the hierarchy
+    timeStart = time.time()
+    
+    if joints is None:
+        joints = keyedJoints()
+    
+    if not joints:
+        om.MGlobal.displayError("NO KEYED JOINTS TO EXPORT. CREATE THE ROM FIRST")
+        return
+    
+    if not cmds.pluginInfo("fbxmaya", query = True, loaded = True):
+        cmds.loadPlugin("fbxmaya", quiet = True)
+    
+    exportJoints = set()
+    for joint in cmds.ls(joints, long = True):
+        segments = joint.split("|")
+        exportJoints.update(["|".join(segments[:i]) for i in range(2, len(segments) + 1)])
+    
+    exportJoints = cmds.ls(list(exportJoints), type = "joint", long = True)
+    
+    cmds.FBXResetExport()
+    cmds.FBXProperty ('Export|IncludeGrp|Animation', '-v', 1)
+    cmds.FBXExportBakeComplexAnimation ('-v', 0)
+    cmds.FBXExportApplyConstantKeyReducer ('-v', 0)
+    cmds.FBXExportInputConnections ('-v', 0)
+    cmds.FBXExportSkins ('-v', 0)
+    cmds.FBXExportShapes ('-v', 0)
+    cmds.FBXProperty ('Export|IncludeGrp|Animation|ConstraintsGrp|Constraint', '-v', 0)
+    cmds.FBXProperty ('Export|IncludeGrp|Animation|ConstraintsGrp|Character', '-v', 0)
+    
+    cmds.select(exportJoints, r = True)
+    cmds.file (exportPath, force = True, type = 'FBX export', exportSelected = True)
+    cmds.select(clear = True)
+    
+    print ("ROM clip with {0} joints exported in {1:.3f} sec to {2}".format(len(exportJoints), time.time() - timeStart, exportPath))
+    
+    return exportPath
+
+def romCharacter(character, resultPath):
+    #Runs inside a headless mayapy like rigCharacter: opens the scene, keys the ROM and exports the clip
+    result = {"name" : character["name"], "scene" : character["scene"], "output" : character["output"], "status" : "failed", "error" : ""}
+    startTime = time.time()
+    
+    try:
+        cmds.file(character["scene"], open = True, force = True)
+        result["open"] = time.time() - startTime
+        
+        buildStart = time.time()
+        
+        if character.get("joints"):
+            joints = cmds.ls(character["joints"], type = "joint", long = True)
+        elif character.get("root"):
+            joints = cmds.ls(character["root"], long = True) + (cmds.listRelatives(character["root"], allDescendents = True, type = "joint", fullPath = True) or [])
+        else:
+            joints = cmds.ls(type = "joint", long = True)
+        
+        if not joints:
+            raise RuntimeError("NO JOINTS FOUND FOR THE ROM")
+        
+        cmds.select(joints, r = True)
+        keyed = createROM(*[character[argument] for argument in ["rotXP", "rotYP", "rotZP", "rotXN", "rotYN", "rotZN", "rotAngle", "keyFramePadding", "keyFrameStart", "scheduleMode"]], limitsPath = character.get("limits"))
+        result["build"] = time.time() - buildStart
+        
+        if not keyed:
+            raise RuntimeError("ROM WAS NOT CREATED")
+        
+        saveStart = time.time()
+        exportROMClip(character["output"], keyed)
+        result["save"] = time.time() - saveStart
+        result["status"] = "done"
+    
+    except Exception as error:
+        result["error"] = str(error)
+    
+    result["total"] = time.time() - startTime
+    
+    with open(resultPath, "w") as resultFile:
+        json.dump(result, resultFile, indent = 4)
+    
+    return result
 
+def batchROMFromManifest(manifestPath, workers = None, outputDir = None):
+    #Same manifest layout as batchRigFromManifest with the keys of BATCH_ROM_DEFAULTS. Clips are saved as <name>_ROM.fbx
+    manifest = loadRigManifest(manifestPath, outputDir, BATCH_ROM_DEFAULTS, "rom", "_ROM.fbx")
+    outputDir = manifest["outputDir"]
+    
+    if workers is None:
+        workers = manifest.get("workers", min(4, multiprocessing.cpu_count()))
+    
+    workers = max(1, int(workers))
+    logDir = os.path.join(outputDir, "batchROMLogs")
+    
+    if not os.path.isdir(logDir):
+        os.makedirs(logDir)
+    
+    results = [{"name" : character["name"], "status" : "skipped", "error" : "SCENE NOT FOUND {0}".format(character["scene"])} for character in manifest["characters"] if not os.path.isfile(character["scene"])]
+    pending = [character for character in manifest["characters"] if os.path.isfile(character["scene"])]
+    
+    if not pending:
+        om.MGlobal.displayError("NO CHARACTERS TO EXPORT IN THE MANIFEST")
+        return
+    
+    startTime = time.time()
+    results += runRigWorkers(pending, workers, logDir, "romCharacter", "Batch ROM")
+    
+    return writeBatchRigReport(results, time.time() - startTime, workers, outputDir, "batchROM", "URT BATCH ROM REPORT")
 '''
 ####################################################################################################
 RANGE OF MOTION SETUP
@@ -4281,37 +8648,352 @@ END
 
 '''
 ####################################################################################################
-POLE VECTOR POSITION
+DEFORMATION QA
 START
 ####################################################################################################
 '''
+#Per vertex values above these count as problems: volume loss and stretch are fractions of the rest value
+DEFORMATION_QA_THRESHOLDS = {"volume" : 0.3, "stretch" : 0.3}
 
-def getPoleVectorPos (firstJNT, secondJNT, thirdJNT):
-    firstJNTVec = om.MVector(firstJNT[0], firstJNT[1], firstJNT[2])
-    secondJNTVec = om.MVector(secondJNT[0], secondJNT[1], secondJNT[2])
-    thirdJNTVec = om.MVector(thirdJNT[0], thirdJNT[1], thirdJNT[2])
+#The points of every mesh and the metric arrays of one mesh, for every frame of a chunk, are kept in memory up to this many bytes
+DEFORMATION_QA_CHUNK_BYTES = 256 * 1024 * 1024
+
+#F x T x 3 float64 arrays vertexVolumes and flippedVertices hold at once (gathered corners, their differences, cross products)
+DEFORMATION_QA_TRIANGLE_ARRAYS = 8
+
+def skinnedMeshes():
+    meshes = []
+    
+    for skinCluster in cmds.ls(type = "skinCluster"):
+        for shape in cmds.skinCluster(skinCluster, query = True, geometry = True) or []:
+            if cmds.nodeType(shape) == "mesh" and shape not in meshes:
+                meshes.append(shape)
+    
+    return meshes
+
+def meshTopology(fnMesh):
+    #Triangles (T x 3) and unique edges (E x 2) as index arrays, read once per mesh
+    triangleCounts, triangleVertices = fnMesh.getTriangles()
+    triangles = numpy.array(triangleVertices, dtype = numpy.int64).reshape(-1, 3)
+    
+    polygonCounts, polygonVertices = fnMesh.getVertices()
+    counts = numpy.array(polygonCounts, dtype = numpy.int64)
+    vertices = numpy.array(polygonVertices, dtype = numpy.int64)
+    
+    #Every face vertex connects to the next one of its face, the last one wraps around to the first
+    starts = numpy.repeat(numpy.cumsum(counts) - counts, counts)
+    positions = numpy.arange(len(vertices))
+    following = positions + 1
+    wrap = following == starts + numpy.repeat(counts, counts)
+    following[wrap] = starts[wrap]
+    
+    pairs = numpy.sort(numpy.stack([vertices, vertices[following]], axis = 1), axis = 1)
+    keys = numpy.unique(pairs[:, 0] * fnMesh.numVertices + pairs[:, 1])
+    edges = numpy.stack([keys // fnMesh.numVertices, keys % fnMesh.numVertices], axis = 1)
+    
+    return triangles, edges
+
+def meshPoints(fnMesh):
+    return numpy.array(fnMesh.getPoints(om2.MSpace.kWorld), dtype = numpy.float64)[:, :3]
+
+def vertexSums(values, indices, vertexCount):
+    #Sums the F x T values into F x N by the T vertex indices, one bincount for all the frames
+    frameCount = values.shape[0]
+    flatIndices = (numpy.arange(frameCount)[:, None] * vertexCount + indices[None, :]).ravel()
+    
+    return numpy.bincount(flatIndices, values.ravel(), frameCount * vertexCount).reshape(frameCount, vertexCount)
+
+def vertexVolumes(points, triangles, vertexCount):
+    #Tetrahedra from every triangle to the mesh center, a third of each goes to the triangle's vertices. points is F x N x 3
+    center = points.mean(axis = 1)[:, None, :]
+    p0 = points[:, triangles[:, 0]] - center
+    p1 = points[:, triangles[:, 1]] - center
+    p2 = points[:, triangles[:, 2]] - center
+    tetrahedra = numpy.einsum("fti,fti->ft", p0, numpy.cross(p1, p2)) / 18.0
+    
+    return sum([vertexSums(tetrahedra, triangles[:, corner], vertexCount) for corner in range(3)])
+
+def flippedVertices(points, triangles, vertexCount):
+    #A triangle is flipped when it faces away from the average normal of its own vertices
+    faceNormals = numpy.cross(points[:, triangles[:, 1]] - points[:, triangles[:, 0]], points[:, triangles[:, 2]] - points[:, triangles[:, 0]])
+    
+    vertexNormals = numpy.stack([sum([vertexSums(faceNormals[:, :, axis], triangles[:, corner], vertexCount) for corner in range(3)]) for axis in range(3)], axis = 2)
+    
+    cornerNormals = vertexNormals[:, triangles[:, 0]] + vertexNormals[:, triangles[:, 1]] + vertexNormals[:, triangles[:, 2]]
+    flipped = numpy.einsum("fti,fti->ft", faceNormals, cornerNormals) < 0.0
+    
+    return sum([vertexSums(flipped.astype(numpy.float64), triangles[:, corner], vertexCount) for corner in range(3)]) > 0.0
+
+def deformationFrameBytes(triangles, edges):
+    #Bytes deformationMetrics takes per frame: the per triangle arrays and the two gathered ends of every edge
+    return (len(triangles) * DEFORMATION_QA_TRIANGLE_ARRAYS + len(edges) * 2) * 3 * 8
+
+def deformationMetrics(restPoints, points, triangles, edges, restVolumes = None, restFlips = None):
+    #Per vertex volume loss, edge stretch and new normal flips of every frame of points (F x N x 3) against the rest points
+    vertexCount = restPoints.shape[0]
+    
+    if restVolumes is None:
+        restVolumes = vertexVolumes(restPoints[None], triangles, vertexCount)[0]
+    if restFlips is None:
+        restFlips = flippedVertices(restPoints[None], triangles, vertexCount)[0]
+    
+    volumes = vertexVolumes(points, triangles, vertexCount)
+    volumeLoss = numpy.where(numpy.abs(restVolumes) > POLE_EPSILON, 1.0 - volumes / numpy.where(numpy.abs(restVolumes) > POLE_EPSILON, restVolumes, 1.0), 0.0)
+    
+    restLengths = numpy.linalg.norm(restPoints[edges[:, 1]] - restPoints[edges[:, 0]], axis = 1)
+    lengths = numpy.linalg.norm(points[:, edges[:, 1]] - points[:, edges[:, 0]], axis = 2)
+    edgeStretch = numpy.abs(lengths / numpy.maximum(restLengths, POLE_EPSILON) - 1.0)
+    
+    #Worst edge of every vertex
+    stretch = numpy.zeros((points.shape[0], vertexCount))
+    frameIndices = numpy.arange(points.shape[0])[:, None]
+    numpy.maximum.at(stretch, (frameIndices, edges[None, :, 0]), edgeStretch)
+    numpy.maximum.at(stretch, (frameIndices, edges[None, :, 1]), edgeStretch)
+    
+    flips = flippedVertices(points, triangles, vertexCount) & ~restFlips
+    
+    return volumeLoss, stretch, flips
+
+def posedJoints(frames, restFrame):
+    #Keyed joints whose curves at each frame differ from the rest frame: the joints the ROM is bending there
+    uiUnit = om2.MTime.uiUnit()
+    posed = dict([(frame, set()) for frame in frames])
+    
+    for joint in keyedJoints():
+        fnNode = om2.MFnDependencyNode(om2.MSelectionList().add(joint).getDependNode(0))
         
-    line = (thirdJNTVec - firstJNTVec)
-    point = (secondJNTVec - firstJNTVec)
+        for channel in ROM_CHANNELS:
+            plug = fnNode.findPlug(channel, False)
+            if not plug.isDestination or not plug.source().node().hasFn(om2.MFn.kAnimCurve):
+                continue
+            
+            fnCurve = oma2.MFnAnimCurve(plug.source().node())
+            restValue = fnCurve.evaluate(om2.MTime(restFrame, uiUnit))
+            
+            for frame in frames:
+                if abs(fnCurve.evaluate(om2.MTime(frame, uiUnit)) - restValue) > POLE_EPSILON:
+                    posed[frame].add(joint.split("|")[-1])
     
-    scaleValue = (line * point) / (line * line)
+    return posed
+
+def romFrames():
+    #Key times of the keyed joints, the first one is the rest pose of the ROM
+    uiUnit = om2.MTime.uiUnit()
+    frames = set()
     
-    projectionVector = line * scaleValue + firstJNTVec
+    for joint in keyedJoints():
+        fnNode = om2.MFnDependencyNode(om2.MSelectionList().add(joint).getDependNode(0))
+        
+        for channel in ROM_CHANNELS:
+            plug = fnNode.findPlug(channel, False)
+            if plug.isDestination and plug.source().node().hasFn(om2.MFn.kAnimCurve):
+                fnCurve = oma2.MFnAnimCurve(plug.source().node())
+                frames.update([fnCurve.input(i).asUnits(uiUnit) for i in range(fnCurve.numKeys)])
     
+    return sorted(frames)
+
+def deformationQA(meshes = None, frames = None, report = 10):
+    #Evaluates the skinned meshes at every ROM key and reports the worst frames and joints. Frames are read in chunks so the
+    #point arrays of a chunk fit in DEFORMATION_QA_CHUNK_BYTES, the metrics of a chunk are computed in one go
+    if numpy is None:
+        om.MGlobal.displayError("DEFORMATION QA NEEDS NUMPY IN MAYA'S PYTHON")
+        return
     
-    rootToMidLength = (secondJNTVec - firstJNTVec).length()
-    midToEndLength = (thirdJNTVec - secondJNTVec).length()
+    timeStart = time.time()
+    meshes = meshes or skinnedMeshes()
+    frames = frames or romFrames()
     
-    totalLength = rootToMidLength + midToEndLength
-       
-   
-    if (projectionVector.isEquivalent(secondJNTVec, 0.0005)):
-        projectionVector.z  = projectionVector.z + 0.0005
+    if not meshes:
+        om.MGlobal.displayError("NO SKINNED MESHES IN THE SCENE")
+        return
+    
+    if len(frames) < 2:
+        om.MGlobal.displayError("NO ROM KEYS FOUND. CREATE THE ROM FIRST")
+        return
+    
+    currentFrame = cmds.currentTime(query = True)
+    uiUnit = om2.MTime.uiUnit()
+    restFrame = frames[0]
+    frames = frames[1:]
+    
+    oma2.MAnimControl.setCurrentTime(om2.MTime(restFrame, uiUnit))
+    
+    setups = []
+    for mesh in meshes:
+        fnMesh = om2.MFnMesh(om2.MSelectionList().add(mesh).getDagPath(0))
+        triangles, edges = meshTopology(fnMesh)
+        restPoints = meshPoints(fnMesh)
+        
+        setups.append({"mesh" : mesh, "fnMesh" : fnMesh, "triangles" : triangles, "edges" : edges, "rest" : restPoints,
+                       "restVolumes" : vertexVolumes(restPoints[None], triangles, len(restPoints))[0],
+                       "restFlips" : flippedVertices(restPoints[None], triangles, len(restPoints))[0]})
+    
+    #Sized from the triangles, the intermediates of the metrics are several times bigger than the points
+    frameBytes = sum([setup["rest"].nbytes for setup in setups]) + max([deformationFrameBytes(setup["triangles"], setup["edges"]) for setup in setups])
+    chunkSize = max(1, DEFORMATION_QA_CHUNK_BYTES // frameBytes)
+    results = []
+    
+    for chunkStart in range(0, len(frames), chunkSize):
+        chunkFrames = frames[chunkStart:chunkStart + chunkSize]
+        chunkPoints = [numpy.empty((len(chunkFrames),) + setup["rest"].shape) for setup in setups]
+        
+        for i, frame in enumerate(chunkFrames):
+            oma2.MAnimControl.setCurrentTime(om2.MTime(frame, uiUnit))
+            
+            for setup, points in zip(setups, chunkPoints):
+                points[i] = meshPoints(setup["fnMesh"])
+        
+        for setup, points in zip(setups, chunkPoints):
+            volumeLoss, stretch, flips = deformationMetrics(setup["rest"], points, setup["triangles"], setup["edges"], setup["restVolumes"], setup["restFlips"])
+            
+            for i, frame in enumerate(chunkFrames):
+                problems = (volumeLoss[i] > DEFORMATION_QA_THRESHOLDS["volume"]) | (stretch[i] > DEFORMATION_QA_THRESHOLDS["stretch"]) | flips[i]
+                results.append({"mesh" : setup["mesh"], "frame" : frame,
+                                "volume" : float(volumeLoss[i].max()), "stretch" : float(stretch[i].max()), "flips" : int(flips[i].sum()),
+                                "score" : float(max(volumeLoss[i].max(), stretch[i].max())) + float(flips[i].any()),
+                                "vertices" : numpy.nonzero(problems)[0].tolist()})
+    
+    posed = posedJoints(frames, restFrame)
+    joints = {}
+    
+    for result in results:
+        result["joints"] = sorted(posed[result["frame"]])
+        for joint in result["joints"]:
+            joints[joint] = max(joints.get(joint, 0.0), result["score"])
+    
+    results.sort(key = lambda result: -result["score"])
+    
+    print ("DEFORMATION QA: {0} meshes, {1} frames in {2:.2f} sec".format(len(setups), len(frames), time.time() - timeStart))
+    print ("{0:<10}{1:<32}{2:>10}{3:>10}{4:>8}  {5}".format("Frame", "Mesh", "Volume", "Stretch", "Flips", "Joints"))
+    for result in results[:report]:
+        print ("{0:<10g}{1:<32}{2:>10.3f}{3:>10.3f}{4:>8}  {5}".format(result["frame"], result["mesh"], result["volume"], result["stretch"], result["flips"], ", ".join(result["joints"])))
+    
+    print ("Worst joints:")
+    for joint in sorted(joints, key = lambda joint: -joints[joint])[:report]:
+        print ("    {0:<32}{1:.3f}".format(joint, joints[joint]))
+    
+    #Lands on the worst frame with its problem vertices selected
+    if results and results[0]["vertices"]:
+        cmds.currentTime(results[0]["frame"])
+        cmds.select(["{0}.vtx[{1}]".format(results[0]["mesh"], vertex) for vertex in results[0]["vertices"]], r = True)
+    else:
+        cmds.currentTime(currentFrame)
+    
+    return {"frames" : results, "joints" : joints}
+
+'''
+####################################################################################################
+DEFORMATION QA
+END
+####################################################################################################
+'''
+
+'''
+####################################################################################################
+POLE VECTOR POSITION
+START
+####################################################################################################
+'''
+
+#Bend direction used when a chain is straight: elbows point back, knees point forward
+POLE_HINT_ARM = (0.0, 0.0, -1.0)
+POLE_HINT_LEG = (0.0, 0.0, 1.0)
+
+#Mid joint closer to the root-end line than this fraction of the chain length counts as a straight chain
+POLE_STRAIGHT_TOLERANCE = 0.0001
+POLE_EPSILON = 1e-9
+
+def solveLimbPlanes(chains, hints = None):
+    #chains is N x 3 x 3 (root, mid, end world positions). Returns pole positions, plane normals and straight flags for every chain
+    if hints is None:
+        hints = [POLE_HINT_ARM] * len(chains)
+    
+    if numpy is None:
+        return solveLimbPlanesPython(chains, hints)
+    
+    positions = numpy.asarray(chains, dtype = numpy.float64).reshape(-1, 3, 3)
+    hints = numpy.asarray(hints, dtype = numpy.float64).reshape(-1, 3)
+    root = positions[:, 0]
+    mid = positions[:, 1]
+    end = positions[:, 2]
+    
+    line = end - root
+    point = mid - root
+    lineLength = numpy.sqrt(numpy.einsum("ij,ij->i", line, line))
+    lineUnit = line / numpy.maximum(lineLength, POLE_EPSILON)[:, None]
+    
+    #Mid joint minus its projection on the root-end line
+    bend = point - lineUnit * numpy.einsum("ij,ij->i", point, lineUnit)[:, None]
+    bendLength = numpy.sqrt(numpy.einsum("ij,ij->i", bend, bend))
+    totalLength = numpy.sqrt(numpy.einsum("ij,ij->i", point, point)) + numpy.sqrt(numpy.einsum("ij,ij->i", end - mid, end - mid))
+    straight = bendLength <= numpy.maximum(totalLength * POLE_STRAIGHT_TOLERANCE, POLE_EPSILON)
+    
+    #Straight chains bend towards the hint, or a world axis when the hint runs along the chain
+    fallback = hints - lineUnit * numpy.einsum("ij,ij->i", hints, lineUnit)[:, None]
     
+    for axis in [(1.0, 0.0, 0.0), (0.0, 1.0, 0.0)]:
+        parallel = numpy.sqrt(numpy.einsum("ij,ij->i", fallback, fallback)) <= POLE_EPSILON
+        fallback[parallel] = numpy.cross(lineUnit[parallel], axis)
+    
+    direction = numpy.where(straight[:, None], fallback, bend)
+    direction /= numpy.maximum(numpy.sqrt(numpy.einsum("ij,ij->i", direction, direction)), POLE_EPSILON)[:, None]
+    
+    poles = mid + direction * totalLength[:, None]
+    normals = numpy.cross(lineUnit, direction)
+    normals /= numpy.maximum(numpy.sqrt(numpy.einsum("ij,ij->i", normals, normals)), POLE_EPSILON)[:, None]
+    
+    return poles.tolist(), normals.tolist(), straight.tolist()
+
+def solveLimbPlanesPython(chains, hints):
+    #Same solve one chain at a time for a mayapy without NumPy
+    poles = []
+    normals = []
+    straightChains = []
+    
+    for chain, hint in zip(chains, hints):
+        root, mid, end = [om2.MVector(position[0], position[1], position[2]) for position in chain]
+        line = end - root
+        point = mid - root
+        lineUnit = line.normal() if line.length() > POLE_EPSILON else om2.MVector()
+        
+        bend = point - lineUnit * (point * lineUnit)
+        totalLength = point.length() + (end - mid).length()
+        straight = bend.length() <= max(totalLength * POLE_STRAIGHT_TOLERANCE, POLE_EPSILON)
+        direction = bend
+        
+        if straight:
+            direction = om2.MVector(hint[0], hint[1], hint[2])
+            direction -= lineUnit * (direction * lineUnit)
+            
+            for axis in [om2.MVector(1.0, 0.0, 0.0), om2.MVector(0.0, 1.0, 0.0)]:
+                if direction.length() <= POLE_EPSILON:
+                    direction = lineUnit ^ axis
+        
+        if direction.length() > POLE_EPSILON:
+            direction.normalize()
+        
+        normal = lineUnit ^ direction
+        
+        if normal.length() > POLE_EPSILON:
+            normal.normalize()
+        
+        pole = mid + direction * totalLength
+        poles.append([pole.x, pole.y, pole.z])
+        normals.append([normal.x, normal.y, normal.z])
+        straightChains.append(straight)
+    
+    return poles, normals, straightChains
+
+def limbPoleVectors(chains, hints = None):
+    #chains are [root, mid, end] joint names. One position query per joint and one solve for all of them
+    positions = [[cmds.xform(joint, q = True, ws = True, translation = True) for joint in chain] for chain in chains]
+    
+    return solveLimbPlanes(positions, hints)[0]
 
-    poleVectorPos = (secondJNTVec - projectionVector).normal() * totalLength + secondJNTVec
+def getPoleVectorPos (firstJNT, secondJNT, thirdJNT):
+    poleVectorPos = solveLimbPlanes([[firstJNT, secondJNT, thirdJNT]])[0][0]
     
-    return poleVectorPos
+    return om.MVector(poleVectorPos[0], poleVectorPos[1], poleVectorPos[2])
     
 '''
 ####################################################################################################
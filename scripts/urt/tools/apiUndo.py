@@ -0,0 +1,45 @@
+import logging
+from maya import cmds
+
+
+log = logging.getLogger(__name__)
+PLUGIN_NAME = "urtApiUndo"
+
+# undo/redo pairs waiting to be picked up by the urtApiUndo command
+pending = []
+
+
+def available():
+    """
+    Load the urtApiUndo plugin when it is not loaded yet.
+
+    :return: True when modifier changes can be put on the undo queue
+    :rtype: bool
+    """
+    if cmds.pluginInfo(PLUGIN_NAME, query=True, loaded=True):
+        return True
+
+    try:
+        cmds.loadPlugin(PLUGIN_NAME, quiet=True)
+    except RuntimeError:
+        return False
+
+    return True
+
+
+def commit(undo, redo):
+    """
+    Put an OpenMaya modifier on Maya's undo queue. The modifier has to be
+    executed already, undo and redo are called with no arguments when the
+    user undoes or redoes the step. When the plugin can not be loaded the
+    changes stay in the scene but can not be undone.
+
+    :param callable undo:
+    :param callable redo:
+    """
+    if not available():
+        log.warning("{0} plugin not found, the last change can not be undone.".format(PLUGIN_NAME))
+        return
+
+    pending.append((undo, redo))
+    getattr(cmds, PLUGIN_NAME)()